@@ -16,7 +16,7 @@ import os
 
 import pytest
 
-from tempest.lib.cli import output_parser as parser
+from mos_tests.functions import cli_output
 
 
 def scripts_dir_path():
@@ -57,10 +57,10 @@ def test_limits_feature(env):
         ceil_res_list_out = remote.check_call(ceil_res_list)['stdout']
         ceil_event_list_out = remote.check_call(ceil_event_list)['stdout']
 
-    ceil_meter_list_out = parser.listing(ceil_meter_list_out)
-    ceil_sample_list_out = parser.listing(ceil_sample_list_out)
-    ceil_res_list_out = parser.listing(ceil_res_list_out)
-    ceil_event_list_out = parser.listing(ceil_event_list_out)
+    ceil_meter_list_out = cli_output.listing(ceil_meter_list_out)
+    ceil_sample_list_out = cli_output.listing(ceil_sample_list_out)
+    ceil_res_list_out = cli_output.listing(ceil_res_list_out)
+    ceil_event_list_out = cli_output.listing(ceil_event_list_out)
 
     assert all(i == 100
                for i in (
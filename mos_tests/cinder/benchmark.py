@@ -0,0 +1,108 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (name, fio rw, block size), in run order: writes go first, so reads
+# don't hit never written (sparse) blocks
+PROFILES = (
+    ('write', 'write', '1M'),
+    ('randwrite', 'randwrite', '4k'),
+    ('read', 'read', '1M'),
+    ('randread', 'randread', '4k'),
+)
+
+PERCENTILES = (('p50', 50), ('p90', 90), ('p99', 99))
+
+
+def device_path(volume):
+    """Path of attached volume in guest (virtio disk serial is volume id)"""
+    return '/dev/disk/by-id/virtio-{0}'.format(volume.id[:20])
+
+
+def wait_device_command(path, timeout=60):
+    return ('for i in $(seq {1}); do [ -b {0} ] && break; sleep 1; done; '
+            '[ -b {0} ]').format(path, timeout)
+
+
+def fio_command(path, rw, block_size, runtime, iodepth):
+    return ('sudo fio --name=benchmark --filename={path} --direct=1 '
+            '--ioengine=libaio --rw={rw} --bs={block_size} '
+            '--iodepth={iodepth} --runtime={runtime} --time_based '
+            '--output-format=json').format(path=path, rw=rw,
+                                           block_size=block_size,
+                                           runtime=runtime, iodepth=iodepth)
+
+
+def parse_fio(output):
+    """Returns summary of fio json output
+
+    Summary has `ops_per_s` (IOPS), `mb_per_s` and completion latency
+    percentiles in seconds (fio 2.x reports it in usec, 3.x - in nsec).
+    """
+    data = json.loads(output[output.index('{'):])
+    job = data['jobs'][0]
+    summary = {'ops_per_s': 0.0, 'mb_per_s': 0.0}
+    percentiles = {}
+    for direction in ('read', 'write'):
+        stats = job[direction]
+        if not stats['iops']:
+            continue
+        summary['ops_per_s'] += stats['iops']
+        summary['mb_per_s'] += stats['bw'] / 1024.0
+        if 'clat_ns' in stats:
+            clat, scale = stats['clat_ns'], 1e-9
+        else:
+            clat, scale = stats['clat'], 1e-6
+        for key, value in clat.get('percentile', {}).items():
+            p = float(key)
+            percentiles[p] = max(percentiles.get(p, 0), value * scale)
+    for name, p in PERCENTILES:
+        summary[name] = percentiles.get(p)
+    return summary
+
+
+def combine(summaries):
+    """Returns summary of fio runs on several volumes at the same time
+
+    Throughput is summed, latency percentiles are the worst of volumes.
+    """
+    result = {'ops_per_s': sum(x['ops_per_s'] for x in summaries),
+              'mb_per_s': sum(x['mb_per_s'] for x in summaries)}
+    for name, _ in PERCENTILES:
+        values = [x[name] for x in summaries if x[name] is not None]
+        result[name] = max(values) if values else None
+    return result
+
+
+def backend_name(volume_type, default):
+    """Returns `lvm` or `ceph` by volume type backend (or default)"""
+    if volume_type is None:
+        return default
+    name = volume_type.get_keys().get('volume_backend_name', '').lower()
+    if 'lvm' in name:
+        return 'lvm'
+    if 'ceph' in name or 'rbd' in name:
+        return 'ceph'
+    return name or default
+
+
+def report(name, summary):
+    latency = ' '.join('{0}={1:.2f}ms'.format(x, summary[x] * 1000)
+                       for x, _ in PERCENTILES if summary[x] is not None)
+    return '{0}: {1:.0f} IOPS, {2:.1f} MB/s, latency {3}'.format(
+        name, summary['ops_per_s'], summary['mb_per_s'], latency or '-')
@@ -24,6 +24,7 @@ import pytest
 
 from mos_tests.environment.os_actions import OpenStackActions
 from mos_tests.functions import common
+from mos_tests.functions.volumes import VolumeEngine
 
 
 logger = logging.getLogger(__name__)
@@ -151,10 +152,9 @@ def cinder_lvm_hosts(os_conn):
 
 
 @pytest.yield_fixture
-def keypair(os_conn):
-    key = os_conn.create_key(key_name='cinder_key')
-    yield key
-    os_conn.delete_key(key_name=key.name)
+def keypair(os_conn, shared_resources):
+    with shared_resources.lease(os_conn, 'keypair') as key:
+        yield key
 
 
 def check_snapshot_status(
@@ -165,18 +165,6 @@ def check_snapshot_status(
     return snp_status == status
 
 
-def check_all_snapshots_statuses(
-        os_conn, snapshots, status='available', positive=True):
-    for snapshot in snapshots:
-        if not check_snapshot_status(os_conn, snapshot, status, positive):
-            return False
-    return True
-
-
-def is_snapshot_deleted(os_conn, snapshot):
-    return len(os_conn.cinder.volume_snapshots.findall(id=snapshot.id)) == 0
-
-
 def check_volume_status(os_conn, volume, status='available', positive=True):
     volume_status = os_conn.cinder.volumes.get(volume.id).status
     if positive:
@@ -203,18 +191,6 @@ def check_backup_status(os_conn, backup, status='available', positive=True):
     return backup_status == status
 
 
-def check_all_backups_statuses(
-        os_conn, backups, status='available', positive=True):
-    for backup in backups:
-        if not check_backup_status(os_conn, backup, status, positive):
-            return False
-    return True
-
-
-def is_backup_deleted(os_conn, backup):
-    return len(os_conn.cinder.backups.findall(id=backup.id)) == 0
-
-
 def mount_volume(os_conn, env, vm, volume, keypair):
     os_conn.nova.volumes.create_server_volume(vm.id, volume.id)
     common.wait(
@@ -248,43 +224,28 @@ def test_creating_multiple_snapshots(os_conn, quota, volume):
         5. Wait for all old snapshots to be deleted
         6. Wait for all new snapshots to become in available status
     """
+    engine = VolumeEngine(os_conn)
     #  Creation of 70 snapshots
     logger.info('Create 70 snapshots')
-    snp_list_1 = []
-    for num in range(70):
-        logger.info('{} snapshot is creating'.format(num + 1))
-        snapshot = os_conn.cinder.volume_snapshots.create(
-            volume.id, name='1st_creation_{0}'.format(num))
-        snp_list_1.append(snapshot)
-    common.wait(
-        lambda: check_all_snapshots_statuses(os_conn, snp_list_1),
-        timeout_seconds=800,
-        waiting_for='all snapshots to become in available status')
+    snp_list_1 = engine.create_snapshots(
+        [{'volume_id': volume.id, 'name': '1st_creation_{0}'.format(num)}
+         for num in range(70)], timeout=800)
 
     #  Delete all snapshots
     logger.info('Delete all snapshots')
-    for snapshot in snp_list_1:
-        os_conn.cinder.volume_snapshots.delete(snapshot)
+    engine.delete('snapshot', [x.id for x in snp_list_1], wait=False)
 
     #  Launch creation of 50 snapshot without waiting of deletion
     logger.info('Launch creation of 50 snapshot without waiting '
                 'of deletion')
-    snp_list_2 = []
-
-    for num in range(50):
-        logger.info('{} snapshot is creating'.format(num + 1))
-        snapshot = os_conn.cinder.volume_snapshots.create(
-            volume.id, name='2nd_creation_{0}'.format(num))
-        snp_list_2.append(snapshot)
+    engine.create_snapshots(
+        [{'volume_id': volume.id, 'name': '2nd_creation_{0}'.format(num)}
+         for num in range(50)], wait=False)
 
-    common.wait(
-        lambda: all([is_snapshot_deleted(os_conn, x) for x in snp_list_1]),
-        timeout_seconds=1800,
-        waiting_for='old snapshots to be deleted')
-    common.wait(
-        lambda: check_all_snapshots_statuses(os_conn, snp_list_2),
-        timeout_seconds=1800,
-        waiting_for='new snapshots to become in available status')
+    logger.info('Wait for old snapshots to be deleted and new snapshots '
+                'to become in available status')
+    engine.wait(timeout=1800)
+    logger.info(engine.report())
 
 
 # NOTE(rpromyshlennikov): this test is not marked as @pytest.mark.undestructive
@@ -326,31 +287,15 @@ def test_delete_backups_in_parallel(os_conn, volume):
     3. Delete 10 backups in parallel
     4. Check that all backups are deleted from the backups list
     """
-    logger.info('Create 10 backups:')
-    backups = []
-    for i in range(1, 11):
-        logger.info('Create backup #{}'.format(i))
-        backup = os_conn.cinder.backups.create(
-            volume.id, name='backup_{}'.format(i))
-        backups.append(backup)
-        common.wait(lambda: check_volume_status(os_conn, volume),
-                    timeout_seconds=300,
-                    waiting_for='volume to become in available status')
-
-    common.wait(
-        lambda: check_all_backups_statuses(os_conn, backups),
-        timeout_seconds=600,
-        waiting_for='all backups to become in available status')
+    engine = VolumeEngine(os_conn)
+    logger.info('Create 10 backups')
+    backups = engine.create_backups(
+        [{'volume_id': volume.id, 'name': 'backup_{}'.format(i)}
+         for i in range(1, 11)])
 
     logger.info('Delete 10 backups in parallel')
-    for i, backup in enumerate(backups, 1):
-        logger.info('Delete backup #{}'.format(i))
-        os_conn.cinder.backups.delete(backup)
-
-    common.wait(
-        lambda: all([is_backup_deleted(os_conn, x) for x in backups]),
-        timeout_seconds=1200,
-        waiting_for='all backups to be deleted')
+    engine.delete('backup', [x.id for x in backups], timeout=1200)
+    logger.info(engine.report())
 
 
 @pytest.mark.undestructive
@@ -366,29 +311,16 @@ def test_create_delete_volumes_in_parallel(os_conn):
     4. Check that all volumes are deleted from the volumes list
     """
     image = os_conn.nova.images.find(name='TestVM')
-    volumes = []
-
-    logger.info('Create 10 volumes in parallel:')
-    for i in range(1, 11):
-        logger.info('Create volume #{}'.format(i))
-        volume = os_conn.cinder.volumes.create(1, name='volume_{}'.format(i),
-                                               imageRef=image.id)
-        volumes.append(volume)
+    engine = VolumeEngine(os_conn)
 
-    common.wait(
-        lambda: check_all_volumes_statuses(os_conn, volumes),
-        timeout_seconds=1200,
-        waiting_for='all volumes to become in available status')
+    logger.info('Create 10 volumes in parallel')
+    volumes = engine.create_volumes(
+        [{'size': 1, 'name': 'volume_{}'.format(i), 'imageRef': image.id}
+         for i in range(1, 11)], timeout=1200)
 
     logger.info('Delete 10 volumes in parallel')
-    for i, volume in enumerate(volumes, 1):
-        logger.info('Delete volume #{}'.format(i))
-        volume.delete()
-
-    common.wait(
-        lambda: all([is_volume_deleted(os_conn, x) for x in volumes]),
-        timeout_seconds=1200,
-        waiting_for='all volumes to be deleted')
+    engine.delete('volume', [x.id for x in volumes], timeout=1200)
+    logger.info(engine.report())
 
 
 @pytest.mark.undestructive
@@ -403,29 +335,16 @@ def test_create_delete_snapshots_in_parallel(os_conn, volume):
     3. Delete 10 snapshots in parallel
     4. Check that all snapshots are deleted from the snapshots list
     """
-    snapshots = []
+    engine = VolumeEngine(os_conn)
 
-    logger.info('Create 10 snapshots in parallel:')
-    for i in range(1, 11):
-        logger.info('Create snapshot #{}'.format(i))
-        snapshot = os_conn.cinder.volume_snapshots.create(
-            volume.id, name='snapshot_{}'.format(i))
-        snapshots.append(snapshot)
-
-    common.wait(
-        lambda: check_all_snapshots_statuses(os_conn, snapshots),
-        timeout_seconds=800,
-        waiting_for='all snapshots to become in available status')
+    logger.info('Create 10 snapshots in parallel')
+    snapshots = engine.create_snapshots(
+        [{'volume_id': volume.id, 'name': 'snapshot_{}'.format(i)}
+         for i in range(1, 11)], timeout=800)
 
     logger.info('Delete 10 snapshots in parallel')
-    for i, snapshot in enumerate(snapshots, 1):
-        logger.info('Delete snapshot #{}'.format(i))
-        os_conn.cinder.volume_snapshots.delete(snapshot)
-
-    common.wait(
-        lambda: all([is_snapshot_deleted(os_conn, x) for x in snapshots]),
-        timeout_seconds=1800,
-        waiting_for='all snapshots to be deleted')
+    engine.delete('snapshot', [x.id for x in snapshots], timeout=1800)
+    logger.info(engine.report())
 
 
 @pytest.mark.undestructive
@@ -0,0 +1,128 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+from multiprocessing.dummy import Pool
+
+import pytest
+
+from mos_tests.cinder import benchmark
+from mos_tests import conftest
+from mos_tests.functions.benchmark import Baselines
+from mos_tests.functions import volumes
+from mos_tests.functions import workload
+from mos_tests import settings
+
+logger = logging.getLogger(__name__)
+
+COUNT = settings.CINDER_BENCHMARK_VOLUMES
+SIZE = settings.CINDER_BENCHMARK_VOLUME_SIZE
+RUNTIME = settings.CINDER_BENCHMARK_RUNTIME
+IODEPTH = settings.CINDER_BENCHMARK_IODEPTH
+
+
+@pytest.yield_fixture
+def keypair(os_conn, shared_resources):
+    with shared_resources.lease(os_conn, 'keypair') as key:
+        yield key
+
+
+@pytest.yield_fixture
+def security_group(os_conn, shared_resources):
+    with shared_resources.lease(os_conn, 'security_group') as sec_group:
+        yield sec_group
+
+
+@pytest.yield_fixture
+def fio_instance(os_conn, ubuntu_image_id, keypair, security_group):
+    flavor = os_conn.nova.flavors.find(name='m1.small')
+    vm = os_conn.create_server(
+        name='cinder_benchmark', image_id=ubuntu_image_id, flavor=flavor,
+        key_name=keypair.name, security_groups=[security_group.id],
+        nics=[{'net-id': os_conn.int_networks[0]['id']}],
+        userdata=workload.tools_userdata(('fio',)))
+    os_conn.wait_servers_cloud_init_finished([vm], timeout=10 * 60)
+    yield vm
+    vm.delete()
+    os_conn.wait_servers_deleted([vm])
+
+
+def run_fio(os_conn, env, vm, keypair, disks):
+    """Run every fio profile on all volumes at the same time
+
+    :return: list of (profile, summary)
+    """
+    results = []
+    for profile, rw, block_size in benchmark.PROFILES:
+        def run(path):
+            with os_conn.ssh_to_instance(env, vm, vm_keypair=keypair,
+                                         username='ubuntu') as remote:
+                remote.check_call(benchmark.wait_device_command(path))
+                output = remote.check_call(benchmark.fio_command(
+                    path, rw, block_size, RUNTIME, IODEPTH)).stdout_string
+            return benchmark.parse_fio(output)
+
+        pool = Pool(len(disks))
+        try:
+            summaries = pool.map(run, disks)
+        finally:
+            pool.terminate()
+        for path, summary in zip(disks, summaries):
+            logger.info(benchmark.report(
+                '{0} {1}'.format(profile, path), summary))
+        results.append((profile, benchmark.combine(summaries)))
+    return results
+
+
+@pytest.mark.undestructive
+def test_volume_io_benchmark(os_conn, env, fio_instance, keypair):
+    """In-guest I/O of attached volumes for each volume type
+
+    Actions:
+    1. Boot Ubuntu instance with fio.
+    2. For each volume type (or default type if there are no types)
+        create several volumes and attach them to instance concurrently.
+    3. Run sequential and random read and write fio jobs on all volumes at
+        the same time.
+    4. Detach and delete volumes.
+    5. Check that IOPS, throughput and latency of each backend and volume
+        type are not worse than stored baselines.
+    """
+    default_backend = 'ceph' if conftest.is_ceph_enabled(env) else 'lvm'
+    volume_types = os_conn.cinder.volume_types.list() or [None]
+    engine = volumes.VolumeEngine(os_conn,
+                                  rate=settings.CINDER_BENCHMARK_RATE)
+    baselines = Baselines()
+    regressions = []
+    for volume_type in volume_types:
+        type_name = volume_type.name if volume_type else 'default'
+        backend = benchmark.backend_name(volume_type, default_backend)
+        specs = [{'size': SIZE,
+                  'name': 'cinder_benchmark_{0}_{1}'.format(type_name, i),
+                  'volume_type': volume_type and volume_type.id}
+                 for i in range(COUNT)]
+        created = engine.create_volumes(specs)
+        try:
+            engine.attach([(fio_instance, x) for x in created])
+            results = run_fio(os_conn, env, fio_instance, keypair,
+                              [benchmark.device_path(x) for x in created])
+        finally:
+            engine.delete_volumes(created)
+        for profile, summary in results:
+            key = 'cinder.{0}.{1}.{2}.{3}x{4}G.qd{5}'.format(
+                backend, type_name, profile, COUNT, SIZE, IODEPTH)
+            logger.info(benchmark.report(key, summary))
+            regressions.extend(baselines.check(key, summary))
+    logger.info(engine.report())
+    assert not regressions, '\n'.join(regressions)
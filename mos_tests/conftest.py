@@ -21,14 +21,16 @@ import uuid
 import pytest
 from six.moves import configparser
 
+from mos_tests.environment import auth
 from mos_tests.environment.devops_client import DevopsClient
 from mos_tests.environment.fuel_client import FuelClient
+from mos_tests.functions.ceph import CephMonitor
 from mos_tests.functions.common import gen_temp_file
 from mos_tests.functions.common import get_os_conn
-from mos_tests.functions.common import is_ceph_time_sync
 from mos_tests.functions.common import wait
-from mos_tests.functions import file_cache
 from mos_tests.functions import os_cli
+from mos_tests.functions import resources
+from mos_tests.nfv import inspector
 from mos_tests import settings
 
 
@@ -38,7 +40,11 @@ logger = logging.getLogger(__name__)
 # Define pytest plugins to use
 pytest_plugins = ("plugins.incremental",
                   "plugins.testrail_id",
-                  "plugins.fuel_snapshot")
+                  "plugins.fuel_snapshot",
+                  "plugins.log_harvest",
+                  "plugins.profiler",
+                  "plugins.durations",
+                  "plugins.impact")
 
 
 def pytest_addoption(parser):
@@ -118,6 +124,10 @@ def fuel_master_ip(request, env_name, snapshot_name):
 def revert_snapshot(env_name, snapshot_name):
     DevopsClient.revert_snapshot(env_name=env_name,
                                  snapshot_name=snapshot_name)
+    # Tokens issued after snapshot was made are unknown for reverted cloud
+    auth.clear()
+    # Instances names are reused by reverted cloud
+    inspector.clear()
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -145,8 +155,16 @@ def _max_fail_exceed(request):
     return max_fail > 0 and request.session.testsfailed >= max_fail
 
 
+@pytest.yield_fixture(scope='session')
+def shared_resources():
+    """Factory of immutable OpenStack resources shared between tests"""
+    factory = resources.ResourceFactory()
+    yield factory
+    factory.cleanup()
+
+
 @pytest.yield_fixture(autouse=True)
-def revert_destructive(request, env_name, snapshot_name):
+def revert_destructive(request, env_name, snapshot_name, shared_resources):
     yield
     item = request.node
     if hasattr(item.session, 'nextitem') and item.session.nextitem is None:
@@ -163,6 +181,7 @@ def revert_destructive(request, env_name, snapshot_name):
     if destructive and not skipped:
         if all([env_name, snapshot_name]):
             revert_snapshot(env_name, snapshot_name)
+            shared_resources.reset()
             reverted = True
     setattr(request.session, 'reverted', reverted)
 
@@ -229,16 +248,15 @@ def restart_ceph(env):
         return
     controllers = env.get_nodes_by_role('controller')
     with controllers[0].ssh() as remote:
-        if is_ceph_time_sync(remote):
+        if CephMonitor(remote).sample().time_sync:
             return
     for controller in controllers:
         with controller.ssh() as remote:
             remote.execute('restart ceph-mon-all')
     with controllers[0].ssh() as remote:
-        wait(lambda: is_ceph_time_sync(remote),
-             timeout_seconds=3 * 60,
-             sleep_seconds=5,
-             waiting_for='ceph services are up')
+        CephMonitor(remote, interval=5).wait(
+            lambda x: x.time_sync, timeout=3 * 60,
+            waiting_for='ceph services are up')
 
 
 @pytest.fixture(scope='session')
@@ -577,14 +595,7 @@ def openstack_client(controller_remote):
 
 
 @pytest.yield_fixture
-def ubuntu_image_id(os_conn):
-    logger.info('Creating ubuntu image')
-    image = os_conn.glance.images.create(name="image_ubuntu",
-                                         disk_format='qcow2',
-                                         container_format='bare')
-    with file_cache.get_file(settings.UBUNTU_QCOW2_URL) as f:
-        os_conn.glance.images.upload(image.id, f)
-
-    logger.info('Ubuntu image created')
-    yield image.id
-    os_conn.glance.images.delete(image.id)
+def ubuntu_image_id(os_conn, shared_resources):
+    with shared_resources.lease(os_conn, 'image', name='image_ubuntu',
+                                url=settings.UBUNTU_QCOW2_URL) as image:
+        yield image.id
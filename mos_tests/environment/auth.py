@@ -0,0 +1,108 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Process-wide Keystone sessions cache
+
+Each OpenStackActions instance (per tenant, per test after fixtures
+reinitialization) used to authenticate with own Keystone session. Sessions
+are cached here by (auth_url, user, project, domain), so instances with the
+same credentials share token and service catalog. All Keystone sessions
+send requests through one `requests` session with pooled connections.
+
+Clients with static token (heat) should take it from `get_token`, which
+re-authenticates before token expiration.
+"""
+
+import logging
+import threading
+
+from keystoneauth1.identity import v3
+from keystoneauth1 import session as sessionV3
+from keystoneclient.auth.identity.v2 import Password as KeystonePassword
+from keystoneclient import session
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Max connections kept open to each host
+POOL_SIZE = 64
+
+# Token is refreshed if it expires in less than this seconds
+STALE_DURATION = 5 * 60
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_http_session = None
+
+
+def get_http_session():
+    """Returns `requests` session shared by all Keystone sessions"""
+    global _http_session
+    with _sessions_lock:
+        if _http_session is None:
+            _http_session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            for prefix in ('http://', 'https://'):
+                _http_session.mount(prefix, adapter)
+        return _http_session
+
+
+def get_session(auth_url, user, password, project, domain='Default',
+                keystone_version=2, verify=None):
+    """Returns cached authenticated Keystone session
+
+    Session is recreated if password was changed.
+    """
+    http_session = get_http_session()
+    key = (auth_url, user, project, domain)
+    with _sessions_lock:
+        cached = _sessions.get(key)
+        if cached is not None and cached[0] == password:
+            return cached[1]
+        logger.debug('New Keystone session for {0}@{1} on {2}'.format(
+            user, project, auth_url))
+        if keystone_version == 2:
+            auth = KeystonePassword(username=user,
+                                    password=password,
+                                    auth_url=auth_url,
+                                    tenant_name=project)
+            sess = session.Session(auth=auth, verify=verify,
+                                   session=http_session)
+        else:
+            auth = v3.Password(auth_url=auth_url,
+                               user_domain_name=domain,
+                               username=user,
+                               password=password,
+                               project_domain_name=domain,
+                               project_name=project)
+            sess = sessionV3.Session(auth=auth, verify=verify,
+                                     session=http_session)
+        _sessions[key] = (password, sess)
+        return sess
+
+
+def get_token(sess, stale_duration=STALE_DURATION):
+    """Returns token of session, re-authenticates if token is expiring"""
+    auth_ref = getattr(sess.auth, 'auth_ref', None)
+    if auth_ref is not None and auth_ref.will_expire_soon(stale_duration):
+        logger.debug('Keystone token expires soon, re-authenticate')
+        sess.auth.invalidate()
+    return sess.get_token()
+
+
+def clear():
+    """Forget all cached sessions (after snapshot revert, for example)"""
+    with _sessions_lock:
+        _sessions.clear()
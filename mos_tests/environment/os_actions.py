@@ -15,16 +15,14 @@
 import logging
 import random
 import re
-import time
 
 from cinderclient import client as cinderclient
 from contextlib2 import suppress
 from dateutil.parser import parse as dateparse
 from glanceclient.v2.client import Client as GlanceClient
 from heatclient.v1.client import Client as HeatClient
-from keystoneclient.auth.identity.v2 import Password as KeystonePassword
-from keystoneclient import session
 from keystoneclient.v2_0 import Client as KeystoneClient
+from keystoneclient.v3 import Client as KeystoneClientV3
 from neutronclient.common.exceptions import Conflict as NeutronConflict
 from neutronclient.common.exceptions import NeutronClientException
 from neutronclient.v2_0 import client as neutron_client
@@ -33,15 +31,13 @@ from novaclient import exceptions as nova_exceptions
 import paramiko
 import six
 
-from keystoneauth1.identity import v3
-from keystoneauth1 import session as sessionV3
-from keystoneclient.v3 import Client as KeystoneClientV3
-
+from mos_tests.environment import auth
 from mos_tests.environment.ssh import NetNsProxy
 from mos_tests.environment.ssh import SSHClient
 from mos_tests.functions.common import gen_temp_file
 from mos_tests.functions.common import wait
 from mos_tests.functions import os_cli
+from mos_tests.functions.volumes import VolumeEngine
 
 logger = logging.getLogger(__name__)
 
@@ -89,23 +85,14 @@ class OpenStackActions(object):
             self.insecure = False
 
         logger.debug('Auth URL is {0}'.format(auth_url))
+        self.session = auth.get_session(auth_url, user=user,
+                                        password=password, project=tenant,
+                                        domain=domain,
+                                        keystone_version=keystone_version,
+                                        verify=self.path_to_cert)
         if keystone_version == 2:
-            auth = KeystonePassword(username=user,
-                                    password=password,
-                                    auth_url=auth_url,
-                                    tenant_name=tenant)
-            self.session = session.Session(auth=auth,
-                                           verify=self.path_to_cert)
             self.keystone = KeystoneClient(session=self.session)
         else:
-            auth = v3.Password(auth_url=auth_url,
-                               user_domain_name=domain,
-                               username=user,
-                               password=password,
-                               project_domain_name=domain,
-                               project_name=tenant)
-            self.session = sessionV3.Session(auth=auth,
-                                             verify=self.path_to_cert)
             self.keystone = KeystoneClientV3(session=self.session)
 
         self.keystone.management_url = auth_url
@@ -122,13 +109,22 @@ class OpenStackActions(object):
 
         self.glance = GlanceClient(session=self.session)
 
-        endpoint_url = self.session.get_endpoint(service_type='orchestration',
-                                                 endpoint_type='publicURL')
-        token = self.session.get_token()
-        self.heat = HeatClient(endpoint=endpoint_url, token=token)
+        self._heat = None
+        self._heat_token = None
 
         self.env = env
 
+    @property
+    def heat(self):
+        """Heat client, it is rebuilt with new token after re-auth"""
+        token = auth.get_token(self.session)
+        if token != self._heat_token:
+            endpoint_url = self.session.get_endpoint(
+                service_type='orchestration', endpoint_type='publicURL')
+            self._heat = HeatClient(endpoint=endpoint_url, token=token)
+            self._heat_token = token
+        return self._heat
+
     def _get_cirros_image(self):
         for image in self.glance.images.list():
             if image.name.startswith("TestVM"):
@@ -1091,61 +1087,14 @@ class OpenStackActions(object):
         self.delete_volumes([volume])
 
     def delete_volumes(self, volumes):
-        ids = ', '.join([x.id for x in volumes])
-        # Exclude non-existing volumes
-        all_volumes = self.cinder.volumes.findall()
-        provided_volumes_ids = [x.id for x in volumes]
-        volumes = [x for x in all_volumes
-                   if x.id in provided_volumes_ids]
-        del all_volumes, provided_volumes_ids
-        # Detach volume from instances; delete snapshots and backups from VOL.
-        for volume in volumes:
-            # if volume attached to any instance
-            for attach in volume.attachments:
-                serv_id = attach['server_id']
-                self.nova.volumes.delete_server_volume(serv_id, volume.id)
-            # if volume have snapshots
-            snapshots = self.cinder.volume_snapshots.findall(
-                volume_id=volume.id)
-            for snapshot in snapshots:
-                self.cinder.volume_snapshots.delete(snapshot)
-            # if volume have backups
-            backups = self.cinder.backups.findall(volume_id=volume.id)
-            for backup in backups:
-                self.cinder.backups.delete(backup)
-        # Wait till volume will be detached and all connections will be removed
-        wait(lambda: not any([self.cinder.backups.findall(volume_id=x.id)
-                              for x in volumes]),
-             timeout_seconds=60 * 10,
-             waiting_for=('backups from volumes [{ids}] '
-                          'to be deleted').format(ids=ids))
-        wait(lambda: not any([self.cinder.volume_snapshots.findall(
-                              volume_id=x.id) for x in volumes]),
-             timeout_seconds=60 * 5,
-             sleep_seconds=10,
-             waiting_for=('snapshots from volumes [{ids}] '
-                          'to be deleted').format(ids=ids))
-        wait(lambda: all([self.cinder.volumes.get(x.id).status == 'available'
-                          for x in volumes]),
-             timeout_seconds=60 * 5,
-             sleep_seconds=10,
-             waiting_for=('volumes [{ids}] '
-                          'to became available').format(ids=ids))
-        # Delete volumes
-        for volume in volumes:
-            self.cinder.volumes.delete(volume.id)
-            # Too fast deletion requests make deletion too long
-            time.sleep(2)
-        self.wait_volumes_deleted(volumes)
+        """Detach and delete volumes with their snapshots and backups"""
+        # Too fast deletion requests make deletion too long
+        VolumeEngine(self, rate=1).delete_volumes(volumes)
 
     def wait_volumes_deleted(self, volumes):
-        ids = ', '.join([x.id for x in volumes])
-        wait(
-            lambda: not any([self.cinder.volumes.findall(id=x.id)
-                             for x in volumes]),
-            timeout_seconds=60 * 2,
-            sleep_seconds=10,
-            waiting_for='volumes [{ids}] to be deleted'.format(ids=ids))
+        engine = VolumeEngine(self)
+        engine.track('volume-delete', [x.id for x in volumes])
+        engine.wait(['volume-delete'], timeout=60 * 2)
 
     def is_server_cloud_init_finished(self, vm):
         finish_mark = 'Cloud-init .* finished'
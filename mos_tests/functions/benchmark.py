@@ -0,0 +1,214 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import logging
+from multiprocessing.dummy import Pool
+import os
+import threading
+import time
+
+from mos_tests import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of latency histogram buckets
+HISTOGRAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25,
+                     50, 100, 250, 500, float('inf'))
+
+
+def percentile(values, p):
+    """Returns p-th (0..100) percentile of values with interpolation"""
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+class Stats(object):
+    """Latencies and transferred bytes of benchmark operations
+
+    Throughput is calculated by wall time between the first operation start
+    and the last operation end, so it is an aggregate value for concurrent
+    operations.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.bytes = 0
+        self.start = None
+        self.end = None
+        self._lock = threading.Lock()
+
+    def add(self, start, end, size=0, ok=True):
+        with self._lock:
+            if ok:
+                self.latencies.append(end - start)
+                self.bytes += size
+            else:
+                self.errors += 1
+            if self.start is None or start < self.start:
+                self.start = start
+            if self.end is None or end > self.end:
+                self.end = end
+
+    @property
+    def count(self):
+        return len(self.latencies)
+
+    @property
+    def duration(self):
+        if self.start is None:
+            return 0
+        return self.end - self.start
+
+    def histogram(self, buckets=HISTOGRAM_BUCKETS):
+        """Returns list of (bucket upper bound, operations count)"""
+        counts = [0] * len(buckets)
+        for latency in self.latencies:
+            for i, bound in enumerate(buckets):
+                if latency <= bound:
+                    counts[i] += 1
+                    break
+        return list(zip(buckets, counts))
+
+    def summary(self):
+        duration = float(max(self.duration, 0.001))
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean': (sum(self.latencies) / self.count
+                     if self.count else None),
+            'p50': percentile(self.latencies, 50),
+            'p90': percentile(self.latencies, 90),
+            'p99': percentile(self.latencies, 99),
+            'max': max(self.latencies) if self.latencies else None,
+            'ops_per_s': self.count / duration,
+            'mb_per_s': self.bytes / 2.0 ** 20 / duration,
+        }
+
+    def report(self):
+        """Returns human readable summary with latency histogram"""
+        summary = self.summary()
+        lines = ['{0}: {1} ops, {2} errors, {3:.1f} ops/s, '
+                 '{4:.1f} MB/s'.format(self.name, summary['count'],
+                                       summary['errors'],
+                                       summary['ops_per_s'],
+                                       summary['mb_per_s'])]
+        if self.count:
+            lines.append('  latency p50={p50:.3f}s p90={p90:.3f}s '
+                         'p99={p99:.3f}s max={max:.3f}s'.format(**summary))
+            width = max(count for _, count in self.histogram())
+            for bound, count in self.histogram():
+                if count == 0:
+                    continue
+                lines.append('  <= {0:>7}s {1:>6} {2}'.format(
+                    bound, count, '#' * (40 * count // width)))
+        return '\n'.join(lines)
+
+
+def run_concurrently(stats, func, args_list, concurrency):
+    """Call func for each args concurrently and record calls to stats
+
+    func should return count of transferred bytes (or None). Failed calls
+    are counted as errors and logged.
+    """
+    def call(args):
+        start = time.time()
+        try:
+            size = func(*args)
+        except Exception as e:
+            stats.add(start, time.time(), ok=False)
+            logger.warning('{0} failed: {1}'.format(stats.name, e))
+        else:
+            stats.add(start, time.time(), size=size or 0)
+
+    if len(args_list) == 0:
+        return stats
+    pool = Pool(min(concurrency, len(args_list)))
+    try:
+        pool.map(call, args_list)
+    finally:
+        pool.terminate()
+    return stats
+
+
+class Baselines(object):
+    """JSON file with benchmark results to compare new results with
+
+    Results are compared by throughput (`mb_per_s`, `ops_per_s` and
+    benchmark specific `*_per_s` metrics, lower is worse) and 90th
+    percentile of latency (higher is worse).
+    """
+
+    # metric: True if bigger value is better
+    METRICS = {'mb_per_s': True, 'ops_per_s': True, 'p90': False,
+               'events_per_s': True, 'resources_per_s': True}
+
+    def __init__(self, path=None):
+        self.path = path or settings.BENCHMARK_BASELINES
+        self.data = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.data = json.load(f)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def update(self, key, summary):
+        self.data[key] = summary
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+
+    def compare(self, key, summary, tolerance=None):
+        """Returns list of regressions descriptions (empty if no baseline)"""
+        if tolerance is None:
+            tolerance = settings.BENCHMARK_TOLERANCE
+        baseline = self.get(key)
+        if baseline is None:
+            logger.info('No baseline for {0}'.format(key))
+            return []
+        regressions = []
+        for metric, bigger_is_better in sorted(self.METRICS.items()):
+            expected = baseline.get(metric)
+            actual = summary.get(metric)
+            if not expected or actual is None:
+                continue
+            if bigger_is_better:
+                failed = actual < expected * (1 - tolerance)
+            else:
+                failed = actual > expected * (1 + tolerance)
+            if failed:
+                regressions.append('{0} {1} is {2:.3f}, baseline is '
+                                   '{3:.3f}'.format(key, metric, actual,
+                                                    expected))
+        return regressions
+
+    def check(self, key, summary):
+        """Compare summary with baseline and store it if required
+
+        :return: list of regressions descriptions
+        """
+        regressions = self.compare(key, summary)
+        if settings.BENCHMARK_UPDATE_BASELINES or self.get(key) is None:
+            self.update(key, summary)
+            self.save()
+        return regressions
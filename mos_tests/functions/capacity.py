@@ -0,0 +1,242 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Capacity aware bulk creation of networks and instances
+
+Instead of creating resources one by one until Neutron or Nova refuses,
+count of networks is computed from quotas and free CIDRs, instances are
+packed to hypervisors by its free resources. Networks are created in
+concurrent batches, instances are booted in waves, which are deleted while
+the next wave is booting (each wave takes half of hypervisors capacity).
+"""
+
+import logging
+from multiprocessing.dummy import Pool
+
+from mos_tests.functions.common import wait
+
+logger = logging.getLogger(__name__)
+
+# Networks are created with 192.168.<index>.0/24 subnets
+CIDR_TEMPLATE = '192.168.{0}.0/24'
+CIDR_INDEXES = range(1, 255)
+
+
+def _map(func, items, concurrency):
+    """Call func for each item concurrently, raise first error"""
+    if len(items) == 0:
+        return []
+    errors = []
+
+    def call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            errors.append(e)
+
+    pool = Pool(min(concurrency, len(items)))
+    try:
+        results = pool.map(call, items)
+    finally:
+        pool.terminate()
+    if errors:
+        raise errors[0]
+    return results
+
+
+def free_cidr_indexes(used_cidrs):
+    """Returns indexes of 192.168.<index>.0/24 CIDRs, which are not used"""
+    used_cidrs = set(used_cidrs)
+    return [x for x in CIDR_INDEXES
+            if CIDR_TEMPLATE.format(x) not in used_cidrs]
+
+
+def plan_networks(quota, used, ports_per_network, instances_capacity,
+                  cidrs):
+    """Returns count of networks, which can be created
+
+    Each network gets one instance port, but no more than
+    `instances_capacity` instances exist at the same time.
+
+    :param quota: dict with neutron quota (`network`, `subnet`, `port`),
+        negative value means unlimited
+    :param used: dict with count of used resources
+    :param ports_per_network: ports count of each network (router
+        interface, DHCP ports)
+    :param instances_capacity: max count of simultaneously existing
+        instances
+    :param cidrs: count of free CIDRs
+    """
+    limits = [cidrs]
+    for resource in ('network', 'subnet'):
+        if quota[resource] >= 0:
+            limits.append(max(quota[resource] - used[resource], 0))
+    if quota['port'] >= 0:
+        free = quota['port'] - used['port']
+        if instances_capacity * (ports_per_network + 1) <= free:
+            count = (free - instances_capacity) // ports_per_network
+        else:
+            count = free // (ports_per_network + 1)
+        limits.append(max(count, 0))
+    return min(limits)
+
+
+def plan_waves(capacities, count):
+    """Returns list of waves (lists of hypervisors names) and overlap flag
+
+    Each wave uses no more than half of hypervisor capacity, so the next
+    wave can boot while the previous one is being deleted (overlap is True).
+    If there is no room for two waves, whole capacity is used by one wave
+    and the next wave should boot only after the previous one is deleted.
+
+    :param capacities: dict {hypervisor name: instances count}
+    :param count: total count of instances
+    """
+    halves = {k: v // 2 for k, v in capacities.items()}
+    overlap = sum(halves.values()) > 0
+    if not overlap:
+        halves = dict(capacities)
+    slots = []
+    # Spread instances over hypervisors evenly
+    for i in range(max(list(halves.values()) + [0])):
+        slots.extend(sorted(k for k, v in halves.items() if v > i))
+    if not slots and count > 0:
+        raise ValueError('There is no hypervisor capacity for instances')
+    waves = []
+    for start in range(0, count, len(slots) or 1):
+        waves.append(slots[:count - start])
+    return waves, overlap
+
+
+def hypervisors_capacities(os_conn, flavor):
+    """Returns dict {hypervisor name: instances count} for flavor"""
+    return {x.hypervisor_hostname: os_conn.get_hypervisor_capacity(x, flavor)
+            for x in os_conn.nova.hypervisors.list()}
+
+
+def get_tenant_id(os_conn):
+    return os_conn.neutron.get_quotas_tenant()['tenant']['tenant_id']
+
+
+def create_networks(os_conn, router_id, cidr_indexes, concurrency=10):
+    """Create networks with subnets concurrently and attach it to router
+
+    :return: list of networks ids
+    """
+    def create(index):
+        network = os_conn.create_network(name='net%02d' % index)['network']
+        subnet = os_conn.create_subnet(network_id=network['id'],
+                                       name='net%02d__subnet' % index,
+                                       cidr=CIDR_TEMPLATE.format(index))
+        return network['id'], subnet['subnet']['id']
+
+    created = _map(create, cidr_indexes, concurrency)
+    logger.info('{0} networks are created'.format(len(created)))
+    _map(lambda x: os_conn.router_interface_add(router_id=router_id,
+                                                subnet_id=x[1]),
+         created, concurrency)
+    return [x[0] for x in created]
+
+
+def _servers_statuses(os_conn, servers_ids):
+    """Returns dict {id: status} of existing servers (one listing)"""
+    servers_ids = set(servers_ids)
+    return {x.id: x.status for x in os_conn.nova.servers.list()
+            if x.id in servers_ids}
+
+
+def wait_servers_status(os_conn, servers_ids, status, timeout=10 * 60):
+    def predicate():
+        statuses = _servers_statuses(os_conn, servers_ids)
+        errors = [k for k, v in statuses.items() if v == 'ERROR']
+        assert not errors, 'Servers {0} are in ERROR state'.format(errors)
+        if status is None:
+            return len(statuses) == 0
+        return (len(statuses) == len(servers_ids) and
+                all(x == status for x in statuses.values()))
+
+    wait(predicate, timeout_seconds=timeout, sleep_seconds=5,
+         waiting_for='{0} servers to be {1}'.format(
+             len(servers_ids), status or 'deleted'))
+
+
+def boot_and_recycle(os_conn, networks_ids, flavor, capacities,
+                     image_id=None, concurrency=20, zone='nova',
+                     timeout=10 * 60):
+    """Boot one instance on each network in waves and delete them
+
+    Wave N+1 is booting while wave N is being deleted, if hypervisors have
+    room for both of them.
+    """
+    if image_id is None:
+        image_id = os_conn._get_cirros_image().id
+    waves, overlap = plan_waves(capacities, len(networks_ids))
+    networks = iter(enumerate(networks_ids, 1))
+    deleting = []
+    for number, hosts in enumerate(waves, 1):
+        items = [(host, next(networks)) for host in hosts]
+        if deleting and not overlap:
+            wait_servers_status(os_conn, deleting, None, timeout=timeout)
+            deleting = []
+        logger.info('Boot wave #{0} of {1} instances'.format(
+            number, len(items)))
+
+        def boot(item):
+            host, (i, net_id) = item
+            return os_conn.nova.servers.create(
+                name='instanceNo{0}'.format(i), image=image_id,
+                flavor=flavor, nics=[{'net-id': net_id}],
+                availability_zone='{0}:{1}'.format(zone, host)).id
+
+        servers = _map(boot, items, concurrency)
+        wait_servers_status(os_conn, servers, 'ACTIVE', timeout=timeout)
+        if deleting:
+            wait_servers_status(os_conn, deleting, None, timeout=timeout)
+        _map(os_conn.nova.servers.delete, servers, concurrency)
+        deleting = servers
+    if deleting:
+        wait_servers_status(os_conn, deleting, None, timeout=timeout)
+
+
+def fill_networks_with_instances(os_conn, router_id, flavor,
+                                 concurrency=10):
+    """Create max possible networks, boot and delete instance on each one
+
+    :return: list of created networks ids
+    """
+    tenant_id = get_tenant_id(os_conn)
+    quota = os_conn.neutron.show_quota(tenant_id)['quota']
+    used = {
+        'network': len(os_conn.neutron.list_networks(
+            tenant_id=tenant_id)['networks']),
+        'subnet': len(os_conn.neutron.list_subnets(
+            tenant_id=tenant_id)['subnets']),
+        'port': len(os_conn.neutron.list_ports(
+            tenant_id=tenant_id)['ports']),
+    }
+    cidrs = free_cidr_indexes(
+        x['cidr'] for x in os_conn.neutron.list_subnets()['subnets'])
+    capacities = hypervisors_capacities(os_conn, flavor)
+    # Each network has router interface and port on each DHCP agent
+    dhcp_agents = len(os_conn.list_all_neutron_agents(agent_type='dhcp'))
+    count = plan_networks(quota, used, ports_per_network=1 + dhcp_agents,
+                          instances_capacity=sum(capacities.values()),
+                          cidrs=len(cidrs))
+    logger.info('Create {0} networks, instances capacity: {1}'.format(
+        count, capacities))
+    networks_ids = create_networks(os_conn, router_id, cidrs[:count],
+                                   concurrency=concurrency)
+    boot_and_recycle(os_conn, networks_ids, flavor, capacities,
+                     concurrency=concurrency)
+    return networks_ids
@@ -0,0 +1,269 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Ceph cluster monitor
+
+`ceph status` (health, PG states, recovery and client I/O rates) and
+`ceph osd perf` (OSDs latency) are sampled with one ssh command on fixed
+interval by background thread. Only compact samples are stored, so tests
+can wait for cluster state with predicates on the latest sample without
+running ceph commands on each poll. Periods of not clean PGs are reported
+as recovery (objects are degraded) or rebalance (objects are misplaced
+only) durations.
+"""
+
+from collections import namedtuple
+import json
+import logging
+import threading
+import time
+
+from mos_tests.functions.benchmark import Stats
+from mos_tests.functions.common import wait
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_COMMAND = 'ceph status -f json && echo && ceph osd perf -f json'
+
+CLEAN_STATE = 'active+clean'
+
+# pg_states - {state name: PGs count}, osds - (up, in, total), rates are
+# per second, latencies are max of all OSDs in ms
+Sample = namedtuple('Sample', [
+    'time', 'health', 'time_sync', 'pg_states', 'num_pgs', 'osds',
+    'degraded_objects', 'misplaced_objects', 'recovering_objects_per_s',
+    'recovering_bytes_per_s', 'read_ops_per_s', 'write_ops_per_s',
+    'read_bytes_per_s', 'write_bytes_per_s', 'commit_latency_ms',
+    'apply_latency_ms'])
+
+
+def is_clean(sample):
+    return sample.pg_states == {CLEAN_STATE: sample.num_pgs}
+
+
+def client_iops(sample):
+    return sample.read_ops_per_s + sample.write_ops_per_s
+
+
+def split_json(output):
+    """Returns list of JSON documents printed one after another"""
+    decoder = json.JSONDecoder()
+    output = output.strip()
+    documents = []
+    index = 0
+    while index < len(output):
+        document, index = decoder.raw_decode(output, index)
+        documents.append(document)
+        while index < len(output) and output[index].isspace():
+            index += 1
+    return documents
+
+
+def is_time_sync(health):
+    """Checks that monitors don't report clock skew
+
+    :param health: `ceph health` data (`health` of `ceph status`)
+    """
+    mons = []
+    for item in health.get('health', {}).get('health_services', []):
+        if isinstance(item, dict) and 'mons' in item:
+            mons = item['mons']
+            break
+    ok = all(x['health'] == 'HEALTH_OK' for x in mons)
+    if not ok:
+        logger.info('ceph health detail:\n{0}'.format(
+            '\n'.join(health.get('detail', []))))
+    return ok
+
+
+def parse_sample(output, now=None):
+    """Returns Sample from output of SAMPLE_COMMAND"""
+    status, perf = split_json(output)
+    health = status['health']
+    pgmap = status['pgmap']
+    osdmap = status['osdmap']
+    osdmap = osdmap.get('osdmap', osdmap)
+    perf = perf.get('osdstats', perf)
+    perf_stats = [x['perf_stats'] for x in perf.get('osd_perf_infos', [])]
+    read_ops = pgmap.get('read_op_per_sec', 0)
+    write_ops = pgmap.get('write_op_per_sec', 0)
+    if 'op_per_sec' in pgmap and not (read_ops or write_ops):
+        # Older releases report only total operations
+        write_ops = pgmap['op_per_sec']
+    return Sample(
+        time=now or time.time(),
+        health=health.get('overall_status') or health.get('status'),
+        time_sync=is_time_sync(health),
+        pg_states={x['state_name']: x['count']
+                   for x in pgmap.get('pgs_by_state', [])},
+        num_pgs=pgmap['num_pgs'],
+        osds=(osdmap['num_up_osds'], osdmap['num_in_osds'],
+              osdmap['num_osds']),
+        degraded_objects=pgmap.get('degraded_objects', 0),
+        misplaced_objects=pgmap.get('misplaced_objects', 0),
+        recovering_objects_per_s=pgmap.get('recovering_objects_per_sec', 0),
+        recovering_bytes_per_s=pgmap.get('recovering_bytes_per_sec', 0),
+        read_ops_per_s=read_ops,
+        write_ops_per_s=write_ops,
+        read_bytes_per_s=pgmap.get('read_bytes_sec', 0),
+        write_bytes_per_s=pgmap.get('write_bytes_sec', 0),
+        commit_latency_ms=max([x['commit_latency_ms']
+                               for x in perf_stats] or [0]),
+        apply_latency_ms=max([x['apply_latency_ms']
+                              for x in perf_stats] or [0]))
+
+
+def unclean_periods(samples):
+    """Returns list of (kind, start, end) of periods with not clean PGs
+
+    kind is `recovery` if some objects were degraded during period,
+    `rebalance` otherwise. end is None if period is not finished.
+    """
+    periods = []
+    current = None
+    for sample in samples:
+        if is_clean(sample):
+            if current is not None:
+                periods.append((current[0], current[1], sample.time))
+                current = None
+            continue
+        degraded = sample.degraded_objects > 0
+        if current is None:
+            current = ['recovery' if degraded else 'rebalance', sample.time]
+        elif degraded:
+            current[0] = 'recovery'
+    if current is not None:
+        periods.append((current[0], current[1], None))
+    return periods
+
+
+class CephMonitor(object):
+    """Background sampler of ceph cluster state
+
+    Usage::
+
+        with CephMonitor(controller_remote) as monitor:
+            remote.check_call('ceph osd out 1')
+            monitor.wait(is_clean, timeout=10 * 60)
+        logger.info(monitor.report())
+
+    Without started background thread `wait` samples cluster itself.
+    """
+
+    def __init__(self, remote, interval=10):
+        self.remote = remote
+        self.interval = interval
+        self.samples = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def latest(self):
+        with self._lock:
+            return self.samples[-1] if self.samples else None
+
+    def sample(self):
+        output = self.remote.check_call(SAMPLE_COMMAND,
+                                        verbose=False).stdout_string
+        sample = parse_sample(output)
+        with self._lock:
+            self.samples.append(sample)
+        return sample
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning('Ceph sampling failed: {0}'.format(e))
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def wait(self, predicate, timeout=5 * 60,
+             waiting_for='ceph cluster state'):
+        """Wait for sample, taken after call, for which predicate is True
+
+        :return: matched sample
+        """
+        since = time.time()
+        matched = []
+
+        def check():
+            if self._thread is None:
+                sample = self.sample()
+            else:
+                sample = self.latest
+                if sample is None or sample.time < since:
+                    return False
+            if predicate(sample):
+                matched.append(sample)
+                return True
+            return False
+
+        wait(check, timeout_seconds=timeout,
+             sleep_seconds=1 if self._thread else self.interval,
+             waiting_for=waiting_for)
+        return matched[0]
+
+    def stats(self):
+        """Returns dict {kind: Stats} of finished unclean periods"""
+        with self._lock:
+            samples = list(self.samples)
+        stats = {}
+        for kind, start, end in unclean_periods(samples):
+            if end is None:
+                continue
+            if kind not in stats:
+                stats[kind] = Stats('ceph-{0}'.format(kind))
+            stats[kind].add(start, end)
+        return stats
+
+    def report(self):
+        with self._lock:
+            samples = list(self.samples)
+        if not samples:
+            return 'Ceph monitor: no samples'
+        lines = ['Ceph monitor: {0} samples, health {1}'.format(
+            len(samples), ' -> '.join(
+                x.health for i, x in enumerate(samples)
+                if i == 0 or x.health != samples[i - 1].health))]
+        lines.append(
+            '  client iops max={0:.0f}, recovery max={1:.0f} objects/s, '
+            'commit latency max={2}ms, apply latency max={3}ms'.format(
+                max(client_iops(x) for x in samples),
+                max(x.recovering_objects_per_s for x in samples),
+                max(x.commit_latency_ms for x in samples),
+                max(x.apply_latency_ms for x in samples)))
+        for kind, stats in sorted(self.stats().items()):
+            lines.append(stats.report())
+        return '\n'.join(lines)
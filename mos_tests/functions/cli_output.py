@@ -0,0 +1,148 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Parsers of CLI clients output
+
+JSON output (`-f json` of cliff based clients) is parsed with json module,
+ASCII tables (prettytable) - by single pass parser, which computes columns
+positions once for each table. Cells are cut by columns positions (as
+prettytable pads them by display width, East Asian wide characters take two
+positions), so unlike tempest `output_parser` values may contain `|`.
+"""
+
+import json
+import re
+import unicodedata
+
+import six
+
+# Characters, which may have display width other than 1
+_NOT_NARROW_RE = re.compile(u'[^\x00-\u02ff]')
+
+
+class InvalidStructure(ValueError):
+    pass
+
+
+def is_json(output):
+    return output.lstrip()[:1] in ('[', '{')
+
+
+def _is_delimiter(line):
+    return line[:2] == '+-' and line[-2:] == '-+' and not line.strip('+-')
+
+
+def _columns(delimiter):
+    """Returns list of columns slices for table delimiter line"""
+    columns = []
+    start = 1
+    end = delimiter.find('+', start)
+    while end != -1:
+        columns.append(slice(start, end))
+        start = end + 1
+        end = delimiter.find('+', start)
+    return columns
+
+
+def _char_width(char):
+    if unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+
+
+def _split_row(line, columns):
+    """Returns cells of row, columns are slices of display positions"""
+    if not isinstance(line, six.text_type) or not _NOT_NARROW_RE.search(line):
+        return [line[column].strip() for column in columns]
+    # Index of character at each display position
+    index = []
+    for i, char in enumerate(line):
+        index.extend([i] * _char_width(char))
+    index.append(len(line))
+
+    def char_index(position):
+        return index[min(position, len(index) - 1)]
+
+    return [line[char_index(x.start):char_index(x.stop)].strip()
+            for x in columns]
+
+
+def tables(output):
+    """Returns list of tables (dicts with headers, values and label)"""
+    if isinstance(output, six.binary_type):
+        output = output.decode('utf-8')
+    result = []
+    label = None
+    table = None
+    columns = None
+    delimiters = 0
+    for line in output.splitlines():
+        line = line.rstrip()
+        if _is_delimiter(line):
+            if table is None:
+                table = {'headers': [], 'values': [], 'label': label}
+                columns = _columns(line)
+                delimiters = 1
+            elif delimiters == 1:
+                delimiters = 2
+            else:
+                result.append(table)
+                table = None
+                label = None
+            continue
+        if table is None:
+            if label is None:
+                label = line
+            continue
+        if line[:1] != '|':
+            continue
+        row = _split_row(line, columns)
+        if delimiters == 1:
+            table['headers'] = row
+        else:
+            table['values'].append(row)
+    if table is not None:
+        result.append(table)
+    return result
+
+
+def listing(output):
+    """Returns list of dicts with data of rows of first table (or JSON)"""
+    if is_json(output):
+        data = json.loads(output)
+        return data if isinstance(data, list) else [data]
+    tables_ = tables(output)
+    if not tables_:
+        return []
+    headers = tables_[0]['headers']
+    return [dict(zip(headers, row)) for row in tables_[0]['values']]
+
+
+def details(output):
+    """Returns dict of properties from Property(Field)/Value table or JSON"""
+    if is_json(output):
+        data = json.loads(output)
+        if isinstance(data, list):
+            data = {x['Field']: x['Value'] for x in data}
+        return data
+    for table in tables(output):
+        headers = table['headers']
+        if 'Value' not in headers:
+            continue
+        for key in ('Property', 'Field'):
+            if key in headers:
+                key_idx, value_idx = headers.index(key), headers.index('Value')
+                return {row[key_idx]: row[value_idx]
+                        for row in table['values']}
+    raise InvalidStructure('There is no Property/Value table in output')
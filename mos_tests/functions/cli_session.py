@@ -0,0 +1,237 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Persistent CLI session on node
+
+Each `os_cli` call opens new SSH channel, sources openrc and starts client,
+which imports lots of python modules and gets new Keystone token. Session
+keeps one resident python process (command server) per remote with sourced
+openrc. `openstack` commands are run inside this process with one Keystone
+token, other commands - as subprocesses of it.
+"""
+
+import json
+import logging
+import socket
+import threading
+import weakref
+
+import six
+from six.moves import shlex_quote
+
+from mos_tests.environment.ssh import CommandResult
+
+logger = logging.getLogger(__name__)
+
+# Command server. Reads JSON requests {"command": ..., "merge_stderr": ...}
+# line by line from stdin and writes JSON responses
+# {"exit_code": ..., "stdout": ..., "stderr": ...} to stdout.
+SERVER_SCRIPT = r'''
+import json, logging, os, shlex, subprocess, sys
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+try:
+    from openstackclient import shell as osc_shell
+except Exception:
+    osc_shell = None
+
+SHELL_CHARS = set('|;&<>`$(){}*?~\\\n')
+out = sys.stdout
+token = {}
+
+
+def decode(data):
+    if isinstance(data, bytes):
+        return data.decode('utf-8', 'replace')
+    return data
+
+
+def run_shell(command, merge_stderr):
+    proc = subprocess.Popen(
+        ['bash', '-c', command], stdin=open(os.devnull),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT if merge_stderr else subprocess.PIPE)
+    stdout, stderr = proc.communicate()
+    return proc.returncode, decode(stdout), decode(stderr or b'')
+
+
+def run_osc(argv, env=None):
+    saved = sys.stdout, sys.stderr, dict(os.environ), logging.root.handlers[:]
+    sys.stdout, sys.stderr = StringIO(), StringIO()
+    os.environ.update(env or {})
+    try:
+        try:
+            code = osc_shell.OpenStackShell().run(argv)
+        except SystemExit as e:
+            code = e.code
+        return code or 0, decode(sys.stdout.getvalue()), decode(
+            sys.stderr.getvalue())
+    finally:
+        sys.stdout, sys.stderr = saved[:2]
+        os.environ.clear()
+        os.environ.update(saved[2])
+        logging.root.handlers[:] = saved[3]
+
+
+def issue_token():
+    code, stdout, _ = run_osc(['token', 'issue', '-f', 'value', '-c', 'id'])
+    token.clear()
+    if code == 0 and stdout.strip():
+        token.update(OS_AUTH_TYPE='token', OS_TOKEN=stdout.strip())
+
+
+def run_openstack(argv):
+    if not token:
+        issue_token()
+    result = run_osc(argv, token)
+    if result[0] != 0 and token and '(HTTP 401)' in result[2]:
+        issue_token()
+        result = run_osc(argv, token)
+    return result
+
+
+def run(command, merge_stderr):
+    if (osc_shell is not None and not SHELL_CHARS & set(command) and
+            command.split()[:1] == ['openstack']):
+        try:
+            code, stdout, stderr = run_openstack(shlex.split(command)[1:])
+        except Exception:
+            pass
+        else:
+            if merge_stderr:
+                stdout, stderr = stderr + stdout, ''
+            return code, stdout, stderr
+    return run_shell(command, merge_stderr)
+
+
+def reply(data):
+    out.write(json.dumps(data) + '\n')
+    out.flush()
+
+
+reply({'ready': True, 'in_process': osc_shell is not None})
+for line in iter(sys.stdin.readline, ''):
+    try:
+        request = json.loads(line)
+    except ValueError:
+        continue
+    code, stdout, stderr = run(request['command'],
+                               request.get('merge_stderr', False))
+    reply({'exit_code': code, 'stdout': stdout, 'stderr': stderr})
+'''
+
+
+class SessionError(Exception):
+    pass
+
+
+class CLISession(object):
+    """Resident command server on node
+
+    Commands are run one by one, session is thread safe. Session is
+    restarted if its channel was closed.
+    """
+
+    python = 'python'
+
+    def __init__(self, remote, prefix='. openrc && '):
+        self.remote = remote
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._chan = None
+        self._stdin = None
+        self._stdout = None
+
+    @property
+    def is_alive(self):
+        return self._chan is not None and not self._chan.closed
+
+    def start(self):
+        command = '{0}{1} -u -c {2}'.format(self.prefix, self.python,
+                                            shlex_quote(SERVER_SCRIPT))
+        self._chan, self._stdin, self._stdout, _ = self.remote.execute_async(
+            command)
+        self._chan.settimeout(self.remote.execution_timeout)
+        ready = self._read()
+        logger.debug('CLI session on {0} is started (openstack commands are '
+                     'run in process: {1})'.format(self.remote,
+                                                   ready['in_process']))
+
+    def _read(self):
+        try:
+            line = self._stdout.readline()
+        except socket.timeout:
+            self.close()
+            raise SessionError('CLI session on {0} is not responding'.format(
+                self.remote))
+        if not line:
+            self.close()
+            raise SessionError('CLI session on {0} is closed'.format(
+                self.remote))
+        return json.loads(line)
+
+    def execute(self, command, merge_stderr=False, verbose=True):
+        """Run command in session
+
+        Session prefix (openrc sourcing) is stripped from command, because
+        session has it already.
+
+        :return: CommandResult like `SSHClient.execute`
+        """
+        if command.startswith(self.prefix):
+            command = command[len(self.prefix):]
+        request = json.dumps({'command': command,
+                              'merge_stderr': merge_stderr})
+        with self._lock:
+            if not self.is_alive:
+                self.start()
+            logger.debug("Executing command in session: '{0}'".format(
+                command))
+            self._stdin.write(request + '\n')
+            self._stdin.flush()
+            response = self._read()
+
+        result = CommandResult({
+            'stdout': six.text_type(response['stdout']).encode(
+                'utf-8').splitlines(True),
+            'stderr': six.text_type(response['stderr']).encode(
+                'utf-8').splitlines(True),
+            'exit_code': response['exit_code'],
+        })
+        result.command = command
+        if verbose:
+            logger.debug("'{0}' exit_code is {1}".format(
+                command, result['exit_code']))
+        return result
+
+    def close(self):
+        if self._chan is not None:
+            self._chan.close()
+        self._chan = self._stdin = self._stdout = None
+
+
+_sessions = weakref.WeakKeyDictionary()
+_sessions_lock = threading.Lock()
+
+
+def get_session(remote):
+    """Returns CLI session of remote (it is closed together with remote)"""
+    with _sessions_lock:
+        session = _sessions.get(remote)
+        if session is None:
+            session = _sessions[remote] = CLISession(remote)
+            remote.stack.callback(session.close)
+        return session
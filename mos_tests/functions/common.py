@@ -13,7 +13,6 @@
 #    under the License.
 
 import inspect
-import json
 import logging
 import os
 import socket
@@ -40,7 +39,7 @@ def is_stack_exists(stack_name, heat):
         :param heat: Heat API client connection point
         :return True or False
     """
-    return stack_name in [s.stack_name for s in heat.stacks.list()]
+    return len(list(heat.stacks.list(filters={'name': stack_name}))) > 0
 
 
 def get_stack_id(heat_client, stack_name):
@@ -49,57 +48,30 @@ def get_stack_id(heat_client, stack_name):
         :param stack_name: Name of stack
         :return Stack uid
     """
-    if is_stack_exists(stack_name, heat_client):
-        return heat_client.stacks.list(filter={'name': stack_name}).id
+    for stack in heat_client.stacks.list(filters={'name': stack_name}):
+        return stack.id
     raise Exception("ERROR: Stack {} is not defined".format(stack_name))
 
 
-def get_ceph_status(remote):
-    output = remote.check_call('ceph status -f json-pretty',
-                               verbose=False).stdout_string
-    return json.loads(output)
-
-
-def get_ceph_health(remote):
-    output = remote.check_call('ceph health -f json-pretty',
-                               verbose=False).stdout_string
-    return json.loads(output)
-
-
-def is_ceph_time_sync(remote):
-    health = get_ceph_health(remote)['health']['health_services']
-    mons = []
-    for item in health:
-        if isinstance(item, dict) and 'mons' in item:
-            mons = item['mons']
-            break
-    ok = all([x['health'] == 'HEALTH_OK' for x in mons])
-    if not ok:
-        logger.info('ceph healt detail:\n'
-                    '{0}'.format('\n'.join(health['detail'])))
-    return ok
-
-
 def check_stack_status(stack_name, heat, status, timeout=60):
     """Check stack status
         :param stack_name: Name of stack
         :param heat: Heat API client connection point
         :param status: Expected stack status
-        :param timeout: Timeout for check operation
+        :param timeout: Timeout for check operation in minutes
         :return True if stack status is equals to expected status
         False otherwise
     """
-    if is_stack_exists(stack_name, heat):
-        start_time = time()
-        stack_status = [s.stack_status for s in heat.stacks.list()
-                        if s.stack_name == stack_name][0]
-        while 'IN_PROGRESS' in stack_status \
-                and time() < start_time + 60 * timeout:
-            sleep(1)
-            stack_status = [s.stack_status for s in heat.stacks.list()
-                            if s.stack_name == stack_name][0]
-        return stack_status == status
-    return False
+    stacks = list(heat.stacks.list(filters={'name': stack_name}))
+    if len(stacks) == 0:
+        return False
+    uid = stacks[0].id
+    stack_status = stacks[0].stack_status
+    end_time = time() + 60 * timeout
+    while 'IN_PROGRESS' in stack_status and time() < end_time:
+        sleep(1)
+        stack_status = heat.stacks.get(uid).stack_status
+    return stack_status == status
 
 
 def create_stack(heat_client, stack_name, template, parameters={}, timeout=20,
@@ -141,9 +113,12 @@ def delete_stack(heat_client, uid):
         :param heat_client: Heat API client connection point
         :param uid:         UID of stack
     """
-    if uid in [s.id for s in heat_client.stacks.list()]:
+    def is_exists():
+        return len(list(heat_client.stacks.list(filters={'id': uid}))) > 0
+
+    if is_exists():
         heat_client.stacks.delete(uid)
-        while uid in [s.id for s in heat_client.stacks.list()]:
+        while is_exists():
             sleep(1)
 
 
@@ -0,0 +1,154 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Synthetic data of any size without disk usage
+
+Data is either sparse (zeros) or deterministic pseudo-random: blocks are
+rotations of random pattern generated from seed, so the same data can be
+produced locally (`DataStream`) and on nodes (`stream_command`) and its md5
+can be calculated without reading any file.
+"""
+
+import binascii
+import hashlib
+import logging
+import posixpath
+import random
+
+from six.moves import shlex_quote
+
+from mos_tests.functions.image_upload import ChecksumReader
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 1024 * 1024
+
+# Each next block is a pattern rotated by this count of bytes
+ROTATION_STEP = 4099
+
+# Must produce the same data as `iter_blocks`
+GENERATOR_SCRIPT = """
+import binascii, random, sys
+size, seed, block_size, step = {size}, {seed}, {block_size}, {step}
+out = getattr(sys.stdout, 'buffer', sys.stdout)
+bits = random.Random(seed).getrandbits(block_size * 8)
+pattern = binascii.unhexlify('%0*x' % (block_size * 2, bits))
+i = 0
+while size > 0:
+    shift = i * step % block_size
+    block = pattern[shift:] + pattern[:shift]
+    out.write(block[:size])
+    size -= block_size
+    i += 1
+"""
+
+_md5_cache = {}
+
+
+def _get_pattern(seed, block_size):
+    bits = random.Random(seed).getrandbits(block_size * 8)
+    return binascii.unhexlify('%0*x' % (block_size * 2, bits))
+
+
+def iter_blocks(size, seed=None, block_size=BLOCK_SIZE):
+    """Yields blocks of data
+
+    :param seed: integer seed of pseudo-random data, zeros if None
+    """
+    if seed is None:
+        zeros = b'\0' * block_size
+        while size > 0:
+            yield zeros if size >= block_size else zeros[:size]
+            size -= block_size
+        return
+
+    pattern = _get_pattern(seed, block_size)
+    i = 0
+    while size > 0:
+        shift = i * ROTATION_STEP % block_size
+        block = pattern[shift:] + pattern[:shift]
+        yield block if size >= block_size else block[:size]
+        size -= block_size
+        i += 1
+
+
+class _BlocksFile(object):
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+
+    def read(self, size=None):
+        return next(self.blocks, b'')
+
+
+class DataStream(ChecksumReader):
+    """File-like object with synthetic data, which computes md5 on read"""
+
+    def __init__(self, size, seed=None, block_size=BLOCK_SIZE):
+        self.length = size
+        super(DataStream, self).__init__(
+            _BlocksFile(iter_blocks(size, seed, block_size)),
+            chunk_size=block_size)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def digest(self):
+        return self.checksums.md5
+
+
+def expected_md5(size, seed=None):
+    """Returns md5 of synthetic data without data storing"""
+    key = (size, seed)
+    if key not in _md5_cache:
+        md5 = hashlib.md5()
+        for block in iter_blocks(size, seed):
+            md5.update(block)
+        _md5_cache[key] = md5.hexdigest()
+    return _md5_cache[key]
+
+
+def stream_command(size, seed):
+    """Returns shell command, which prints pseudo-random data to stdout"""
+    script = GENERATOR_SCRIPT.format(size=size, seed=seed,
+                                     block_size=BLOCK_SIZE, step=ROTATION_STEP)
+    return 'python -c {0}'.format(shlex_quote(script))
+
+
+class GeneratedFile(tuple):
+    """Tuple (path, name) of generated file with expected `md5` attribute"""
+
+    def __new__(cls, path, md5):
+        obj = super(GeneratedFile, cls).__new__(
+            cls, (path, posixpath.basename(path)))
+        obj.md5 = md5
+        return obj
+
+
+def create_remote_file(remote, path, size, seed=None):
+    """Create file on node
+
+    Sparse file is created for `seed` equal to None, so it takes no disk
+    space.
+
+    :return: GeneratedFile
+    """
+    if seed is None:
+        cmd = 'truncate -s {0} {1}'.format(size, path)
+    else:
+        cmd = '{0} > {1}'.format(stream_command(size, seed), path)
+    logger.debug('Create {0} bytes file {1}'.format(size, path))
+    remote.check_call(cmd, verbose=False)
+    return GeneratedFile(path, expected_md5(size, seed))
@@ -25,6 +25,9 @@ from mos_tests import settings
 
 logger = logging.getLogger(__name__)
 
+# Read buffer size for streaming tar decoder
+TAR_BUFFER_SIZE = 4 * 1024 * 1024
+
 
 @contextmanager
 def get_and_unpack(url, name=None):
@@ -93,7 +96,7 @@ def get_file_name(url):
 @contextmanager
 def _tar_decoder(src, compression='*'):
     mode = 'r|{0}'.format(compression)
-    with tarfile.open(fileobj=src, mode=mode) as tar:
+    with tarfile.open(fileobj=src, mode=mode, bufsize=TAR_BUFFER_SIZE) as tar:
         yield tar.extractfile(tar.firstmember)
 
 
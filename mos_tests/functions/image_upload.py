@@ -0,0 +1,357 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from collections import namedtuple
+import hashlib
+import logging
+import mmap
+from multiprocessing.dummy import Pool
+import os
+import posixpath
+import time
+
+from six.moves import shlex_quote
+
+from mos_tests.functions import file_cache
+from mos_tests.functions import os_cli
+from mos_tests import settings
+
+logger = logging.getLogger(__name__)
+
+# Size of blocks to read from streams (multiple of mmap granularity)
+CHUNK_SIZE = 64 * mmap.ALLOCATIONGRANULARITY
+
+Checksums = namedtuple('Checksums', ['size', 'md5', 'sha256'])
+
+
+class ChecksumError(Exception):
+    pass
+
+
+def _get_mmap(fileobj):
+    """Returns read only memory map of regular file or None"""
+    try:
+        fileno = fileobj.fileno()
+        if os.fstat(fileno).st_size == 0:
+            return None
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (AttributeError, EnvironmentError, ValueError):
+        return None
+
+
+class ChecksumReader(object):
+    """File-like object, which computes md5 and sha256 of data read from it
+
+    Regular files are read through memory map, other streams (tar members,
+    for example) - by large blocks, so the data is never read twice.
+    """
+
+    def __init__(self, fileobj, chunk_size=CHUNK_SIZE):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.size = 0
+        self._md5 = hashlib.md5()
+        self._sha256 = hashlib.sha256()
+        self._mmap = _get_mmap(fileobj)
+        if self._mmap is not None:
+            self._buffer = self._mmap
+            self._offset = fileobj.tell()
+        else:
+            self._buffer = b''
+            self._offset = 0
+
+    def _fill(self):
+        """Returns True if buffer has data to read"""
+        if self._offset < len(self._buffer):
+            return True
+        if self._mmap is not None:
+            return False
+        self._buffer = self.fileobj.read(self.chunk_size)
+        self._offset = 0
+        return len(self._buffer) > 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = float('inf')
+        parts = []
+        while size > 0 and self._fill():
+            end = min(self._offset + size, len(self._buffer))
+            parts.append(self._buffer[self._offset:end])
+            size -= end - self._offset
+            self._offset = end
+        data = b''.join(parts)
+        self._md5.update(data)
+        self._sha256.update(data)
+        self.size += len(data)
+        return data
+
+    def __iter__(self):
+        while True:
+            data = self.read(self.chunk_size)
+            if not data:
+                break
+            yield data
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._buffer = b''
+
+    @property
+    def checksums(self):
+        return Checksums(self.size, self._md5.hexdigest(),
+                         self._sha256.hexdigest())
+
+
+def upload(glance, image_id, fileobj, chunk_size=CHUNK_SIZE):
+    """Upload image data and verify checksum reported by Glance
+
+    :return: Checksums of uploaded data
+    """
+    reader = ChecksumReader(fileobj, chunk_size=chunk_size)
+    start = time.time()
+    try:
+        glance.images.upload(image_id, reader)
+    finally:
+        reader.close()
+    checksums = reader.checksums
+    duration = time.time() - start
+    logger.info('{0} bytes uploaded to image {1} in {2:.1f}s '
+                '({3:.1f} MB/s)'.format(checksums.size, image_id, duration,
+                                        checksums.size / 2.0 ** 20 /
+                                        max(duration, 0.001)))
+
+    image = glance.images.get(image_id)
+    if image.checksum != checksums.md5:
+        raise ChecksumError(
+            'Image {0} checksum is {1}, but {2} is expected'.format(
+                image_id, image.checksum, checksums.md5))
+    os_hash_value = getattr(image, 'os_hash_value', None)
+    if os_hash_value is not None and os_hash_value != checksums.sha256:
+        raise ChecksumError(
+            'Image {0} sha256 is {1}, but {2} is expected'.format(
+                image_id, os_hash_value, checksums.sha256))
+    return checksums
+
+
+def upload_from_cache(glance, image_id, url, unpack=False):
+    """Upload file from `file_cache` to image
+
+    :param unpack: extract first file of tar archive before upload
+    """
+    if unpack:
+        get_file = file_cache.get_and_unpack
+    else:
+        get_file = file_cache.get_file
+    with get_file(url) as f:
+        return upload(glance, image_id, f)
+
+
+def upload_images(glance, uploads, concurrency=4):
+    """Upload several images from `file_cache` concurrently
+
+    :param uploads: list of tuples (image id, url, unpack)
+    :return: list of Checksums
+    """
+    if len(uploads) == 0:
+        return []
+    pool = Pool(min(concurrency, len(uploads)))
+    try:
+        return pool.map(lambda x: upload_from_cache(glance, *x), uploads)
+    finally:
+        pool.terminate()
+
+
+def get_checksum(url, unpack=False):
+    """Returns md5 of `file_cache` file (or of unpacked file) data
+
+    Checksum is saved near the file, so it is calculated once for each
+    downloaded file version.
+    """
+    path = file_cache.get_file_path(url)
+    stat = os.stat(path)
+    key = '{0} {1}'.format(int(stat.st_mtime), stat.st_size)
+    checksum_path = path + ('.unpacked.md5' if unpack else '.md5')
+    if os.path.exists(checksum_path):
+        with open(checksum_path) as f:
+            saved_key, _, checksum = f.read().strip().rpartition(' ')
+        if saved_key == key:
+            return checksum
+
+    get_file = file_cache.get_and_unpack if unpack else file_cache.get_file
+    with get_file(url) as f:
+        reader = ChecksumReader(f)
+        try:
+            for _ in reader:
+                pass
+        finally:
+            reader.close()
+    checksum = reader.checksums.md5
+    with open(checksum_path, 'w') as f:
+        f.write('{0} {1}'.format(key, checksum))
+    return checksum
+
+
+def find_image(glance, name, checksum):
+    """Returns active image with name and checksum or None"""
+    for image in glance.images.list():
+        if (image['name'] == name and image['status'] == 'active' and
+                image['checksum'] == checksum):
+            return image
+
+
+def push_to_controller(remote, url, checksum, unpack=False):
+    """Copy image data to controller (if it is absent or differs there)
+
+    :return: path to image file on controller
+    """
+    name = file_cache.get_file_name(url)
+    if unpack:
+        name += '.unpacked'
+    path = posixpath.join(settings.REMOTE_IMAGE_PATH, name)
+
+    result = remote.execute('md5sum {0}'.format(path), verbose=False)
+    if result.is_ok and result.stdout_string.split()[0] == checksum:
+        logger.info('Image {0} is up to date on controller'.format(name))
+        return path
+
+    logger.info('Copy image {0} to controller'.format(name))
+    remote.mkdir(settings.REMOTE_IMAGE_PATH)
+    tmp_path = path + '.tmp'
+    remote.upload(file_cache.get_file_path(url), tmp_path)
+    if unpack:
+        remote.check_call(
+            'tar -xOf {0} "$(tar -tf {0} | head -n 1)" > {1} && '
+            'rm -f {0}'.format(tmp_path, path), verbose=False)
+    else:
+        remote.check_call('mv -f {0} {1}'.format(tmp_path, path),
+                          verbose=False)
+
+    result = remote.check_call('md5sum {0}'.format(path), verbose=False)
+    if result.stdout_string.split()[0] != checksum:
+        raise ChecksumError('Image {0} on controller is corrupted'.format(
+            path))
+    return path
+
+
+def create_image_on_controller(remote, path, name, disk_format,
+                               container_format, properties,
+                               credentials=None):
+    """Create image from controller local file with Glance CLI
+
+    :param credentials: tuple (user, password, project) of image owner,
+        openrc credentials are used by default
+    :return: image id
+    """
+    params = ['--name', name, '--disk-format', disk_format,
+              '--container-format', container_format, '--file', path]
+    for key, value in sorted(properties.items()):
+        if key == 'visibility':
+            params.extend(['--visibility', value])
+        else:
+            params.extend(['--property', '{0}={1}'.format(key, value)])
+    prefix = ''
+    if credentials is not None:
+        user, password, project = credentials
+        prefix = ' '.join('{0}={1}'.format(key, shlex_quote(value)) for
+                          key, value in (('OS_USERNAME', user),
+                                         ('OS_PASSWORD', password),
+                                         ('OS_TENANT_NAME', project),
+                                         ('OS_PROJECT_NAME', project)))
+    glance = os_cli.Glance(remote)
+    output = glance('image-create', flags='--os-image-api-version 2',
+                    params=' '.join(shlex_quote(x) for x in params),
+                    prefix=prefix)
+    return output.details()['id']
+
+
+def import_image(os_conn, url, name, disk_format='qcow2',
+                 container_format='bare', unpack=False, **properties):
+    """Returns image with `file_cache` file data
+
+    Active image with the same name and checksum is reused. Otherwise image
+    is created by upload from test runner or (with `IMAGE_IMPORT_MODE` set
+    to `remote`) from image copy on controller, which is updated only when
+    file in `file_cache` is changed.
+
+    :return: tuple (image, created)
+    """
+    checksum = get_checksum(url, unpack=unpack)
+    image = find_image(os_conn.glance, name, checksum)
+    if image is not None:
+        logger.info('Reuse image {0} ({1})'.format(name, image.id))
+        return image, False
+
+    if settings.IMAGE_IMPORT_MODE == 'remote' and os_conn.env is not None:
+        controller = os_conn.env.get_nodes_by_role('controller')[0]
+        with controller.ssh() as remote:
+            path = push_to_controller(remote, url, checksum, unpack=unpack)
+            image_id = create_image_on_controller(
+                remote, path, name, disk_format, container_format,
+                properties, credentials=(os_conn.username, os_conn.password,
+                                         os_conn.tenant))
+    else:
+        image = os_conn.glance.images.create(
+            name=name, disk_format=disk_format,
+            container_format=container_format, **properties)
+        image_id = image.id
+        upload_from_cache(os_conn.glance, image_id, url, unpack=unpack)
+
+    return _get_checked(os_conn.glance, image_id, checksum), True
+
+
+def import_images(os_conn, images, concurrency=4):
+    """Import several `file_cache` images, uploading them concurrently
+
+    Images are reused or created as by `import_image`. With `remote`
+    `IMAGE_IMPORT_MODE` images are imported one by one.
+
+    :param images: list of dicts with `import_image` arguments
+    :return: list of tuples (image, created)
+    """
+    if settings.IMAGE_IMPORT_MODE == 'remote' and os_conn.env is not None:
+        return [import_image(os_conn, **x) for x in images]
+    found = []
+    uploads = []
+    for kwargs in images:
+        kwargs = dict(kwargs)
+        url = kwargs.pop('url')
+        name = kwargs.pop('name')
+        unpack = kwargs.pop('unpack', False)
+        kwargs.setdefault('disk_format', 'qcow2')
+        kwargs.setdefault('container_format', 'bare')
+        checksum = get_checksum(url, unpack=unpack)
+        image = find_image(os_conn.glance, name, checksum)
+        if image is not None:
+            logger.info('Reuse image {0} ({1})'.format(name, image.id))
+            found.append((image, None))
+            continue
+        image = os_conn.glance.images.create(name=name, **kwargs)
+        uploads.append((image.id, url, unpack))
+        found.append((image, checksum))
+
+    upload_images(os_conn.glance, uploads, concurrency=concurrency)
+    return [(x, False) if checksum is None else
+            (_get_checked(os_conn.glance, x.id, checksum), True)
+            for x, checksum in found]
+
+
+def _get_checked(glance, image_id, checksum):
+    image = glance.images.get(image_id)
+    if image.checksum != checksum:
+        raise ChecksumError(
+            'Image {0} checksum is {1}, but {2} is expected'.format(
+                image_id, image.checksum, checksum))
+    return image
@@ -15,16 +15,19 @@
 import json
 
 import six
-from tempest.lib.cli import output_parser as parser
 from tempest.lib import exceptions
 
+from mos_tests.functions import cli_output
+from mos_tests.functions import cli_session
+from mos_tests import settings
+
 
 class Result(six.text_type):
     def listing(self):
-        return parser.listing(self)
+        return cli_output.listing(self)
 
     def details(self):
-        return parser.details(self)
+        return cli_output.details(self)
 
     def __add__(self, other):
         if not isinstance(other, six.text_type):
@@ -34,7 +37,10 @@ class Result(six.text_type):
 
 def os_execute(remote, command, fail_ok=False, merge_stderr=False):
     command = '. openrc && {}'.format(command.encode('utf-8'))
-    result = remote.execute(command)
+    if settings.CLI_SESSION:
+        result = cli_session.get_session(remote).execute(command)
+    else:
+        result = remote.execute(command)
     if not fail_ok and not result.is_ok:
         raise exceptions.CommandFailed(result['exit_code'],
                                        command.decode('utf-8'),
@@ -49,12 +55,23 @@ def os_execute(remote, command, fail_ok=False, merge_stderr=False):
 class CLICLient(object):
 
     command = ''
+    # Subcommands, which can print JSON with `-f json` (cliff based clients)
+    json_actions = ()
 
     def __init__(self, remote):
         self.remote = remote
         super(CLICLient, self).__init__()
 
+    def is_json_action(self, action, params=''):
+        words = action.split()
+        options = set(words + params.split())
+        if '-f' in options or '--format' in options:
+            return False
+        return any(x in self.json_actions for x in words[:2])
+
     def build_command(self, action, flags='', params='', prefix=''):
+        if self.is_json_action(action, params):
+            params = u'{0} -f json'.format(params)
         return u' '.join([prefix, self.command, flags, action, params])
 
     def __call__(self, action, flags='', params='', prefix='', fail_ok=False,
@@ -181,14 +198,7 @@ class Ceilometer(CLICLient):
 
 class Aodh(CLICLient):
     command = 'aodh'
-
-    def __call__(self, *args, **kwargs):
-        result = super(Aodh, self).__call__(*args, **kwargs)
-        lines = result.splitlines()
-        if len(lines) > 0:
-            # Change output to tempest parser
-            lines[1] = lines[1].replace('Field   ', 'Property')
-        return Result('\n'.join(lines))
+    json_actions = ('list', 'show', 'create', 'update', 'search')
 
 
 class S3CMD(CLICLient):
@@ -0,0 +1,248 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from contextlib import contextmanager
+import hashlib
+import json
+import logging
+
+from mos_tests.functions import image_upload
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(owner, kind, params):
+    """Returns unique key of resource with params for owner"""
+    data = json.dumps([owner, kind, params], sort_keys=True)
+    return hashlib.md5(data.encode('utf-8')).hexdigest()
+
+
+def get_owner(os_conn):
+    """Resources are shared between os_conn instances of same user"""
+    return [os_conn.controller_ip, os_conn.username, os_conn.tenant]
+
+
+def create_image(os_conn, name, url, disk_format='qcow2',
+                 container_format='bare'):
+    """Existing image with the same data is reused (and is not deleted)"""
+    return image_upload.import_image(os_conn, url, name,
+                                     disk_format=disk_format,
+                                     container_format=container_format)
+
+
+def image_exists(os_conn, image):
+    return os_conn.glance.images.get(image.id).status == 'active'
+
+
+def delete_image(os_conn, image):
+    os_conn.glance.images.delete(image.id)
+
+
+def create_flavor(os_conn, name, ram, vcpu, disk, keys=None):
+    flavor = os_conn.nova.flavors.create(name, ram, vcpu, disk)
+    if keys:
+        flavor.set_keys(keys)
+    return flavor, True
+
+
+def flavor_exists(os_conn, flavor):
+    return os_conn.nova.flavors.get(flavor.id) is not None
+
+
+def delete_flavor(os_conn, flavor):
+    os_conn.nova.flavors.delete(flavor.id)
+
+
+def create_keypair(os_conn, name):
+    return os_conn.create_key(key_name=name), True
+
+
+def keypair_exists(os_conn, keypair):
+    return os_conn.nova.keypairs.get(keypair.name) is not None
+
+
+def delete_keypair(os_conn, keypair):
+    os_conn.delete_key(key_name=keypair.name)
+
+
+def create_security_group(os_conn, name):
+    return os_conn.create_sec_group_for_ssh(), True
+
+
+def security_group_exists(os_conn, security_group):
+    return os_conn.nova.security_groups.get(security_group.id) is not None
+
+
+def delete_security_group(os_conn, security_group):
+    os_conn.delete_security_group(security_group)
+
+
+def create_network(os_conn, name, cidr='192.168.1.0/24', router=False):
+    """Create network with subnet (and router with gateway if requested)
+
+    :return: tuple (dict like `create_network` result with additional
+        `subnet` and `router` keys, True)
+    """
+    network = os_conn.create_network(name=name)
+    subnet = os_conn.create_subnet(network_id=network['network']['id'],
+                                   name='{0}__subnet'.format(name), cidr=cidr)
+    network['subnet'] = subnet['subnet']
+    network['router'] = None
+    if router:
+        router = os_conn.create_router(
+            name='{0}__router'.format(name))['router']
+        os_conn.router_gateway_add(router_id=router['id'],
+                                   network_id=os_conn.ext_network['id'])
+        os_conn.router_interface_add(router_id=router['id'],
+                                     subnet_id=subnet['subnet']['id'])
+        network['router'] = router
+    return network, True
+
+
+def network_exists(os_conn, network):
+    networks = os_conn.neutron.list_networks(
+        id=network['network']['id'])['networks']
+    return len(networks) > 0
+
+
+def delete_network(os_conn, network):
+    if network['router'] is not None:
+        os_conn.delete_router(network['router']['id'])
+    os_conn.delete_net_subnet_smart(network['network']['id'])
+
+
+# kind: (create, exists, delete, id getter), create returns tuple
+# (resource, created) - resources which were not created are not deleted
+KINDS = {
+    'image': (create_image, image_exists, delete_image,
+              lambda x: x.id),
+    'flavor': (create_flavor, flavor_exists, delete_flavor,
+               lambda x: x.id),
+    'keypair': (create_keypair, keypair_exists, delete_keypair,
+                lambda x: x.name),
+    'security_group': (create_security_group, security_group_exists,
+                       delete_security_group, lambda x: x.id),
+    'network': (create_network, network_exists, delete_network,
+                lambda x: x['network']['id']),
+}
+
+
+class Lease(object):
+
+    def __init__(self, key, kind, os_conn, resource, created=True):
+        self.key = key
+        self.kind = kind
+        self.os_conn = os_conn
+        self.resource = resource
+        self.created = created
+        self.refs = 0
+
+    @property
+    def id(self):
+        return KINDS[self.kind][3](self.resource)
+
+
+class ResourceFactory(object):
+    """Shares immutable OpenStack resources between tests
+
+    Resources are identified by fingerprint of its kind, parameters and
+    owner (user and project), so tests which need identical resources get
+    the same object. Resources are not deleted when the last lease is
+    released - they live until `reset` (after snapshot revert all of them
+    disappear) or `cleanup` at the end of session.
+
+    Tests must not modify shared resources.
+    """
+
+    def __init__(self):
+        self._leases = {}
+
+    def _get_name(self, kind, key):
+        return 'shared_{0}_{1}'.format(kind, key[:8])
+
+    def acquire(self, os_conn, kind, **params):
+        """Returns resource and increments its references count"""
+        create, exists, _, _ = KINDS[kind]
+        key = fingerprint(get_owner(os_conn), kind, params)
+        lease = self._leases.get(key)
+        if lease is not None:
+            try:
+                alive = exists(os_conn, lease.resource)
+            except Exception as e:
+                logger.debug('Shared {0} check failed: {1}'.format(kind, e))
+                alive = False
+            if not alive:
+                logger.info('Shared {0} {1} was deleted, recreate it'.format(
+                    kind, lease.id))
+                del self._leases[key]
+                lease = None
+        if lease is None:
+            params.setdefault('name', self._get_name(kind, key))
+            logger.info('Create shared {0} {1}'.format(kind, params['name']))
+            resource, created = create(os_conn, **params)
+            lease = self._leases[key] = Lease(key, kind, os_conn, resource,
+                                              created=created)
+        lease.refs += 1
+        return lease.resource
+
+    def release(self, resource):
+        for lease in self._leases.values():
+            if lease.resource is resource:
+                lease.refs -= 1
+                return
+        # Resource may be forgotten by `reset`
+        logger.debug('Resource {0} is not shared'.format(resource))
+
+    @contextmanager
+    def lease(self, os_conn, kind, **params):
+        resource = self.acquire(os_conn, kind, **params)
+        try:
+            yield resource
+        finally:
+            self.release(resource)
+
+    def is_shared(self, kind, resource_id):
+        return any(x.kind == kind and x.id == resource_id
+                   for x in self._leases.values())
+
+    def refs(self, resource):
+        for lease in self._leases.values():
+            if lease.resource is resource:
+                return lease.refs
+        return 0
+
+    def reset(self):
+        """Forget all resources (after environment revert)"""
+        self._leases = {}
+
+    def cleanup(self, unused_only=False):
+        """Delete shared resources (networks first, images last)"""
+        order = ('network', 'security_group', 'keypair', 'flavor', 'image')
+        leases = sorted(self._leases.values(),
+                        key=lambda x: order.index(x.kind))
+        for lease in leases:
+            if unused_only and lease.refs > 0:
+                continue
+            if not lease.created:
+                logger.info('Keep reused {0} {1}'.format(lease.kind,
+                                                         lease.id))
+                del self._leases[lease.key]
+                continue
+            logger.info('Delete shared {0} {1}'.format(lease.kind, lease.id))
+            try:
+                KINDS[lease.kind][2](lease.os_conn, lease.resource)
+            except Exception as e:
+                logger.warning("Can't delete shared {0} {1}: {2}".format(
+                    lease.kind, lease.id, e))
+            del self._leases[lease.key]
@@ -12,10 +12,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from collections import OrderedDict
 from contextlib import contextmanager
 import logging
+from multiprocessing.dummy import Pool
 
-from contextlib2 import ExitStack
 from six import BytesIO
 from six.moves import configparser
 
@@ -24,6 +25,35 @@ from mos_tests.functions import common
 logger = logging.getLogger(__name__)
 
 
+def _read_config(remote, path):
+    """Returns original config data and parser with it"""
+    with remote.open(path, 'rb') as f:
+        orig_conf = BytesIO(f.read())
+    parser = configparser.RawConfigParser()
+    parser.readfp(orig_conf)
+    orig_conf.seek(0)
+    return orig_conf, parser
+
+
+def _set_values(parser, new_values):
+    """Set values to parser
+
+    :return: bool flag indicates config was changed
+    """
+    changed = False
+    for section, key, val in new_values:
+        if section != 'DEFAULT' and not parser.has_section(section):
+            changed = True
+            parser.add_section(section)
+        if (parser.has_option(section, key) and
+                parser.get(section, key) == str(val)):
+            continue
+
+        changed = True
+        parser.set(section, key, val)
+    return changed
+
+
 @contextmanager
 def patch_conf(remote, path, new_values, restart_cmd=None):
     """Patch ini-like config and restart corresponding service
@@ -37,21 +67,8 @@ def patch_conf(remote, path, new_values, restart_cmd=None):
     changed = False
     try:
         with remote:
-            parser = configparser.RawConfigParser()
-            with remote.open(path, 'rb') as f:
-                orig_cong = BytesIO(f.read())
-            parser.readfp(orig_cong)
-
-            for section, key, val in new_values:
-                if section != 'DEFAULT' and not parser.has_section(section):
-                    changed = True
-                    parser.add_section(section)
-                if (parser.has_option(section, key) and
-                        parser.get(section, key) == str(val)):
-                    continue
-
-                changed = True
-                parser.set(section, key, val)
+            orig_cong, parser = _read_config(remote, path)
+            changed = _set_values(parser, new_values)
 
             if changed:
                 with remote.open(path, 'wb') as f:
@@ -70,20 +87,145 @@ def patch_conf(remote, path, new_values, restart_cmd=None):
                     remote.check_call(restart_cmd, verbose=False)
 
 
+class ConfigPatch(object):
+
+    def __init__(self, remote, path, new_values, restart_cmd=None, wave=0):
+        self.remote = remote
+        self.path = path
+        self.new_values = new_values
+        self.restart_cmd = restart_cmd
+        self.wave = wave
+        self.orig_conf = None
+        self.changed = False
+
+    def apply(self):
+        with self.remote:
+            self.orig_conf, parser = _read_config(self.remote, self.path)
+            if not _set_values(parser, self.new_values):
+                return
+            with self.remote.open(self.path, 'wb') as f:
+                parser.write(f)
+            self.changed = True
+
+    def revert(self):
+        if not self.changed:
+            return
+        with self.remote:
+            with self.remote.open(self.path, 'wb') as f:
+                f.write(self.orig_conf.getvalue())
+        self.changed = False
+
+    def restart(self):
+        with self.remote:
+            self.remote.check_call(self.restart_cmd, verbose=False)
+
+
+class ConfigTransaction(object):
+    """Patch ini-like configs on many nodes as one transaction
+
+    Configs are patched concurrently (with `concurrency` SSH connections at
+    most). If any of them can't be patched, already patched configs are
+    restored. Then changed services are restarted by waves: patches with the
+    same `wave` are restarted concurrently, waves - one by one in order of
+    addition (so controllers can be restarted one by one and computes - all
+    together). Configs are restored on exit the same way, or at once if some
+    service fails to restart.
+    """
+
+    def __init__(self, concurrency=10):
+        self.concurrency = concurrency
+        self.patches = []
+
+    def add(self, remote, path, new_values, restart_cmd=None, wave=0):
+        """Add config patch
+
+        :param remote: SSH connection (closed)
+        """
+        self.patches.append(ConfigPatch(remote, path, new_values,
+                                        restart_cmd=restart_cmd, wave=wave))
+
+    @property
+    def changed(self):
+        return any(x.changed for x in self.patches)
+
+    def _map(self, func, patches):
+        """Call func for each patch concurrently, raise first error"""
+        if len(patches) == 0:
+            return
+        errors = []
+
+        def call(patch):
+            try:
+                func(patch)
+            except Exception as e:
+                logger.error('{0} of {1} on {2} failed: {3}'.format(
+                    func.__name__, patch.path, patch.remote.host, e))
+                errors.append(e)
+
+        pool = Pool(min(self.concurrency, len(patches)))
+        try:
+            pool.map(call, patches)
+        finally:
+            pool.terminate()
+        if errors:
+            raise errors[0]
+
+    def _restart(self, patches):
+        waves = OrderedDict()
+        for patch in patches:
+            if patch.restart_cmd is not None:
+                waves.setdefault(patch.wave, []).append(patch)
+        for patches in waves.values():
+            logger.info('Restart services on {0}'.format(
+                ', '.join(x.remote.host for x in patches)))
+            self._map(ConfigPatch.restart, patches)
+
+    def apply(self):
+        try:
+            self._map(ConfigPatch.apply, self.patches)
+        except Exception:
+            # Services were not restarted yet, so restore configs only
+            self._map(ConfigPatch.revert,
+                      [x for x in self.patches if x.changed])
+            raise
+        try:
+            self._restart([x for x in self.patches if x.changed])
+        except Exception:
+            # Don't leave new configs if some service can't work with them
+            self.rollback()
+            raise
+
+    def rollback(self):
+        changed = [x for x in self.patches if x.changed]
+        self._map(ConfigPatch.revert, changed)
+        self._restart(changed)
+
+    def __enter__(self):
+        self.apply()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.rollback()
+
+
 def nova_patch(env, config, nodes=None):
     nova_config_path = '/etc/nova/nova.conf'
     restart_cmd = 'service nova-api restart || service nova-compute restart'
     nodes = nodes or (
         env.get_nodes_by_role('controller') + env.get_nodes_by_role('compute'))
 
-    with ExitStack() as stack:
-        for node in nodes:
-            remote = node.ssh()
-            logger.info('Patch nova config on {fqdn}'.format(**node.data))
-            stack.enter_context(patch_conf(remote,
-                                           path=nova_config_path,
-                                           new_values=config,
-                                           restart_cmd=restart_cmd))
+    transaction = ConfigTransaction()
+    for node in nodes:
+        logger.info('Patch nova config on {fqdn}'.format(**node.data))
+        # Controllers are restarted one by one to keep API available
+        if 'controller' in node.data['roles']:
+            wave = node.data['fqdn']
+        else:
+            wave = 'compute'
+        transaction.add(node.ssh(), path=nova_config_path, new_values=config,
+                        restart_cmd=restart_cmd, wave=wave)
+
+    with transaction:
         common.wait(env.os_conn.is_nova_ready,
                     timeout_seconds=60 * 5,
                     expected_exceptions=Exception,
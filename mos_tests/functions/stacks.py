@@ -0,0 +1,265 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Bulk Heat stacks operations
+
+Stacks are tracked by id (`stacks.get`) instead of listing of all stacks,
+resources progress is followed by stack events newer than the last seen
+event (events list `marker`), so each poll fetches only new data.
+"""
+
+# Preload module, first call of time.strptime in threads is not safe
+import _strptime  # noqa
+import calendar
+import logging
+from multiprocessing.dummy import Pool
+import time
+
+from mos_tests.functions.common import wait
+
+logger = logging.getLogger(__name__)
+
+EVENT_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+class StackError(Exception):
+    pass
+
+
+def is_not_found(e):
+    return getattr(e, 'code', None) == 404
+
+
+def parse_event_time(value):
+    return calendar.timegm(time.strptime(value, EVENT_TIME_FORMAT))
+
+
+def _map(func, items, concurrency):
+    """Call func for each item concurrently, raise first error"""
+    if len(items) == 0:
+        return []
+    errors = []
+
+    def call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            errors.append(e)
+
+    pool = Pool(min(concurrency, len(items)))
+    try:
+        results = pool.map(call, items)
+    finally:
+        pool.terminate()
+    if errors:
+        raise errors[0]
+    return results
+
+
+class TrackedStack(object):
+
+    def __init__(self, stack_id, action, start=None):
+        self.id = stack_id
+        self.name = None
+        self.action = action
+        self.status = None
+        self.status_reason = None
+        self.last_event = None
+        self.events = 0
+        # resource name: [start, end, status]
+        self.resources = {}
+        self.start = start or time.time()
+        self.end = None
+
+    @property
+    def done(self):
+        return self.end is not None
+
+    @property
+    def duration(self):
+        return (self.end or time.time()) - self.start
+
+    def add_event(self, event):
+        self.last_event = event.id
+        self.events += 1
+        if (event.physical_resource_id == self.id or
+                getattr(event, 'stack_name', self.name) != self.name):
+            # Stack own event or event of nested stack resource
+            return
+        timestamp = parse_event_time(event.event_time)
+        resource = self.resources.setdefault(event.resource_name,
+                                             [timestamp, None, None])
+        resource[2] = event.resource_status
+        if event.resource_status.endswith('_IN_PROGRESS'):
+            if resource[1] is not None:
+                # Next action on resource
+                resource[0] = timestamp
+                resource[1] = None
+        else:
+            resource[1] = timestamp
+
+    def resources_timings(self):
+        """Returns dict {resource name: (duration or None, status)}"""
+        return {name: (end - start if end is not None else None, status)
+                for name, (start, end, status) in self.resources.items()}
+
+
+class StackTracker(object):
+    """Follows many stacks actions (CREATE, UPDATE, DELETE) concurrently
+
+    Tracking fails on first stack with `*_FAILED` status. With
+    `nested_depth` events of nested stacks are counted too.
+    """
+
+    def __init__(self, heat, poll_interval=5, concurrency=10,
+                 nested_depth=None):
+        self.heat = heat
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.nested_depth = nested_depth
+        self.stacks = []
+
+    @property
+    def ids(self):
+        return [x.id for x in self.stacks]
+
+    def add(self, stack_id, action, start=None):
+        self.stacks.append(TrackedStack(stack_id, action, start=start))
+
+    def _fetch_events(self, stack):
+        kwargs = {'sort_dir': 'asc'}
+        if stack.last_event is not None:
+            kwargs['marker'] = stack.last_event
+        if self.nested_depth is not None:
+            kwargs['nested_depth'] = self.nested_depth
+        for event in self.heat.events.list(stack.id, **kwargs):
+            stack.add_event(event)
+
+    def _poll_one(self, stack):
+        try:
+            data = self.heat.stacks.get(stack.id)
+        except Exception as e:
+            if stack.action == 'DELETE' and is_not_found(e):
+                stack.status = 'DELETE_COMPLETE'
+                stack.end = time.time()
+                return
+            raise
+        stack.name = data.stack_name
+        stack.status = data.stack_status
+        stack.status_reason = data.stack_status_reason
+        try:
+            self._fetch_events(stack)
+        except Exception as e:
+            # Events of deleted stack can be unavailable
+            if not is_not_found(e):
+                raise
+        if stack.status == '{0}_FAILED'.format(stack.action):
+            raise StackError('Stack {0} {1}: {2}'.format(
+                stack.name, stack.status, stack.status_reason))
+        if stack.status == '{0}_COMPLETE'.format(stack.action):
+            stack.end = time.time()
+            logger.info('Stack {0} {1} in {2:.0f}s'.format(
+                stack.name, stack.status, stack.duration))
+
+    def poll(self):
+        """Update all unfinished stacks
+
+        :return: True if all stacks are finished
+        """
+        pending = [x for x in self.stacks if not x.done]
+        _map(self._poll_one, pending, self.concurrency)
+        return all(x.done for x in self.stacks)
+
+    def wait(self, timeout=20 * 60):
+        wait(self.poll, timeout_seconds=timeout,
+             sleep_seconds=self.poll_interval,
+             waiting_for='{0} stacks to be completed'.format(
+                 len(self.stacks)))
+        return self
+
+    def timings(self):
+        """Returns dict {stack id: (duration, resources timings)}"""
+        return {x.id: (x.duration, x.resources_timings())
+                for x in self.stacks}
+
+
+def create_stacks(heat, stacks, timeout=20 * 60, concurrency=10,
+                  poll_interval=5, nested_depth=None):
+    """Create several stacks concurrently and wait for CREATE_COMPLETE
+
+    :param stacks: list of dicts with `stacks.create` arguments (stack_name,
+        template, parameters, files, ...)
+    :return: StackTracker with created stacks
+    """
+    tracker = StackTracker(heat, poll_interval=poll_interval,
+                           concurrency=concurrency, nested_depth=nested_depth)
+
+    def create(kwargs):
+        kwargs = dict(kwargs)
+        kwargs.setdefault('timeout_mins', timeout // 60)
+        start = time.time()
+        stack_id = heat.stacks.create(**kwargs)['stack']['id']
+        tracker.add(stack_id, 'CREATE', start=start)
+
+    _map(create, stacks, concurrency)
+    return tracker.wait(timeout)
+
+
+def update_stacks(heat, updates, timeout=20 * 60, concurrency=10,
+                  poll_interval=5, nested_depth=None):
+    """Update several stacks concurrently and wait for UPDATE_COMPLETE
+
+    :param updates: list of tuples (stack id, dict with `stacks.update`
+        arguments)
+    :return: StackTracker with updated stacks
+    """
+    tracker = StackTracker(heat, poll_interval=poll_interval,
+                           concurrency=concurrency, nested_depth=nested_depth)
+    for stack_id, _ in updates:
+        tracker.add(stack_id, 'UPDATE')
+    # Skip events happened before update
+    _map(tracker._fetch_events, tracker.stacks, concurrency)
+    for stack in tracker.stacks:
+        stack.events = 0
+        stack.resources = {}
+    params = dict(updates)
+
+    def update(stack):
+        stack.start = time.time()
+        heat.stacks.update(stack.id, **params[stack.id])
+
+    _map(update, tracker.stacks, concurrency)
+    return tracker.wait(timeout)
+
+
+def delete_stacks(heat, stack_ids, timeout=20 * 60, concurrency=10,
+                  poll_interval=5, nested_depth=None):
+    """Delete several stacks concurrently and wait for them to disappear
+
+    :return: StackTracker with deleted stacks
+    """
+    tracker = StackTracker(heat, poll_interval=poll_interval,
+                           concurrency=concurrency, nested_depth=nested_depth)
+
+    def delete(stack_id):
+        start = time.time()
+        try:
+            heat.stacks.delete(stack_id)
+        except Exception as e:
+            if not is_not_found(e):
+                raise
+        tracker.add(stack_id, 'DELETE', start=start)
+
+    _map(delete, stack_ids, concurrency)
+    return tracker.wait(timeout)
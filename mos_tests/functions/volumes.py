@@ -0,0 +1,333 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Bulk Cinder volumes operations
+
+Requests (create, attach, detach, snapshot, backup, delete) are issued
+concurrently with optional bound of requests rate. Pending operations are
+followed by one listing of each resources kind (volumes, snapshots,
+backups) per poll instead of one request per resource, time from request
+to expected status is recorded for each operation.
+"""
+
+import logging
+from multiprocessing.dummy import Pool
+import threading
+import time
+
+from mos_tests.functions.benchmark import Stats
+from mos_tests.functions.common import wait
+
+logger = logging.getLogger(__name__)
+
+# kind: cinder client manager
+MANAGERS = {
+    'volume': 'volumes',
+    'snapshot': 'volume_snapshots',
+    'backup': 'backups',
+}
+
+# operation: (resource kind, expected status (or tuple of statuses) or None
+# if resource is deleted)
+OPERATIONS = {
+    'volume-create': ('volume', 'available'),
+    'volume-ready': ('volume', ('available', 'error')),
+    'volume-attach': ('volume', 'in-use'),
+    'volume-detach': ('volume', 'available'),
+    'volume-delete': ('volume', None),
+    'snapshot-create': ('snapshot', 'available'),
+    'snapshot-delete': ('snapshot', None),
+    'backup-create': ('backup', 'available'),
+    'backup-delete': ('backup', None),
+}
+
+
+class VolumeError(Exception):
+    pass
+
+
+def is_not_found(e):
+    return getattr(e, 'code', None) == 404
+
+
+def _map(func, items, concurrency):
+    """Call func for each item concurrently, raise first error"""
+    if len(items) == 0:
+        return []
+    errors = []
+
+    def call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            errors.append(e)
+
+    pool = Pool(min(concurrency, len(items)))
+    try:
+        results = pool.map(call, items)
+    finally:
+        pool.terminate()
+    if errors:
+        raise errors[0]
+    return results
+
+
+class RateLimiter(object):
+    """Spreads calls from many threads evenly, `rate` calls per second"""
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next)
+            self._next = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class VolumeEngine(object):
+    """Concurrent Cinder operations with batched status polling
+
+    Usage::
+
+        engine = VolumeEngine(os_conn, rate=5)
+        volumes = engine.create_volumes([{'size': 1, 'name': 'vol'}] * 10)
+        engine.create_snapshots([{'volume_id': x.id} for x in volumes])
+        engine.delete_volumes(volumes)
+        logger.info(engine.report())
+
+    Methods with `wait=False` only issue requests, `wait` waits for all
+    pending operations at once.
+    """
+
+    def __init__(self, os_conn, concurrency=10, rate=None, poll_interval=5):
+        self.os_conn = os_conn
+        self.cinder = os_conn.cinder
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate)
+        self.poll_interval = poll_interval
+        # operation: {resource id: request start}
+        self.pending = {}
+        self.stats = {}
+
+    def _stats(self, operation):
+        if operation not in self.stats:
+            self.stats[operation] = Stats('cinder-{0}'.format(operation))
+        return self.stats[operation]
+
+    def listing(self, kind):
+        """Returns dict {id: resource} with one list request"""
+        manager = getattr(self.cinder, MANAGERS[kind])
+        return {x.id: x for x in manager.list()}
+
+    def _issue(self, operation, func, items):
+        """Call func for items with bounded rate, track returned ids
+
+        func should return resource (or its id), which status is changed.
+        """
+        pending = self.pending.setdefault(operation, {})
+
+        def call(item):
+            self.limiter.acquire()
+            start = time.time()
+            try:
+                result = func(item)
+            except Exception:
+                self._stats(operation).add(start, time.time(), ok=False)
+                raise
+            pending[getattr(result, 'id', result)] = start
+            return result
+
+        return _map(call, items, self.concurrency)
+
+    def track(self, operation, ids):
+        """Follow operation on resources requested outside of engine"""
+        now = time.time()
+        self.pending.setdefault(operation, {}).update((x, now) for x in ids)
+
+    def _update(self, operation, resources, now):
+        kind, status = OPERATIONS[operation]
+        statuses = status if isinstance(status, tuple) else (status,)
+        pending = self.pending[operation]
+        for resource_id in list(pending):
+            resource = resources.get(resource_id)
+            if resource is None:
+                if status is not None:
+                    raise VolumeError('{0} {1} is absent'.format(
+                        kind, resource_id))
+                done = True
+            elif resource.status in statuses:
+                done = True
+            elif resource.status.startswith('error'):
+                raise VolumeError('{0} {1} is in {2} status'.format(
+                    kind, resource_id, resource.status))
+            else:
+                done = False
+            if done:
+                self._stats(operation).add(pending.pop(resource_id), now)
+
+    def poll(self, operations=None):
+        """Update pending operations, one listing per resources kind
+
+        :return: True if there are no pending operations
+        """
+        operations = [x for x in operations or list(self.pending)
+                      if self.pending.get(x)]
+        now = time.time()
+        listings = {}
+        for operation in operations:
+            kind, _ = OPERATIONS[operation]
+            if kind not in listings:
+                listings[kind] = self.listing(kind)
+            self._update(operation, listings[kind], now)
+        return not any(self.pending[x] for x in operations)
+
+    def wait(self, operations=None, timeout=5 * 60):
+        count = sum(len(self.pending.get(x, ()))
+                    for x in operations or list(self.pending))
+        wait(lambda: self.poll(operations), timeout_seconds=timeout,
+             sleep_seconds=self.poll_interval,
+             waiting_for='{0} cinder operations to be completed'.format(
+                 count))
+
+    def create_volumes(self, specs, wait=True, timeout=5 * 60):
+        """Create volumes
+
+        :param specs: list of dicts with `volumes.create` arguments
+        :return: list of created volumes (in specs order)
+        """
+        volumes = self._issue(
+            'volume-create', lambda x: self.cinder.volumes.create(**x), specs)
+        if wait:
+            self.wait(['volume-create'], timeout=timeout)
+        return volumes
+
+    def attach(self, pairs, wait=True, timeout=5 * 60):
+        """Attach volumes to servers
+
+        :param pairs: list of (server, volume)
+        """
+        def attach(pair):
+            server, volume = pair
+            self.os_conn.nova.volumes.create_server_volume(server.id,
+                                                           volume.id)
+            return volume.id
+
+        self._issue('volume-attach', attach, pairs)
+        if wait:
+            self.wait(['volume-attach'], timeout=timeout)
+
+    def detach(self, volume_ids, wait=True, timeout=5 * 60):
+        """Detach volumes from all servers"""
+        volumes = self.listing('volume')
+        attachments = [(x['server_id'], volume_id)
+                       for volume_id in volume_ids if volume_id in volumes
+                       for x in volumes[volume_id].attachments]
+
+        def detach(attachment):
+            self.os_conn.nova.volumes.delete_server_volume(*attachment)
+            return attachment[1]
+
+        self._issue('volume-detach', detach, attachments)
+        if wait:
+            self.wait(['volume-detach'], timeout=timeout)
+
+    def create_snapshots(self, specs, wait=True, timeout=5 * 60):
+        """Create snapshots
+
+        :param specs: list of dicts with `volume_snapshots.create` arguments
+        :return: list of created snapshots (in specs order)
+        """
+        snapshots = self._issue(
+            'snapshot-create',
+            lambda x: self.cinder.volume_snapshots.create(**x), specs)
+        if wait:
+            self.wait(['snapshot-create'], timeout=timeout)
+        return snapshots
+
+    def create_backups(self, specs, wait=True, timeout=10 * 60):
+        """Create backups
+
+        Volume is busy while its backup is created, so backups of
+        different volumes are created concurrently, but backups of the same
+        volume - one after another.
+
+        :param specs: list of dicts with `backups.create` arguments
+        :return: list of created backups (in creation order)
+        """
+        waves = []
+        for spec in specs:
+            for wave in waves:
+                if all(x['volume_id'] != spec['volume_id'] for x in wave):
+                    wave.append(spec)
+                    break
+            else:
+                waves.append([spec])
+        backups = []
+        for i, wave in enumerate(waves, 1):
+            backups.extend(self._issue(
+                'backup-create', lambda x: self.cinder.backups.create(**x),
+                wave))
+            if wait or i < len(waves):
+                self.wait(['backup-create'], timeout=timeout)
+        return backups
+
+    def delete(self, kind, ids, wait=True, timeout=5 * 60):
+        """Delete resources of kind and wait for them to disappear"""
+        manager = getattr(self.cinder, MANAGERS[kind])
+
+        def delete(resource_id):
+            try:
+                manager.delete(resource_id)
+            except Exception as e:
+                if not is_not_found(e):
+                    raise
+            return resource_id
+
+        operation = '{0}-delete'.format(kind)
+        self._issue(operation, delete, ids)
+        if wait:
+            self.wait([operation], timeout=timeout)
+
+    def delete_volumes(self, volumes, timeout=5 * 60,
+                       backups_timeout=10 * 60):
+        """Detach and delete volumes with their snapshots and backups
+
+        Cinder refuses to delete volumes in transitional statuses (creating,
+        downloading, backing-up), so volumes are waited to become available
+        (or error) first.
+        """
+        ids = set(getattr(x, 'id', x) for x in volumes)
+        existing = [x for x in self.listing('volume') if x in ids]
+        backups = [x.id for x in self.listing('backup').values()
+                   if x.volume_id in ids]
+        snapshots = [x.id for x in self.listing('snapshot').values()
+                     if x.volume_id in ids]
+        self.detach(existing, wait=False)
+        self.track('volume-ready', existing)
+        self.wait(['volume-detach', 'volume-ready'], timeout=timeout)
+        self.delete('backup', backups, wait=False)
+        self.delete('snapshot', snapshots, wait=False)
+        self.wait(['backup-delete', 'snapshot-delete'],
+                  timeout=backups_timeout)
+        self.delete('volume', existing, timeout=timeout)
+
+    def report(self):
+        return '\n'.join(self.stats[x].report() for x in sorted(self.stats))
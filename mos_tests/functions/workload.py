@@ -0,0 +1,438 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-guest load harness
+
+Load profiles (cpu, memory dirtying, disk, network) are started on many
+instances in parallel, each profile runs in its own process group and can
+be stopped separately. While load runs, background thread samples guest
+counters (cpu steal time, page faults) and vCPU placement on hypervisors
+(`virsh vcpuinfo`, one ssh command per hypervisor) with fixed interval.
+
+Load tools are installed only if they are absent, so instances booted from
+image baked with `BakedImage` start without apt-get.
+"""
+
+import logging
+from multiprocessing.dummy import Pool
+import threading
+import time
+
+from contextlib2 import ExitStack
+
+from mos_tests.functions.common import wait
+
+logger = logging.getLogger(__name__)
+
+TOOLS = ('stress', 'cpulimit', 'sysstat', 'iperf')
+
+PROFILES = {
+    'cpu': 'cpulimit -l {cpu_limit} -- gzip -9 </dev/urandom >/dev/null',
+    'memory': 'stress --vm-bytes {vm_bytes} --vm-keep -m {workers}',
+    'disk': 'stress --hdd {workers}',
+    'iperf_server': 'iperf -u -s -p {port}',
+    'network': ('iperf -u -c {target} -p {port} -t {duration} --len 64 '
+                '--bandwidth {bandwidth}'),
+}
+
+PROFILE_TOOLS = {
+    'cpu': ('cpulimit',),
+    'memory': ('stress',),
+    'disk': ('stress',),
+    'iperf_server': ('iperf',),
+    'network': ('iperf',),
+}
+
+DEFAULTS = {
+    'cpu_limit': 50,
+    'vm_bytes': '5M',
+    'workers': 1,
+    'port': 5002,
+    'duration': 24 * 60 * 60,
+    'bandwidth': '5M',
+}
+
+PID_FILE = '/tmp/workload_{0}.pid'
+
+GUEST_SAMPLE = "head -1 /proc/stat; grep -E '^pg(maj)?fault ' /proc/vmstat"
+
+
+def install_tools_command(tools=TOOLS):
+    """Returns command, which installs tools if some of them are absent"""
+    packages = ' '.join(tools)
+    return ('dpkg -s {0} >/dev/null 2>&1 || '
+            '(apt-get update -q && apt-get install -yq {0})').format(packages)
+
+
+def tools_userdata(tools=TOOLS):
+    return '\n'.join(['#!/bin/bash -v', install_tools_command(tools)])
+
+
+def start_command(profile, command):
+    """Returns command, which starts load in background process group"""
+    return ("setsid sh -c '{command}' <&- >/dev/null 2>&1 & "
+            "echo $! > {pid_file}").format(command=command,
+                                           pid_file=PID_FILE.format(profile))
+
+
+def stop_command(profile):
+    pid_file = PID_FILE.format(profile)
+    return ('[ -f {0} ] && kill -- -$(cat {0}) 2>/dev/null; '
+            'rm -f {0}').format(pid_file)
+
+
+def parse_guest_sample(output):
+    """Returns dict with guest counters
+
+    `cpu_total` and `cpu_steal` are jiffies from /proc/stat, `pgfault`
+    and `pgmajfault` - counters from /proc/vmstat.
+    """
+    sample = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == 'cpu':
+            values = [int(x) for x in parts[1:]]
+            sample['cpu_total'] = sum(values)
+            sample['cpu_steal'] = values[7] if len(values) > 7 else 0
+        elif parts[0] in ('pgfault', 'pgmajfault'):
+            sample[parts[0]] = int(parts[1])
+    return sample
+
+
+def vcpuinfo_command(domains):
+    return ('for d in {0}; do echo "Domain: $d"; '
+            'virsh vcpuinfo $d 2>/dev/null; done').format(' '.join(domains))
+
+
+def parse_vcpuinfo_list(output):
+    """Returns dict {domain: {vcpu: physical cpu}}"""
+    result = {}
+    domain = vcpu = None
+    for line in output.splitlines():
+        key, _, value = [x.strip() for x in line.partition(':')]
+        if key == 'Domain':
+            domain = value
+            result[domain] = {}
+        elif key == 'VCPU':
+            vcpu = int(value)
+        elif key == 'CPU' and domain is not None and vcpu is not None:
+            result[domain][vcpu] = int(value)
+    return result
+
+
+def rates(samples, key):
+    """Returns list of (time, value per second) for counter `key`"""
+    result = []
+    for (t1, s1), (t2, s2) in zip(samples, samples[1:]):
+        if key in s1 and key in s2 and t2 > t1:
+            result.append((t2, (s2[key] - s1[key]) / float(t2 - t1)))
+    return result
+
+
+def steal_percents(samples):
+    """Returns list of (time, percent of cpu time stolen by hypervisor)"""
+    result = []
+    for (_, s1), (t2, s2) in zip(samples, samples[1:]):
+        if 'cpu_total' not in s1 or 'cpu_total' not in s2:
+            continue
+        total = s2['cpu_total'] - s1['cpu_total']
+        if total > 0:
+            steal = s2['cpu_steal'] - s1['cpu_steal']
+            result.append((t2, 100.0 * steal / total))
+    return result
+
+
+class BakedImage(object):
+    """Image with load tools, snapshotted from instance booted from base
+
+    Usage::
+
+        image = BakedImage(os_conn, ubuntu_image_id)
+        boot instances from `image.image_id` with `tools_userdata()`
+        image.bake(instance)
+        ...
+        image.delete()
+    """
+
+    def __init__(self, os_conn, base_image_id, name='workload_tools'):
+        self.os_conn = os_conn
+        self.base_image_id = base_image_id
+        self.name = name
+        self.baked_id = None
+
+    @property
+    def image_id(self):
+        return self.baked_id or self.base_image_id
+
+    def bake(self, instance, timeout=10 * 60):
+        """Snapshot instance with installed tools (only once)"""
+        if self.baked_id is not None:
+            return
+        image_id = self.os_conn.nova.servers.create_image(instance, self.name)
+        wait(lambda: self.os_conn.nova.images.get(image_id).status == 'ACTIVE',
+             timeout_seconds=timeout, sleep_seconds=10,
+             waiting_for='image with load tools to become ACTIVE')
+        self.baked_id = image_id
+
+    def delete(self):
+        if self.baked_id is not None:
+            self.os_conn.glance.images.delete(self.baked_id)
+            self.baked_id = None
+
+
+class Workload(object):
+    """Coordinated load of instances with metrics sampling
+
+    Usage::
+
+        with Workload(env, os_conn, instances, keypair=keypair) as workload:
+            workload.start('memory', vm_bytes='64M')
+            ...
+        logger.info(workload.report())
+    """
+
+    def __init__(self, env, os_conn, instances, keypair=None,
+                 username='ubuntu', password=None, interval=5,
+                 concurrency=10):
+        self.env = env
+        self.os_conn = os_conn
+        self.instances = list(instances)
+        self.keypair = keypair
+        self.username = username
+        self.password = password
+        self.interval = interval
+        self.concurrency = concurrency
+        self.started = {}
+        self.guest_samples = {x.id: [] for x in self.instances}
+        self.vcpu_samples = {x.id: [] for x in self.instances}
+        self._installed = set()
+        # key -> (remote, ExitStack closing it)
+        self._remotes = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _map(self, func, items):
+        if len(items) == 0:
+            return []
+        pool = Pool(min(self.concurrency, len(items)))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.terminate()
+
+    def _remote(self, key, factory):
+        with self._lock:
+            if key in self._remotes:
+                return self._remotes[key][0]
+        # Connect without lock, so many remotes are opened in parallel
+        stack = ExitStack()
+        remote = stack.enter_context(factory())
+        with self._lock:
+            existing = self._remotes.setdefault(key, (remote, stack))
+        if existing[0] is not remote:
+            # Other thread has connected first
+            self._close_remote(key, stack)
+        return existing[0]
+
+    def _close_remote(self, key, stack):
+        try:
+            stack.close()
+        except Exception as e:
+            logger.warning("Can't close connection to {0}: {1}".format(
+                key, e))
+
+    def _drop_remote(self, key):
+        with self._lock:
+            item = self._remotes.pop(key, None)
+        if item is not None:
+            self._close_remote(key, item[1])
+
+    def _guest(self, instance):
+        return self._remote(instance.id, lambda: self.os_conn.ssh_to_instance(
+            self.env, instance, vm_keypair=self.keypair,
+            username=self.username, password=self.password))
+
+    def _host(self, fqdn):
+        node = self.env.find_node_by_fqdn(fqdn)
+        return self._remote(fqdn, node.ssh)
+
+    def execute(self, command, instances=None, sudo=False):
+        """Execute command on instances in parallel"""
+        def call(instance):
+            remote = self._guest(instance)
+            if sudo:
+                with remote.sudo:
+                    return remote.check_call(command)
+            return remote.check_call(command)
+
+        return self._map(call, instances or self.instances)
+
+    def install_tools(self, instances=None, tools=TOOLS):
+        """Install load tools, if they are absent"""
+        instances = [x for x in instances or self.instances
+                     if any((x.id, t) not in self._installed for t in tools)]
+        self.execute(install_tools_command(tools), instances, sudo=True)
+        self._installed.update((x.id, t) for x in instances for t in tools)
+
+    def start(self, profile, instances=None, **params):
+        """Start load profile on instances in parallel
+
+        Values of `params` can be callables, which take instance and return
+        value (for example, iperf server address for `network` profile).
+        """
+        instances = instances or self.instances
+        self.install_tools(instances, PROFILE_TOOLS[profile])
+
+        def call(instance):
+            values = dict(DEFAULTS)
+            values.update({k: v(instance) if callable(v) else v
+                           for k, v in params.items()})
+            command = PROFILES[profile].format(**values)
+            self._guest(instance).check_call(start_command(profile, command))
+
+        self._map(call, instances)
+        self.started.setdefault(profile, set()).update(
+            x.id for x in instances)
+        logger.info('{0} load is started on {1} instances'.format(
+            profile, len(instances)))
+
+    def stop(self, profile=None):
+        """Stop load profile (all started profiles without arguments)
+
+        Profile, which was started by another Workload, is stopped on all
+        instances.
+        """
+        profiles = [profile] if profile else list(self.started)
+        for name in profiles:
+            ids = self.started.pop(name, None)
+            instances = [x for x in self.instances
+                         if ids is None or x.id in ids]
+            self._map(lambda x: self._guest(x).execute(stop_command(name),
+                                                       verbose=False),
+                      instances)
+
+    def _sample_guest(self, instance):
+        try:
+            output = self._guest(instance).execute(GUEST_SAMPLE,
+                                                   verbose=False)
+        except Exception as e:
+            # Connection can be lost during migration, reconnect next time
+            logger.debug('Sampling {0} failed: {1}'.format(instance.name, e))
+            self._drop_remote(instance.id)
+            return
+        self.guest_samples[instance.id].append(
+            (time.time(), parse_guest_sample(output.stdout_string)))
+
+    def _sample_host(self, item):
+        host, instances = item
+        domains = {getattr(x, 'OS-EXT-SRV-ATTR:instance_name'): x
+                   for x in instances}
+        output = self._host(host).execute(vcpuinfo_command(domains),
+                                          verbose=False)
+        now = time.time()
+        for domain, vcpus in parse_vcpuinfo_list(
+                output.stdout_string).items():
+            if domain in domains:
+                self.vcpu_samples[domains[domain].id].append(
+                    (now, {'host': host, 'vcpus': vcpus}))
+
+    def sample(self):
+        ids = set(self.guest_samples)
+        by_host = {}
+        for server in self.os_conn.nova.servers.list():
+            if server.id in ids:
+                host = getattr(server, 'OS-EXT-SRV-ATTR:hypervisor_hostname')
+                by_host.setdefault(host, []).append(server)
+        self._map(self._sample_host, list(by_host.items()))
+        self._map(self._sample_guest, self.instances)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning('Workload sampling failed: {0}'.format(e))
+            self._stop.wait(self.interval)
+
+    def start_sampling(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop_sampling(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stop sampling and close connections (load keeps running)"""
+        self.stop_sampling()
+        with self._lock:
+            remotes, self._remotes = self._remotes, {}
+        for key, (_, stack) in remotes.items():
+            self._close_remote(key, stack)
+
+    def __enter__(self):
+        return self.start_sampling()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop_sampling()
+        try:
+            self.stop()
+        finally:
+            self.close()
+
+    def series(self):
+        """Returns time series of each instance
+
+        Dict {instance id: {'steal_pct': [(time, value)], 'pgfault_per_s':
+        [...], 'pgmajfault_per_s': [...], 'placement': [(time, {'host': ...,
+        'vcpus': {vcpu: cpu}})]}}
+        """
+        result = {}
+        for instance_id, samples in self.guest_samples.items():
+            result[instance_id] = {
+                'steal_pct': steal_percents(samples),
+                'pgfault_per_s': rates(samples, 'pgfault'),
+                'pgmajfault_per_s': rates(samples, 'pgmajfault'),
+                'placement': list(self.vcpu_samples[instance_id]),
+            }
+        return result
+
+    def report(self):
+        lines = ['Workload of {0} instances:'.format(len(self.instances))]
+        series = self.series()
+        for instance in sorted(self.instances, key=lambda x: x.name):
+            data = series[instance.id]
+            steal = [x[1] for x in data['steal_pct']]
+            faults = [x[1] for x in data['pgmajfault_per_s']]
+            placements = set(
+                (x[1]['host'], tuple(sorted(x[1]['vcpus'].items())))
+                for x in data['placement'])
+            lines.append(
+                '  {name}: steal max={steal:.1f}% mean={mean:.1f}%, '
+                'major faults max={faults:.1f}/s, '
+                'vcpu placements={placements}'.format(
+                    name=instance.name,
+                    steal=max(steal) if steal else 0,
+                    mean=sum(steal) / len(steal) if steal else 0,
+                    faults=max(faults) if faults else 0,
+                    placements=len(placements)))
+        return '\n'.join(lines)
@@ -15,42 +15,17 @@
 import hashlib
 import json
 import logging
-import random
 import time
-import xml.etree.ElementTree as ET
 
 import pytest
 
-from mos_tests.functions.common import is_ceph_time_sync
-from mos_tests.functions.common import wait
+from mos_tests.functions.ceph import CephMonitor
+from mos_tests.functions.ceph import is_clean
+from mos_tests.functions.data_source import DataStream
 
 logger = logging.getLogger(__name__)
 
 
-class FakeFile(object):
-    """Semi-random file-like object with md5 generation"""
-    chars = [chr(x) for x in range(256)]
-
-    def __init__(self, size):
-        self.size = size
-        self.pos = 0
-        self.md5 = hashlib.md5()
-
-    def read(self, size=None):
-        if size is None:
-            size = self.size - self.pos
-        else:
-            size = min(self.size - self.pos, size)
-        self.pos += size
-        chunk = random.choice(self.chars) * size
-        self.md5.update(chunk)
-        return chunk
-
-    @property
-    def digest(self):
-        return self.md5.hexdigest()
-
-
 @pytest.fixture
 def ceph_nodes_osds(env):
     controller = env.get_nodes_by_role('controller')[0]
@@ -67,6 +42,13 @@ def ceph_nodes_osds(env):
     return nodes_with_osd_count
 
 
+@pytest.yield_fixture
+def ceph_monitor(controller_remote):
+    with CephMonitor(controller_remote) as monitor:
+        yield monitor
+    logger.info(monitor.report())
+
+
 @pytest.fixture
 def replication_factor(env):
     storage_data = env.get_settings_data()['editable']['storage']
@@ -86,56 +68,31 @@ def get_glance_image_md5(os_conn, image):
     return md5.hexdigest()
 
 
-def up_down_nodes(controller):
-    with controller.ssh() as remote:
-        output = remote.check_call(
-            'ceph status -f xml-pretty').stdout_string
-
-    root = ET.fromstring(output)
-    nodes = int(root.find('osdmap/osdmap/num_osds').text)
-    up_nodes = int(root.find('osdmap/osdmap/num_up_osds').text)
-    return {'up': up_nodes, 'down': nodes - up_nodes}
+def down_osds(sample):
+    up, _, total = sample.osds
+    return total - up
 
 
-def ceph_nodes_down(controller, devops_nodes, osd_count):
-    down_number = up_down_nodes(controller)['down']
+def ceph_nodes_down(monitor, devops_nodes, osd_count):
+    down_number = down_osds(monitor.sample())
     for devops_node in devops_nodes:
         devops_node.destroy()
-    wait(
-        lambda: up_down_nodes(
-            controller)['down'] == down_number + osd_count,
-        timeout_seconds=600,
-        waiting_for='ceph nodes becomes down',
-        sleep_seconds=30)
+    monitor.wait(lambda x: down_osds(x) == down_number + osd_count,
+                 timeout=600, waiting_for='ceph nodes becomes down')
 
 
-def ceph_nodes_up(controller, devops_nodes, osd_count):
-    up_number = up_down_nodes(controller)['up']
+def ceph_nodes_up(monitor, devops_nodes, osd_count):
+    up_number = monitor.sample().osds[0]
     for devops_node in devops_nodes:
         devops_node.start()
-    wait(
-        lambda: up_down_nodes(
-            controller)['up'] == up_number + osd_count,
-        timeout_seconds=600,
-        waiting_for='ceph nodes becomes up',
-        sleep_seconds=30)
-
-
-def is_replication_finished(controller):
-    with controller.ssh() as remote:
-        output = remote.check_call(
-            'ceph status -f xml-pretty').stdout_string
-    states = ET.fromstring(output).findall(
-        'pgmap/pgs_by_state/pgs_by_state_element')
-    if len(states) == 1 and states[0].find(
-            'state_name').text == 'active+clean':
-        return True
-    return False
+    monitor.wait(lambda x: x.osds[0] == up_number + osd_count,
+                 timeout=600, waiting_for='ceph nodes becomes up')
 
 
 @pytest.mark.testrail_id('1295484')
 @pytest.mark.check_env_('is_images_ceph_enabled')
-def test_sync_type_on_ceph(devops_env, env, os_conn, controller_remote):
+def test_sync_type_on_ceph(devops_env, env, os_conn, controller_remote,
+                           ceph_monitor):
     """Check file on ceph after time unsync/sync
 
     Scenario:
@@ -155,14 +112,12 @@ def test_sync_type_on_ceph(devops_env, env, os_conn, controller_remote):
     size = 6 * 1024**3  # 6GB
 
     # Wait till time will be synchronized and Ceph be ok
-    wait(lambda: is_ceph_time_sync(controller_remote),
-         timeout_seconds=10 * 60,
-         sleep_seconds=60,
-         waiting_for='ceph monitors to detect clock sync '
-                     'BEFORE any actions')
+    ceph_monitor.wait(lambda x: x.time_sync, timeout=10 * 60,
+                      waiting_for='ceph monitors to detect clock sync '
+                                  'BEFORE any actions')
 
-    f1 = FakeFile(size=size)
-    f2 = FakeFile(size=size)
+    f1 = DataStream(size=size, seed=1)
+    f2 = DataStream(size=size, seed=2)
 
     image1 = os_conn.glance.images.create(name='image1',
                                           disk_format='raw',
@@ -183,10 +138,8 @@ def test_sync_type_on_ceph(devops_env, env, os_conn, controller_remote):
             time.sleep(5)
             remote.check_call('date -u -s "{0}"'.format(date))
 
-    wait(lambda: not is_ceph_time_sync(controller_remote),
-         timeout_seconds=10 * 60,
-         sleep_seconds=30,
-         waiting_for='ceph monitors to detect clock skew')
+    ceph_monitor.wait(lambda x: not x.time_sync, timeout=10 * 60,
+                      waiting_for='ceph monitors to detect clock skew')
 
     image2 = os_conn.glance.images.create(name='image1',
                                           disk_format='raw',
@@ -204,10 +157,8 @@ def test_sync_type_on_ceph(devops_env, env, os_conn, controller_remote):
     controller_remote.check_call('pcs resource enable p_ntp')
 
     # Ceph clock sync time take up to 300 seconds, according documentation
-    wait(lambda: is_ceph_time_sync(controller_remote),
-         timeout_seconds=10 * 60,
-         sleep_seconds=60,
-         waiting_for='ceph monitors to detect clock sync')
+    ceph_monitor.wait(lambda x: x.time_sync, timeout=10 * 60,
+                      waiting_for='ceph monitors to detect clock sync')
 
     assert f1.digest == get_glance_image_md5(os_conn, image1)
     assert f2.digest == get_glance_image_md5(os_conn, image2)
@@ -216,7 +167,8 @@ def test_sync_type_on_ceph(devops_env, env, os_conn, controller_remote):
 @pytest.mark.testrail_id('1295465')
 @pytest.mark.check_env_('is_images_ceph_enabled')
 def test_data_replication_with_factor_2(
-        env, devops_env, os_conn, ceph_nodes_osds, replication_factor):
+        env, devops_env, os_conn, ceph_nodes_osds, replication_factor,
+        ceph_monitor):
     """This test case checks data replication with replication factor 2 if
     only 2 node with ceph-osd role is present
 
@@ -236,34 +188,30 @@ def test_data_replication_with_factor_2(
     if len(ceph_nodes) != replication_factor:
         pytest.skip("Incorrect count of node with ceph-osd role")
 
-    controller = env.get_nodes_by_role('controller')[0]
     devops_nodes = [devops_env.get_node_by_fuel_node(node_off) for
                     node_off in ceph_nodes]
 
     name = "Test_ceph_2"
 
     logger.info("Shutdown one ceph node")
-    ceph_nodes_down(controller, [devops_nodes[0]],
+    ceph_nodes_down(ceph_monitor, [devops_nodes[0]],
                     ceph_nodes_osds[ceph_nodes[0]])
 
     logger.info("Upload file 20Gb to glance")
     image = os_conn.glance.images.create(
         name=name, disk_format='qcow2', container_format='bare')
-    image_file = FakeFile(size=20 * 1024 ** 3)
+    image_file = DataStream(size=20 * 1024 ** 3, seed=0)
     os_conn.glance.images.upload(image.id, image_file)
 
     logger.info("Enable the ceph node")
-    ceph_nodes_up(controller, [devops_nodes[0]],
+    ceph_nodes_up(ceph_monitor, [devops_nodes[0]],
                   ceph_nodes_osds[ceph_nodes[0]])
 
     # Wait for data replication
-    wait(lambda: is_replication_finished(controller),
-         timeout_seconds=1500,
-         waiting_for='replication',
-         sleep_seconds=60)
+    ceph_monitor.wait(is_clean, timeout=1500, waiting_for='replication')
 
     logger.info("Shutdown another ceph node")
-    ceph_nodes_down(controller, [devops_nodes[1]],
+    ceph_nodes_down(ceph_monitor, [devops_nodes[1]],
                     ceph_nodes_osds[ceph_nodes[1]])
 
     logger.info("Check MD5 sum of the image.")
@@ -273,7 +221,8 @@ def test_data_replication_with_factor_2(
 @pytest.mark.testrail_id('1295466')
 @pytest.mark.check_env_('is_images_ceph_enabled')
 def test_data_replication_with_factor_3(
-        env, devops_env, os_conn, ceph_nodes_osds, replication_factor):
+        env, devops_env, os_conn, ceph_nodes_osds, replication_factor,
+        ceph_monitor):
     """This test case checks data replication with replication factor 3 if
     only 3 node with ceph-osd role is present
 
@@ -297,47 +246,43 @@ def test_data_replication_with_factor_3(
     if len(ceph_nodes) != replication_factor:
         pytest.skip("Incorrect count of node with ceph-osd role")
 
-    controller = env.get_nodes_by_role('controller')[0]
     devops_nodes = [devops_env.get_node_by_fuel_node(node_off) for
                     node_off in ceph_nodes]
     name = "Test_ceph_3"
 
     logger.info("Shutdown ceph nodes 2 and 3")
     ceph_nodes_down(
-        controller, [devops_nodes[1], devops_nodes[2]],
+        ceph_monitor, [devops_nodes[1], devops_nodes[2]],
         ceph_nodes_osds[ceph_nodes[1]] + ceph_nodes_osds[ceph_nodes[2]])
 
     logger.info("Upload file 20Gb to glance")
     image = os_conn.glance.images.create(
         name=name, disk_format='qcow2', container_format='bare')
-    image_file = FakeFile(size=20 * 1024 ** 3)
+    image_file = DataStream(size=20 * 1024 ** 3, seed=0)
     os_conn.glance.images.upload(image.id, image_file)
 
     logger.info("Enable the ceph nodes 2 and 3")
     ceph_nodes_up(
-        controller, [devops_nodes[1], devops_nodes[2]],
+        ceph_monitor, [devops_nodes[1], devops_nodes[2]],
         ceph_nodes_osds[ceph_nodes[1]] + ceph_nodes_osds[ceph_nodes[2]])
 
     # Wait for data replication
-    wait(lambda: is_replication_finished(controller),
-         timeout_seconds=1500,
-         waiting_for='replication',
-         sleep_seconds=60)
+    ceph_monitor.wait(is_clean, timeout=1500, waiting_for='replication')
 
     logger.info("Shutdown ceph nodes 1 and 3")
     ceph_nodes_down(
-        controller, [devops_nodes[0], devops_nodes[2]],
+        ceph_monitor, [devops_nodes[0], devops_nodes[2]],
         ceph_nodes_osds[ceph_nodes[0]] + ceph_nodes_osds[ceph_nodes[2]])
 
     logger.info("Check MD5 sum of the image.")
     assert image_file.digest == get_glance_image_md5(os_conn, image)
 
     logger.info("Enable the ceph node 3")
-    ceph_nodes_up(controller, [devops_nodes[2]],
+    ceph_nodes_up(ceph_monitor, [devops_nodes[2]],
                   ceph_nodes_osds[ceph_nodes[2]])
 
     logger.info("Shutdown ceph nodes 2 ")
-    ceph_nodes_down(controller, [devops_nodes[1]],
+    ceph_nodes_down(ceph_monitor, [devops_nodes[1]],
                     ceph_nodes_osds[ceph_nodes[1]])
 
     logger.info("Check MD5 sum of the image.")
@@ -21,6 +21,7 @@ from six.moves import configparser
 from tempest.lib.cli import base
 
 from mos_tests.functions import common
+from mos_tests.functions import data_source
 from mos_tests.functions import os_cli
 
 
@@ -102,10 +103,8 @@ def image_file(request):
 def image_file_remote(request, controller_remote, suffix):
     size = getattr(request, 'param', 100)  # Size in MB
     filename = '/tmp/{}'.format(suffix[:6])
-    with controller_remote.open(filename, 'w') as f:
-        f.seek(size * (1024 ** 2))
-        f.write(' ')
-        f.flush()
+    data_source.create_remote_file(controller_remote, filename,
+                                   size * (1024 ** 2))
     controller_remote.execute('ls -alph {}'.format(filename))
     yield filename
     controller_remote.execute('rm -f {}'.format(filename))
@@ -27,8 +27,8 @@ logger = logging.getLogger(__name__)
 
 
 @pytest.fixture
-def ubuntu_image_id(os_conn):
-    return next(ubuntu_image_id_base(os_conn))
+def ubuntu_image_id(os_conn, shared_resources):
+    return next(ubuntu_image_id_base(os_conn, shared_resources))
 
 
 @pytest.mark.check_env_('is_ha')
@@ -17,8 +17,8 @@ import hashlib
 import tempfile
 
 import pytest
-from tempest.lib.cli import output_parser as parser
 
+from mos_tests.functions import cli_output
 from mos_tests.functions.common import wait
 from mos_tests import settings
 
@@ -27,14 +27,14 @@ pytestmark = pytest.mark.undestructive
 
 def check_image_in_list(glance, image):
     __tracebackhide__ = True
-    image_list = parser.listing(glance('image-list'))
+    image_list = cli_output.listing(glance('image-list'))
     if image['id'] not in [x['ID'] for x in image_list]:
         pytest.fail('There is no image {id} in list'.format(**image))
 
 
 def check_image_not_in_list(glance, image):
     __tracebackhide__ = True
-    image_list = parser.listing(glance('image-list'))
+    image_list = cli_output.listing(glance('image-list'))
     if image['id'] in [x['ID'] for x in image_list]:
         pytest.fail('There is image {id} in list'.format(**image))
 
@@ -42,7 +42,7 @@ def check_image_not_in_list(glance, image):
 def check_image_active(glance, image):
     __tracebackhide__ = True
 
-    image_data = parser.details(glance('image-show {id}'.format(**image)))
+    image_data = cli_output.details(glance('image-show {id}'.format(**image)))
     if image_data['status'] != 'active':
         pytest.fail('Image {id} status is {status} (not active)'.format(
             **image_data))
@@ -72,7 +72,7 @@ def test_update_raw_data_in_image(glance_remote, image_file_remote, suffix):
     name = "Test_{0}".format(suffix[:6])
     cmd = ("image-create --name {name} --container-format bare --disk-format "
            "qcow2".format(name=name))
-    image = parser.details(glance_remote(cmd))
+    image = cli_output.details(glance_remote(cmd))
     image_data = glance_remote('image-show {id}'.format(**image)).details()
     assert image_data['status'] == 'queued'
 
@@ -108,7 +108,7 @@ def test_share_glance_image(glance, user, project, image_file, suffix):
     cmd = ("image-create --name {name} --container-format bare --disk-format "
            "qcow2 --file {file} --progress".format(name=name,
                                                    file=image_file))
-    image = parser.details(glance(cmd))
+    image = cli_output.details(glance(cmd))
 
     check_image_active(glance, image)
 
@@ -117,15 +117,15 @@ def test_share_glance_image(glance, user, project, image_file, suffix):
     glance('member-create {id} {project_id}'.format(project_id=project['id'],
                                                     **image))
 
-    member_list = parser.listing(glance('member-list --image-id {id}'.format(
-        **image)))
+    member_list = cli_output.listing(
+        glance('member-list --image-id {id}'.format(**image)))
     assert project['id'] in [x['Member ID'] for x in member_list]
 
     glance('member-delete {id} {project_id}'.format(project_id=project['id'],
                                                     **image))
 
-    member_list = parser.listing(glance('member-list --image-id {id}'.format(
-        **image)))
+    member_list = cli_output.listing(
+        glance('member-list --image-id {id}'.format(**image)))
     assert project['id'] not in [x['Member ID'] for x in member_list]
 
     glance('image-delete {id}'.format(**image))
@@ -151,7 +151,7 @@ def test_image_create_delete_from_file(glance, image_file, suffix):
                name=name,
                source=image_file))
 
-    image = parser.details(glance(cmd))
+    image = cli_output.details(glance(cmd))
 
     check_image_active(glance, image)
 
@@ -185,10 +185,11 @@ def test_image_create_delete_from_url(glance, suffix, option):
                option=option,
                image_url=image_url))
 
-    image = parser.details(glance(cmd))
+    image = cli_output.details(glance(cmd))
 
     def is_image_active():
-        image_data = parser.details(glance('image-show {id}'.format(**image)))
+        image_data = cli_output.details(
+            glance('image-show {id}'.format(**image)))
         return image_data['status'] == 'active'
 
     wait(is_image_active, timeout_seconds=60, waiting_for='image is active')
@@ -249,7 +250,7 @@ def test_image_file_equal(glance, image_file, suffix):
                name=name,
                source=image_file))
 
-    image = parser.details(glance(cmd))
+    image = cli_output.details(glance(cmd))
 
     with tempfile.NamedTemporaryFile() as new_file:
         new_file.write(glance('image-download {id}'.format(**image)))
@@ -276,7 +277,7 @@ def test_unicode_support(glance_remote, suffix):
     """
     name = u"試験画像_{0}".format(suffix[:6])
     cmd = (u"image-create --name {name}".format(name=name))
-    image = parser.details(glance_remote(cmd))
+    image = cli_output.details(glance_remote(cmd))
 
     check_image_in_list(glance_remote, image)
 
@@ -307,7 +308,7 @@ def test_upload_image_with_token_expiration(glance, image_file, suffix):
                name=name,
                source=image_file))
 
-    image = parser.details(glance(cmd))
+    image = cli_output.details(glance(cmd))
 
     check_image_active(glance, image)
 
@@ -338,7 +339,7 @@ def test_update_properties_of_image(glance_remote, image_file_remote, suffix,
     cmd = ("image-create --name {name} --container-format bare --disk-format "
            "qcow2 --file {file} --progress".format(name=name,
                                                    file=image_file_remote))
-    image = parser.details(glance_remote(cmd))
+    image = cli_output.details(glance_remote(cmd))
 
     check_image_active(glance_remote, image)
 
@@ -435,7 +436,7 @@ def test_big_image_create_delete_from_file(glance_remote, image_file_remote,
            '--disk-format qcow2 --file {source} --progress'.format(
                sec=timeout_for_cli_cmd, name=name, source=image_file_remote))
 
-    image = parser.details(glance_remote(cmd))
+    image = cli_output.details(glance_remote(cmd))
     check_image_active(glance_remote, image)
     glance_remote('image-delete {id}'.format(**image))
     check_image_not_in_list(glance_remote, image)
@@ -9,7 +9,8 @@ IMAGE_ID=$(python -c 'import uuid; print uuid.uuid4()')
 
 export OS_IMAGE_API_VERSION
 
-fallocate -l 120GB $IMAGE_NAME
+# Sparse file takes no disk space
+truncate -s 120GB $IMAGE_NAME
 if [[ $? -ne 0 ]]; then
     echo "Error during creation image file"
     exit 1
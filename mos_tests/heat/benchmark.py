@@ -0,0 +1,169 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+
+import yaml
+
+from mos_tests.functions.benchmark import Stats
+from mos_tests.functions import stacks
+
+logger = logging.getLogger(__name__)
+
+HOT_VERSION = '2015-04-30'
+
+# Name of ResourceGroup member template in stack files
+UNIT_TEMPLATE = 'unit.yaml'
+
+# Events of group members stacks are counted too
+NESTED_DEPTH = 2
+
+
+def unit_template(resources):
+    """Returns template of one ResourceGroup member
+
+    :param resources: list of resources kinds: `server`, `port`, `volume`
+        or `random` (OS::Heat::RandomString, engine only load)
+    """
+    parameters = {}
+    template = {}
+    if 'server' in resources or 'port' in resources:
+        parameters['network'] = {'type': 'string'}
+    if 'random' in resources:
+        template['random'] = {'type': 'OS::Heat::RandomString'}
+    if 'port' in resources:
+        template['port'] = {
+            'type': 'OS::Neutron::Port',
+            'properties': {'network': {'get_param': 'network'}}}
+    if 'volume' in resources:
+        template['volume'] = {'type': 'OS::Cinder::Volume',
+                              'properties': {'size': 1}}
+    if 'server' in resources:
+        parameters['image'] = {'type': 'string'}
+        parameters['flavor'] = {'type': 'string'}
+        if 'port' in resources:
+            networks = [{'port': {'get_resource': 'port'}}]
+        else:
+            networks = [{'network': {'get_param': 'network'}}]
+        template['server'] = {
+            'type': 'OS::Nova::Server',
+            'properties': {'image': {'get_param': 'image'},
+                           'flavor': {'get_param': 'flavor'},
+                           'networks': networks}}
+        if 'volume' in resources:
+            template['attachment'] = {
+                'type': 'OS::Cinder::VolumeAttachment',
+                'properties': {'instance_uuid': {'get_resource': 'server'},
+                               'volume_id': {'get_resource': 'volume'}}}
+    return {'heat_template_version': HOT_VERSION,
+            'parameters': parameters,
+            'resources': template}
+
+
+def group_template(unit_parameters):
+    """Returns template with ResourceGroup of `count` (parameter) units"""
+    parameters = {x: {'type': 'string'} for x in unit_parameters}
+    parameters['count'] = {'type': 'number'}
+    return {
+        'heat_template_version': HOT_VERSION,
+        'parameters': parameters,
+        'resources': {
+            'group': {
+                'type': 'OS::Heat::ResourceGroup',
+                'properties': {
+                    'count': {'get_param': 'count'},
+                    'resource_def': {
+                        'type': UNIT_TEMPLATE,
+                        'properties': {x: {'get_param': x}
+                                       for x in unit_parameters}}}}}}
+
+
+def build_templates(resources):
+    """Returns (template, files) for stacks.create/update"""
+    unit = unit_template(resources)
+    template = group_template(sorted(unit['parameters']))
+    return template, {UNIT_TEMPLATE: yaml.safe_dump(unit)}
+
+
+def resources_count(resources, group_size):
+    """Returns count of resources of stack (with nested stacks)"""
+    unit = unit_template(resources)
+    # group + nested group stack resource per member + members resources
+    return 1 + group_size * (1 + len(unit['resources']))
+
+
+def operation_summary(name, tracker, resources):
+    """Returns (Stats, summary) of stacks operation
+
+    Summary contains stacks operation latencies, `ops_per_s` (stacks per
+    second) and engine throughput: `events_per_s` and `resources_per_s`.
+    """
+    stats = Stats(name)
+    for stack in tracker.stacks:
+        stats.add(stack.start, stack.end)
+    summary = stats.summary()
+    duration = float(max(stats.duration, 0.001))
+    summary['events_per_s'] = sum(x.events for x in tracker.stacks) / duration
+    summary['resources_per_s'] = resources * stats.count / duration
+    return stats, summary
+
+
+def run_benchmark(heat, prefix, count, group_size, resources, parameters,
+                  concurrency, timeout=60 * 60):
+    """Create, scale up (update) and delete stacks concurrently
+
+    Stacks are scaled up by update from `group_size` to `2 * group_size`
+    members.
+
+    :param parameters: group template parameters (network, image, flavor)
+        except `count`
+    :return: list of (operation, Stats, summary)
+    """
+    template, files = build_templates(resources)
+    names = ['{0}_{1}'.format(prefix, i) for i in range(count)]
+    kwargs = {'template': template, 'files': files,
+              'timeout_mins': timeout // 60}
+    results = []
+    try:
+        tracker = stacks.create_stacks(
+            heat,
+            [dict(kwargs, stack_name=name,
+                  parameters=dict(parameters, count=group_size))
+             for name in names],
+            timeout=timeout, concurrency=concurrency,
+            nested_depth=NESTED_DEPTH)
+        results.append(('create',) + operation_summary(
+            'stack-create', tracker,
+            resources_count(resources, group_size)))
+
+        update = dict(kwargs, parameters=dict(parameters,
+                                              count=2 * group_size))
+        tracker = stacks.update_stacks(
+            heat, [(x, update) for x in tracker.ids], timeout=timeout,
+            concurrency=concurrency, nested_depth=NESTED_DEPTH)
+        results.append(('update',) + operation_summary(
+            'stack-update', tracker,
+            resources_count(resources, group_size)))
+
+        tracker = stacks.delete_stacks(heat, tracker.ids, timeout=timeout,
+                                       concurrency=concurrency)
+        results.append(('delete',) + operation_summary(
+            'stack-delete', tracker,
+            resources_count(resources, 2 * group_size)))
+    finally:
+        leftovers = [x.id for x in heat.stacks.list(filters={'name': names})]
+        if leftovers:
+            stacks.delete_stacks(heat, leftovers, timeout=timeout,
+                                 concurrency=concurrency)
+    return results
@@ -23,6 +23,7 @@ import pytest
 from mos_tests.functions.base import OpenStackTestCase
 from mos_tests.functions import common as common_functions
 from mos_tests.functions import file_cache
+from mos_tests.functions import stacks as stack_functions
 from mos_tests import settings
 
 from keystoneclient.v3 import Client as KeystoneClientV3
@@ -48,8 +49,7 @@ class HeatIntegrationTests(OpenStackTestCase):
         self.uid_list = []
 
     def tearDown(self):
-        for stack_uid in self.uid_list:
-            common_functions.delete_stack(self.heat, stack_uid)
+        stack_functions.delete_stacks(self.heat, self.uid_list)
         self.uid_list = []
 
     @pytest.mark.testrail_id('631860')
@@ -1464,7 +1464,7 @@ class HeatIntegrationTests(OpenStackTestCase):
         assert resource['output']['description'] == 'ID of resource a', err_msg
 
         self.assertTrue(common_functions.check_stack_status(
-            stack_name, self.heat, 'CREATE_COMPLETE', 300))
+            stack_name, self.heat, 'CREATE_COMPLETE', 5))
 
     @pytest.mark.testrail_id('844926')
     def test_check_property_user_data_update_policy(self):
@@ -1498,7 +1498,7 @@ class HeatIntegrationTests(OpenStackTestCase):
             self.heat.stacks.update(stack_id, **stack_updated)
             self.assertTrue(
                 common_functions.check_stack_status(stack_name, self.heat,
-                                                    'UPDATE_COMPLETE', 120))
+                                                    'UPDATE_COMPLETE', 2))
             vms = [vm for vm in self.nova.servers.list() if policy in vm.name]
             vm_id_after = vms[0].id
             assert len(vms) == 1
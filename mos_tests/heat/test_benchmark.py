@@ -0,0 +1,65 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+
+import pytest
+
+from mos_tests.functions.benchmark import Baselines
+from mos_tests.heat import benchmark
+from mos_tests import settings
+
+logger = logging.getLogger(__name__)
+
+COUNT = settings.HEAT_BENCHMARK_STACKS
+GROUP_SIZE = settings.HEAT_BENCHMARK_GROUP_SIZE
+CONCURRENCY = settings.HEAT_BENCHMARK_CONCURRENCY
+
+
+@pytest.mark.undestructive
+@pytest.mark.parametrize('resources', [
+    ['random'],
+    settings.HEAT_BENCHMARK_RESOURCES,
+], ids=['engine', 'resources'])
+def test_resource_group_benchmark(os_conn, resources):
+    """Concurrent Heat stacks create/update/delete latency and throughput
+
+    Actions:
+    1. Create several stacks with ResourceGroup of nested templates
+        concurrently, wait for CREATE_COMPLETE of all stacks.
+    2. Scale up all stacks twice by update.
+    3. Delete all stacks.
+    4. Check that stacks operations latency and stacks, events and
+        resources throughput are not worse than stored baselines.
+    """
+    parameters = {}
+    if 'server' in resources or 'port' in resources:
+        parameters['network'] = os_conn.int_networks[0]['id']
+    if 'server' in resources:
+        parameters['image'] = 'TestVM'
+        parameters['flavor'] = 'm1.micro'
+    results = benchmark.run_benchmark(
+        os_conn.heat, 'heat_benchmark', count=COUNT, group_size=GROUP_SIZE,
+        resources=resources, parameters=parameters, concurrency=CONCURRENCY)
+
+    baselines = Baselines()
+    regressions = []
+    for operation, stats, summary in results:
+        logger.info('{0}\n  {1:.1f} events/s, {2:.1f} resources/s'.format(
+            stats.report(), summary['events_per_s'],
+            summary['resources_per_s']))
+        key = 'heat.{0}.{1}x{2}.x{3}.{4}'.format(
+            '+'.join(resources), COUNT, GROUP_SIZE, CONCURRENCY, operation)
+        regressions.extend(baselines.check(key, summary))
+    assert not regressions, '\n'.join(regressions)
@@ -76,7 +76,16 @@ class IronicActions(object):
                                           timeout=60 * 10,
                                           **kwargs)
 
-    def create_node(self, driver, driver_info, node_properties, mac_address):
+    def get_deploy_images(self):
+        """Return deploy images ids for node driver_info"""
+        return {
+            'deploy_kernel': self._get_image('ironic-deploy-linux').id,
+            'deploy_ramdisk': self._get_image('ironic-deploy-initramfs').id,
+            'deploy_squashfs': self._get_image('ironic-deploy-squashfs').id,
+        }
+
+    def create_node(self, driver, driver_info, node_properties, mac_address,
+                    deploy_images=None):
         """Create ironic node with port
 
         :param driver: driver name
@@ -88,15 +97,14 @@ class IronicActions(object):
         :type node_properties: dict
         :param mac_address: MAC address to port assign
         :type mac_address: str
+        :param deploy_images: result of `get_deploy_images` (to avoid
+            images lookup for each node)
+        :type deploy_images: dict
         :return: created ironic node object
         :rtype: ironicclient.v1.node.Node
         """
 
-        driver_info.update({
-            'deploy_kernel': self._get_image('ironic-deploy-linux').id,
-            'deploy_ramdisk': self._get_image('ironic-deploy-initramfs').id,
-            'deploy_squashfs': self._get_image('ironic-deploy-squashfs').id,
-        })
+        driver_info.update(deploy_images or self.get_deploy_images())
 
         node = self.client.node.create(driver=driver,
                                        driver_info=driver_info,
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import logging
 import os
 import pytest
@@ -20,6 +21,7 @@ import subprocess
 import yaml
 
 from mos_tests.ironic import actions
+from mos_tests.ironic import provisioning
 from mos_tests.ironic import testutils
 from mos_tests import settings
 
@@ -125,24 +127,26 @@ def ironic_nodes(request, env, ironic_drivers_params, ironic, devops_env):
 
     node_count = getattr(request, 'param', 1)
     devops_nodes = []
-    nodes = []
-
-    for i, config in enumerate(ironic_drivers_params[:node_count]):
-        devops_node, node = make_ironic_node(config=config,
-                                             devops_env=devops_env,
-                                             ironic=ironic,
-                                             name='baremetal_{i}'.format(i=i),
-                                             fuel_env=env)
-        nodes.append(node)
-        if devops_node is not None:
-            devops_nodes.append(devops_node)
+    # Configs can be the same objects (yaml aliases), so copy each one
+    configs = [copy.deepcopy(x) for x in ironic_drivers_params[:node_count]]
+
+    for i, config in enumerate(configs):
+        if config['driver'] == 'fuel_libvirt':
+            devops_nodes.append(make_devops_node(
+                config=config,
+                devops_env=devops_env,
+                fuel_env=env,
+                name='baremetal_{i}'.format(i=i)))
+
+    pipeline = provisioning.ProvisioningPipeline(ironic)
+    nodes = pipeline.enroll(configs)
+    pipeline.prepare()
 
     env.wait_for_ostf_pass(['sanity'], timeout_seconds=60 * 5)
 
     yield nodes
 
-    for node in nodes:
-        ironic.delete_node(node)
+    pipeline.delete()
 
     for node in devops_nodes:
         devops_env.del_node(node)
@@ -21,6 +21,7 @@ from mos_tests.environment.os_actions import OpenStackActions
 from mos_tests.functions import common
 from mos_tests.ironic import actions
 from mos_tests.ironic import conftest
+from mos_tests.ironic import provisioning
 from mos_tests.ironic import testutils
 from mos_tests import settings
 
@@ -28,18 +29,20 @@ logger = logging.getLogger(__name__)
 
 
 @pytest.fixture
-def instances(make_image, flavors, keypair, ironic_nodes, ironic, request):
+def instances(os_conn, make_image, flavors, keypair, ironic_nodes, ironic,
+              request):
     instance_count = getattr(request, 'param', 1)
-    instances = []
 
+    pipeline = provisioning.ProvisioningPipeline(ironic)
+    pipeline.add_nodes(ironic_nodes)
     distribution = zip(flavors, ironic_nodes)[:instance_count]
-    for i, (flavor, ironic_node) in enumerate(distribution, 1):
-        image = make_image(node_driver=ironic_node.driver)
-        instance = ironic.boot_instance(name='ironic-{0}'.format(i),
-                                        image=image,
-                                        flavor=flavor,
-                                        keypair=keypair)
-        instances.append(instance)
+    items = [('ironic-{0}'.format(i),
+              make_image(node_driver=ironic_node.driver),
+              flavor)
+             for i, (flavor, ironic_node) in enumerate(distribution, 1)]
+    instances = pipeline.deploy(items, keypair)
+    logger.info(pipeline.report())
+    os_conn.wait_servers_ssh_ready(instances)
 
     return instances
 
@@ -0,0 +1,274 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Bulk ironic nodes provisioning
+
+Nodes from inventory (`ironic_nodes.yaml`) are enrolled concurrently, then
+all nodes are moved through enroll -> manageable -> available -> active
+states together: each poll lists all nodes once and issues next state
+transition for nodes, which are ready for it. Time of each state change
+is recorded per node, so deploy time of each node and deploy throughput
+of each conductor can be reported.
+"""
+
+import copy
+import logging
+from multiprocessing.dummy import Pool
+import time
+
+from mos_tests.functions.benchmark import Stats
+from mos_tests.functions.common import wait
+
+logger = logging.getLogger(__name__)
+
+# provision_state -> action to move node towards `available`
+PREPARE_ACTIONS = {
+    'enroll': 'manage',
+    'manageable': 'provide',
+}
+
+FAILED_STATES = ('error', 'deploy failed', 'clean failed', 'inspect failed')
+
+
+class ProvisioningError(Exception):
+    def __init__(self, records):
+        self.records = records
+        super(ProvisioningError, self).__init__(
+            'Nodes provisioning failed: {0}'.format(
+                ['{0.uuid}: {0.state} ({0.last_error})'.format(x)
+                 for x in records]))
+
+
+def _map(func, items, concurrency):
+    """Call func for each item concurrently, raise first error"""
+    if len(items) == 0:
+        return []
+    errors = []
+
+    def call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            errors.append(e)
+
+    pool = Pool(min(concurrency, len(items)))
+    try:
+        results = pool.map(call, items)
+    finally:
+        pool.terminate()
+    if errors:
+        raise errors[0]
+    return results
+
+
+class NodeRecord(object):
+    """Provisioning states history of ironic node"""
+
+    def __init__(self, node, created=None):
+        self.node = node
+        self.uuid = node.uuid
+        self.created = created
+        self.states = []
+        self.last_error = None
+        self.conductor = None
+        self.instance_uuid = None
+        self.deploy_start = None
+        self.deploy_end = None
+
+    @property
+    def state(self):
+        return self.states[-1][1] if self.states else None
+
+    def update(self, now, node):
+        self.node = node
+        self.last_error = getattr(node, 'last_error', None)
+        self.conductor = (getattr(node, 'conductor', None) or
+                          getattr(node, 'conductor_affinity', None) or
+                          self.conductor)
+        self.instance_uuid = getattr(node, 'instance_uuid', None)
+        if node.provision_state != self.state:
+            self.states.append((now, node.provision_state))
+
+    @property
+    def failed(self):
+        return self.state in FAILED_STATES
+
+    @property
+    def deploy_time(self):
+        if self.deploy_start is None or self.deploy_end is None:
+            return None
+        return self.deploy_end - self.deploy_start
+
+
+class ProvisioningPipeline(object):
+    """Enroll, prepare and deploy ironic nodes in batch
+
+    Usage::
+
+        pipeline = ProvisioningPipeline(ironic)
+        pipeline.enroll(ironic_drivers_params)
+        pipeline.prepare()
+        servers = pipeline.deploy([(name, image, flavor), ...], keypair)
+        logger.info(pipeline.report())
+    """
+
+    def __init__(self, ironic, concurrency=10, poll_interval=10):
+        self.ironic = ironic
+        self.os_conn = ironic.os_conn
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.records = {}
+
+    def add_nodes(self, nodes):
+        """Track already enrolled nodes"""
+        for node in nodes:
+            self.records.setdefault(node.uuid, NodeRecord(node))
+
+    def enroll(self, configs):
+        """Create nodes with ports concurrently
+
+        :param configs: list of nodes configs (like in ironic_nodes.yaml)
+        :return: list of created nodes (in configs order)
+        """
+        deploy_images = self.ironic.get_deploy_images()
+
+        def create(config):
+            created = time.time()
+            node = self.ironic.create_node(
+                config['driver'], copy.deepcopy(config['driver_info']),
+                config['node_properties'], config['mac_address'],
+                deploy_images=deploy_images)
+            return NodeRecord(node, created=created)
+
+        records = _map(create, configs, self.concurrency)
+        for record in records:
+            self.records[record.uuid] = record
+        logger.info('{0} ironic nodes are enrolled'.format(len(records)))
+        return [x.node for x in records]
+
+    def poll(self, instances=()):
+        """Update nodes states with one nodes listing
+
+        :param instances: ids of instances, nodes with them are tracked too
+        """
+        now = time.time()
+        for node in self.ironic.client.node.list(detail=True):
+            record = self.records.get(node.uuid)
+            if record is None and node.instance_uuid in instances:
+                record = self.records[node.uuid] = NodeRecord(node)
+            if record is not None:
+                record.update(now, node)
+        failed = [x for x in self.records.values() if x.failed]
+        if failed:
+            raise ProvisioningError(failed)
+
+    def _set_states(self, actions):
+        _map(lambda x: self.ironic.client.node.set_provision_state(*x),
+             actions, self.concurrency)
+
+    def prepare(self, timeout=10 * 60):
+        """Move all nodes to `available` state"""
+        def is_available():
+            self.poll()
+            actions = []
+            for record in self.records.values():
+                node = record.node
+                if getattr(node, 'target_provision_state', None):
+                    continue
+                action = PREPARE_ACTIONS.get(record.state)
+                if action is not None:
+                    actions.append((record.uuid, action))
+            self._set_states(actions)
+            return all(x.state == 'available' for x in self.records.values())
+
+        wait(is_available, timeout_seconds=timeout,
+             sleep_seconds=self.poll_interval,
+             waiting_for='ironic nodes to become available')
+
+    def deploy(self, items, keypair, network_label='baremetal',
+               timeout=20 * 60):
+        """Boot instances concurrently and wait for nodes to be active
+
+        :param items: list of (name, image, flavor)
+        :return: list of servers (in items order)
+        """
+        wait(self.ironic.all_nodes_provisioned,
+             timeout_seconds=3 * 60,
+             sleep_seconds=15,
+             waiting_for='ironic nodes to be provisioned')
+        baremetal_net = self.os_conn.nova.networks.find(label=network_label)
+        starts = {}
+
+        def boot(item):
+            name, image, flavor = item
+            start = time.time()
+            server = self.os_conn.nova.servers.create(
+                name=name, image=image.id, flavor=flavor.id,
+                key_name=keypair.name, nics=[{'net-id': baremetal_net.id}])
+            starts[server.id] = start
+            return server
+
+        servers = _map(boot, items, self.concurrency)
+        logger.info('{0} baremetal instances are booting'.format(
+            len(servers)))
+
+        def is_deployed():
+            self.poll(instances=starts)
+            deployed = 0
+            for record in self.records.values():
+                if record.instance_uuid in starts:
+                    if record.deploy_start is None:
+                        record.deploy_start = starts[record.instance_uuid]
+                    if record.state == 'active':
+                        record.deploy_end = record.states[-1][0]
+                        deployed += 1
+            return deployed == len(servers)
+
+        wait(is_deployed, timeout_seconds=timeout,
+             sleep_seconds=self.poll_interval,
+             waiting_for='ironic nodes to be deployed')
+        self.os_conn.wait_servers_active(servers, timeout=timeout)
+        return [self.os_conn.nova.servers.get(x.id) for x in servers]
+
+    def delete(self):
+        """Delete instances, ports and nodes concurrently"""
+        _map(lambda x: self.ironic.delete_node(x.node),
+             list(self.records.values()), self.concurrency)
+        self.records = {}
+
+    def deploy_stats(self):
+        """Return dict {conductor: Stats} with nodes deploy times"""
+        stats = {}
+        for record in self.records.values():
+            if record.deploy_time is None:
+                continue
+            conductor = record.conductor or 'unknown'
+            if conductor not in stats:
+                stats[conductor] = Stats(
+                    'ironic-deploy[{0}]'.format(conductor))
+            stats[conductor].add(record.deploy_start, record.deploy_end)
+        return stats
+
+    def report(self):
+        lines = ['Ironic nodes provisioning:']
+        for record in sorted(self.records.values(),
+                             key=lambda x: x.deploy_start or 0):
+            lines.append('  {0.uuid} [{1}]: {2} deploy={3}'.format(
+                record, record.conductor,
+                ' -> '.join(x[1] for x in record.states),
+                '{0:.1f}s'.format(record.deploy_time)
+                if record.deploy_time is not None else '-'))
+        for conductor, stats in sorted(self.deploy_stats().items()):
+            lines.append(stats.report())
+        return '\n'.join(lines)
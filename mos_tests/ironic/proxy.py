@@ -1,94 +1,263 @@
 #!/usr/bin/python
 # This is a simple port-forward / proxy, written using only the default python
 # library.
+#
+# Sockets are non-blocking and served by one epoll (poll where epoll is
+# absent) loop. Each connection has its own output buffer: data is sent as
+# much as the socket accepts, the rest is sent when socket becomes writable.
+# If the buffer of one side grows over max_buffer_size, reading from the
+# other side is paused until the buffer drains (backpressure).
 
 from __future__ import print_function
+import errno
 import select
 import socket
 import sys
 import time
 
-# Changing the buffer_size and delay, you can improve the speed and bandwidth.
-# But when buffer get to high or delay go too down, you can broke things
-buffer_size = 4096
-delay = 0.0001
+# Size of one recv call and max size of pending data of one connection
+buffer_size = 64 * 1024
+max_buffer_size = 1024 * 1024
 libvirt_port = 16509
 forward_to = '/var/run/libvirt/libvirt-sock'
+# Interval of statistics printing (if there was any traffic)
+stats_interval = 60
 
+READ = select.POLLIN | select.POLLPRI
+WRITE = select.POLLOUT
+ERROR = select.POLLERR | select.POLLHUP
+
+RETRY_ERRORS = (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR)
+
+
+class Poller(object):
+    """epoll/poll wrapper with timeout in seconds"""
 
-class Forward(object):
     def __init__(self):
-        self.forward = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if hasattr(select, 'epoll'):
+            self._poller = select.epoll()
+            self._scale = 1
+        else:
+            self._poller = select.poll()
+            self._scale = 1000
+
+    def register(self, fd, events):
+        self._poller.register(fd, events)
+
+    def modify(self, fd, events):
+        self._poller.modify(fd, events)
 
-    def start(self, address):
+    def unregister(self, fd):
+        self._poller.unregister(fd)
+
+    def poll(self, timeout):
         try:
-            self.forward.connect(address)
-            return self.forward
-        except Exception as e:
-            print(e)
-            return False
+            return self._poller.poll(timeout * self._scale)
+        except (IOError, OSError, select.error) as e:
+            if e.args[0] == errno.EINTR:
+                return []
+            raise
+
+
+class Connection(object):
+    """One side of forwarded connection"""
+
+    def __init__(self, sock, name, upstream=False):
+        sock.setblocking(0)
+        self.sock = sock
+        self.fd = sock.fileno()
+        self.name = name
+        self.upstream = upstream
+        self.peer = None
+        self.buffer = bytearray()
+        self.reading = True
+        self.closing = False
+        self.events = None
 
 
 class TheServer(object):
-    input_list = []
-    channel = {}
 
-    def __init__(self, host, port):
+    def __init__(self, host, port, forward_to=forward_to):
+        self.forward_to = forward_to
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server.bind((host, port))
-        self.server.listen(200)
-
-    def main_loop(self):
-        self.input_list.append(self.server)
-        while 1:
-            time.sleep(delay)
-            ss = select.select
-            inputready, outputready, exceptready = ss(self.input_list, [], [])
-            for self.s in inputready:
-                if self.s == self.server:
+        self.server.listen(1024)
+        self.server.setblocking(0)
+        self.poller = Poller()
+        self.connections = {}
+        self.running = False
+        self.stats = {'accepted': 0, 'failed': 0, 'closed': 0,
+                      'bytes_in': 0, 'bytes_out': 0, 'paused': 0}
+        self._reported = None
+
+    @property
+    def address(self):
+        return self.server.getsockname()
+
+    @property
+    def active(self):
+        return len(self.connections) // 2
+
+    def main_loop(self, timeout=1):
+        """Serve connections until `stop` is called"""
+        self.running = True
+        self.poller.register(self.server.fileno(), READ)
+        last_report = time.time()
+        while self.running:
+            for fd, events in self.poller.poll(timeout):
+                if fd == self.server.fileno():
                     self.on_accept()
-                    break
+                    continue
+                conn = self.connections.get(fd)
+                if conn is None:
+                    continue
+                if events & (READ | ERROR) and conn.reading:
+                    self.on_recv(conn)
+                elif events & ERROR and conn.closing:
+                    # Closed side is reported until unregistered, pending
+                    # data is still sent to peer (on_send closes both)
+                    self.poller.unregister(fd)
+                    conn.events = None
+                elif events & ERROR:
+                    # Hang up while reading is paused
+                    self.on_close(conn)
+                if events & WRITE and fd in self.connections:
+                    self.on_send(conn)
+            if time.time() - last_report >= stats_interval:
+                last_report = time.time()
+                self.report()
+        self.poller.unregister(self.server.fileno())
 
-                self.data = self.s.recv(buffer_size)
-                if len(self.data) == 0:
-                    self.on_close()
-                    break
-                else:
-                    self.on_recv()
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        for conn in list(self.connections.values()):
+            self.on_close(conn)
+        self.server.close()
+
+    def report(self):
+        if self._reported == self.stats:
+            return
+        self._reported = dict(self.stats)
+        print('connections: {active} active, {accepted} accepted, '
+              '{failed} failed, {closed} closed; bytes: {bytes_in} to '
+              'libvirt, {bytes_out} from libvirt; paused reads: '
+              '{paused}'.format(active=self.active, **self.stats))
+        sys.stdout.flush()
+
+    def _update_events(self, conn):
+        events = ERROR
+        if conn.reading:
+            events |= READ
+        if conn.buffer:
+            events |= WRITE
+        if events != conn.events:
+            if conn.events is None:
+                self.poller.register(conn.fd, events)
+            else:
+                self.poller.modify(conn.fd, events)
+            conn.events = events
 
     def on_accept(self):
-        forward = Forward().start(forward_to)
-        clientsock, clientaddr = self.server.accept()
-        if forward:
+        while True:
+            try:
+                clientsock, clientaddr = self.server.accept()
+            except socket.error as e:
+                if e.args[0] in RETRY_ERRORS:
+                    return
+                raise
+            forward = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                forward.connect(self.forward_to)
+            except socket.error as e:
+                print(e)
+                print("Can't establish connection with remote server.")
+                print("Closing connection with client side", clientaddr)
+                self.stats['failed'] += 1
+                forward.close()
+                clientsock.close()
+                continue
+            clientsock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = Connection(clientsock, clientaddr)
+            server = Connection(forward, self.forward_to, upstream=True)
+            client.peer, server.peer = server, client
+            for conn in (client, server):
+                self.connections[conn.fd] = conn
+                self._update_events(conn)
+            self.stats['accepted'] += 1
             print(clientaddr, "has connected")
-            self.input_list.append(clientsock)
-            self.input_list.append(forward)
-            self.channel[clientsock] = forward
-            self.channel[forward] = clientsock
+
+    def on_recv(self, conn):
+        try:
+            data = conn.sock.recv(buffer_size)
+        except socket.error as e:
+            if e.args[0] in RETRY_ERRORS:
+                return
+            data = b''
+        if not data:
+            self.on_eof(conn)
+            return
+        self.stats['bytes_out' if conn.upstream else 'bytes_in'] += len(data)
+        peer = conn.peer
+        peer.buffer.extend(data)
+        self.on_send(peer)
+        if conn.fd not in self.connections:
+            return
+        if len(peer.buffer) > max_buffer_size and conn.reading:
+            # Peer doesn't read fast enough, wait until buffer is sent
+            conn.reading = False
+            self.stats['paused'] += 1
+            self._update_events(conn)
+
+    def on_send(self, conn):
+        if conn.buffer:
+            try:
+                sent = conn.sock.send(conn.buffer)
+            except socket.error as e:
+                if e.args[0] in RETRY_ERRORS:
+                    sent = 0
+                else:
+                    self.on_close(conn)
+                    return
+            del conn.buffer[:sent]
+        if not conn.buffer and conn.closing:
+            self.on_close(conn)
+            return
+        peer = conn.peer
+        if (not peer.reading and not peer.closing and
+                len(conn.buffer) <= max_buffer_size // 2):
+            peer.reading = True
+            self._update_events(peer)
+        self._update_events(conn)
+
+    def on_eof(self, conn):
+        """Close connection after pending data is sent to peer"""
+        conn.reading = False
+        conn.closing = True
+        peer = conn.peer
+        peer.closing = True
+        peer.reading = False
+        if peer.buffer:
+            self._update_events(conn)
+            self._update_events(peer)
         else:
-            print("Can't establish connection with remote server.",)
-            print("Closing connection with client side", clientaddr)
-            clientsock.close()
-
-    def on_close(self):
-        print(self.s.getpeername(), "has disconnected")
-        # remove objects from input_list
-        self.input_list.remove(self.s)
-        self.input_list.remove(self.channel[self.s])
-        out = self.channel[self.s]
-        # close the connection with client
-        self.channel[out].close()  # equivalent to do self.s.close()
-        # close the connection with remote server
-        self.channel[self.s].close()
-        # delete both objects from channel dict
-        del self.channel[out]
-        del self.channel[self.s]
-
-    def on_recv(self):
-        data = self.data
-        # here we can parse and/or modify the data before send forward
-        self.channel[self.s].send(data)
+            self.on_close(peer)
+
+    def on_close(self, conn):
+        if conn.fd not in self.connections:
+            return
+        for item in (conn, conn.peer):
+            if self.connections.pop(item.fd, None) is None:
+                continue
+            if item.events is not None:
+                self.poller.unregister(item.fd)
+            item.sock.close()
+        self.stats['closed'] += 1
+        print(conn.peer.name if conn.upstream else conn.name,
+              "has disconnected")
+
 
 if __name__ == '__main__':
     ip_to_listen = sys.argv[1]
@@ -97,4 +266,5 @@ if __name__ == '__main__':
         server.main_loop()
     except KeyboardInterrupt:
         print("Ctrl C - Stopping server")
+        server.report()
         sys.exit(1)
@@ -19,6 +19,7 @@ import pytest
 
 from mos_tests import conftest
 from mos_tests.environment import devops_client
+from mos_tests.functions import ceph
 from mos_tests.functions import common
 from mos_tests.ironic import testutils
 
@@ -40,24 +41,18 @@ def map_interfaces(devops_env, fuel_node):
 
 
 def remove_ceph_from_node(remote):
-    def is_pg_clean():
-        result = remote.check_call('ceph pg stat -f json-pretty',
-                                   verbose=False)
-        pg_stat = json.loads(result.stdout_string)
-        states = pg_stat['num_pg_by_state']
-        return len(states) == 1 and states[0]['name'] == 'active+clean'
-
     hostname = remote.check_call('hostname -f', verbose=False).stdout_string
     result = remote.check_call('ceph report', verbose=False)
     ceph_data = json.loads(result.stdout_string)
     osd_ids = [x['id'] for x in ceph_data['osd_metadata']
                if x['hostname'] == hostname]
-    for osd_id in osd_ids:
-        remote.check_call('ceph osd out {0}'.format(osd_id), verbose=False)
-    common.wait(is_pg_clean,
-                timeout_seconds=5 * 60,
-                sleep_seconds=15,
-                waiting_for='Ceph data migration to be done')
+    with ceph.CephMonitor(remote, interval=15) as monitor:
+        for osd_id in osd_ids:
+            remote.check_call('ceph osd out {0}'.format(osd_id),
+                              verbose=False)
+        monitor.wait(ceph.is_clean, timeout=5 * 60,
+                     waiting_for='Ceph data migration to be done')
+    logger.info(monitor.report())
     for osd_id in osd_ids:
         remote.check_call("stop ceph-osd id={}".format(osd_id),
                           verbose=False)
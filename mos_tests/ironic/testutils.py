@@ -15,7 +15,7 @@
 import json
 import logging
 
-from mos_tests.functions import file_cache
+from mos_tests.functions import image_upload
 from mos_tests import settings
 
 logger = logging.getLogger(__name__)
@@ -32,26 +32,21 @@ def make_image(os_conn):
             image_name = 'ironic_ubuntu_virtual'
             disk_info = settings.IRONIC_GLANCE_DISK_INFO_VIRTUAL
 
-        try:
-            image = next(x for x in os_conn.glance.images.list()
-                         if x['name'] == image_name)
-        except StopIteration:
-            logger.info('Creating %s image', image_name)
-            image = os_conn.glance.images.create(
-                name=image_name,
-                disk_format='raw',
-                container_format='bare',
-                hypervisor_type='baremetal',
-                visibility='public',
-                cpu_arch='x86_64',
-                fuel_disk_info=json.dumps(disk_info))
-
+        logger.info('Creating %s image', image_name)
+        image, created = image_upload.import_image(
+            os_conn,
+            settings.IRONIC_IMAGE_URL,
+            image_name,
+            disk_format='raw',
+            container_format='bare',
+            unpack=True,
+            hypervisor_type='baremetal',
+            visibility='public',
+            cpu_arch='x86_64',
+            fuel_disk_info=json.dumps(disk_info))
+        if created:
             images.append(image)
-
-            with file_cache.get_and_unpack(settings.IRONIC_IMAGE_URL) as img:
-                os_conn.glance.images.upload(image.id, img)
-
-            logger.info('Creating %s image ... done', image_name)
+        logger.info('Creating %s image ... done', image_name)
 
         return image
 
@@ -0,0 +1,126 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import threading
+
+from mos_tests.functions.benchmark import run_concurrently
+from mos_tests.functions.benchmark import Stats
+
+logger = logging.getLogger(__name__)
+
+# Run order: tokens are revoked at the end
+OPERATIONS = ('issue', 'validate', 'list_users', 'list_projects', 'revoke')
+
+
+def v3_url(os_conn):
+    """Returns Keystone v3 API url of OpenStackActions auth url"""
+    url = os_conn.keystone.management_url.rstrip('/')
+    return url.rsplit('/', 1)[0] + '/v3'
+
+
+def password_auth(username, password, domain_name):
+    """Returns body of unscoped token request"""
+    return {'auth': {'identity': {
+        'methods': ['password'],
+        'password': {'user': {'name': username,
+                              'password': password,
+                              'domain': {'name': domain_name}}}}}}
+
+
+class KeystoneBenchmark(object):
+    """Concurrent Keystone v3 API requests of one domain user
+
+    Requests go straight to API with `session` (without auth plugin),
+    tokens validation, revocation and listings use `admin_token`.
+    """
+
+    def __init__(self, session, url, admin_token):
+        self.session = session
+        self.url = url
+        self.admin_token = admin_token
+
+    def _request(self, method, path, token=None, **kwargs):
+        headers = kwargs.pop('headers', {})
+        if token is not None:
+            headers['X-Auth-Token'] = token
+        # Requests and responses contain passwords and tokens
+        return self.session.request(self.url + path, method, headers=headers,
+                                    authenticated=False, log=False, **kwargs)
+
+    def domain_id(self, name):
+        response = self._request('GET', '/domains', token=self.admin_token,
+                                 params={'name': name})
+        return response.json()['domains'][0]['id']
+
+    def issue(self, username, password, domain_name):
+        """Returns (token, response size)"""
+        response = self._request(
+            'POST', '/auth/tokens',
+            json=password_auth(username, password, domain_name))
+        return response.headers['X-Subject-Token'], len(response.content)
+
+    def validate(self, token):
+        response = self._request('GET', '/auth/tokens',
+                                 token=self.admin_token,
+                                 headers={'X-Subject-Token': token})
+        return len(response.content)
+
+    def revoke(self, token):
+        self._request('DELETE', '/auth/tokens', token=self.admin_token,
+                      headers={'X-Subject-Token': token})
+
+    def list_users(self, domain_id):
+        response = self._request('GET', '/users', token=self.admin_token,
+                                 params={'domain_id': domain_id})
+        return len(response.content)
+
+    def list_projects(self, domain_id):
+        response = self._request('GET', '/projects', token=self.admin_token,
+                                 params={'domain_id': domain_id})
+        return len(response.content)
+
+    def run(self, domain_name, username, password, count, concurrency):
+        """Issue, validate and revoke `count` tokens, list users/projects
+
+        Each operation runs with `concurrency` parallel requests.
+
+        :return: list of (operation, Stats) in OPERATIONS order
+        """
+        domain_id = self.domain_id(domain_name)
+        tokens = []
+        lock = threading.Lock()
+
+        def issue():
+            token, size = self.issue(username, password, domain_name)
+            with lock:
+                tokens.append(token)
+            return size
+
+        args = {
+            'issue': (issue, lambda: [()] * count),
+            'validate': (self.validate, lambda: [(x,) for x in tokens]),
+            'list_users': (self.list_users, lambda: [(domain_id,)] * count),
+            'list_projects': (self.list_projects,
+                              lambda: [(domain_id,)] * count),
+            'revoke': (self.revoke, lambda: [(x,) for x in tokens]),
+        }
+        results = []
+        for operation in OPERATIONS:
+            func, args_list = args[operation]
+            stats = Stats('keystone-{0}[{1}]'.format(operation, domain_name))
+            run_concurrently(stats, func, args_list(), concurrency)
+            logger.info(stats.report())
+            results.append((operation, stats))
+        return results
@@ -0,0 +1,110 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+
+from keystoneclient.v3 import Client as KeystoneClientV3
+import pytest
+
+from mos_tests import conftest
+from mos_tests.functions.benchmark import Baselines
+from mos_tests.keystone import benchmark
+from mos_tests import settings
+
+logger = logging.getLogger(__name__)
+
+COUNT = settings.KEYSTONE_BENCHMARK_REQUESTS
+CONCURRENCY = settings.KEYSTONE_BENCHMARK_CONCURRENCY
+
+
+@pytest.yield_fixture
+def sql_user(os_conn):
+    """User of SQL backed `Default` domain"""
+    keystone_v3 = KeystoneClientV3(session=os_conn.session)
+    credentials = ('keystone_benchmark', 'keystone_benchmark')
+    user = keystone_v3.users.create(name=credentials[0],
+                                    password=credentials[1],
+                                    domain='default')
+    yield ('Default',) + credentials
+    keystone_v3.users.delete(user)
+
+
+def ldap_users(os_conn):
+    """Returns list of (domain, user, password) of existing LDAP domains"""
+    keystone_v3 = KeystoneClientV3(session=os_conn.session)
+    names = [x.name for x in keystone_v3.domains.list()]
+    return [(name, user, password) for name, (user, password)
+            in sorted(settings.KEYSTONE_LDAP_USERS.items()) if name in names]
+
+
+def run_benchmark(os_conn, backend, users, concurrency):
+    keystone = benchmark.KeystoneBenchmark(os_conn.session,
+                                           benchmark.v3_url(os_conn),
+                                           os_conn.session.get_token())
+    baselines = Baselines()
+    regressions = []
+    for domain, user, password in users:
+        results = keystone.run(domain, user, password, count=COUNT,
+                               concurrency=concurrency)
+        for operation, stats in results:
+            assert stats.errors == 0, '{0} {1} requests failed'.format(
+                stats.errors, stats.name)
+            key = 'keystone.{0}.{1}.{2}.x{3}'.format(
+                backend, domain, operation, concurrency)
+            regressions.extend(baselines.check(key, stats.summary()))
+    assert not regressions, '\n'.join(regressions)
+
+
+@pytest.mark.undestructive
+@pytest.mark.parametrize('concurrency', CONCURRENCY)
+def test_sql_domain_benchmark(os_conn, sql_user, concurrency):
+    """Keystone token and listing requests throughput for SQL domain
+
+    Actions:
+    1. Create user in Default domain.
+    2. Issue tokens for user concurrently.
+    3. Validate all tokens concurrently.
+    4. List users and projects of domain concurrently.
+    5. Revoke all tokens concurrently.
+    6. Check that there are no errors and requests latency and throughput
+        are not worse than stored baselines.
+    """
+    run_benchmark(os_conn, 'sql', [sql_user], concurrency)
+
+
+@pytest.mark.undestructive
+@pytest.mark.ldap
+@pytest.mark.check_env_('is_ldap_plugin_installed')
+@pytest.mark.parametrize('concurrency', CONCURRENCY)
+def test_ldap_domains_benchmark(os_conn, concurrency):
+    """Keystone token and listing requests throughput for LDAP domains
+
+    Results are stored separately for deployments with and without LDAP
+    proxy, so proxy and `list_limit` can be compared by baselines.
+
+    Actions:
+    1. For each LDAP domain with known user issue tokens for user
+        concurrently.
+    2. Validate all tokens concurrently.
+    3. List users and projects of domain concurrently.
+    4. Revoke all tokens concurrently.
+    5. Check that there are no errors and requests latency and throughput
+        are not worse than stored baselines.
+    """
+    users = ldap_users(os_conn)
+    if not users:
+        pytest.skip('LDAP domains with known users are required')
+    backend = ('ldap_proxy' if conftest.is_ldap_proxy(os_conn.env)
+               else 'ldap')
+    run_benchmark(os_conn, backend, users, concurrency)
@@ -31,15 +31,12 @@ from neutronclient.common.exceptions import NeutronClientException
 from mos_tests import conftest
 from mos_tests.environment.os_actions import OpenStackActions
 from mos_tests.functions import common
+from mos_tests import settings
 
 
 logger = logging.getLogger(__name__)
 
-AUTH_DATA = {
-    'openldap1': ('user01', '1111'),
-    'openldap2': ('user1', '1111'),
-    'AD2': ('user01', 'qwerty123!')
-}
+AUTH_DATA = settings.KEYSTONE_LDAP_USERS
 
 
 @pytest.yield_fixture
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
 import psycopg2
 import random
 import requests
@@ -24,6 +25,7 @@ from muranoclient.v1.client import Client as MuranoClient
 
 from mos_tests.functions.common import delete_stack
 from mos_tests.functions.common import wait
+from mos_tests.murano import tracker
 
 
 flavor = 'm1.medium'
@@ -59,9 +61,12 @@ class MuranoActions(object):
                                        token=token,
                                        cacert=os_conn.path_to_cert)
 
-        self.heat = os_conn.heat
         self.postgres_passwd = self.rand_name("O5t@")
 
+    @property
+    def heat(self):
+        return self.os_conn.heat
+
     def rand_name(self, name):
         return name + '_' + str(random.randint(1, 0x7fffffff))
 
@@ -76,29 +81,39 @@ class MuranoActions(object):
             session_id=session.id)
 
     def wait_for_deploy(self, environment):
-        def is_murano_env_deployed(environment):
-            environment = self.murano.environments.get(environment.id)
-            if environment.status == 'deploy failure':
-                deploy_result = self.murano.deployments.list(environment.id)[
-                    -1].result['result']
-                raise Exception('Environment deploy finished with errors\n'
-                                'Message: {message}\n'
-                                '{details}'.format(**deploy_result))
-            return environment.status == 'ready'
-
-        wait(lambda: is_murano_env_deployed(environment),
-             timeout_seconds=1800,
-             waiting_for='environment is ready')
-
-        environment = self.murano.environments.get(environment.id)
-        logs = self.get_log(environment)
-        assert 'Deployment finished' in logs
-        return environment
+        return self.wait_for_deploys([environment])[0]
+
+    def wait_for_deploys(self, environments, timeout=1800):
+        """Wait for several environments to be deployed concurrently
+
+        :return: list of deployed environments
+        """
+        deploy_tracker = tracker.DeploymentTracker(self.murano)
+        for environment in environments:
+            deploy_tracker.add(environment)
+        deploy_tracker.wait(timeout=timeout)
+
+        deployed = []
+        for environment in environments:
+            assert 'Deployment finished' in deploy_tracker.logs(
+                environment.id)
+            deployed.append(self.murano.environments.get(environment.id))
+        return deployed
 
     def deploy_environment(self, environment, session):
         self.murano.sessions.deploy(environment.id, session.id)
         return self.wait_for_deploy(environment)
 
+    def deploy_environments(self, environments_sessions):
+        """Deploy several environments at once
+
+        :param environments_sessions: list of tuples (environment, session)
+        :return: list of deployed environments
+        """
+        for environment, session in environments_sessions:
+            self.murano.sessions.deploy(environment.id, session.id)
+        return self.wait_for_deploys([x[0] for x in environments_sessions])
+
     def get_action_id(self, environment, name, service):
         env_data = environment.to_dict()
         a_dict = env_data['services'][service]['?']['_actions']
@@ -112,6 +127,7 @@ class MuranoActions(object):
 
     def status_check(self, environment, configurations, kubernetes=False,
                      negative=False):
+        probes = []
         for configuration in configurations:
             if kubernetes:
                 service_name = configuration[0]
@@ -121,8 +137,11 @@ class MuranoActions(object):
                                                       service_name)
                 if ip:
                     for port in ports:
-                        assert self.check_port_access(ip, port, negative)
-                        assert self.check_k8s_deployment(ip, port, negative)
+                        probes.append(self._port_probe(ip, port, negative))
+                        probes.append((
+                            'kubernetes {0}:{1}'.format(ip, port),
+                            functools.partial(self.check_k8s_deployment, ip,
+                                              port, negative)))
                 else:
                     raise Exception("Instance {} doesn't have floating IP"
                                     .format(inst_name))
@@ -132,10 +151,15 @@ class MuranoActions(object):
                 ip = self.get_ip_by_instance_name(environment, inst_name)
                 if ip and ports:
                     for port in ports:
-                        assert self.check_port_access(ip, port)
+                        probes.append(self._port_probe(ip, port))
                 else:
                     raise Exception("Instance {} doesn't have floating IP"
                                     .format(inst_name))
+        tracker.run_probes(probes)
+
+    def _port_probe(self, ip, port, negative=False):
+        return ('port {0}:{1}'.format(ip, port),
+                functools.partial(self.check_port_access, ip, port, negative))
 
     def check_port_access(self, ip, port, negative=False):
         def is_port_accessible():
@@ -230,8 +254,7 @@ class MuranoActions(object):
         ip = environment.services[0]['instance']['floatingIpAddress']
 
         if ip:
-            for port in ports:
-                self.check_port_access(ip, port)
+            tracker.run_probes([self._port_probe(ip, port) for port in ports])
         else:
             raise Exception('Docker Instance does not have floating IP')
 
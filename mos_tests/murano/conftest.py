@@ -18,7 +18,7 @@ import pytest
 import uuid
 
 from mos_tests.functions import common
-from mos_tests.functions import file_cache
+from mos_tests.functions import image_upload
 from mos_tests.functions import os_cli
 from mos_tests.murano import actions
 from mos_tests import settings
@@ -30,41 +30,62 @@ flavor = 'm1.medium'
 labels = "testkey=testvalue"
 
 
+# image fixture name: image url
+IMAGES = {
+    'linux_image': settings.MURANO_IMAGE_URL,
+    'docker_image': settings.MURANO_DOCKER_IMAGE_URL,
+    'kubernetes_image': settings.MURANO_KUBERNETES_IMAGE_URL,
+}
+
+
+@pytest.yield_fixture(scope='session')
+def murano_images(request, os_conn):
+    """Images required by collected tests, imported concurrently"""
+    fixtures = set()
+    for item in request.session.items:
+        fixtures.update(getattr(item, 'fixturenames', ()))
+    urls = sorted(set(v for k, v in IMAGES.items() if k in fixtures))
+    logger.info('Creating images from {0}'.format(urls))
+    images = image_upload.import_images(
+        os_conn, [{'url': x, 'name': x.split('/')[-1],
+                   'visibility': 'public'} for x in urls])
+    logger.info('Creating images ... done')
+    images = dict(zip(urls, images))
+
+    yield images
+
+    for image, created in images.values():
+        if created:
+            os_conn.glance.images.delete(image.id)
+
+
 def image_factory(url):
 
     @pytest.yield_fixture(scope='session')
-    def image(os_conn):
+    def image(os_conn, murano_images):
+        if url in murano_images:
+            yield murano_images[url][0]
+            return
 
+        # Fixture is requested dynamically, it isn't imported with others
         name = url.split('/')[-1]
 
-        exists = [x for x in os_conn.glance.images.list() if x.name == name]
-
-        if len(exists) > 0:
-            image = exists[0]
-        else:
-            logger.info('Creating {0} image'.format(name))
-            logger.info('Image source {0}'.format(url))
-            image = os_conn.glance.images.create(
-                name=name,
-                disk_format='qcow2',
-                container_format='bare',
-                visibility='public')
-
-            with file_cache.get_file(url) as f:
-                os_conn.glance.images.upload(image.id, f)
-
-            logger.info('Creating {0} image ... done'.format(name))
+        logger.info('Creating {0} image'.format(name))
+        logger.info('Image source {0}'.format(url))
+        image, created = image_upload.import_image(os_conn, url, name,
+                                                   visibility='public')
+        logger.info('Creating {0} image ... done'.format(name))
 
         yield image
 
-        if len(exists) == 0:
+        if created:
             os_conn.glance.images.delete(image.id)
 
     return image
 
-linux_image = image_factory(settings.MURANO_IMAGE_URL)
-docker_image = image_factory(settings.MURANO_DOCKER_IMAGE_URL)
-kubernetes_image = image_factory(settings.MURANO_KUBERNETES_IMAGE_URL)
+linux_image = image_factory(IMAGES['linux_image'])
+docker_image = image_factory(IMAGES['docker_image'])
+kubernetes_image = image_factory(IMAGES['kubernetes_image'])
 
 
 @pytest.fixture
@@ -433,10 +433,8 @@ def test_k8s_deploy_multiple_clusters_in_one_environment(
     murano.status_check(deployed_environment,
                         [[cluster_one['name'], "master-1", 8080],
                          [cluster_one['name'], "gateway-1", 3306],
-                         [cluster_one['name'], "minion-1", 4194]],
-                        kubernetes=True)
-    murano.status_check(deployed_environment,
-                        [[cluster_two['name'], "master-2", 8080],
+                         [cluster_one['name'], "minion-1", 4194],
+                         [cluster_two['name'], "master-2", 8080],
                          [cluster_two['name'], "gateway-2", 80],
                          [cluster_two['name'], "minion-2", 4194]],
                         kubernetes=True)
@@ -0,0 +1,163 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+from multiprocessing.dummy import Pool
+import time
+
+from mos_tests.functions.common import wait
+
+logger = logging.getLogger(__name__)
+
+
+class DeploymentError(Exception):
+    pass
+
+
+def _map(func, items, concurrency=10):
+    if len(items) == 0:
+        return []
+    pool = Pool(min(concurrency, len(items)))
+    try:
+        return pool.map(func, items)
+    finally:
+        pool.terminate()
+
+
+class TrackedDeployment(object):
+    """Deployment of one environment with reports seen so far"""
+
+    def __init__(self, environment_id):
+        self.environment_id = environment_id
+        self.deployment_id = None
+        self.status = None
+        self.last_report = None
+        self.logs = []
+        self.start = time.time()
+        self.end = None
+
+    @property
+    def done(self):
+        return self.end is not None
+
+    @property
+    def duration(self):
+        return (self.end or time.time()) - self.start
+
+
+class DeploymentTracker(object):
+    """Follows deployments of several Murano environments concurrently
+
+    On each poll environments statuses and new deployment reports (newer
+    than last seen report) are fetched for all unfinished environments.
+    Tracking fails on first error report or `deploy failure` status.
+    """
+
+    def __init__(self, murano, poll_interval=10):
+        self.murano = murano
+        self.poll_interval = poll_interval
+        self.deployments = {}
+
+    def add(self, environment):
+        self.deployments[environment.id] = TrackedDeployment(environment.id)
+
+    def _fetch_reports(self, deployment):
+        if deployment.deployment_id is None:
+            # Last deployment of environment is the current one, if it is
+            # already started
+            deployments = self.murano.deployments.list(
+                deployment.environment_id)
+            if not deployments or (deployment.status == 'deploying' and
+                                   deployments[-1].state != 'running'):
+                return
+            deployment.deployment_id = deployments[-1].id
+        reports = self.murano.deployments.reports(deployment.environment_id,
+                                                  deployment.deployment_id)
+        last = deployment.last_report
+        new_reports = sorted(
+            (x for x in reports if last is None or (x.created, x.id) > last),
+            key=lambda x: (x.created, x.id))
+        for report in new_reports:
+            logger.debug('Environment {0}: {1}'.format(
+                deployment.environment_id, report.text))
+            deployment.logs.append(report.text)
+            deployment.last_report = (report.created, report.id)
+            if report.level == 'error':
+                raise DeploymentError(
+                    'Environment {0} deploy failed: {1}'.format(
+                        deployment.environment_id, report.text))
+
+    def _poll_one(self, deployment):
+        environment = self.murano.environments.get(deployment.environment_id)
+        deployment.status = environment.status
+        self._fetch_reports(deployment)
+        if environment.status == 'deploy failure':
+            deploy_result = self.murano.deployments.list(
+                environment.id)[-1].result['result']
+            raise DeploymentError('Environment deploy finished with errors\n'
+                                  'Message: {message}\n'
+                                  '{details}'.format(**deploy_result))
+        if environment.status == 'ready':
+            deployment.end = time.time()
+            logger.info('Environment {0} is deployed in {1:.0f}s'.format(
+                environment.id, deployment.duration))
+
+    def poll(self):
+        """Update all unfinished deployments
+
+        :return: True if all deployments are finished
+        """
+        pending = [x for x in self.deployments.values() if not x.done]
+        errors = []
+
+        def poll_one(deployment):
+            try:
+                self._poll_one(deployment)
+            except Exception as e:
+                errors.append(e)
+
+        _map(poll_one, pending)
+        if errors:
+            raise errors[0]
+        return all(x.done for x in self.deployments.values())
+
+    def wait(self, timeout=1800):
+        wait(self.poll, timeout_seconds=timeout,
+             sleep_seconds=self.poll_interval,
+             waiting_for='{0} environments to be ready'.format(
+                 len(self.deployments)))
+
+    def logs(self, environment_id):
+        return self.deployments[environment_id].logs
+
+
+def run_probes(probes, concurrency=20):
+    """Run probes concurrently
+
+    :param probes: list of tuples (description, callable), callable should
+        return True on success
+    :raise AssertionError: with list of failed probes
+    """
+    def run(probe):
+        description, func = probe
+        try:
+            result = func()
+        except Exception as e:
+            logger.warning('{0} failed: {1}'.format(description, e))
+            return description
+        if not result:
+            return description
+
+    failed = [x for x in _map(run, probes, concurrency) if x is not None]
+    assert not failed, 'Failed checks: {0}'.format(', '.join(failed))
@@ -15,12 +15,11 @@
 import logging
 import warnings
 
-from neutronclient.common.exceptions import OverQuotaClient
-from neutronclient.common.exceptions import ServiceUnavailable
 import paramiko
 import pytest
 import six
 
+from mos_tests.functions import capacity
 from mos_tests.functions.common import wait
 from mos_tests.functions import network_checks
 from mos_tests import settings
@@ -246,45 +245,6 @@ class TestBase(object):
 
     def create_max_networks_with_instances(self, router):
         """Create max possible networks, boot and delete instances on it"""
-
-        def delete_instances(servers):
-            self.os_conn.wait_servers_active(servers)
-            logger.info('Delete created servers')
-            for server in servers:
-                server.delete()
-            self.os_conn.wait_servers_deleted(servers)
-
-        hypervisors = self.os_conn.nova.hypervisors.list()
         flavor = self.os_conn.nova.flavors.find(name='m1.micro')
-        capacities = []
-        for hypervisor in hypervisors:
-            capacities.append(
-                self.os_conn.get_hypervisor_capacity(hypervisor, flavor))
-        max_instances = sum(capacities)
-
-        i = 0
-        net_list = []
-        servers = []
-        try:
-            while True:
-                i += 1
-                logger.info('Create network #{}'.format(i))
-                net_id = self.os_conn.add_net(router['id'])
-                net_list.append(net_id)
-                if len(servers) >= max_instances:
-                    delete_instances(servers)
-                    servers = []
-
-                logger.info('Create server #{}'.format(i))
-                srv = self.os_conn.create_server(name='instanceNo{}'.format(i),
-                                                 nics=[{'net-id': net_id}],
-                                                 flavor=flavor,
-                                                 wait_for_active=False,
-                                                 wait_for_avaliable=False)
-                servers.append(srv)
-        except (ServiceUnavailable, OverQuotaClient) as e:
-            logger.info(e)
-
-        delete_instances(servers)
-
-        return net_list
+        return capacity.fill_networks_with_instances(
+            self.os_conn, router['id'], flavor)
@@ -20,6 +20,7 @@ import re
 
 import pytest
 
+from mos_tests import conftest
 from mos_tests.functions import common
 from mos_tests.functions import file_cache
 from mos_tests.neutron.python_tests import base
@@ -144,10 +145,10 @@ class TestQoSBase(base.TestBase):
 
     @classmethod
     @pytest.yield_fixture(scope='class', autouse=True)
-    def revert(cls, request, devops_env, snapshot_name):
+    def revert(cls, request, env_name, snapshot_name):
         yield
         if hasattr(request.session, 'nextitem') and snapshot_name is not None:
-            devops_env.revert_snapshot(snapshot_name)
+            conftest.revert_snapshot(env_name, snapshot_name)
 
     @pytest.yield_fixture
     def clean_net_policy(self, os_conn):
@@ -11,12 +11,13 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
-import re
 import xml.etree.ElementTree as ElementTree
 
 from mos_tests.environment.os_actions import InstanceError
 from mos_tests.functions import common
 from mos_tests.functions import network_checks
+from mos_tests.functions.workload import Workload
+from mos_tests.nfv import inspector
 
 page_1gb = 1048576
 page_2mb = 2048
@@ -35,13 +36,7 @@ class TestBaseNFV(object):
             assert str(free_pages) in free[0], "Unexpected HugePages_Free"
 
     def get_instance_page_size(self, os_conn, vm):
-        root = self.get_vm_dump(os_conn, vm)
-        if root.find('memoryBacking'):
-            page_size = root.find('memoryBacking').find('hugepages').find(
-                'page').get('size')
-            return int(page_size)
-        else:
-            return None
+        return self.get_vm_domain(os_conn, vm).page_size
 
     def live_migrate(self, os_conn, vm, host, block_migration=True,
                      disk_over_commit=False):
@@ -110,13 +105,11 @@ class TestBaseNFV(object):
         {'numa0': [1, 3, 4], 'numa1': [2]}
         :return:
         """
-        root = self.get_vm_dump(os_conn, vm)
-        actual_numa = root.find('numatune').findall('memnode')
-        assert len(actual_numa) == numa_count
+        domain = self.get_vm_domain(os_conn, vm)
+        assert len(domain.memnodes) == numa_count
 
-        vm_vcpupins = [
-            {'id': int(v.get('vcpu')), 'set_id': int(v.get('cpuset'))}
-            for v in root.find('cputune').findall('vcpupin')]
+        vm_vcpupins = [{'id': vcpu, 'set_id': int(cpuset)}
+                       for vcpu, cpuset in sorted(domain.vcpupins.items())]
         vm_vcpus_sets = [vcpupin['set_id'] for vcpupin in vm_vcpupins]
         cnt_of_used_numa = 0
         for host in host_conf.values():
@@ -134,10 +127,8 @@ class TestBaseNFV(object):
             assert act_vcpupin == exp_vcpupin, "Unexpected cpu's allocation"
 
     def get_nodesets_for_vm(self, os_conn, vm):
-        root = self.get_vm_dump(os_conn, vm)
-        nodesets = [numa.get('nodeset') for numa in
-                    root.find('numatune').findall('memnode')]
-        return nodesets
+        domain = self.get_vm_domain(os_conn, vm)
+        return [nodeset for _, nodeset in domain.memnodes]
 
     def compute_change_state(self, os_conn, devops_env, host, state):
         def is_compute_state():
@@ -154,6 +145,8 @@ class TestBaseNFV(object):
         common.wait(is_compute_state,
                     timeout_seconds=20 * 60,
                     waiting_for='compute is {}'.format(state))
+        # Host is rebooted, hugepages and domains are changed
+        self.get_inspector(os_conn).invalidate(host)
 
     def evacuate(self, os_conn, devops_env, vm, on_shared_storage=True,
                  password=None):
@@ -171,19 +164,15 @@ class TestBaseNFV(object):
 
     def cpu_load(self, env, os_conn, vm, vm_keypair=None, vm_login='ubuntu',
                  vm_password='ubuntu', action='start'):
-        if action == 'start':
-            cmd = 'cpulimit -l 50 -- gzip -9 < /dev/urandom > /dev/null'
-            with os_conn.ssh_to_instance(env, vm, vm_keypair=vm_keypair,
-                                         username=vm_login) as vm_remote:
-                vm_remote.check_call(cmd)
-        if action == 'stop':
-            cmd = "ps -aux | grep cpulimit | awk '{print $2}'"
-            with os_conn.ssh_to_instance(env, vm, vm_keypair=vm_keypair,
-                                         username=vm_login) as vm_remote:
-                result = vm_remote.check_call(cmd)
-                pid = result['stdout'][0]
-                result = vm_remote.execute('kill -9 {}'.format(pid))
-                assert not result['exit_code'], "kill failed {}".format(result)
+        workload = Workload(env, os_conn, [vm], keypair=vm_keypair,
+                            username=vm_login, password=vm_password)
+        try:
+            if action == 'start':
+                workload.start('cpu')
+            if action == 'stop':
+                workload.stop('cpu')
+        finally:
+            workload.close()
 
     def delete_servers(self, os_conn):
         os_conn.delete_servers()
@@ -253,27 +242,24 @@ class TestBaseNFV(object):
         :return: actual allocation {'0': 512, '1': 1536} where key is numa_cpu,
          value is allocated memory in Mb
         """
-        root = self.get_vm_dump(os_conn, vm)
-        numa_cells = root.find('cpu').find('numa').findall('cell')
+        numa_cells = self.get_vm_domain(os_conn, vm).numa_cells
         assert len(numa_cells) == numa_count, "Unexpected count of numa nodes"
-        memory_allocation = {cell.get('id'): int(cell.get('memory')) / 1024
-                             for cell in numa_cells}
+        memory_allocation = {cell: memory / 1024
+                             for cell, memory in numa_cells.items()}
         return memory_allocation
 
+    def get_inspector(self, os_conn):
+        return inspector.get_inspector(os_conn.env)
+
+    def get_vm_domain(self, os_conn, vm):
+        return self.get_inspector(os_conn).domain(vm)
+
     def get_vm_dump(self, os_conn, vm):
-        vm.get()
-        name = getattr(vm, "OS-EXT-SRV-ATTR:instance_name")
-        host = os_conn.env.find_node_by_fqdn(
-            getattr(vm, "OS-EXT-SRV-ATTR:host"))
-        with host.ssh() as remote:
-            dump = remote.execute("virsh dumpxml {0}".format(name))
-        return ElementTree.fromstring(dump.stdout_string)
+        domain = self.get_vm_domain(os_conn, vm)
+        return ElementTree.fromstring(domain.xml)
 
     def get_instances(self, os_conn, host):
-        host = os_conn.env.find_node_by_fqdn(host)
-        with host.ssh() as remote:
-            instances = remote.check_call('virsh list --name').stdout_string
-        return instances.splitlines()
+        return list(self.get_inspector(os_conn).host(host).domains)
 
     def get_thread_siblings_lists(self, os_conn, host, numanode):
         """This method returns list of thread_siblings_list for numanode. Only
@@ -284,28 +270,15 @@ class TestBaseNFV(object):
         :param numanode: id from numa node
         :return: list of thread_siblings_list
         """
-        compute = os_conn.env.find_node_by_fqdn(host)
-        with compute.ssh() as remote:
-            # Get all thread_siblings_list
-            cmd = ("cat /sys/bus/node/devices/node{0}/cpu*/topology/"
-                   "thread_siblings_list".format(numanode))
-            res = remote.check_call(cmd).stdout_string.splitlines()
-            all_ts = [re.split('-|,', item) for item in res]
-
-            # Get cpus for cpu pinning usage
-            cpus = remote.check_call("cat /proc/cmdline")["stdout"][0]
-            isolcpus = {x[0]: x[2] for x in [y.partition('=')
-                        for y in cpus.split()]}['isolcpus'].split(',')
-        return [tuple(i) for i in all_ts if set(i).issubset(set(isolcpus))]
+        topology = self.get_inspector(os_conn).host(host)
+        return inspector.thread_siblings_lists(topology, numanode)
 
     def get_vm_thread_siblings_lists(self, os_conn, vm):
         """This method returns thread_siblings_lists used by vm"""
-        vm.get()
+        domain = self.get_vm_domain(os_conn, vm)
         host = getattr(vm, "OS-EXT-SRV-ATTR:host")
-        dump = self.get_vm_dump(os_conn, vm)
-        numa = dump.find('numatune').find('memnode').get('cellid')
+        numa = domain.memnodes[0][0]
         ts_lsts = self.get_thread_siblings_lists(os_conn, host, numa)
-        vcpus = [vcpupin.get('cpuset') for vcpupin in
-                 dump.find('cputune').findall('vcpupin')]
+        vcpus = domain.vcpupins.values()
         used_ts = set([ts for ts in ts_lsts for vcpu in vcpus if vcpu in ts])
         return used_ts
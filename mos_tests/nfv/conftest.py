@@ -12,14 +12,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import csv
-
 import dpath.util
 import pytest
 import re
 
 from mos_tests.functions import common
-from mos_tests.functions import file_cache
+from mos_tests.nfv import inspector
 from mos_tests.nfv.base import page_1gb
 from mos_tests.nfv.base import page_2mb
 from mos_tests.settings import UBUNTU_QCOW2_URL
@@ -34,17 +32,11 @@ def nova_ceph(env):
 
 @pytest.yield_fixture
 def aggregate(os_conn):
-    numa_computes = []
-    for compute in os_conn.env.get_nodes_by_role('compute'):
-        with compute.ssh() as remote:
-            res = remote.check_call("lscpu -p=cpu,node | "
-                                    "grep -v '#'")["stdout"]
-            cmdline = remote.check_call("cat /proc/cmdline")["stdout"][0]
-            cpu_pinning = True if 'isolcpus' in cmdline else False
-        reader = csv.reader(res)
-        numas = {int(numa[1]) for numa in reader}
-        if len(numas) > 1 and cpu_pinning:
-            numa_computes.append(compute)
+    hosts = inspector.get_inspector(os_conn.env).hosts()
+    numa_computes = [
+        x for x in os_conn.env.get_nodes_by_role('compute')
+        if len(hosts[x.data['fqdn']].numa_cpus) > 1 and
+        hosts[x.data['fqdn']].isolcpus]
     if len(numa_computes) < 2:
         pytest.skip("Insufficient count of compute with Numa Nodes")
     aggr = os_conn.nova.aggregates.create('performance', 'nova')
@@ -75,17 +67,15 @@ def flavors(os_conn, request, cleanup):
 
 
 @pytest.yield_fixture(scope="class")
-def keypair(os_conn):
-    key = os_conn.create_key(key_name='nfv_key')
-    yield key
-    os_conn.delete_key(key_name=key.name)
+def keypair(os_conn, shared_resources):
+    with shared_resources.lease(os_conn, 'keypair') as key:
+        yield key
 
 
 @pytest.yield_fixture(scope="class")
-def security_group(os_conn):
-    security_group = os_conn.create_sec_group_for_ssh()
-    yield security_group
-    os_conn.delete_security_groups()
+def security_group(os_conn, shared_resources):
+    with shared_resources.lease(os_conn, 'security_group') as security_group:
+        yield security_group
 
 
 @pytest.yield_fixture(scope="class")
@@ -116,7 +106,7 @@ def volume(os_conn):
 
 
 @pytest.yield_fixture
-def cleanup(os_conn):
+def cleanup(os_conn, shared_resources):
     def instances_cleanup(os_conn):
         instances = os_conn.nova.servers.list()
         for instance in instances:
@@ -130,10 +120,12 @@ def cleanup(os_conn):
     instances_cleanup(os_conn)
 
     images = [image for image in os_conn.nova.images.list() if
-              image not in initial_images]
+              image not in initial_images and
+              not shared_resources.is_shared('image', image.id)]
     for image in images:
         image.delete()
-    common.wait(lambda: len(os_conn.nova.images.list()) == len(initial_images),
+    common.wait(lambda: all(x not in os_conn.nova.images.list()
+                            for x in images),
                 timeout_seconds=10 * 60, waiting_for='images cleanup')
 
     for volume in os_conn.cinder.volumes.list():
@@ -154,24 +146,11 @@ def flavor(os_conn, request):
 
 
 def computes_configuration(env):
-    computes = env.get_nodes_by_role('compute')
-    computes_def = {}
-
-    def get_compute_def(host, size):
-        with host.ssh() as remote:
-            cmd = ("cat /sys/kernel/mm/hugepages/hugepages-"
-                   "{size}kB/{type}_hugepages" " || echo 0")
-            [free, total] = [
-                remote.execute(cmd.format(size=size, type=t))['stdout'][0]
-                for t in ['free', 'nr']]
-            pages_count = {'total': int(total), 'free': int(free)}
-        return pages_count
-
-    for compute in computes:
-        computes_def.update(
-            {compute.data['fqdn']: {size: get_compute_def(compute, size)
-                                    for size in [page_1gb, page_2mb]}})
-    return computes_def
+    hosts = inspector.get_inspector(env).hosts()
+    return {fqdn: {size: dict(host.hugepages.get(size,
+                                                 {'total': 0, 'free': 0}))
+                   for size in [page_1gb, page_2mb]}
+            for fqdn, host in hosts.items()}
 
 
 @pytest.fixture
@@ -252,91 +231,39 @@ def get_cpu_distribition_per_numa_node(env):
     Two settings are taken into account: vcpus per numa node and vcpus
     allocated for cpu pinning.
     """
-
-    def convert_vcpu(s):
-        result = []
-        for item in s.split(','):
-            bounds = item.split('-')
-            if len(bounds) == 2:
-                result.extend(range(int(bounds[0]), int(bounds[1]) + 1))
-            else:
-                result.append(int(bounds[0]))
-        return result
     host_def = {}
-    computes = env.get_nodes_by_role('compute')
-    for host in computes:
-        count = get_numa_count(host)
-        with host.ssh() as remote:
-            nodes = {}
-            cpus = remote.execute('cat /proc/cmdline')['stdout'][0]
-            if 'isolcpus' not in cpus:
-                continue
-            isolcpus = set(convert_vcpu({x[0]: x[2] for x in [y.partition('=')
-                           for y in cpus.split()]}['isolcpus']))
-            for i in range(count):
-                cmd = "lscpu | grep 'NUMA node{0} CPU(s)'".format(i)
-                res = remote.execute(cmd)['stdout'][0]
-                vcpu_set = set(convert_vcpu(res.split(':')[1].strip()))
-                vcpus = list(vcpu_set & isolcpus)
-                nodes.update({'numa{0}'.format(i): vcpus})
-            host_def.update({host.data['fqdn']: nodes})
+    for fqdn, host in inspector.get_inspector(env).hosts().items():
+        if not host.isolcpus:
+            continue
+        host_def[fqdn] = {
+            'numa{0}'.format(node): sorted(set(cpus) & host.isolcpus)
+            for node, cpus in host.numa_cpus.items()}
     return host_def
 
 
 def get_memory_distribition_per_numa_node(env):
-    host_def = {}
-    computes = env.get_nodes_by_role('compute')
-    for host in computes:
-        with host.ssh() as remote:
-            res = remote.execute("lscpu -p=node | grep -v '#' | uniq")
-            reader = csv.reader(res['stdout'])
-            numas = [i[0] for i in reader]
-            numa_nodes = {}
-            for numa in numas:
-                cmd = ("cat /sys/devices/system/node/node{0}/meminfo |"
-                       "grep MemTotal")
-                res = remote.execute(cmd.format(numa))['stdout']
-                mem_kb = re.findall(r'MemTotal:.* (\d+)', res[0])
-                numa_nodes.update({'numa{0}'.format(numa): float(mem_kb[0])})
-        host_def.update({host.data['fqdn']: numa_nodes})
-    return host_def
+    return {fqdn: {'numa{0}'.format(node): memory
+                   for node, memory in host.numa_memory.items()}
+            for fqdn, host in inspector.get_inspector(env).hosts().items()}
 
 
 def get_hp_distribution_per_numa_node(env):
-    computes = env.get_nodes_by_role('compute')
-
-    def huge_pages_per_numa_node(host, node, size):
-        with host.ssh() as remote:
-            cmd = ("cat /sys/devices/system/node/node{0}/hugepages/hugepages-"
-                   "{size}kB/{type}_hugepages" " || echo 0")
-            [free, total] = [remote.execute(
-                cmd.format(node, size=size, type=t))['stdout'][0]
-                for t in ['free', 'nr']]
-            pages_count = {'total': int(total), 'free': int(free)}
-        return pages_count
-
-    def huge_pages_per_compute(compute):
-        node_def = {}
-        numa_count = get_numa_count(compute)
-        for node in range(numa_count):
-            sizes = {size: huge_pages_per_numa_node(compute, node, size)
-                     for size in [page_1gb, page_2mb]}
-            node_def.update({'numa{0}'.format(node): sizes})
-        return node_def
-
-    computes_def = {compute.data['fqdn']: huge_pages_per_compute(compute)
-                    for compute in computes}
+    computes_def = {}
+    for fqdn, host in inspector.get_inspector(env).hosts().items():
+        computes_def[fqdn] = {
+            'numa{0}'.format(node): {
+                size: dict(host.numa_hugepages.get(node, {}).get(
+                    size, {'total': 0, 'free': 0}))
+                for size in [page_1gb, page_2mb]}
+            for node in host.numa_cpus}
     return computes_def
 
 
-@pytest.fixture
-def ubuntu_image_id(os_conn, cleanup):
-    image = os_conn.glance.images.create(
-        name="image_ubuntu", url=UBUNTU_QCOW2_URL, disk_format='qcow2',
-        container_format='bare')
-    with file_cache.get_file(UBUNTU_QCOW2_URL) as f:
-        os_conn.glance.images.upload(image.id, f)
-    return image.id
+@pytest.yield_fixture
+def ubuntu_image_id(os_conn, shared_resources, cleanup):
+    with shared_resources.lease(os_conn, 'image', name='image_ubuntu',
+                                url=UBUNTU_QCOW2_URL) as image:
+        yield image.id
 
 
 @pytest.fixture
@@ -382,12 +309,7 @@ def experimental_features(fuel):
 
 @pytest.fixture
 def hosts_with_hyper_threading(os_conn):
-    computes = os_conn.env.get_nodes_by_role('compute')
-    hosts = []
-    for compute in computes:
-        with compute.ssh() as remote:
-            res = remote.check_call("lscpu | grep 'Thread(s) per core'")
-        threads_count = int(re.findall('[\d]+', res['stdout'][0])[0])
-        if threads_count >= 2:
-            hosts.append(compute.data['fqdn'])
-    return hosts
+    hosts = inspector.get_inspector(os_conn.env).hosts()
+    return [fqdn for fqdn, host in hosts.items()
+            if any(len(re.split('-|,', x)) >= 2
+                   for x in host.siblings.values())]
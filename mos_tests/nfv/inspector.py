@@ -0,0 +1,278 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Host topology and libvirt domains inspector for NFV tests
+
+All computes are inspected concurrently with one SSH command per host:
+kernel cmdline (isolcpus), NUMA nodes cpus and memory, thread siblings,
+hugepages counters and XML dumps of all running domains. Result is cached
+per host until nova reports changes of instances on it (boot, delete,
+migration, resize), so pinning and hugepages checks don't touch computes.
+"""
+
+from collections import namedtuple
+import logging
+from multiprocessing.dummy import Pool
+import re
+import threading
+import xml.etree.ElementTree as ElementTree
+
+logger = logging.getLogger(__name__)
+
+SWEEP_SCRIPT = """
+echo '### cmdline'; cat /proc/cmdline
+echo '### cpus'; lscpu -p=cpu,node | grep -v '#'
+echo '### siblings'
+grep -H . /sys/devices/system/cpu/cpu[0-9]*/topology/thread_siblings_list
+echo '### hugepages'
+grep -H . /sys/kernel/mm/hugepages/hugepages-*/*_hugepages \
+    /sys/devices/system/node/node*/hugepages/hugepages-*/*_hugepages
+echo '### meminfo'
+grep -H MemTotal /sys/devices/system/node/node*/meminfo
+for name in $(virsh list --name); do
+    echo "### domain $name"; virsh dumpxml $name
+done
+"""
+
+HUGEPAGES_RE = re.compile(r'(?:node(?P<node>\d+)/)?hugepages/hugepages-'
+                          r'(?P<size>\d+)kB/(?P<type>nr|free)_hugepages:'
+                          r'(?P<value>\d+)$')
+SIBLINGS_RE = re.compile(r'cpu(\d+)/topology/thread_siblings_list:(.+)$')
+MEMINFO_RE = re.compile(r'node(\d+)/meminfo:.*MemTotal:\s+(\d+)')
+
+# vcpupins: {vcpu: cpuset}, memnodes: [(cellid, nodeset)] from numatune,
+# numa_cells: {cell id: memory KiB}, page_size: hugepages size KiB or None
+Domain = namedtuple('Domain', ['name', 'uuid', 'page_size', 'vcpupins',
+                               'memnodes', 'numa_cells', 'xml'])
+
+# isolcpus: set of cpus, numa_cpus: {node: [cpus]}, numa_memory: {node:
+# MemTotal KiB}, siblings: {cpu: thread_siblings_list}, hugepages: {size KiB:
+# {'total': count, 'free': count}}, numa_hugepages: {node: {size KiB: ...}},
+# domains: {instance name: Domain}
+HostTopology = namedtuple('HostTopology', [
+    'fqdn', 'isolcpus', 'numa_cpus', 'numa_memory', 'siblings', 'hugepages',
+    'numa_hugepages', 'domains'])
+
+
+def parse_cpus_list(value):
+    """Converts cpus list like `1-3,6` to list of ints"""
+    result = []
+    for item in value.split(','):
+        bounds = item.strip().split('-')
+        if not all(x.isdigit() for x in bounds):
+            continue
+        if len(bounds) == 2:
+            result.extend(range(int(bounds[0]), int(bounds[1]) + 1))
+        else:
+            result.append(int(bounds[0]))
+    return result
+
+
+def parse_domain(name, xml):
+    root = ElementTree.fromstring(xml)
+    page = root.find('memoryBacking/hugepages/page')
+    page_size = int(page.get('size')) if page is not None else None
+    vcpupins = {int(x.get('vcpu')): x.get('cpuset')
+                for x in root.findall('cputune/vcpupin')}
+    memnodes = [(x.get('cellid'), x.get('nodeset'))
+                for x in root.findall('numatune/memnode')]
+    numa_cells = {x.get('id'): int(x.get('memory'))
+                  for x in root.findall('cpu/numa/cell')}
+    return Domain(name=name, uuid=root.findtext('uuid'), page_size=page_size,
+                  vcpupins=vcpupins, memnodes=memnodes,
+                  numa_cells=numa_cells, xml=xml)
+
+
+def split_sections(output):
+    """Returns list of (section name, lines) of sweep output"""
+    sections = []
+    for line in output.splitlines():
+        if line.startswith('### '):
+            sections.append((line[4:].strip(), []))
+        elif sections:
+            sections[-1][1].append(line)
+    return sections
+
+
+def parse_sweep(fqdn, output):
+    """Returns HostTopology from SWEEP_SCRIPT output"""
+    isolcpus = set()
+    numa_cpus = {}
+    numa_memory = {}
+    siblings = {}
+    hugepages = {}
+    numa_hugepages = {}
+    domains = {}
+    for section, lines in split_sections(output):
+        if section == 'cmdline':
+            for arg in ' '.join(lines).split():
+                key, _, value = arg.partition('=')
+                if key == 'isolcpus':
+                    isolcpus = set(parse_cpus_list(value))
+        elif section == 'cpus':
+            for line in lines:
+                cpu, _, node = line.strip().partition(',')
+                if cpu.isdigit():
+                    numa_cpus.setdefault(int(node or 0), []).append(int(cpu))
+        elif section == 'siblings':
+            for line in lines:
+                match = SIBLINGS_RE.search(line)
+                if match:
+                    siblings[int(match.group(1))] = match.group(2).strip()
+        elif section == 'hugepages':
+            for line in lines:
+                match = HUGEPAGES_RE.search(line)
+                if match is None:
+                    continue
+                if match.group('node') is None:
+                    target = hugepages
+                else:
+                    target = numa_hugepages.setdefault(
+                        int(match.group('node')), {})
+                pages = target.setdefault(int(match.group('size')),
+                                          {'total': 0, 'free': 0})
+                key = 'total' if match.group('type') == 'nr' else 'free'
+                pages[key] = int(match.group('value'))
+        elif section == 'meminfo':
+            for line in lines:
+                match = MEMINFO_RE.search(line)
+                if match:
+                    numa_memory[int(match.group(1))] = float(match.group(2))
+        elif section.startswith('domain '):
+            name = section.split(' ', 1)[1]
+            domains[name] = parse_domain(name, '\n'.join(lines))
+    return HostTopology(fqdn=fqdn, isolcpus=isolcpus, numa_cpus=numa_cpus,
+                        numa_memory=numa_memory, siblings=siblings,
+                        hugepages=hugepages, numa_hugepages=numa_hugepages,
+                        domains=domains)
+
+
+def thread_siblings_lists(topology, node):
+    """Returns thread siblings lists of NUMA node, which are isolated
+
+    Each list is tuple of strings (as in thread_siblings_list).
+    """
+    result = []
+    isolcpus = {str(x) for x in topology.isolcpus}
+    for cpu in topology.numa_cpus.get(int(node), []):
+        value = topology.siblings.get(cpu)
+        if value is None:
+            continue
+        siblings = tuple(re.split('-|,', value))
+        if set(siblings).issubset(isolcpus) and siblings not in result:
+            result.append(siblings)
+    return result
+
+
+def instances_states(os_conn):
+    """Returns dict {host: instances state key} from one servers listing
+
+    Key changes on each instance lifecycle event on host. Instance id is
+    a part of key, as names of instances are reused after env revert.
+    """
+    states = {}
+    for server in os_conn.nova.servers.list(search_opts={'all_tenants': 1}):
+        host = getattr(server, 'OS-EXT-SRV-ATTR:host', None)
+        if host is None:
+            continue
+        states.setdefault(host, []).append((
+            server.id,
+            getattr(server, 'OS-EXT-SRV-ATTR:instance_name', None),
+            server.status,
+            getattr(server, 'OS-EXT-STS:task_state', None)))
+    return {k: tuple(sorted(v)) for k, v in states.items()}
+
+
+class Inspector(object):
+    """Cached topology of computes
+
+    Hosts are swept again only if its instances are changed (checked with
+    one nova servers listing) or after `invalidate`.
+    """
+
+    def __init__(self, env, concurrency=10):
+        self.env = env
+        self.concurrency = concurrency
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, *hosts):
+        """Drop cached topology of hosts (all hosts without arguments)"""
+        with self._lock:
+            if not hosts:
+                self._cache.clear()
+            for host in hosts:
+                self._cache.pop(host, None)
+
+    def _sweep(self, compute):
+        fqdn = compute.data['fqdn']
+        with compute.ssh() as remote:
+            output = remote.check_call(SWEEP_SCRIPT).stdout_string
+        return fqdn, parse_sweep(fqdn, output)
+
+    def hosts(self):
+        """Returns dict {fqdn: HostTopology} of all computes"""
+        computes = self.env.get_nodes_by_role('compute')
+        states = instances_states(self.env.os_conn)
+        with self._lock:
+            stale = [x for x in computes
+                     if self._cache.get(x.data['fqdn'], (None,))[0] !=
+                     states.get(x.data['fqdn'], ())]
+        if stale:
+            logger.debug('Inspect computes: {0}'.format(
+                [x.data['fqdn'] for x in stale]))
+            pool = Pool(min(self.concurrency, len(stale)))
+            try:
+                results = pool.map(self._sweep, stale)
+            finally:
+                pool.terminate()
+            with self._lock:
+                for fqdn, topology in results:
+                    self._cache[fqdn] = (states.get(fqdn, ()), topology)
+        with self._lock:
+            return {x.data['fqdn']: self._cache[x.data['fqdn']][1]
+                    for x in computes}
+
+    def host(self, fqdn):
+        return self.hosts()[fqdn]
+
+    def domain(self, vm):
+        """Returns Domain of nova server (it is refreshed)"""
+        vm.get()
+        fqdn = getattr(vm, 'OS-EXT-SRV-ATTR:host')
+        name = getattr(vm, 'OS-EXT-SRV-ATTR:instance_name')
+        if name not in self.host(fqdn).domains:
+            # Domain can be defined after nova state was cached
+            self.invalidate(fqdn)
+        return self.host(fqdn).domains[name]
+
+
+_inspectors = {}
+_inspectors_lock = threading.Lock()
+
+
+def get_inspector(env):
+    """Returns Inspector of environment (shared between tests)"""
+    with _inspectors_lock:
+        inspector = _inspectors.get(env.id)
+        if inspector is None:
+            inspector = _inspectors[env.id] = Inspector(env)
+        inspector.env = env
+        return inspector
+
+
+def clear():
+    """Forget all inspectors (after snapshot revert, for example)"""
+    with _inspectors_lock:
+        _inspectors.clear()
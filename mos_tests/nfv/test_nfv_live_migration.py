@@ -17,7 +17,6 @@ import logging
 import dpath.util
 import pytest
 
-from mos_tests.functions import file_cache
 from mos_tests.functions import network_checks
 from mos_tests.functions import service
 from mos_tests.nfv.base import page_1gb
@@ -55,15 +54,10 @@ def disable_nova_config_drive(get_env):
 
 
 @pytest.yield_fixture
-def ubuntu_image_id(os_conn):
-    image = os_conn.glance.images.create(name="image_ubuntu",
-                                         url=UBUNTU_QCOW2_URL,
-                                         disk_format='qcow2',
-                                         container_format='bare')
-    with file_cache.get_file(UBUNTU_QCOW2_URL) as f:
-        os_conn.glance.images.upload(image.id, f)
-    yield image.id
-    os_conn.glance.images.delete(image.id)
+def ubuntu_image_id(os_conn, shared_resources):
+    with shared_resources.lease(os_conn, 'image', name='image_ubuntu',
+                                url=UBUNTU_QCOW2_URL) as image:
+        yield image.id
 
 
 def check_vm_connectivity_cirros_ubuntu(env, os_conn, keypair, cirros, ubuntu):
@@ -34,19 +34,15 @@ def network(os_conn, request):
 
 
 @pytest.yield_fixture
-def keypair(os_conn, request):
-    keypair = os_conn.create_key(key_name='instancekey')
-    yield keypair
-    if 'undestructive' in request.node.keywords:
-        os_conn.delete_key(key_name=keypair.name)
+def keypair(os_conn, shared_resources):
+    with shared_resources.lease(os_conn, 'keypair') as keypair:
+        yield keypair
 
 
 @pytest.yield_fixture
-def security_group(os_conn, request):
-    sec_group = os_conn.create_sec_group_for_ssh()
-    yield sec_group
-    if 'undestructive' in request.node.keywords:
-        os_conn.delete_security_group(sec_group)
+def security_group(os_conn, shared_resources):
+    with shared_resources.lease(os_conn, 'security_group') as sec_group:
+        yield sec_group
 
 
 def delete_instances(os_conn, instances):
@@ -22,8 +22,13 @@ import pytest
 from six.moves import configparser
 
 from mos_tests.conftest import ubuntu_image_id as ubuntu_image_id_base
+from mos_tests.environment.os_actions import InstanceError
 from mos_tests.functions import common
 from mos_tests.functions import service
+from mos_tests.functions.workload import BakedImage
+from mos_tests.functions.workload import tools_userdata
+from mos_tests.functions.workload import Workload
+from mos_tests.nova.migration_profiler import MigrationProfiler
 
 logger = logging.getLogger(__name__)
 pytestmark = pytest.mark.undestructive
@@ -31,15 +36,24 @@ pytestmark = pytest.mark.undestructive
 
 def is_migrated(os_conn, instances, target=None, source=None):
     assert any([source, target]), 'One of target or source is required'
+    # One listing instead of fetching of each instance
+    servers = {x.id: x for x in os_conn.nova.servers.list()}
     for instance in instances:
-        instance.get()
-        host = getattr(instance, 'OS-EXT-SRV-ATTR:host')
-        if not os_conn.is_server_active(instance):
+        if instance.id not in servers:
             return False
+        server = servers[instance.id]
+        if server.status == 'ERROR':
+            raise InstanceError(server)
+        if server.status != 'ACTIVE':
+            return False
+        host = getattr(server, 'OS-EXT-SRV-ATTR:host')
         if target and host != target:
             return False
         if source and host == source:
             return False
+    for instance in instances:
+        # Refresh instance data from the same listing
+        instance._add_details(servers[instance.id]._info)
     return True
 
 
@@ -124,11 +138,19 @@ def block_migration(get_env, request):
 
 
 @pytest.yield_fixture(scope='module')
-def ubuntu_image_id(os_conn):
-    for step in ubuntu_image_id_base(os_conn):
+def ubuntu_image_id(os_conn, shared_resources):
+    for step in ubuntu_image_id_base(os_conn, shared_resources):
         yield step
 
 
+@pytest.yield_fixture(scope='module')
+def workload_image(os_conn, ubuntu_image_id):
+    """Ubuntu image with load tools (baked after first stress instances)"""
+    image = BakedImage(os_conn, ubuntu_image_id)
+    yield image
+    image.delete()
+
+
 @pytest.yield_fixture
 def router(os_conn, network):
     router = os_conn.create_router(name='router01')
@@ -228,26 +250,24 @@ class TestLiveMigrationBase(object):
                         "instances")
 
     def make_stress_instances(self,
-                              ubuntu_image_id,
+                              workload_image,
                               instances_count,
                               zone,
                               create_args=None,
                               flavor=None):
-        userdata = '\n'.join([
-            '#!/bin/bash -v',
-            'apt-get install -yq stress cpulimit sysstat iperf',
-        ])
-
         flavor = flavor or self.os_conn.nova.flavors.find(name='m1.small')
         self.create_instances(zone=zone,
                               flavor=flavor,
                               instances_count=instances_count,
-                              image_id=ubuntu_image_id,
-                              userdata=userdata,
+                              image_id=workload_image.image_id,
+                              userdata=tools_userdata(),
                               create_args=create_args)
+        if create_args is None:
+            # Next instances will be booted with installed tools
+            workload_image.bake(self.instances[0])
 
     @pytest.fixture
-    def stress_instances(self, request, ubuntu_image_id, os_conn, nova_ceph,
+    def stress_instances(self, request, workload_image, os_conn, nova_ceph,
                          block_migration, big_hypervisors):
         project_id = os_conn.session.get_project_id()
         max_volumes = os_conn.cinder.quotas.get(project_id).volumes
@@ -272,13 +292,12 @@ class TestLiveMigrationBase(object):
             instances_count = min(instances_count, max_volumes)
             create_args = []
             for i in range(instances_count):
-                vol = common.create_volume(os_conn.cinder,
-                                           image_id=ubuntu_image_id,
-                                           size=5)
+                vol = common.create_volume(
+                    os_conn.cinder, image_id=workload_image.image_id, size=5)
                 self.volumes.append(vol)
                 create_args.append(dict(block_device_mapping={'vda': vol.id}))
             request.addfinalizer(lambda: os_conn.delete_volumes(self.volumes))
-        self.make_stress_instances(ubuntu_image_id,
+        self.make_stress_instances(workload_image,
                                    instances_count=instances_count,
                                    zone=instances_zone, flavor=flavor,
                                    create_args=create_args)
@@ -286,7 +305,7 @@ class TestLiveMigrationBase(object):
         return self.instances
 
     @pytest.fixture
-    def stress_instance(self, request, os_conn, ubuntu_image_id, nova_ceph,
+    def stress_instance(self, request, os_conn, workload_image, nova_ceph,
                         block_migration):
         params = getattr(request, 'param', {'volume_backed': False})
         self.check_lm_restrictions(nova_ceph, params['volume_backed'],
@@ -294,11 +313,12 @@ class TestLiveMigrationBase(object):
         create_args = None
         if params['volume_backed']:
             vol = common.create_volume(os_conn.cinder,
-                                       image_id=ubuntu_image_id, size=5)
+                                       image_id=workload_image.image_id,
+                                       size=5)
             self.volumes.append(vol)
             create_args = [dict(block_device_mapping={'vda': vol.id})]
             request.addfinalizer(lambda: os_conn.delete_volumes(self.volumes))
-        self.make_stress_instances(ubuntu_image_id,
+        self.make_stress_instances(workload_image,
                                    instances_count=1,
                                    zone='nova',
                                    create_args=create_args)
@@ -346,36 +366,51 @@ class TestLiveMigrationBase(object):
         yield
         os_conn.delete_volumes(self.volumes)
 
+    def workload(self):
+        return Workload(self.env, self.os_conn, self.instances,
+                        keypair=self.keypair)
+
+    def profiler(self):
+        return MigrationProfiler(self.env, self.os_conn, self.instances,
+                                 network_id=self.network['network']['id'])
+
     def successive_migration(self, block_migration, hypervisor_from):
         logger.info('Start successive migrations')
-        for instance in self.instances:
-            instance.live_migrate(block_migration=block_migration)
-
-        common.wait(
-            lambda: is_migrated(self.os_conn, self.instances,
-                                source=hypervisor_from.hypervisor_hostname),
-            timeout_seconds=20 * 60,
-            waiting_for='instances to migrate from '
-                        '{0.hypervisor_hostname}'.format(hypervisor_from))
+        with self.profiler() as profiler:
+            for instance in self.instances:
+                profiler.migrate(instance, block_migration=block_migration)
+
+            common.wait(
+                lambda: is_migrated(
+                    self.os_conn, self.instances,
+                    source=hypervisor_from.hypervisor_hostname),
+                timeout_seconds=20 * 60,
+                waiting_for='instances to migrate from '
+                            '{0.hypervisor_hostname}'.format(hypervisor_from))
+        logger.info('Successive migrations:\n{0}'.format(profiler.report()))
+        return profiler
 
     def concurrent_migration(self, block_migration, hypervisor_to):
-        pool = Pool(len(self.instances))
         logger.info('Start concurrent migrations')
         host = hypervisor_to.hypervisor_hostname
-        try:
-            pool.map(
-                lambda x: x.live_migrate(host=host,
-                                         block_migration=block_migration),
-                self.instances)
-        finally:
-            pool.terminate()
-
-        common.wait(
-            lambda: is_migrated(self.os_conn, self.instances,
-                                target=hypervisor_to.hypervisor_hostname),
-            timeout_seconds=20 * 60,
-            waiting_for='instances to migrate to '
-                        '{0.hypervisor_hostname}'.format(hypervisor_to))
+        with self.profiler() as profiler:
+            pool = Pool(len(self.instances))
+            try:
+                pool.map(
+                    lambda x: profiler.migrate(
+                        x, host=host, block_migration=block_migration),
+                    self.instances)
+            finally:
+                pool.terminate()
+
+            common.wait(
+                lambda: is_migrated(self.os_conn, self.instances,
+                                    target=hypervisor_to.hypervisor_hostname),
+                timeout_seconds=20 * 60,
+                waiting_for='instances to migrate to '
+                            '{0.hypervisor_hostname}'.format(hypervisor_to))
+        logger.info('Concurrent migrations:\n{0}'.format(profiler.report()))
+        return profiler
 
     def check_volumes_have_status(self, status):
         assert all(
@@ -824,22 +859,21 @@ class TestLiveMigrationUnderWorkload(TestLiveMigrationBase):
                 connectivity between these hosts is alive
         """
         hypervisor1, _ = big_hypervisors
-        for instance in self.instances:
-            with self.os_conn.ssh_to_instance(self.env,
-                                              instance,
-                                              vm_keypair=keypair,
-                                              username='ubuntu') as remote:
-                remote.check_call(cmd)
+        with self.workload() as workload:
+            workload.execute(cmd)
 
-        self.successive_migration(block_migration, hypervisor_from=hypervisor1)
+            self.successive_migration(block_migration,
+                                      hypervisor_from=hypervisor1)
 
-        self.os_conn.wait_servers_ssh_ready(self.instances)
+            self.os_conn.wait_servers_ssh_ready(self.instances)
 
-        self.os_conn.wait_hypervisor_be_free(hypervisor1)
+            self.os_conn.wait_hypervisor_be_free(hypervisor1)
 
-        self.concurrent_migration(block_migration, hypervisor_to=hypervisor1)
+            self.concurrent_migration(block_migration,
+                                      hypervisor_to=hypervisor1)
 
-        self.os_conn.wait_servers_ssh_ready(self.instances)
+            self.os_conn.wait_servers_ssh_ready(self.instances)
+        logger.info(workload.report())
 
     @pytest.mark.testrail_id('838039')
     @pytest.mark.parametrize('block_migration, stress_instances, cmd',
@@ -874,18 +908,16 @@ class TestLiveMigrationUnderWorkload(TestLiveMigrationBase):
                 connectivity between these hosts is alive
         """
         hypervisor1, _ = big_hypervisors
-        for instance in self.instances:
-            with self.os_conn.ssh_to_instance(self.env,
-                                              instance,
-                                              vm_keypair=keypair,
-                                              username='ubuntu') as remote:
-                remote.check_call(cmd)
+        with self.workload() as workload:
+            workload.execute(cmd)
 
-        self.successive_migration(block_migration, hypervisor_from=hypervisor1)
+            self.successive_migration(block_migration,
+                                      hypervisor_from=hypervisor1)
 
-        self.os_conn.wait_servers_ssh_ready(self.instances)
+            self.os_conn.wait_servers_ssh_ready(self.instances)
 
-        self.os_conn.wait_hypervisor_be_free(hypervisor1)
+            self.os_conn.wait_hypervisor_be_free(hypervisor1)
+        logger.info(workload.report())
 
     @pytest.mark.testrail_id('838038', block_migration=True,
                              stress_instances={'volume_backed': False})
@@ -939,35 +971,28 @@ class TestLiveMigrationUnderWorkload(TestLiveMigrationBase):
         hypervisor1, _ = big_hypervisors
         clients = self.instances[::2]
         servers = self.instances[1::2]
-        for server in servers:
-            with self.os_conn.ssh_to_instance(self.env,
-                                              server,
-                                              vm_keypair=keypair,
-                                              username='ubuntu') as remote:
-                remote.check_call('iperf -u -s -p 5002 <&- >/dev/null 2>&1 &')
-
         if len(servers) < len(clients):
             servers.append(servers[-1])
-        for client, server in zip(clients, servers):
+        targets = {
+            client.id: self.os_conn.get_nova_instance_ips(server)['fixed']
+            for client, server in zip(clients, servers)}
+        with self.workload() as workload:
+            workload.start('iperf_server', self.instances[1::2])
+            workload.start('network', clients, duration=240,
+                           target=lambda x: targets[x.id])
 
-            server_ip = self.os_conn.get_nova_instance_ips(server)['fixed']
-            with self.os_conn.ssh_to_instance(self.env,
-                                              client,
-                                              vm_keypair=keypair,
-                                              username='ubuntu') as remote:
-                remote.check_call(
-                    'iperf -u -c {ip} -p 5002 -t 240 --len 64 --bandwidth 5M '
-                    '<&- >/dev/null 2>&1 &'.format(ip=server_ip))
-
-        self.successive_migration(block_migration, hypervisor_from=hypervisor1)
+            self.successive_migration(block_migration,
+                                      hypervisor_from=hypervisor1)
 
-        self.os_conn.wait_servers_ssh_ready(self.instances)
+            self.os_conn.wait_servers_ssh_ready(self.instances)
 
-        self.os_conn.wait_hypervisor_be_free(hypervisor1)
+            self.os_conn.wait_hypervisor_be_free(hypervisor1)
 
-        self.concurrent_migration(block_migration, hypervisor_to=hypervisor1)
+            self.concurrent_migration(block_migration,
+                                      hypervisor_to=hypervisor1)
 
-        self.os_conn.wait_servers_ssh_ready(self.instances)
+            self.os_conn.wait_servers_ssh_ready(self.instances)
+        logger.info(workload.report())
 
 
 class TestLiveMigrationWithFeatures(TestLiveMigrationBase):
@@ -1156,35 +1181,28 @@ class TestLiveMigrationWithFeatures(TestLiveMigrationBase):
         hypervisor1, _ = big_hypervisors
         clients = self.instances[::2]
         servers = self.instances[1::2]
-        for server in servers:
-            with self.os_conn.ssh_to_instance(self.env,
-                                              server,
-                                              vm_keypair=keypair,
-                                              username='ubuntu') as remote:
-                remote.background_call('iperf -u -s -p 5002')
-
         if len(servers) < len(clients):
             servers.append(servers[-1])
-        for client, server in zip(clients, servers):
-
-            server_ip = self.os_conn.get_nova_instance_ips(server)['fixed']
-            with self.os_conn.ssh_to_instance(self.env,
-                                              client,
-                                              vm_keypair=keypair,
-                                              username='ubuntu') as remote:
-                remote.background_call(
-                    'iperf -u -c {ip} -p 5002 -t 240 --len 64 --bandwidth 5M'
-                    .format(ip=server_ip))
+        targets = {
+            client.id: self.os_conn.get_nova_instance_ips(server)['fixed']
+            for client, server in zip(clients, servers)}
+        with self.workload() as workload:
+            workload.start('iperf_server', self.instances[1::2])
+            workload.start('network', clients, duration=240,
+                           target=lambda x: targets[x.id])
 
-        self.successive_migration(block_migration, hypervisor_from=hypervisor1)
+            self.successive_migration(block_migration,
+                                      hypervisor_from=hypervisor1)
 
-        self.os_conn.wait_servers_ssh_ready(self.instances)
+            self.os_conn.wait_servers_ssh_ready(self.instances)
 
-        self.os_conn.wait_hypervisor_be_free(hypervisor1)
+            self.os_conn.wait_hypervisor_be_free(hypervisor1)
 
-        self.concurrent_migration(block_migration, hypervisor_to=hypervisor1)
+            self.concurrent_migration(block_migration,
+                                      hypervisor_to=hypervisor1)
 
-        self.os_conn.wait_servers_ssh_ready(self.instances)
+            self.os_conn.wait_servers_ssh_ready(self.instances)
+        logger.info(workload.report())
 
 
 class TestLiveMigrationWithUserContent(TestLiveMigrationBase):
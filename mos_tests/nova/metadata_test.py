@@ -16,7 +16,6 @@ import logging
 
 import pytest
 
-from mos_tests.functions import file_cache
 from mos_tests import settings
 
 logger = logging.getLogger(__name__)
@@ -24,17 +23,10 @@ pytestmark = pytest.mark.undestructive
 
 
 @pytest.yield_fixture
-def ubuntu_image_id(os_conn):
-    logger.info('Creating ubuntu image')
-    image = os_conn.glance.images.create(name="image_ubuntu",
-                                         disk_format='qcow2',
-                                         container_format='bare')
-    with file_cache.get_file(settings.UBUNTU_QCOW2_URL) as f:
-        os_conn.glance.images.upload(image.id, f)
-
-    logger.info('Ubuntu image created')
-    yield image.id
-    os_conn.glance.images.delete(image.id)
+def ubuntu_image_id(os_conn, shared_resources):
+    with shared_resources.lease(os_conn, 'image', name='image_ubuntu',
+                                url=settings.UBUNTU_QCOW2_URL) as image:
+        yield image.id
 
 
 @pytest.yield_fixture
@@ -0,0 +1,441 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Live migration profiler
+
+While instances migrate, background thread samples nova `os-migrations`
+(one listing for all instances) and `virsh domjobinfo` of migrating
+domains (one ssh command per source hypervisor, hypervisors are sampled
+concurrently). Network downtime is measured by ping from DHCP namespace of
+instances network. After migration libvirt statistics of completed jobs are
+read on destination hypervisors.
+"""
+
+import logging
+from multiprocessing.dummy import Pool
+import threading
+import time
+
+from contextlib2 import ExitStack
+
+from mos_tests.functions.benchmark import percentile
+from mos_tests.functions.benchmark import Stats
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_DONE = ('completed', 'error', 'failed', 'cancelled')
+
+SIZE_UNITS = {'B': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3,
+              'TiB': 1024 ** 4}
+
+PING_INTERVAL = 0.2
+
+
+def parse_domjobinfo(output):
+    """Returns dict of `virsh domjobinfo` fields
+
+    Keys are lowercased with underscores (`memory_processed`), sizes are
+    converted to bytes, rates - to bytes per second, times - to seconds.
+    """
+    info = {}
+    for line in output.splitlines():
+        if ':' not in line:
+            continue
+        key, value = [x.strip() for x in line.split(':', 1)]
+        key = key.lower().replace(' ', '_')
+        parts = value.split()
+        if not parts:
+            continue
+        try:
+            number = float(parts[0])
+        except ValueError:
+            info[key] = value
+            continue
+        unit = parts[1] if len(parts) > 1 else ''
+        if unit == 'ms':
+            number /= 1000.0
+        elif unit.endswith('/s') and unit[:-2] in SIZE_UNITS:
+            number *= SIZE_UNITS[unit[:-2]]
+        elif unit in SIZE_UNITS:
+            number *= SIZE_UNITS[unit]
+        info[key] = number
+    return info
+
+
+def domjobinfo_command(domains, completed=False):
+    """Returns command, which prints job info of several domains"""
+    option = ' --completed' if completed else ''
+    return ('for d in {domains}; do echo "Domain: $d"; '
+            'virsh domjobinfo{option} $d 2>/dev/null; done').format(
+                domains=' '.join(domains), option=option)
+
+
+def parse_domjobinfo_list(output):
+    """Returns dict {domain: job info} from `domjobinfo_command` output"""
+    result = {}
+    domain = None
+    lines = []
+    for line in output.splitlines() + ['Domain: ']:
+        if line.startswith('Domain: '):
+            if domain:
+                result[domain] = parse_domjobinfo('\n'.join(lines))
+            domain = line.split(':', 1)[1].strip()
+            lines = []
+        else:
+            lines.append(line)
+    return result
+
+
+def parse_ping(output):
+    """Returns timestamps of replies from `ping -D` output"""
+    timestamps = []
+    for line in output.splitlines():
+        if not line.startswith('[') or 'bytes from' not in line:
+            continue
+        timestamps.append(float(line[1:line.index(']')]))
+    return timestamps
+
+
+def ping_downtime(timestamps, interval=PING_INTERVAL):
+    """Returns max time without ping replies (seconds)"""
+    if len(timestamps) < 2:
+        return None
+    gaps = [b - a for a, b in zip(timestamps, timestamps[1:])]
+    return max(max(gaps) - interval, 0)
+
+
+class MigrationProfile(object):
+    """Live migration of one instance"""
+
+    def __init__(self, instance):
+        self.instance = instance
+        self.domain = getattr(instance, 'OS-EXT-SRV-ATTR:instance_name')
+        self.source = getattr(instance,
+                              'OS-EXT-SRV-ATTR:hypervisor_hostname')
+        self.destination = None
+        self.migration_id = None
+        self.status = None
+        # list of (time, migration status)
+        self.states = []
+        # list of (time, domjobinfo)
+        self.samples = []
+        self.completed = {}
+        self.ping = []
+        self.start = None
+        self.end = None
+
+    @property
+    def done(self):
+        return self.status in MIGRATION_DONE
+
+    def add_state(self, timestamp, status):
+        if status == self.status:
+            return
+        self.status = status
+        self.states.append((timestamp, status))
+        if self.done and self.end is None:
+            self.end = timestamp
+
+    def add_sample(self, timestamp, info):
+        if info.get('job_type', 'None') != 'None':
+            self.samples.append((timestamp, info))
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    def _last(self, key):
+        if key in self.completed:
+            return self.completed[key]
+        values = [x[key] for _, x in self.samples if key in x]
+        return values[-1] if values else None
+
+    @property
+    def data_processed(self):
+        return self._last('data_processed') or 0
+
+    @property
+    def memory_rate(self):
+        """Memory transfer rate (bytes per second)"""
+        processed = self._last('memory_processed')
+        elapsed = self._last('time_elapsed')
+        if processed is None or not elapsed:
+            return self._last('memory_bandwidth')
+        return processed / elapsed
+
+    @property
+    def iterations(self):
+        """Count of memory copy passes (dirty pages iterations)"""
+        iteration = self._last('iteration')
+        if iteration is not None:
+            return int(iteration)
+        # Old libvirt has no iteration counter, new pass starts when
+        # remaining memory grows
+        remaining = [x['memory_remaining'] for _, x in self.samples
+                     if 'memory_remaining' in x]
+        if not remaining:
+            return None
+        return 1 + sum(1 for a, b in zip(remaining, remaining[1:]) if b > a)
+
+    @property
+    def downtime(self):
+        """Network downtime by ping (seconds)"""
+        return ping_downtime(self.ping)
+
+    @property
+    def libvirt_downtime(self):
+        return self.completed.get('total_downtime')
+
+    def report(self):
+        def fmt(value, template):
+            return 'n/a' if value is None else template.format(value)
+
+        return ('{name}: {status} {source} -> {destination} in {duration}, '
+                'processed {data}, memory {rate}, {iterations} iterations, '
+                'downtime {downtime} (libvirt {libvirt})').format(
+                    name=self.instance.name, status=self.status,
+                    source=self.source, destination=self.destination,
+                    duration=fmt(self.duration, '{0:.1f}s'),
+                    data=fmt(self.data_processed / 2.0 ** 20, '{0:.0f}MiB'),
+                    rate=fmt(self.memory_rate and
+                             self.memory_rate / 2.0 ** 20, '{0:.1f}MiB/s'),
+                    iterations=fmt(self.iterations, '{0}'),
+                    downtime=fmt(self.downtime, '{0:.2f}s'),
+                    libvirt=fmt(self.libvirt_downtime, '{0:.3f}s'))
+
+
+class MigrationProfiler(object):
+    """Records live migrations of instances
+
+    Usage::
+
+        with MigrationProfiler(env, os_conn, instances) as profiler:
+            for instance in instances:
+                profiler.migrate(instance, block_migration=False)
+            common.wait(...)
+        logger.info(profiler.report())
+    """
+
+    def __init__(self, env, os_conn, instances, network_id=None, interval=1,
+                 concurrency=10):
+        self.env = env
+        self.os_conn = os_conn
+        self.network_id = network_id
+        self.interval = interval
+        self.concurrency = concurrency
+        self.profiles = {x.id: MigrationProfile(x) for x in instances}
+        self._remotes = {}
+        self._pings = {}
+        self._ping_remote = None
+        self._known_migrations = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stack = ExitStack()
+
+    def _remote(self, fqdn):
+        if fqdn not in self._remotes:
+            node = self.env.find_node_by_fqdn(fqdn)
+            self._remotes[fqdn] = self.stack.enter_context(node.ssh())
+        return self._remotes[fqdn]
+
+    def _map(self, func, items):
+        if len(items) == 0:
+            return []
+        pool = Pool(min(self.concurrency, len(items)))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.terminate()
+
+    def _start_ping(self):
+        if self.network_id is None:
+            return
+        dhcp_node = self.os_conn.get_node_with_dhcp_for_network(
+            self.network_id)[0]
+        self._ping_remote = self._remote(dhcp_node)
+        for instance_id, profile in self.profiles.items():
+            ip = self.os_conn.get_nova_instance_ips(profile.instance)['fixed']
+            path = '/tmp/lm_ping_{0}.log'.format(instance_id)
+            pid = self._ping_remote.background_call(
+                'ip netns exec qdhcp-{net} ping -D -i {interval} {ip}'.format(
+                    net=self.network_id, interval=PING_INTERVAL, ip=ip),
+                stdout=path)
+            self._pings[instance_id] = (pid, path)
+
+    def _stop_ping(self):
+        for instance_id, (pid, path) in self._pings.items():
+            self._best_effort(
+                lambda: self._read_ping(instance_id, pid, path),
+                'read ping of {0}'.format(instance_id))
+        self._pings = {}
+
+    def _read_ping(self, instance_id, pid, path):
+        self._ping_remote.execute('kill {0}'.format(pid), verbose=False)
+        output = self._ping_remote.execute(
+            'cat {0}; rm -f {0}'.format(path), verbose=False)
+        self.profiles[instance_id].ping = parse_ping(output.stdout_string)
+
+    def _sample_migrations(self):
+        now = time.time()
+        migrations = sorted(self.os_conn.nova.migrations.list(),
+                            key=lambda x: x.id)
+        for migration in migrations:
+            if migration.id in self._known_migrations:
+                continue
+            profile = self.profiles.get(migration.instance_uuid)
+            if profile is None:
+                self._known_migrations.add(migration.id)
+                continue
+            if profile.start is None:
+                continue
+            if profile.migration_id not in (None, migration.id):
+                continue
+            profile.migration_id = migration.id
+            profile.destination = migration.dest_compute
+            profile.add_state(now, migration.status)
+            if profile.done:
+                self._known_migrations.add(migration.id)
+
+    def _sample_jobs(self, host):
+        profiles = [x for x in self.profiles.values()
+                    if x.source == host and x.start is not None and
+                    not x.done]
+        if not profiles:
+            return
+        result = self._remote(host).execute(
+            domjobinfo_command([x.domain for x in profiles]), verbose=False)
+        now = time.time()
+        jobs = parse_domjobinfo_list(result.stdout_string)
+        for profile in profiles:
+            profile.add_sample(now, jobs.get(profile.domain, {}))
+
+    def sample(self):
+        self._sample_migrations()
+        hosts = set(x.source for x in self.profiles.values())
+        self._map(self._sample_jobs, list(hosts))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning('Migration sampling failed: {0}'.format(e))
+            if all(x.done for x in self.profiles.values()):
+                break
+            self._stop.wait(self.interval)
+
+    def _read_completed_jobs(self):
+        by_host = {}
+        servers = {x.id: x for x in self.os_conn.nova.servers.list()}
+        for profile in self.profiles.values():
+            if profile.instance.id not in servers:
+                continue
+            host = getattr(servers[profile.instance.id],
+                           'OS-EXT-SRV-ATTR:hypervisor_hostname')
+            if host != profile.source:
+                by_host.setdefault(host, []).append(profile)
+
+        def read(item):
+            host, profiles = item
+            result = self._remote(host).execute(
+                domjobinfo_command([x.domain for x in profiles],
+                                   completed=True), verbose=False)
+            jobs = parse_domjobinfo_list(result.stdout_string)
+            for profile in profiles:
+                profile.completed = jobs.get(profile.domain, {})
+
+        self._map(read, list(by_host.items()))
+
+    def _best_effort(self, func, action):
+        """Profiling errors must not fail migration tests"""
+        try:
+            func()
+        except Exception as e:
+            logger.warning('Migration profiler failed to {0}: {1}'.format(
+                action, e))
+
+    def _list_known_migrations(self):
+        self._known_migrations = set(
+            x.id for x in self.os_conn.nova.migrations.list())
+
+    def start(self):
+        self._best_effort(self._list_known_migrations, 'list migrations')
+        self._best_effort(self._start_ping, 'start ping')
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def migrate(self, instance, **kwargs):
+        """Start live migration of instance with `live_migrate` kwargs"""
+        self.profiles[instance.id].start = time.time()
+        instance.live_migrate(**kwargs)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._best_effort(self._sample_migrations, 'sample migrations')
+        self._best_effort(self._stop_ping, 'stop ping')
+        self._best_effort(self._read_completed_jobs, 'read completed jobs')
+        self._best_effort(self.stack.close, 'close ssh connections')
+        self._remotes = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def stats(self, name='live-migration'):
+        """Returns Stats with migrations durations and transferred data"""
+        stats = Stats(name)
+        for profile in self.profiles.values():
+            if profile.start is None:
+                continue
+            stats.add(profile.start, profile.end or time.time(),
+                      size=profile.data_processed,
+                      ok=profile.status == 'completed')
+        return stats
+
+    def summary(self):
+        """Returns aggregate statistics of batch of migrations"""
+        profiles = [x for x in self.profiles.values() if x.start is not None]
+        summary = self.stats().summary()
+        downtimes = [x.downtime for x in profiles if x.downtime is not None]
+        rates = [x.memory_rate for x in profiles if x.memory_rate]
+        iterations = [x.iterations for x in profiles
+                      if x.iterations is not None]
+        summary.update({
+            'downtime_p50': percentile(downtimes, 50),
+            'downtime_max': max(downtimes) if downtimes else None,
+            'memory_rate_mean': (sum(rates) / len(rates)
+                                 if rates else None),
+            'iterations_max': max(iterations) if iterations else None,
+        })
+        return summary
+
+    def report(self):
+        lines = [self.stats().report()]
+        summary = self.summary()
+        if summary['downtime_max'] is not None:
+            lines.append('  network downtime p50={downtime_p50:.2f}s '
+                         'max={downtime_max:.2f}s'.format(**summary))
+        for profile in sorted(self.profiles.values(),
+                              key=lambda x: x.instance.name):
+            if profile.start is not None:
+                lines.append('  ' + profile.report())
+        return '\n'.join(lines)
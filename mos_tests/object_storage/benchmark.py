@@ -0,0 +1,86 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+
+from six.moves import shlex_quote
+
+from mos_tests.functions.benchmark import Stats
+
+logger = logging.getLogger(__name__)
+
+# Operation command is called with object index as `$1`, prints its exit
+# code and start/end timestamps
+OPERATION_WRAPPER = ('s=$(date +%s.%N); {command} >/dev/null 2>&1; rc=$?; '
+                     'echo "$1 $rc $s $(date +%s.%N)"')
+
+# Commands templates for each API and operation. `$1` is object index
+COMMANDS = {
+    ('swift', 'put'): ('swift upload --segment-size {segment_size}M '
+                       '--segment-threads {segment_threads} '
+                       '--object-name obj_$1 {container} {path}'),
+    ('swift', 'get'): 'swift download {container} obj_$1 -o -',
+    ('s3', 'put'): ('s3cmd put --multipart-chunk-size-mb={segment_size} '
+                    '{path} s3://{container}/obj_$1'),
+    ('s3', 'get'): 's3cmd get --force s3://{container}/obj_$1 -',
+}
+
+
+def build_script(command, count, concurrency):
+    """Returns shell script, which runs command `count` times in parallel"""
+    wrapper = OPERATION_WRAPPER.format(command=command)
+    return 'seq 0 {0} | xargs -P {1} -n 1 sh -c {2} _'.format(
+        count - 1, concurrency, shlex_quote(wrapper))
+
+
+def parse_timings(output):
+    """Returns list of (index, exit code, start, end) from script output"""
+    timings = []
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) != 4:
+            continue
+        index, code, start, end = parts
+        timings.append((int(index), int(code), float(start), float(end)))
+    return sorted(timings)
+
+
+def run_operations(remote, api, operation, container, count, concurrency,
+                   object_size, path='', segment_size=64, segment_threads=4):
+    """Run `count` operations on objects `obj_<index>` on node in parallel
+
+    CLI processes are started on node concurrently, so each operation
+    latency is measured on node without SSH round trips.
+
+    :param object_size: object size in bytes (for throughput calculation)
+    :return: Stats
+    """
+    command = COMMANDS[(api, operation)].format(
+        container=container, path=path, segment_size=segment_size,
+        segment_threads=segment_threads)
+    script = build_script(command, count, concurrency)
+    result = remote.check_call('. openrc && {0}'.format(script),
+                               verbose=False)
+    stats = Stats('{0} {1}'.format(api, operation))
+    for index, code, start, end in parse_timings(result.stdout_string):
+        if code != 0:
+            logger.warning('{0} obj_{1} failed with code {2}'.format(
+                stats.name, index, code))
+        stats.add(start, end, size=object_size, ok=code == 0)
+    missed = count - stats.count - stats.errors
+    if missed > 0:
+        logger.warning('{0}: no results for {1} operations'.format(
+            stats.name, missed))
+        stats.errors += missed
+    return stats
@@ -13,7 +13,6 @@
 #    under the License.
 
 import logging
-import ntpath
 import os
 import random
 import tempfile
@@ -22,6 +21,7 @@ import pytest
 from six.moves import configparser
 from swiftclient import client
 
+from mos_tests.functions import data_source
 from mos_tests.functions import os_cli
 
 logger = logging.getLogger(__name__)
@@ -91,10 +91,10 @@ def create_file_on_node(ctrl_remote, request):
     """Creates tmp file with requested size"""
     size_mb = getattr(request, 'param', 111)
     _, f_path = tempfile.mkstemp(prefix='ObjStor_')
-    f_name = ntpath.basename(f_path)
-    cmd = 'fallocate -l {0}M {1}'.format(size_mb, f_path)
-    ctrl_remote.check_call(cmd)
-    yield f_path, f_name
+    # Sparse file takes no disk space, its md5 is known without reading
+    generated_file = data_source.create_remote_file(ctrl_remote, f_path,
+                                                    size_mb * 1024 ** 2)
+    yield generated_file
     # delete file
     cmd = 'rm -rf {0}'.format(f_path)
     ctrl_remote.check_call(cmd)
@@ -0,0 +1,110 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import tempfile
+
+import pytest
+
+from mos_tests import conftest
+from mos_tests.functions.benchmark import Baselines
+from mos_tests.functions import data_source
+from mos_tests.object_storage import benchmark
+from mos_tests import settings
+
+logger = logging.getLogger(__name__)
+
+OBJECT_SIZE = settings.OBJECT_BENCHMARK_OBJECT_SIZE * 1024 ** 2
+SEGMENT_SIZE = settings.OBJECT_BENCHMARK_SEGMENT_SIZE
+COUNT = settings.OBJECT_BENCHMARK_OBJECTS
+CONCURRENCY = settings.OBJECT_BENCHMARK_CONCURRENCY
+
+
+@pytest.fixture(scope='module')
+def backend(get_env):
+    env = get_env()
+    return 'radosgw' if conftest.is_radosgw_enabled(env) else 'swift'
+
+
+@pytest.yield_fixture(scope='module')
+def benchmark_file(ctrl_remote):
+    """Pseudo-random file (compression or deduplication can't help)"""
+    _, path = tempfile.mkstemp(prefix='ObjBench_')
+    yield data_source.create_remote_file(ctrl_remote, path, OBJECT_SIZE,
+                                         seed=1)
+    ctrl_remote.check_call('rm -f {0}'.format(path))
+
+
+def run_benchmark(remote, api, backend, container, path):
+    """Put and get objects concurrently, compare results with baselines"""
+    baselines = Baselines()
+    regressions = []
+    for operation in ('put', 'get'):
+        stats = benchmark.run_operations(
+            remote, api, operation, container, count=COUNT,
+            concurrency=CONCURRENCY, object_size=OBJECT_SIZE, path=path,
+            segment_size=SEGMENT_SIZE)
+        logger.info('{0} backend:\n{1}'.format(backend, stats.report()))
+        assert stats.errors == 0, '{0} operations failed'.format(
+            stats.errors)
+        key = 'object_storage.{0}.{1}.{2}.{3}MB.x{4}'.format(
+            backend, api, operation, settings.OBJECT_BENCHMARK_OBJECT_SIZE,
+            CONCURRENCY)
+        regressions.extend(baselines.check(key, stats.summary()))
+    assert not regressions, '\n'.join(regressions)
+
+
+@pytest.mark.undestructive
+def test_swift_api_benchmark(ctrl_remote, backend, swift_container,
+                             benchmark_file):
+    """Concurrent segmented PUT/GET throughput through Swift API
+
+    Actions:
+    1. Create pseudo-random file on controller.
+    2. Upload it as several segmented objects concurrently with swift cli.
+    3. Download all objects concurrently.
+    4. Check that there are no errors and throughput and latency are not
+        worse than stored baselines.
+    """
+    try:
+        run_benchmark(ctrl_remote, 'swift', backend, swift_container,
+                      benchmark_file[0])
+    finally:
+        ctrl_remote.execute('. openrc && swift delete {0}_segments'.format(
+            swift_container), verbose=False)
+
+
+@pytest.mark.undestructive
+@pytest.mark.check_env_('is_radosgw_enabled')
+class TestS3Benchmark(object):
+
+    @pytest.fixture(autouse=True)
+    def setUp_install_configure_s3cmd(
+            self, s3cmd_install_configure, s3cmd_cleanup):
+        logger.debug('Install and configure S3CMD on controller')
+
+    def test_s3_api_benchmark(self, ctrl_remote, backend,
+                              s3cmd_create_container, benchmark_file):
+        """Concurrent multipart PUT/GET throughput through S3 API
+
+        Actions:
+        1. Create pseudo-random file on controller.
+        2. Upload it as several objects with multipart upload concurrently
+            with s3cmd.
+        3. Download all objects concurrently.
+        4. Check that there are no errors and throughput and latency are
+            not worse than stored baselines.
+        """
+        bucket, _ = s3cmd_create_container
+        run_benchmark(ctrl_remote, 's3', backend, bucket, benchmark_file[0])
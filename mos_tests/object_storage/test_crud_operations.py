@@ -118,7 +118,7 @@ class TestObjectStorageS3CMD(TestBase):
         6. Delete container.
         """
         f_path, f_name = create_file_on_node
-        initial_md5 = calc_md5(ctrl_remote, f_path)
+        initial_md5 = create_file_on_node.md5
         b_name, _ = s3cmd_create_container
         s3cmd_client.bucket_put_file(b_name, f_path)
 
@@ -300,7 +300,7 @@ class TestObjectStorageSWIFT(TestBase):
         openstack cli can not upload big (5432MB) file to container
         """
         f_path = create_file_on_node[0]
-        initial_md5 = calc_md5(ctrl_remote, f_path)
+        initial_md5 = create_file_on_node.md5
 
         # Object creation doesn't work for big file due to
         # https://bugs.launchpad.net/mos/+bug/1583033
@@ -387,7 +387,7 @@ class TestObjectStorageSWIFT(TestBase):
         BUG: https://bugs.launchpad.net/mos/+bug/1543135
         """
         f_path, f_name = create_file_on_node
-        initial_md5 = calc_md5(ctrl_remote, f_path)
+        initial_md5 = create_file_on_node.md5
         swift_cli.upload_object(
             swift_container, f_path, f_name, segment=self.segment_size)
 
@@ -31,10 +31,25 @@ KEYSTONE_CREDS = {'username': KEYSTONE_USER,
                   'password': KEYSTONE_PASS,
                   'tenant_name': os.environ.get('KEYSTONE_TENANT', 'admin')}
 
+# Users of LDAP domains of LDAP plugin lab: {domain name: (user, password)}
+KEYSTONE_LDAP_USERS = {
+    'openldap1': ('user01', '1111'),
+    'openldap2': ('user1', '1111'),
+    'AD2': ('user01', 'qwerty123!')
+}
+
 PUBLIC_TEST_IP = os.environ.get('PUBLIC_TEST_IP', '8.8.8.8')
 
 # Path to folder with required images
 TEST_IMAGE_PATH = os.environ.get("TEST_IMAGE_PATH", os.path.expanduser('~/images'))  # noqa
+# Images import mode: `upload` - upload from test runner, `remote` - keep
+# copy of images on controller and create images from there
+IMAGE_IMPORT_MODE = os.environ.get('IMAGE_IMPORT_MODE', 'upload')
+# Path to folder with images copies on controller
+REMOTE_IMAGE_PATH = os.environ.get('REMOTE_IMAGE_PATH',
+                                   '/var/tmp/mos_tests_images')
+# Run os_cli commands in persistent session on node (see `cli_session`)
+CLI_SESSION = os.environ.get('CLI_SESSION', 'false').lower() == 'true'
 UBUNTU_QCOW2_URL = os.environ.get('UBUNTU_QCOW2_URL',
                                   'https://cloud-images.ubuntu.com/xenial/current/xenial-server-cloudimg-amd64-disk1.img')  # noqa
 FEDORA_QCOW2_URL = 'https://download.fedoraproject.org/pub/fedora/linux/releases/23/Cloud/x86_64/Images/Fedora-Cloud-Base-23-20151030.x86_64.qcow2'  # noqa
@@ -139,3 +154,55 @@ IRONIC_NODES_CONFIG = os.environ.get('IRONIC_NODES_CONFIG',
 RABBITOSLO_REPO = 'https://github.com/dmitrymex/oslo.messaging-check-tool.git'
 RABBITOSLO_PKG = 'oslo.messaging-check-tool*.deb'
 RABBITOSLO_TOOL_PORT = 12400
+
+######################
+# Benchmark settings #
+######################
+
+# JSON file with stored benchmark results to compare with
+BENCHMARK_BASELINES = os.environ.get('BENCHMARK_BASELINES',
+                                     'benchmark_baselines.json')
+# Allowed degradation of results relative to baseline (0.2 - 20%)
+BENCHMARK_TOLERANCE = float(os.environ.get('BENCHMARK_TOLERANCE', 0.2))
+# Store results of this run as new baselines
+BENCHMARK_UPDATE_BASELINES = os.environ.get(
+    'BENCHMARK_UPDATE_BASELINES', 'false').lower() == 'true'
+
+# Object storage benchmark parameters
+OBJECT_BENCHMARK_OBJECT_SIZE = int(os.environ.get(
+    'OBJECT_BENCHMARK_OBJECT_SIZE', 256))  # MB
+OBJECT_BENCHMARK_SEGMENT_SIZE = int(os.environ.get(
+    'OBJECT_BENCHMARK_SEGMENT_SIZE', 64))  # MB
+OBJECT_BENCHMARK_OBJECTS = int(os.environ.get('OBJECT_BENCHMARK_OBJECTS', 16))
+OBJECT_BENCHMARK_CONCURRENCY = int(os.environ.get(
+    'OBJECT_BENCHMARK_CONCURRENCY', 8))
+
+# Heat benchmark parameters
+HEAT_BENCHMARK_STACKS = int(os.environ.get('HEAT_BENCHMARK_STACKS', 5))
+# Members of ResourceGroup of each stack, update adds the same count
+HEAT_BENCHMARK_GROUP_SIZE = int(os.environ.get('HEAT_BENCHMARK_GROUP_SIZE',
+                                               5))
+HEAT_BENCHMARK_CONCURRENCY = int(os.environ.get(
+    'HEAT_BENCHMARK_CONCURRENCY', 5))
+# Resources of each group member: any of server, port, volume
+HEAT_BENCHMARK_RESOURCES = os.environ.get('HEAT_BENCHMARK_RESOURCES',
+                                          'server,port').split(',')
+
+# Cinder benchmark parameters
+# Volumes of each volume type, fio runs on all of them at the same time
+CINDER_BENCHMARK_VOLUMES = int(os.environ.get('CINDER_BENCHMARK_VOLUMES', 2))
+CINDER_BENCHMARK_VOLUME_SIZE = int(os.environ.get(
+    'CINDER_BENCHMARK_VOLUME_SIZE', 10))  # GB
+CINDER_BENCHMARK_RUNTIME = int(os.environ.get('CINDER_BENCHMARK_RUNTIME',
+                                              60))  # seconds
+CINDER_BENCHMARK_IODEPTH = int(os.environ.get('CINDER_BENCHMARK_IODEPTH', 32))
+# Cinder API requests per second
+CINDER_BENCHMARK_RATE = float(os.environ.get('CINDER_BENCHMARK_RATE', 5))
+
+# Keystone benchmark parameters
+# Requests of each operation (token issue, validate, revoke, listings)
+KEYSTONE_BENCHMARK_REQUESTS = int(os.environ.get('KEYSTONE_BENCHMARK_REQUESTS',
+                                                 200))
+# Benchmark is repeated for each concurrency level
+KEYSTONE_BENCHMARK_CONCURRENCY = [int(x) for x in os.environ.get(
+    'KEYSTONE_BENCHMARK_CONCURRENCY', '1,10,50').split(',')]
@@ -0,0 +1,178 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import time
+
+import pytest
+
+from tools.durations import DurationsDB
+from tools.durations import get_testrail_id
+
+__doc__ = """This module stores tests and fixtures durations history.
+
+With `--durations-db=durations.sqlite` option each test phase (setup, call,
+teardown) and fixture setup duration is stored to SQLite database together
+with test testrail_id and environment profile (`--durations-profile`, by
+default - devops env name or `JOB_NAME`).
+
+History can be viewed with `tools/durations.py` (percentiles, trends,
+regressions). With `--longest-first` option tests are reordered by
+historical duration (longest classes and modules go first), which makes
+xdist workers to finish at the same time.
+"""
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('durations')
+    group.addoption("--durations-db",
+                    action="store",
+                    help="SQLite database to store durations history in")
+    group.addoption("--durations-profile",
+                    action="store",
+                    help="Environment profile name for durations history "
+                         "(default - devops env name or JOB_NAME)")
+    group.addoption("--durations-label",
+                    action="store",
+                    help="Label for this run (MOS version, for example)")
+    group.addoption("--longest-first",
+                    action="store_true",
+                    help="Run tests in order of historical duration "
+                         "(requires --durations-db)")
+
+
+def _is_xdist_worker(config):
+    return hasattr(config, 'slaveinput')
+
+
+def _is_xdist_master(config):
+    return (not _is_xdist_worker(config) and
+            getattr(config.option, 'dist', 'no') != 'no')
+
+
+def get_profile(config):
+    profile = config.getoption("--durations-profile")
+    if profile is None and hasattr(config.option, 'env'):
+        profile = config.option.env
+    return profile or os.environ.get('JOB_NAME', 'default')
+
+
+class XdistHooks(object):
+
+    @pytest.hookimpl
+    def pytest_configure_node(self, node):
+        """Pass run id to xdist workers"""
+        run_id = getattr(node.config, '_durations_run_id', None)
+        node.slaveinput['durations_run_id'] = run_id
+
+
+class DurationsRecorder(object):
+
+    def __init__(self, config, db_path):
+        self.config = config
+        self.db_path = db_path
+        self.records = []
+        self.testrail_ids = {}
+
+    def pytest_collection_modifyitems(self, items):
+        for item in items:
+            testrail_id = get_testrail_id(item.name)
+            self.testrail_ids[item.nodeid] = testrail_id
+            user_properties = getattr(item, 'user_properties', None)
+            if testrail_id is not None and user_properties is not None:
+                user_properties.append(('testrail_id', testrail_id))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        start = time.time()
+        yield
+        item = getattr(request, '_pyfuncitem', None)
+        nodeid = item.nodeid if item is not None else ''
+        self.records.append((nodeid, self.testrail_ids.get(nodeid),
+                             'fixture', fixturedef.argname,
+                             time.time() - start, None))
+
+    def pytest_runtest_logreport(self, report):
+        self.records.append((report.nodeid,
+                             self.testrail_ids.get(report.nodeid),
+                             report.when, '', report.duration,
+                             report.outcome))
+
+    def pytest_sessionfinish(self, session):
+        if _is_xdist_master(self.config):
+            return
+        if _is_xdist_worker(self.config):
+            run_id = self.config.slaveinput.get('durations_run_id')
+        else:
+            run_id = self.config._durations_run_id
+        if run_id is None or not self.records:
+            return
+        db = DurationsDB(self.db_path)
+        try:
+            db.add_durations(run_id, self.records)
+        finally:
+            db.close()
+
+
+def pytest_configure(config):
+    db_path = config.getoption("--durations-db")
+    if db_path is None:
+        return
+    if not _is_xdist_worker(config):
+        db = DurationsDB(db_path)
+        try:
+            config._durations_run_id = db.start_run(
+                get_profile(config), config.getoption("--durations-label"))
+        finally:
+            db.close()
+    if config.pluginmanager.hasplugin('xdist'):
+        config.pluginmanager.register(XdistHooks(), 'durations_xdist')
+    config.pluginmanager.register(DurationsRecorder(config, db_path),
+                                  'durations_recorder')
+
+
+def _group_key(item):
+    """Tests of one class (or module) should run together"""
+    parts = item.nodeid.split('::')
+    if getattr(item, 'cls', None) is not None:
+        return '::'.join(parts[:2])
+    return parts[0]
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    db_path = config.getoption("--durations-db")
+    if not config.getoption("--longest-first") or db_path is None:
+        return
+    db = DurationsDB(db_path)
+    try:
+        expected = db.expected_durations(get_profile(config))
+    finally:
+        db.close()
+    if not expected:
+        return
+
+    # Tests without history are expected to be as long as median test
+    known = sorted(expected.values())
+    default = known[len(known) // 2]
+
+    groups = {}
+    for item in items:
+        key = get_testrail_id(item.name) or item.nodeid
+        group = groups.setdefault(_group_key(item), [0, []])
+        group[0] += expected.get(key, default)
+        group[1].append(item)
+
+    ordered = sorted(groups.values(), key=lambda x: x[0], reverse=True)
+    items[:] = [item for _, group_items in ordered for item in group_items]
@@ -0,0 +1,400 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from collections import defaultdict
+import dis
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import types
+
+import pytest
+
+logger = logging.getLogger(__name__)
+
+__doc__ = """This module allow to re-run only tests affected by changes.
+
+With `--impact-db=impact.json` option each executed test records which
+functions from `mos_tests` package (tests, fixtures, helpers) it has called
+(with light-weight tracer, which reacts only to function calls) and git
+commit it was run on.
+
+With `--impact-select` option only the following tests are selected:
+
+    * new tests (without records in impact db);
+    * tests, which did not pass last time;
+    * tests, which called functions changed since last run (`git diff`);
+    * tests, which depend on changed module level code (imports, constants,
+      class bodies) of files they use.
+
+An example of nightly triage:
+
+    $ py.test mos_tests/nova --impact-db=impact.json          # full run
+    $ # fix something
+    $ py.test mos_tests/nova --impact-db=impact.json --impact-select
+"""
+
+HUNK_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('impact')
+    group.addoption("--impact-db",
+                    action="store",
+                    help="File to store tests dependencies in")
+    group.addoption("--impact-select",
+                    action="store_true",
+                    help="Run only tests affected by changes since the last "
+                         "run (requires --impact-db)")
+
+
+def git(rootdir, *args):
+    return subprocess.check_output(('git',) + args,
+                                   cwd=str(rootdir)).decode('utf-8')
+
+
+def get_hunks(rootdir, commit):
+    """Returns hunks of working tree changes since commit
+
+    :return: dict {file path in commit: [(old start, old count, new start,
+        new count), ...]}
+    """
+    output = git(rootdir, 'diff', '-U0', '--no-color', commit, '--',
+                 'mos_tests')
+    hunks = defaultdict(list)
+    path = None
+    for line in output.splitlines():
+        if line.startswith('--- '):
+            path = line[4:]
+            path = None if path == '/dev/null' else path[2:]
+            continue
+        match = HUNK_RE.match(line)
+        if match is None or path is None:
+            continue
+        hunks[path].append(tuple(int(x) if x is not None else 1
+                                 for x in match.groups()))
+    return hunks
+
+
+def get_changed_lines(rootdir, commit):
+    """Returns lines changed since commit (in commit coordinates)
+
+    :return: dict {file path: [(first line, last line), ...]}
+    """
+    changes = defaultdict(list)
+    for path, hunks in get_hunks(rootdir, commit).items():
+        for start, count, _, _ in hunks:
+            if count == 0:
+                # Pure insertion is made between `start` and next lines
+                changes[path].append((start, start + 1))
+            else:
+                changes[path].append((start, start + count - 1))
+    return changes
+
+
+def _map_line(hunks, line, is_last):
+    offset = 0
+    for old_start, old_count, new_start, new_count in hunks:
+        if new_count == 0:
+            # Lines were deleted after `new_start` line
+            if line <= new_start:
+                break
+        elif line < new_start:
+            break
+        elif line < new_start + new_count:
+            # Changed line - take whole old hunk
+            if old_count == 0:
+                return old_start + 1 if is_last else old_start
+            return old_start + old_count - 1 if is_last else old_start
+        offset += old_count - new_count
+    return line + offset
+
+
+def map_lines(hunks, first, last):
+    """Maps lines range of working tree file to commit coordinates
+
+    :param hunks: hunks of file (as `get_hunks` values)
+    """
+    return _map_line(hunks, first, False), _map_line(hunks, last, True)
+
+
+def _last_line(code):
+    return max([line for _, line in dis.findlinestarts(code)] or
+               [code.co_firstlineno])
+
+
+# Name of dependency on module level code (imports, constants, etc)
+MODULE_DEP = '<module>'
+
+
+class DependencyTracer(object):
+    """Records called functions from files in traced directory
+
+    Modules, imported by modules of called functions, are recorded too
+    (as `MODULE_DEP` dependency), because their module level code can be
+    used without functions calls.
+    """
+
+    def __init__(self, rootdir, package='mos_tests'):
+        self.rootdir = str(rootdir)
+        self.prefix = os.path.join(self.rootdir, package) + os.sep
+        self.deps = set()
+        self._codes = {}
+        self._imports = {}
+
+    def _get_path(self, filename):
+        if filename is None:
+            return None
+        filename = os.path.abspath(filename)
+        if not filename.startswith(self.prefix):
+            return None
+        if filename.endswith(('.pyc', '.pyo')):
+            filename = filename[:-1]
+        return os.path.relpath(filename, self.rootdir)
+
+    def _get_imports(self, path, module_globals):
+        """Returns paths of traced modules used by module globals"""
+        if path in self._imports:
+            return self._imports[path]
+        imports = set()
+        for value in list(module_globals.values()):
+            try:
+                if not isinstance(value, types.ModuleType):
+                    value = sys.modules.get(getattr(value, '__module__', None))
+                import_path = self._get_path(getattr(value, '__file__', None))
+            except Exception:
+                continue
+            if import_path not in (None, path):
+                imports.add((import_path, MODULE_DEP, 0, 0))
+        self._imports[path] = imports
+        return imports
+
+    def _trace(self, frame, event, arg):
+        code = frame.f_code
+        if code in self._codes:
+            deps = self._codes[code]
+        else:
+            deps = set()
+            path = self._get_path(code.co_filename)
+            if path is not None:
+                deps.add((path, code.co_name, code.co_firstlineno,
+                          _last_line(code)))
+                deps.update(self._get_imports(path, frame.f_globals))
+            self._codes[code] = deps
+        if deps:
+            self.deps.update(deps)
+        # Don't trace lines inside function
+        return None
+
+    def start(self):
+        self.deps = set()
+        threading.settrace(self._trace)
+        sys.settrace(self._trace)
+
+    def stop(self):
+        """Returns set of (path, function name, first line, last line)"""
+        sys.settrace(None)
+        threading.settrace(None)
+        return self.deps
+
+
+class ImpactDB(object):
+    """Tests dependencies storage"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tests = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.tests = json.load(f)['tests']
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump({'tests': self.tests}, f, indent=1, sort_keys=True)
+
+    def update(self, records):
+        self.tests.update(records)
+
+    def is_affected(self, nodeid, changes_getter):
+        """Check test should be rerun
+
+        :param changes_getter: callable, which returns changed lines for
+            commit (as `get_changed_lines`)
+        """
+        record = self.tests.get(nodeid)
+        if record is None or record['outcome'] != 'passed':
+            return True
+        changes = changes_getter(record['commit'])
+        for path, functions in record['deps'].items():
+            hunks = changes.get(path)
+            if not hunks:
+                continue
+            functions_lines = [(x[1], x[2]) for x in functions
+                               if x[0] != MODULE_DEP]
+            for first, last in hunks:
+                for func_first, func_last in functions_lines:
+                    if first <= func_last and last >= func_first:
+                        return True
+                # Change outside of any known function - module level code
+                if not self._is_inside_functions(path, first, last):
+                    return True
+        return False
+
+    def _is_inside_functions(self, path, first, last):
+        """Check lines are inside functions used by any test"""
+        for record in self.tests.values():
+            for name, func_first, func_last in record['deps'].get(path, []):
+                if (name != MODULE_DEP and
+                        func_first <= first and last <= func_last):
+                    return True
+        return False
+
+
+class ImpactRecorder(object):
+    """Records dependencies of executed tests
+
+    Fixtures, which are set up once for many tests (module, class, session
+    scoped), are traced separately and their dependencies are added to each
+    test, which uses them. Line numbers of working tree are stored in HEAD
+    commit coordinates.
+    """
+
+    def __init__(self, config, db_path):
+        self.config = config
+        self.db_path = db_path
+        self.tracer = DependencyTracer(config.rootdir)
+        self.commit = git(config.rootdir, 'rev-parse', 'HEAD').strip()
+        self.hunks = get_hunks(config.rootdir, self.commit)
+        self.fixtures_deps = defaultdict(set)
+        self.records = {}
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        deps = self.tracer.deps
+        self.tracer.deps = set()
+        try:
+            yield
+        finally:
+            fixture_deps = self.tracer.deps
+            self.tracer.deps = deps | fixture_deps
+            self.fixtures_deps[fixturedef].update(fixture_deps)
+
+    def _get_fixtures_deps(self, item):
+        fixtureinfo = getattr(item, '_fixtureinfo', None)
+        if fixtureinfo is None:
+            return set()
+        deps = set()
+        for name in getattr(item, 'fixturenames', []):
+            for fixturedef in fixtureinfo.name2fixturedefs.get(name, ()):
+                deps.update(self.fixtures_deps.get(fixturedef, ()))
+        return deps
+
+    def _group(self, deps):
+        """Returns dict {path: [(name, first, last), ...]}"""
+        result = defaultdict(list)
+        for path, name, first, last in sorted(deps):
+            hunks = self.hunks.get(path)
+            if hunks and name != MODULE_DEP:
+                first, last = map_lines(hunks, first, last)
+            result[path].append((name, first, last))
+        return dict(result)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.tracer.start()
+        try:
+            yield
+        finally:
+            deps = self.tracer.stop() | self._get_fixtures_deps(item)
+        reports = [getattr(item, 'rep_{}'.format(name), None)
+                   for name in ("setup", "call", "teardown")]
+        outcome = 'passed'
+        for report in reports:
+            if report is not None and not report.passed:
+                outcome = report.outcome
+                break
+        self.records[item.nodeid] = {'commit': self.commit,
+                                     'outcome': outcome,
+                                     'deps': self._group(deps)}
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        rep = outcome.get_result()
+        setattr(item, "rep_" + rep.when, rep)
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(self.config, 'slaveinput'):
+            self.config.slaveoutput['impact_records'] = self.records
+            return
+        db = ImpactDB(self.db_path)
+        db.update(self.records)
+        db.save()
+
+
+class XdistHooks(object):
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    @pytest.hookimpl
+    def pytest_testnodedown(self, node, error):
+        records = getattr(node, 'slaveoutput', {}).get('impact_records', {})
+        self.recorder.records.update(records)
+
+
+def pytest_configure(config):
+    db_path = config.getoption("--impact-db")
+    if db_path is None:
+        return
+    recorder = ImpactRecorder(config, db_path)
+    config.pluginmanager.register(recorder, 'impact_recorder')
+    if config.pluginmanager.hasplugin('xdist'):
+        config.pluginmanager.register(XdistHooks(recorder), 'impact_xdist')
+
+
+def pytest_collection_modifyitems(session, config, items):
+    db_path = config.getoption("--impact-db")
+    if not config.getoption("--impact-select") or db_path is None:
+        return
+    db = ImpactDB(db_path)
+    cache = {}
+
+    def changes_getter(commit):
+        if commit not in cache:
+            try:
+                cache[commit] = get_changed_lines(config.rootdir, commit)
+            except subprocess.CalledProcessError as e:
+                logger.warning("Can't get changes since {0}: {1}".format(
+                    commit, e))
+                cache[commit] = None
+        if cache[commit] is None:
+            # Unknown commit - treat all files as changed
+            return defaultdict(lambda: [(0, sys.maxsize)])
+        return cache[commit]
+
+    selected = []
+    deselected = []
+    for item in items:
+        if db.is_affected(item.nodeid, changes_getter):
+            selected.append(item)
+        else:
+            deselected.append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
@@ -0,0 +1,234 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import logging
+from multiprocessing.dummy import Pool
+import os
+import re
+import tarfile
+import tempfile
+import time
+
+import pytest
+import six
+
+logger = logging.getLogger(__name__)
+
+__doc__ = """This module collects time sliced logs for failed tests.
+
+It is a lightweight alternative for `plugins.fuel_snapshot`: instead of
+whole cloud diagnostic snapshot only log lines written between test start
+and test end are fetched from all nodes. Filtering is made on nodes side
+(with awk and journalctl), so only a few MB goes over the network.
+
+Logs directories to collect are computed from the test package name (for
+example `mos_tests/nova/...` -> nova logs) and can be extended with marker:
+
+@pytest.mark.harvest_logs('/var/log/cinder', 'libvirt')
+def test_smth():
+    pass
+"""
+
+LOG_ROOT = '/var/log'
+
+# Logs, which are interesting for almost any test
+COMMON_LOG_DIRS = ('keystone', 'nova', 'neutron', 'glance', 'cinder')
+
+# Additional logs for test packages (mos_tests/<package>)
+PACKAGE_LOG_DIRS = {
+    'ceilometer': ('ceilometer', 'aodh', 'mongodb'),
+    'failover': ('rabbitmq', 'mysql', 'haproxy.log', 'pacemaker.log'),
+    'glare': ('glare', 'murano'),
+    'heat': ('heat',),
+    'ironic': ('ironic', 'ironic-api', 'libvirt'),
+    'murano': ('murano', 'heat'),
+    'nfv': ('libvirt',),
+    'nova': ('libvirt',),
+    'object_storage': ('swift', 'ceph', 'radosgw'),
+    'rabbitmq_oslo': ('rabbitmq',),
+    'sahara': ('sahara', 'heat'),
+}
+
+# Seconds to add before test start and after test end to avoid losing
+# lines because of clocks skew between test runner and nodes
+TIME_MARGIN = 60
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Lines without timestamp (tracebacks, for example) belong to the
+# previous timestamped line
+AWK_FILTER = ("awk -v s=\"$start\" -v e=\"$end\" "
+              "'/^[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9][ T]"
+              "[0-9][0-9]:[0-9][0-9]:[0-9][0-9]/ "
+              "{ ts = substr($0, 1, 10) \" \" substr($0, 12, 8); "
+              "keep = (ts >= s && ts <= e) } keep'")
+
+HARVEST_SCRIPT = """
+start='{start}'; end='{end}'
+tmp=$(mktemp -d)
+for f in $(find {paths} -type f -name '*.log' -newermt "$start UTC" \
+        2>/dev/null); do
+    out="$tmp$f"
+    mkdir -p "$(dirname "$out")"
+    {awk_filter} "$f" > "$out" 2>/dev/null
+    [ -s "$out" ] || rm -f "$out"
+done
+if command -v journalctl >/dev/null 2>&1; then
+    journalctl --utc --since "$start" --until "$end" --no-pager \
+        > "$tmp/journal.log" 2>/dev/null
+    [ -s "$tmp/journal.log" ] || rm -f "$tmp/journal.log"
+fi
+tar -C "$tmp" -czf - .
+rm -rf "$tmp"
+"""
+
+
+def pytest_addoption(parser):
+    parser.addoption("--harvest-logs",
+                     action="store_true",
+                     help="Collect test time logs from nodes on failures")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers",
+                            "harvest_logs(*dirs): add logs directories "
+                            "(absolute or relative to /var/log) to collect "
+                            "with --harvest-logs on test failure")
+
+
+def get_log_dirs(item):
+    """Returns absolute paths of log dirs to collect for test item"""
+    names = list(COMMON_LOG_DIRS)
+    parts = item.nodeid.split('/')
+    if len(parts) > 2 and parts[0] == 'mos_tests':
+        names.extend(PACKAGE_LOG_DIRS.get(parts[1], (parts[1],)))
+    marker = item.get_marker('harvest_logs')
+    if marker is not None:
+        names.extend(marker.args)
+    paths = []
+    for name in names:
+        path = os.path.join(LOG_ROOT, name)
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+def build_harvest_command(start, end, paths):
+    """Build shell command, which prints tar.gz of sliced logs to stdout
+
+    :param start: unix timestamp of slice begin
+    :param end: unix timestamp of slice end
+    :param paths: list of log files and directories to look logs in
+    """
+    start = datetime.datetime.utcfromtimestamp(start - TIME_MARGIN)
+    end = datetime.datetime.utcfromtimestamp(end + TIME_MARGIN)
+    return HARVEST_SCRIPT.format(start=start.strftime(TIME_FORMAT),
+                                 end=end.strftime(TIME_FORMAT),
+                                 paths=' '.join(paths),
+                                 awk_filter=AWK_FILTER)
+
+
+def fetch_node_logs(node, command):
+    """Execute harvest command on node and stream result to temp file
+
+    :return: file object with tar.gz content (or None on error)
+    """
+    dst = tempfile.TemporaryFile()
+    try:
+        with node.ssh() as remote:
+            chan, stdin, stdout, stderr = remote.execute_async(command)
+            while True:
+                data = chan.recv(65536)
+                if not data:
+                    break
+                dst.write(data)
+            exit_code = chan.recv_exit_status()
+            chan.close()
+        if exit_code != 0:
+            raise Exception('exit code is {0}'.format(exit_code))
+    except Exception as e:
+        logger.warning("Can't collect logs from {0}: {1}".format(node, e))
+        dst.close()
+        return None
+    dst.seek(0)
+    return dst
+
+
+def merge_archives(path, archives):
+    """Merge nodes tar.gz streams to single archive
+
+    :param path: result archive path
+    :param archives: dict with node names as keys and tar.gz file objects
+        as values
+    """
+    with tarfile.open(path, 'w:gz') as dst:
+        for name, archive in sorted(archives.items()):
+            with tarfile.open(fileobj=archive, mode='r|gz') as src:
+                for member in src:
+                    if member.name in ('.', './'):
+                        continue
+                    fileobj = src.extractfile(member)
+                    member.name = os.path.normpath(
+                        os.path.join(name, member.name))
+                    dst.addfile(member, fileobj)
+
+
+def harvest_logs(env, item, start, end, path):
+    nodes = [x for x in env.get_all_nodes() if x.data['online']]
+    command = build_harvest_command(start, end, get_log_dirs(item))
+
+    pool = Pool(len(nodes))
+    try:
+        results = pool.map(lambda x: fetch_node_logs(x, command), nodes)
+    finally:
+        pool.terminate()
+
+    archives = {node.data['fqdn']: result
+                for node, result in zip(nodes, results) if result is not None}
+    try:
+        merge_archives(path, archives)
+    finally:
+        for archive in archives.values():
+            archive.close()
+
+
+@pytest.yield_fixture(autouse=True)
+def harvest_test_logs(request, env):
+    """Collect logs written during failed test from all nodes"""
+    start = time.time()
+    yield
+    end = time.time()
+
+    try:
+        if not request.config.getoption("--harvest-logs"):
+            return
+
+        steps_rep = [getattr(request.node, 'rep_{}'.format(name), None)
+                     for name in ("setup", "call", "teardown")]
+        if not any(x for x in steps_rep if x is not None and x.failed):
+            return
+
+        test_name = request.node.nodeid
+        logger.info('Harvesting logs for test {}'.format(test_name))
+        filename = six.text_type(
+            re.sub(r'[^\w\s-]', '_', test_name).strip().lower())
+        filename += '.logs.tar.gz'
+        path = os.path.join('snapshots', filename)
+
+        harvest_logs(env, request.node, start, end, path)
+        logger.info('Logs saved to {0} ({1:.0f}s)'.format(
+            path, time.time() - end))
+    except Exception as e:
+        logger.warning(e)
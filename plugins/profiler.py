@@ -0,0 +1,317 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from collections import defaultdict
+from contextlib import contextmanager
+import csv
+import functools
+import importlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import pytest
+from six.moves.urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+__doc__ = """This module collects per test timings.
+
+With `--profile-timing` option each test phase (setup, call, teardown),
+each fixture setup and following calls are measured:
+
+    * ssh - `SSHClient.execute`
+    * wait - `common.wait` (and all helpers based on it)
+    * openstack_api - keystone sessions requests (used by OpenStackActions)
+    * fuel_api - Fuel `APIClient` requests
+
+Events are written to `--profile-output` file (JSON or CSV, depends on file
+extension) and top of slowest phases and calls is printed at session end.
+Note: categories can overlap in time (for example, `wait` predicate may make
+API calls), so their durations should not be summed.
+"""
+
+ID_RE = re.compile(r'/(?:[0-9a-fA-F]{32}|[0-9a-fA-F-]{36}|\d+)(?=/|$)')
+
+
+def _normalize_path(path):
+    return ID_RE.sub('/<id>', path.split('?')[0])
+
+
+def ssh_name(self, command, *args, **kwargs):
+    return command.strip().splitlines()[0][:80] if command.strip() else ''
+
+
+def wait_name(predicate, *args, **kwargs):
+    return kwargs.get('waiting_for', repr(predicate))
+
+
+def api_name(self, url, method, *args, **kwargs):
+    parsed = urlparse(url)
+    port = ':{0}'.format(parsed.port) if parsed.port else ''
+    return '{0} {1}{2}'.format(method, port, _normalize_path(parsed.path))
+
+
+def fuel_name(method):
+    def name(self, api, *args, **kwargs):
+        return '{0} {1}'.format(method, _normalize_path('/' + api))
+    return name
+
+
+# (module, attribute path, category, callable to make event name)
+TARGETS = (
+    ('mos_tests.environment.ssh', 'SSHClient.execute', 'ssh', ssh_name),
+    ('mos_tests.functions.common', 'base_wait', 'wait', wait_name),
+    ('keystoneclient.session', 'Session.request', 'openstack_api', api_name),
+    ('keystoneauth1.session', 'Session.request', 'openstack_api', api_name),
+    ('fuelclient.client', 'Client.get_request_raw', 'fuel_api',
+        fuel_name('GET')),
+    ('fuelclient.client', 'Client.post_request_raw', 'fuel_api',
+        fuel_name('POST')),
+    ('fuelclient.client', 'Client.put_request', 'fuel_api',
+        fuel_name('PUT')),
+    ('fuelclient.client', 'Client.delete_request', 'fuel_api',
+        fuel_name('DELETE')),
+)
+
+EVENT_FIELDS = ('test', 'category', 'name', 'start', 'duration')
+
+
+class Profiler(object):
+    """Collects timing events for current test"""
+
+    def __init__(self):
+        self.events = []
+        self.current_test = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._patched = []
+
+    @contextmanager
+    def measure(self, category, name):
+        """Measure block execution time
+
+        Nested measurements of same category (in same thread) are ignored,
+        so only outermost call is recorded.
+        """
+        depth = getattr(self._local, 'depth', None)
+        if depth is None:
+            depth = self._local.depth = defaultdict(int)
+        depth[category] += 1
+        start = time.time()
+        try:
+            yield
+        finally:
+            depth[category] -= 1
+            if depth[category] == 0:
+                self.add_event(category, name, start, time.time() - start)
+
+    def add_event(self, category, name, start, duration):
+        event = dict(zip(EVENT_FIELDS, (self.current_test, category, name,
+                                        start, duration)))
+        with self._lock:
+            self.events.append(event)
+
+    def wrap(self, func, category, get_name):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                name = get_name(*args, **kwargs)
+            except Exception:
+                name = func.__name__
+            with self.measure(category, name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def patch(self, obj, attr, category, get_name):
+        orig = obj.__dict__[attr]
+        setattr(obj, attr, self.wrap(orig, category, get_name))
+        self._patched.append((obj, attr, orig))
+
+    def install(self, targets=TARGETS):
+        for module_name, path, category, get_name in targets:
+            try:
+                obj = importlib.import_module(module_name)
+                parts = path.split('.')
+                for part in parts[:-1]:
+                    obj = getattr(obj, part)
+                self.patch(obj, parts[-1], category, get_name)
+            except (ImportError, AttributeError, KeyError) as e:
+                logger.debug("Can't profile {0}.{1}: {2}".format(
+                    module_name, path, e))
+
+    def uninstall(self):
+        while self._patched:
+            obj, attr, orig = self._patched.pop()
+            setattr(obj, attr, orig)
+
+    def summary(self):
+        """Returns {test: {category: {'count': int, 'duration': float}}}"""
+        result = defaultdict(
+            lambda: defaultdict(lambda: {'count': 0, 'duration': 0}))
+        for event in self.events:
+            data = result[event['test']][event['category']]
+            data['count'] += 1
+            data['duration'] += event['duration']
+        return result
+
+    def top_calls(self, count):
+        """Returns calls (not phases or fixtures), which took most time"""
+        calls = defaultdict(lambda: [0, 0])
+        for event in self.events:
+            if event['category'] in ('phase', 'fixture'):
+                continue
+            data = calls[(event['category'], event['name'])]
+            data[0] += 1
+            data[1] += event['duration']
+        return sorted(calls.items(), key=lambda x: x[1][1],
+                      reverse=True)[:count]
+
+    def top_phases(self, count):
+        """Returns test phases and fixtures setups, which took most time"""
+        phases = [x for x in self.events
+                  if x['category'] in ('phase', 'fixture')]
+        return sorted(phases, key=lambda x: x['duration'],
+                      reverse=True)[:count]
+
+    def save(self, path):
+        if path.endswith('.csv'):
+            with open(path, 'w') as f:
+                writer = csv.DictWriter(f, EVENT_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.events)
+        else:
+            with open(path, 'w') as f:
+                json.dump({'events': self.events,
+                           'summary': self.summary()}, f, indent=2)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('profiler')
+    group.addoption("--profile-timing",
+                    action="store_true",
+                    help="Measure tests phases, fixtures, ssh, wait and API "
+                         "calls durations")
+    group.addoption("--profile-output",
+                    action="store",
+                    default='profile.json',
+                    help="File to save profiling events (.json or .csv)")
+    group.addoption("--profile-top",
+                    action="store",
+                    type=int,
+                    default=10,
+                    help="Count of slowest phases and calls to show")
+
+
+def pytest_configure(config):
+    if not config.getoption("--profile-timing"):
+        return
+    profiler = Profiler()
+    profiler.install()
+    config._profiler = profiler
+
+
+def pytest_unconfigure(config):
+    profiler = getattr(config, '_profiler', None)
+    if profiler is None:
+        return
+    profiler.uninstall()
+    del config._profiler
+
+
+def _get_profiler(config):
+    return getattr(config, '_profiler', None)
+
+
+def _measure_phase(item, phase):
+    profiler = _get_profiler(item.config)
+    if profiler is None:
+        return None
+    profiler.current_test = item.nodeid
+    return profiler.measure('phase', phase)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    cm = _measure_phase(item, 'setup')
+    if cm is None:
+        yield
+        return
+    with cm:
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    cm = _measure_phase(item, 'call')
+    if cm is None:
+        yield
+        return
+    with cm:
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+    cm = _measure_phase(item, 'teardown')
+    if cm is None:
+        yield
+        return
+    with cm:
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    profiler = _get_profiler(request.config)
+    if profiler is None:
+        yield
+        return
+    name = '{0} ({1})'.format(fixturedef.argname, fixturedef.scope)
+    with profiler.measure('fixture', name):
+        yield
+
+
+def pytest_sessionfinish(session):
+    profiler = _get_profiler(session.config)
+    if profiler is None:
+        return
+    path = session.config.getoption("--profile-output")
+    # Don't overwrite results of xdist workers
+    worker = getattr(session.config, 'slaveinput', {}).get('slaveid')
+    if worker is not None:
+        root, ext = os.path.splitext(path)
+        path = '{0}.{1}{2}'.format(root, worker, ext)
+    profiler.save(path)
+
+
+def pytest_terminal_summary(terminalreporter):
+    config = terminalreporter.config
+    profiler = _get_profiler(config)
+    if profiler is None:
+        return
+    count = config.getoption("--profile-top")
+    tr = terminalreporter
+    tr.write_sep('=', 'slowest {0} phases and fixtures'.format(count))
+    for event in profiler.top_phases(count):
+        tr.write_line('{duration:9.2f}s {category:8} {name:30} '
+                      '{test}'.format(**event))
+    tr.write_sep('=', 'top {0} calls by total time'.format(count))
+    for (category, name), (calls, duration) in profiler.top_calls(count):
+        tr.write_line('{0:9.2f}s {1:6}x {2:14} {3}'.format(
+            duration, calls, category, name))
@@ -0,0 +1,49 @@
+pytest_plugins = "pytester"
+
+
+def test_store_and_longest_first(testdir):
+    db_path = str(testdir.tmpdir.join('durations.sqlite'))
+    testdir.makepyfile(test_fast="""
+        def test_fast():
+            pass
+    """, test_slow="""
+        import time
+
+        def test_slow():
+            time.sleep(0.1)
+    """)
+    args = ('-p', 'plugins.durations', '--durations-db', db_path,
+            '--durations-profile', 'env', '-v')
+
+    result = testdir.runpytest(*args)
+    result.stdout.fnmatch_lines(["test_fast.py::test_fast*",
+                                 "test_slow.py::test_slow*"])
+
+    result = testdir.runpytest('--longest-first', *args)
+    result.stdout.fnmatch_lines(["test_slow.py::test_slow*",
+                                 "test_fast.py::test_fast*"])
+
+    from tools.durations import DurationsDB
+    db = DurationsDB(db_path)
+    durations = db.test_durations('env')
+    db.close()
+    assert len(durations['test_slow.py::test_slow']) == 2
+    assert durations['test_slow.py::test_slow'][0][2] >= 0.1
+
+
+def test_regressions(tmpdir):
+    from tools.durations import DurationsDB
+
+    db = DurationsDB(str(tmpdir.join('durations.sqlite')))
+    for label, duration in (('9.0', 100), ('9.0', 110), ('9.1', 250)):
+        run_id = db.start_run('env', label)
+        db.add_durations(run_id, [
+            ('test_a', '1234', 'call', '', duration, 'passed'),
+            ('test_b', None, 'call', '', 10, 'passed'),
+        ])
+
+    assert db.regressions('env') == [('1234', 100, 250)]
+    assert db.regressions('env', label='9.1', base_label='9.0') == [
+        ('1234', 100, 250)]
+    assert db.regressions('env', factor=3) == []
+    db.close()
@@ -0,0 +1,141 @@
+import subprocess
+import sys
+
+pytest_plugins = "pytester"
+
+
+def git(testdir, *args):
+    subprocess.check_call(('git',) + args, cwd=str(testdir.tmpdir))
+
+
+def test_select_affected(testdir, monkeypatch):
+    # Test package has the same name as real one
+    for name in list(sys.modules):
+        if name.split('.')[0] == 'mos_tests':
+            monkeypatch.delitem(sys.modules, name)
+    package = testdir.mkpydir('mos_tests')
+    package.join('helpers.py').write(
+        "CONST = 1\n"
+        "\n"
+        "\n"
+        "def helper_a():\n"
+        "    return 1\n"
+        "\n"
+        "\n"
+        "def helper_b():\n"
+        "    return 2\n")
+    package.join('test_smth.py').write(
+        "from mos_tests import helpers\n"
+        "\n"
+        "\n"
+        "def test_a():\n"
+        "    assert helpers.helper_a() == 1\n"
+        "\n"
+        "\n"
+        "def test_b():\n"
+        "    assert helpers.helper_b() == 2\n"
+        "\n"
+        "\n"
+        "def test_c():\n"
+        "    assert helpers.CONST == 1\n")
+    git(testdir, 'init', '-q')
+    git(testdir, 'add', '.')
+    git(testdir, '-c', 'user.name=test', '-c', 'user.email=test@test',
+        'commit', '-q', '-m', 'init')
+
+    args = ('-p', 'plugins.impact', '--impact-db', 'impact.json',
+            '--impact-select', '-v', 'mos_tests')
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(passed=3)
+
+    result = testdir.runpytest(*args)
+    result.assert_outcomes()
+
+    # Change helper_b only
+    helpers = package.join('helpers.py')
+    helpers.write(helpers.read().replace('return 2', 'return 3'))
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["*test_b FAILED*"])
+
+    # Failed test is selected again
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(failed=1)
+
+    # Module level change affects all tests, which use the module
+    helpers.write(helpers.read().replace('return 3', 'return 2').replace(
+        'CONST = 1', 'CONST = 2'))
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(passed=2, failed=1)
+
+
+def test_map_lines():
+    from plugins import impact
+    # 2 lines inserted after line 3, lines 10-11 replaced with 1 line,
+    # old line 20 deleted
+    hunks = [(3, 0, 4, 2), (10, 2, 12, 1), (20, 1, 20, 0)]
+    assert impact.map_lines(hunks, 1, 3) == (1, 3)
+    assert impact.map_lines(hunks, 4, 5) == (3, 4)
+    assert impact.map_lines(hunks, 6, 11) == (4, 9)
+    assert impact.map_lines(hunks, 12, 12) == (10, 11)
+    assert impact.map_lines(hunks, 13, 20) == (12, 19)
+    assert impact.map_lines(hunks, 21, 22) == (21, 22)
+
+
+def test_select_fixture_users(testdir, monkeypatch):
+    for name in list(sys.modules):
+        if name.split('.')[0] == 'mos_tests':
+            monkeypatch.delitem(sys.modules, name)
+    package = testdir.mkpydir('mos_tests')
+    package.join('helpers.py').write(
+        "def make():\n"
+        "    return 1\n")
+    package.join('test_smth.py').write(
+        "import pytest\n"
+        "\n"
+        "from mos_tests import helpers\n"
+        "\n"
+        "\n"
+        "@pytest.fixture(scope='module')\n"
+        "def resource():\n"
+        "    return helpers.make()\n"
+        "\n"
+        "\n"
+        "def test_a(resource):\n"
+        "    assert resource == 1\n"
+        "\n"
+        "\n"
+        "def test_b(resource):\n"
+        "    assert resource == 1\n"
+        "\n"
+        "\n"
+        "def test_c():\n"
+        "    pass\n")
+    git(testdir, 'init', '-q')
+    git(testdir, 'add', '.')
+    git(testdir, '-c', 'user.name=test', '-c', 'user.email=test@test',
+        'commit', '-q', '-m', 'init')
+
+    args = ('-p', 'plugins.impact', '--impact-db', 'impact.json',
+            '--impact-select', '-v', 'mos_tests')
+    # Run with not committed lines shift in test module
+    tests = package.join('test_smth.py')
+    tests.write('\n\n' + tests.read())
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(passed=3)
+    tests.write(tests.read()[2:])
+
+    # Fixture was set up once, but both its users depend on helper
+    helpers = package.join('helpers.py')
+    helpers.write(helpers.read().replace('return 1', 'return 2'))
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(failed=2)
+
+    # Change of test_c is found in HEAD coordinates
+    helpers.write(helpers.read().replace('return 2', 'return 1'))
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(passed=2)
+    tests.write(tests.read().replace('    pass', '    assert False'))
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["*test_c FAILED*"])
@@ -0,0 +1,53 @@
+import datetime
+import io
+import subprocess
+import tarfile
+import time
+
+from plugins import log_harvest
+
+
+def ts(timestamp):
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime(
+        '%Y-%m-%d %H:%M:%S.000')
+
+
+def test_harvest_command_slices_logs(tmpdir):
+    now = time.time()
+    log_dir = tmpdir.mkdir('nova')
+    log_dir.join('nova-api.log').write('\n'.join([
+        '{0} INFO before'.format(ts(now - 3600)),
+        '{0} ERROR inside'.format(ts(now)),
+        'Traceback (most recent call last):',
+        '{0} INFO after'.format(ts(now + 3600)),
+        'after traceback',
+    ]) + '\n')
+    log_dir.join('nova-compute.log').write(
+        '{0} INFO old'.format(ts(now - 3600)))
+
+    command = log_harvest.build_harvest_command(now - 10, now + 10,
+                                                [str(log_dir)])
+    output = subprocess.check_output(['bash', '-c', command])
+
+    with tarfile.open(fileobj=io.BytesIO(output), mode='r:gz') as tar:
+        files = {x.name.split('/')[-1]: tar.extractfile(x).read()
+                 for x in tar.getmembers() if x.isfile()}
+    assert 'nova-compute.log' not in files
+    lines = files['nova-api.log'].decode('utf-8').splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith('ERROR inside')
+    assert lines[1] == 'Traceback (most recent call last):'
+
+
+def test_merge_archives(tmpdir):
+    node_dir = tmpdir.mkdir('node').mkdir('var')
+    node_dir.join('a.log').write('data')
+    archive = io.BytesIO(subprocess.check_output(
+        ['tar', '-C', str(tmpdir.join('node')), '-czf', '-', '.']))
+    path = str(tmpdir.join('result.tar.gz'))
+
+    log_harvest.merge_archives(path, {'node-1.domain.tld': archive})
+
+    with tarfile.open(path) as tar:
+        member = tar.getmember('node-1.domain.tld/var/a.log')
+        assert tar.extractfile(member).read() == b'data'
@@ -0,0 +1,46 @@
+import json
+
+pytest_plugins = "pytester"
+
+
+def test_profile_phases_and_fixtures(testdir):
+    testdir.makepyfile("""
+        import time
+
+        import pytest
+
+        @pytest.fixture
+        def slow():
+            time.sleep(0.2)
+
+        def test_a(slow):
+            pass
+    """)
+    output = testdir.tmpdir.join('profile.json')
+    result = testdir.runpytest('-p', 'plugins.profiler', '--profile-timing',
+                               '--profile-output={0}'.format(output))
+    result.stdout.fnmatch_lines([
+        "*slowest 10 phases and fixtures*",
+        "*fixture*slow (function)*test_a*",
+    ])
+    data = json.loads(output.read())
+    events = {(x['category'], x['name']): x for x in data['events']}
+    assert events[('fixture', 'slow (function)')]['duration'] >= 0.2
+    assert ('phase', 'call') in events
+    summary = data['summary']['test_profile_phases_and_fixtures.py::test_a']
+    assert summary['phase']['count'] == 3
+
+
+def test_nested_calls_recorded_once():
+    from plugins.profiler import Profiler
+
+    profiler = Profiler()
+
+    def inner():
+        return 'result'
+
+    wrapped_inner = profiler.wrap(inner, 'ssh', lambda: 'inner')
+    outer = profiler.wrap(wrapped_inner, 'ssh', lambda: 'outer')
+
+    assert outer() == 'result'
+    assert [x['name'] for x in profiler.events] == ['outer']
@@ -0,0 +1,82 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import pytest
+
+pytest.importorskip('keystoneauth1')
+pytest.importorskip('keystoneclient')
+
+from mos_tests.environment import auth  # noqa
+
+V2_URL = 'http://10.0.0.2:5000/v2.0/'
+V3_URL = 'http://10.0.0.2:5000/v3/'
+
+
+@pytest.yield_fixture(autouse=True)
+def clear_cache():
+    auth.clear()
+    yield
+    auth.clear()
+
+
+class AccessInfo(object):
+    def __init__(self, expiring):
+        self.expiring = expiring
+
+    def will_expire_soon(self, stale_duration):
+        return self.expiring
+
+
+def test_session_is_cached():
+    session = auth.get_session(V2_URL, 'admin', 'admin', 'admin')
+    assert auth.get_session(V2_URL, 'admin', 'admin', 'admin') is session
+    assert auth.get_session(V2_URL, 'admin', 'admin', 'demo') is not session
+    session_v3 = auth.get_session(V3_URL, 'admin', 'admin', 'admin',
+                                  domain='ldap1', keystone_version=3)
+    assert session_v3 is not session
+    assert auth.get_session(V3_URL, 'admin', 'admin', 'admin',
+                            domain='ldap1',
+                            keystone_version=3) is session_v3
+    # All sessions share pooled connections
+    assert session.session is session_v3.session is auth.get_http_session()
+
+
+def test_session_is_rebuilt_on_password_change():
+    session = auth.get_session(V2_URL, 'user1', 'pass1', 'admin')
+    new_session = auth.get_session(V2_URL, 'user1', 'pass2', 'admin')
+    assert new_session is not session
+    assert auth.get_session(V2_URL, 'user1', 'pass2', 'admin') is new_session
+
+
+def test_clear():
+    session = auth.get_session(V2_URL, 'admin', 'admin', 'admin')
+    auth.clear()
+    assert auth.get_session(V2_URL, 'admin', 'admin', 'admin') is not session
+
+
+@pytest.mark.parametrize('expiring, expected', [
+    (False, 'old_token'),
+    (True, 'new_token'),
+])
+def test_get_token(expiring, expected):
+    session = auth.get_session(V2_URL, 'admin', 'admin', 'admin')
+    session.auth.auth_ref = AccessInfo(expiring)
+
+    def get_token(session):
+        if session.auth.auth_ref is None:
+            return 'new_token'
+        return 'old_token'
+
+    session.auth.get_token = lambda session: get_token(session)
+    assert auth.get_token(session) == expected
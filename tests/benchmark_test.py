@@ -0,0 +1,98 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import subprocess
+
+import pytest
+
+from mos_tests.functions import benchmark
+from mos_tests.object_storage import benchmark as object_benchmark
+
+
+class LocalRemote(object):
+    def check_call(self, command, verbose=True):
+        command = command.replace('. openrc && ', '', 1)
+        output = subprocess.check_output(command, shell=True)
+        return type('Result', (object,), {
+            'stdout_string': output.decode('utf-8')})
+
+
+def test_percentile():
+    values = [4, 1, 3, 2, 5]
+    assert benchmark.percentile(values, 0) == 1
+    assert benchmark.percentile(values, 50) == 3
+    assert benchmark.percentile(values, 100) == 5
+    assert benchmark.percentile(values, 90) == pytest.approx(4.6)
+    assert benchmark.percentile([], 50) is None
+
+
+def test_stats():
+    stats = benchmark.Stats('test')
+    stats.add(10, 11, size=2 ** 20)
+    stats.add(10.5, 12, size=2 ** 20)
+    stats.add(11, 11.1, ok=False)
+    summary = stats.summary()
+    assert summary['count'] == 2
+    assert summary['errors'] == 1
+    assert summary['mb_per_s'] == pytest.approx(1)
+    assert summary['max'] == pytest.approx(1.5)
+    histogram = dict(stats.histogram())
+    assert histogram[1] == 1
+    assert histogram[2.5] == 1
+    assert 'test: 2 ops, 1 errors' in stats.report()
+
+
+def test_run_concurrently():
+    def func(x):
+        if x < 0:
+            raise ValueError(x)
+        return x
+
+    stats = benchmark.run_concurrently(benchmark.Stats('test'), func,
+                                       [(1,), (2,), (-1,)], concurrency=2)
+    assert stats.count == 2
+    assert stats.errors == 1
+    assert stats.bytes == 3
+
+
+def test_baselines(tmpdir, monkeypatch):
+    monkeypatch.setattr(benchmark.settings, 'BENCHMARK_UPDATE_BASELINES',
+                        False)
+    path = str(tmpdir.join('baselines.json'))
+    good = {'mb_per_s': 100, 'ops_per_s': 10, 'p90': 1}
+    assert benchmark.Baselines(path).check('key', good) == []
+
+    baselines = benchmark.Baselines(path)
+    assert baselines.get('key') == good
+    assert baselines.compare('key', good, tolerance=0.1) == []
+    bad = {'mb_per_s': 80, 'ops_per_s': 10, 'p90': 1.2}
+    regressions = baselines.compare('key', bad, tolerance=0.1)
+    assert len(regressions) == 2
+    assert 'mb_per_s' in regressions[0]
+    assert 'p90' in regressions[1]
+
+    # Baseline is not overwritten by worse results
+    baselines.check('key', bad)
+    assert benchmark.Baselines(path).get('key') == good
+
+
+def test_run_remote_operations(monkeypatch):
+    monkeypatch.setitem(object_benchmark.COMMANDS, ('test', 'put'),
+                        'test $1 -ne 3')
+    stats = object_benchmark.run_operations(
+        LocalRemote(), 'test', 'put', 'container', count=5, concurrency=3,
+        object_size=10)
+    assert stats.count == 4
+    assert stats.errors == 1
+    assert stats.bytes == 40
@@ -0,0 +1,136 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from collections import Counter
+import threading
+
+import pytest
+
+from mos_tests.functions import capacity
+
+
+def test_free_cidr_indexes():
+    indexes = capacity.free_cidr_indexes(['192.168.1.0/24', '10.0.0.0/24',
+                                          '192.168.3.0/24'])
+    assert indexes[:3] == [2, 4, 5]
+    assert len(indexes) == 252
+
+
+@pytest.mark.parametrize('quota, expected', [
+    ({'network': 50, 'subnet': 50, 'port': 150}, 30),
+    ({'network': 20, 'subnet': 50, 'port': -1}, 18),
+    ({'network': -1, 'subnet': -1, 'port': -1}, 254),
+    ({'network': 1, 'subnet': 50, 'port': 150}, 0),
+])
+def test_plan_networks(quota, expected):
+    used = {'network': 2, 'subnet': 2, 'port': 50}
+    assert capacity.plan_networks(quota, used, ports_per_network=3,
+                                  instances_capacity=10, cidrs=254) == expected
+
+
+@pytest.mark.parametrize('instances_capacity, expected', [
+    (0, 83),
+    (10, 80),
+    (240, 62),
+    (1000, 62),
+])
+def test_plan_networks_big_capacity(instances_capacity, expected):
+    # Capacity of hypervisors can be close to or more than ports quota
+    quota = {'network': -1, 'subnet': -1, 'port': 250}
+    used = {'network': 0, 'subnet': 0, 'port': 0}
+    count = capacity.plan_networks(quota, used, ports_per_network=3,
+                                   instances_capacity=instances_capacity,
+                                   cidrs=254)
+    assert count == expected
+    assert count * 3 + min(count, instances_capacity) <= 250
+
+
+def test_plan_waves():
+    waves, overlap = capacity.plan_waves(
+        {'node-1': 4, 'node-2': 7, 'node-3': 0}, 7)
+    assert waves == [['node-1', 'node-2', 'node-1', 'node-2', 'node-2'],
+                     ['node-1', 'node-2']]
+    assert overlap is True
+
+
+def test_plan_waves_small_capacity():
+    waves, overlap = capacity.plan_waves({'node-1': 1, 'node-2': 1}, 3)
+    assert [Counter(x) for x in waves] == [Counter(['node-1', 'node-2']),
+                                           Counter(['node-1'])]
+    # Each wave takes whole capacity, waves can't be booted simultaneously
+    assert overlap is False
+    with pytest.raises(ValueError):
+        capacity.plan_waves({'node-1': 0}, 1)
+
+
+class Server(object):
+    def __init__(self, server_id, host):
+        self.id = server_id
+        self.host = host
+        self.status = 'ACTIVE'
+
+
+class FakeServers(object):
+    """Servers become ACTIVE at once, deleted servers disappear on listing"""
+
+    def __init__(self, capacities):
+        self.capacities = capacities
+        self.servers = {}
+        self.deleted = set()
+        self.max_used = Counter()
+        self.lock = threading.Lock()
+
+    def create(self, name, availability_zone, **kwargs):
+        host = availability_zone.split(':')[1]
+        with self.lock:
+            used = sum(1 for x in self.servers.values()
+                       if x.host == host) + 1
+            assert used <= self.capacities[host], 'No room on {0}'.format(
+                host)
+            self.max_used[host] = max(self.max_used[host], used)
+            server = Server(name, host)
+            self.servers[server.id] = server
+        return server
+
+    def delete(self, server_id):
+        self.deleted.add(server_id)
+
+    def list(self):
+        for server_id in self.deleted:
+            self.servers.pop(server_id, None)
+        self.deleted.clear()
+        return list(self.servers.values())
+
+
+class FakeNova(object):
+    def __init__(self, capacities):
+        self.servers = FakeServers(capacities)
+
+
+class FakeOsConn(object):
+    def __init__(self, capacities):
+        self.nova = FakeNova(capacities)
+
+
+@pytest.mark.parametrize('capacities, max_used', [
+    ({'node-1': 1, 'node-2': 1}, {'node-1': 1, 'node-2': 1}),
+    # Two waves of half capacity exist at the same time
+    ({'node-1': 4, 'node-2': 3}, {'node-1': 4, 'node-2': 2}),
+])
+def test_boot_and_recycle(capacities, max_used):
+    os_conn = FakeOsConn(capacities)
+    capacity.boot_and_recycle(os_conn, ['net{0}'.format(i) for i in range(9)],
+                              'flavor', capacities, image_id='image')
+    assert os_conn.nova.servers.servers == {}
+    assert os_conn.nova.servers.max_used == Counter(max_used)
@@ -0,0 +1,95 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+from mos_tests.functions import ceph
+
+
+def ceph_output(states, degraded=0, mons_health='HEALTH_OK'):
+    status = {
+        'health': {
+            'health': {'health_services': [
+                {'mons': [{'name': 'node-1', 'health': mons_health}]}]},
+            'overall_status': 'HEALTH_OK' if len(states) == 1 else
+                              'HEALTH_WARN',
+            'detail': ['mon.node-1 addr clock skew'],
+        },
+        'osdmap': {'osdmap': {'num_osds': 6, 'num_up_osds': 5,
+                              'num_in_osds': 5}},
+        'pgmap': {
+            'pgs_by_state': [{'state_name': k, 'count': v}
+                             for k, v in states.items()],
+            'num_pgs': sum(states.values()),
+            'degraded_objects': degraded,
+            'recovering_objects_per_sec': 12,
+            'read_bytes_sec': 1024,
+            'op_per_sec': 30,
+        },
+    }
+    perf = {'osd_perf_infos': [
+        {'id': 0, 'perf_stats': {'commit_latency_ms': 5,
+                                 'apply_latency_ms': 7}},
+        {'id': 1, 'perf_stats': {'commit_latency_ms': 9,
+                                 'apply_latency_ms': 2}}]}
+    return json.dumps(status, indent=2) + '\n\n' + json.dumps(perf)
+
+
+class FakeRemote(object):
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+
+    def check_call(self, command, verbose=True):
+        assert command == ceph.SAMPLE_COMMAND
+        result = type('Result', (), {})()
+        result.stdout_string = self.outputs.pop(0)
+        return result
+
+
+def test_parse_sample():
+    sample = ceph.parse_sample(
+        ceph_output({'active+clean': 60, 'active+degraded': 4}, degraded=10,
+                    mons_health='HEALTH_WARN'), now=100)
+    assert sample.health == 'HEALTH_WARN'
+    assert not sample.time_sync
+    assert sample.pg_states == {'active+clean': 60, 'active+degraded': 4}
+    assert not ceph.is_clean(sample)
+    assert sample.osds == (5, 5, 6)
+    assert ceph.client_iops(sample) == 30
+    assert (sample.commit_latency_ms, sample.apply_latency_ms) == (9, 7)
+
+
+def test_unclean_periods():
+    samples = [
+        ceph.parse_sample(ceph_output(states, degraded=degraded), now=now)
+        for now, states, degraded in (
+            (0, {'active+clean': 64}, 0),
+            (10, {'active+clean': 60, 'active+remapped': 4}, 0),
+            (20, {'active+clean': 64}, 0),
+            (30, {'active+clean': 60, 'active+degraded': 4}, 0),
+            (40, {'active+clean': 60, 'active+degraded': 4}, 5),
+            (70, {'active+clean': 64}, 0),
+            (80, {'peering': 64}, 0))]
+    assert ceph.unclean_periods(samples) == [
+        ('rebalance', 10, 20), ('recovery', 30, 70), ('rebalance', 80, None)]
+
+
+def test_monitor_wait():
+    monitor = ceph.CephMonitor(FakeRemote([
+        ceph_output({'active+clean': 60, 'active+degraded': 4}, degraded=1),
+        ceph_output({'active+clean': 64})]), interval=0)
+    sample = monitor.wait(ceph.is_clean, timeout=5)
+    assert sample is monitor.latest
+    assert len(monitor.samples) == 2
+    assert 'ceph-recovery: 1 ops' in monitor.report()
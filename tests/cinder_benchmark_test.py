@@ -0,0 +1,63 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import pytest
+
+from mos_tests.cinder import benchmark
+
+IDLE = {'iops': 0, 'bw': 0}
+
+
+def fio_output(read, write):
+    return 'fio: warning\n' + json.dumps(
+        {'jobs': [{'jobname': 'benchmark', 'read': read, 'write': write}]})
+
+
+def test_parse_fio_v2():
+    output = fio_output(
+        {'iops': 2000.0, 'bw': 8000,
+         'clat': {'percentile': {'50.000000': 400, '90.000000': 900,
+                                 '99.000000': 2000}}},
+        IDLE)
+    summary = benchmark.parse_fio(output)
+    assert summary['ops_per_s'] == 2000
+    assert summary['mb_per_s'] == pytest.approx(7.8125)
+    assert summary['p50'] == pytest.approx(0.0004)
+    assert summary['p99'] == pytest.approx(0.002)
+
+
+def test_parse_fio_v3():
+    output = fio_output(
+        IDLE,
+        {'iops': 100.0, 'bw': 102400,
+         'clat_ns': {'percentile': {'50.000000': 5000000,
+                                    '90.000000': 8000000,
+                                    '99.000000': 20000000}}})
+    summary = benchmark.parse_fio(output)
+    assert summary['ops_per_s'] == 100
+    assert summary['mb_per_s'] == 100
+    assert summary['p90'] == pytest.approx(0.008)
+
+
+def test_combine():
+    summary = benchmark.combine([
+        {'ops_per_s': 100, 'mb_per_s': 1, 'p50': 0.1, 'p90': 0.2,
+         'p99': None},
+        {'ops_per_s': 300, 'mb_per_s': 3, 'p50': 0.3, 'p90': 0.1,
+         'p99': None}])
+    assert summary == {'ops_per_s': 400, 'mb_per_s': 4, 'p50': 0.3,
+                       'p90': 0.2, 'p99': None}
+    assert '400 IOPS' in benchmark.report('lvm', summary)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import textwrap
+
+import pytest
+
+from mos_tests.functions import cli_output
+
+LISTING = textwrap.dedent("""\
+    +--------------------------------------+--------+--------+
+    | ID                                   | Name   | Status |
+    +--------------------------------------+--------+--------+
+    | 2a0e6a4b-3c6b-4f3e-9a3b-7d3e2f1c0b5a | cirros | active |
+    | 5f6e7d8c-9b0a-4c1d-8e2f-3a4b5c6d7e8f | a | b  | queued |
+    +--------------------------------------+--------+--------+
+""")
+
+DETAILS = textwrap.dedent("""\
+    Image created:
+    +----------+------------+
+    | Property | Value      |
+    +----------+------------+
+    | name     | test image |
+    | size     |            |
+    +----------+------------+
+""")
+
+
+def test_listing():
+    assert cli_output.listing(LISTING) == [
+        {'ID': '2a0e6a4b-3c6b-4f3e-9a3b-7d3e2f1c0b5a',
+         'Name': 'cirros', 'Status': 'active'},
+        {'ID': '5f6e7d8c-9b0a-4c1d-8e2f-3a4b5c6d7e8f',
+         'Name': 'a | b', 'Status': 'queued'},
+    ]
+    assert cli_output.listing('') == []
+
+
+def test_details():
+    assert cli_output.details(DETAILS) == {'name': 'test image', 'size': ''}
+    assert cli_output.tables(DETAILS)[0]['label'] == 'Image created:'
+    aodh_output = DETAILS.replace('Property', 'Field   ')
+    assert cli_output.details(aodh_output)['name'] == 'test image'
+    with pytest.raises(cli_output.InvalidStructure):
+        cli_output.details(LISTING)
+
+
+def test_json():
+    assert cli_output.listing('[{"ID": "1", "Name": "x"}]') == [
+        {'ID': '1', 'Name': 'x'}]
+    assert cli_output.details('{"name": "x", "size": 1}') == {'name': 'x',
+                                                              'size': 1}
+    assert cli_output.details(
+        '[{"Field": "name", "Value": "x"}]') == {'name': 'x'}
+
+
+def test_big_listing():
+    lines = LISTING.splitlines()
+    rows = [lines[3].replace('cirros', 'img{0:03d}'.format(i % 1000))
+            for i in range(50000)]
+    output = '\n'.join(lines[:3] + rows + lines[-1:])
+    result = cli_output.listing(output)
+    assert len(result) == 50000
+    assert result[-1]['Name'] == 'img999'
+
+
+def test_wide_characters():
+    output = textwrap.dedent(u"""\
+        +----------+---------------------------+
+        | Property | Value                     |
+        +----------+---------------------------+
+        | name     | 試験画像_тест | b         |
+        | status   | active                    |
+        +----------+---------------------------+
+    """)
+    assert cli_output.details(output) == {
+        'name': u'試験画像_тест | b',
+        'status': 'active'}
+    # The same table as UTF-8 bytes
+    assert cli_output.details(output.encode('utf-8'))['name'].startswith(
+        u'試験')
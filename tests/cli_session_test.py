@@ -0,0 +1,144 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from mos_tests.functions import cli_session
+
+FAKE_SHELL = textwrap.dedent("""
+    import os
+    import sys
+
+    tokens = []
+
+
+    class OpenStackShell(object):
+        def run(self, argv):
+            if argv[:2] == ['token', 'issue']:
+                tokens.append('token-{0}'.format(len(tokens) + 1))
+                sys.stdout.write(tokens[-1] + '\\n')
+                return 0
+            token = os.environ.get('OS_TOKEN')
+            if argv == ['expired'] and token == 'token-1':
+                sys.stderr.write('The request you have made requires '
+                                 'authentication. (HTTP 401)\\n')
+                return 1
+            sys.stdout.write('{0} {1} {2}\\n'.format(' '.join(argv), token,
+                                                     os.getpid()))
+            return 0
+""")
+
+
+class FakeChan(object):
+    def __init__(self, proc):
+        self.proc = proc
+
+    @property
+    def closed(self):
+        return self.proc.poll() is not None
+
+    def settimeout(self, timeout):
+        pass
+
+    def close(self):
+        if not self.closed:
+            self.proc.terminate()
+            self.proc.wait()
+
+
+class LocalRemote(object):
+    execution_timeout = 60
+
+    def __init__(self, env=None):
+        self.env = env
+        self.started = 0
+
+    def execute_async(self, command):
+        self.started += 1
+        proc = subprocess.Popen(command, shell=True, env=self.env,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                universal_newlines=True)
+        return FakeChan(proc), proc.stdin, proc.stdout, proc.stderr
+
+
+@pytest.yield_fixture
+def session_factory():
+    sessions = []
+
+    def factory(remote):
+        session = cli_session.CLISession(remote, prefix='')
+        session.python = sys.executable
+        sessions.append(session)
+        return session
+
+    yield factory
+    for session in sessions:
+        session.close()
+
+
+def test_shell_commands(session_factory):
+    remote = LocalRemote()
+    session = session_factory(remote)
+    result = session.execute('echo out; echo err >&2; exit 3')
+    assert result['exit_code'] == 3
+    assert result.stdout_string == 'out'
+    assert result.stderr_string == 'err'
+
+    result = session.execute('echo out; echo err >&2', merge_stderr=True)
+    assert result.is_ok
+    assert result.stdout_string == 'out\nerr'
+
+    # Commands are run by the same server
+    parents = {session.execute('echo $PPID').stdout_string for _ in range(3)}
+    assert len(parents) == 1
+    assert remote.started == 1
+
+
+def test_restart_after_close(session_factory):
+    remote = LocalRemote()
+    session = session_factory(remote)
+    assert session.execute('true').is_ok
+    session.close()
+    assert session.execute('true').is_ok
+    assert remote.started == 2
+
+
+def test_openstack_in_process(tmpdir, session_factory):
+    tmpdir.mkdir('openstackclient').join('__init__.py').write('')
+    tmpdir.join('openstackclient', 'shell.py').write(FAKE_SHELL)
+    env = dict(os.environ, PYTHONPATH=str(tmpdir))
+    session = session_factory(LocalRemote(env=env))
+
+    result = session.execute("openstack user list -f json")
+    token, pid1 = result.stdout_string.split()[-2:]
+    assert token == 'token-1'
+    result = session.execute("openstack project show 'admin'")
+    assert result.stdout_string.split()[:3] == ['project', 'show', 'admin']
+    pid2 = result.stdout_string.split()[-1]
+    assert pid1 == pid2
+
+    # Token is reissued after expiration
+    result = session.execute('openstack expired')
+    assert result.stdout_string.split()[:2] == ['expired', 'token-2']
+
+    # Commands with shell syntax are run by bash
+    result = session.execute('openstack user list 2>/dev/null || '
+                             'echo shell')
+    assert result.stdout_string == 'shell'
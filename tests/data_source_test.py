@@ -0,0 +1,67 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import hashlib
+import subprocess
+import sys
+
+import pytest
+
+from mos_tests.functions import data_source
+
+SIZE = 3 * data_source.BLOCK_SIZE + 12345
+
+
+class LocalRemote(object):
+    def check_call(self, command, verbose=True):
+        command = command.replace('python -c', sys.executable + ' -c', 1)
+        subprocess.check_call(command, shell=True)
+
+
+@pytest.mark.parametrize('seed', [None, 42])
+def test_stream(seed):
+    stream = data_source.DataStream(SIZE, seed=seed)
+    data = b''
+    while True:
+        chunk = stream.read(65536)
+        if not chunk:
+            break
+        data += chunk
+    assert len(data) == SIZE
+    assert stream.digest == hashlib.md5(data).hexdigest()
+    assert stream.digest == data_source.expected_md5(SIZE, seed)
+    if seed is None:
+        assert data == b'\0' * SIZE
+
+
+def test_stream_is_deterministic():
+    data1 = b''.join(data_source.iter_blocks(SIZE, seed=1))
+    data2 = b''.join(data_source.iter_blocks(SIZE, seed=1))
+    data3 = b''.join(data_source.iter_blocks(SIZE, seed=2))
+    assert data1 == data2
+    assert data1 != data3
+    # Blocks are different
+    block = data_source.BLOCK_SIZE
+    assert data1[:block] != data1[block:2 * block]
+
+
+@pytest.mark.parametrize('seed', [None, 42])
+def test_create_remote_file(tmpdir, seed):
+    path = str(tmpdir.join('file'))
+    generated = data_source.create_remote_file(LocalRemote(), path, SIZE,
+                                               seed=seed)
+    path, name = generated
+    assert name == 'file'
+    with open(path, 'rb') as f:
+        assert hashlib.md5(f.read()).hexdigest() == generated.md5
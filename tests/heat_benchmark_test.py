@@ -0,0 +1,61 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import yaml
+
+from mos_tests.functions.stacks import TrackedStack
+from mos_tests.heat import benchmark
+
+
+class FakeTracker(object):
+
+    def __init__(self, stacks):
+        self.stacks = stacks
+
+
+def test_build_templates():
+    template, files = benchmark.build_templates(['server', 'port', 'volume'])
+    unit = yaml.safe_load(files[benchmark.UNIT_TEMPLATE])
+    assert sorted(unit['resources']) == ['attachment', 'port', 'server',
+                                         'volume']
+    assert unit['resources']['server']['properties']['networks'] == [
+        {'port': {'get_resource': 'port'}}]
+    assert sorted(template['parameters']) == ['count', 'flavor', 'image',
+                                              'network']
+    group = template['resources']['group']['properties']
+    assert group['resource_def']['type'] == benchmark.UNIT_TEMPLATE
+    assert group['resource_def']['properties']['network'] == {
+        'get_param': 'network'}
+
+
+def test_engine_only_template():
+    template, files = benchmark.build_templates(['random'])
+    assert sorted(template['parameters']) == ['count']
+    assert benchmark.resources_count(['random'], 5) == 11
+
+
+def test_operation_summary():
+    stacks = []
+    for i in range(4):
+        stack = TrackedStack(str(i), 'CREATE', start=100 + i)
+        stack.end = 110 + i
+        stack.events = 5
+        stacks.append(stack)
+    stats, summary = benchmark.operation_summary(
+        'stack-create', FakeTracker(stacks), resources=11)
+    assert stats.count == 4
+    assert summary['p50'] == 10
+    assert summary['ops_per_s'] == 4 / 13.0
+    assert summary['events_per_s'] == 20 / 13.0
+    assert summary['resources_per_s'] == 44 / 13.0
@@ -0,0 +1,201 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import hashlib
+import os
+import tarfile
+
+import pytest
+from six import BytesIO
+
+from mos_tests.functions import image_upload
+
+
+class Image(dict):
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class FakeImages(object):
+    def __init__(self, corrupt=False):
+        self.data = {}
+        self.names = {}
+        self.corrupt = corrupt
+
+    def create(self, name, **kwargs):
+        image_id = 'id{0}'.format(len(self.names))
+        self.names[image_id] = name
+        return Image(id=image_id)
+
+    def list(self):
+        return [self.get(x) for x in self.data]
+
+    def upload(self, image_id, image_data):
+        # glanceclient reads data by 64KB chunks
+        chunks = []
+        while True:
+            chunk = image_data.read(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.data[image_id] = b''.join(chunks)
+
+    def get(self, image_id):
+        data = self.data[image_id]
+        if self.corrupt:
+            data = data[:-1]
+        return Image(id=image_id, name=self.names.get(image_id),
+                     status='active', checksum=hashlib.md5(data).hexdigest())
+
+
+class FakeGlance(object):
+    def __init__(self, corrupt=False):
+        self.images = FakeImages(corrupt)
+
+
+@pytest.fixture
+def content():
+    return os.urandom(1024 * 1024 + 1)
+
+
+@pytest.fixture
+def image_path(tmpdir, content):
+    path = tmpdir.join('image.qcow2')
+    path.write_binary(content)
+    return str(path)
+
+
+def test_upload_file(image_path, content):
+    glance = FakeGlance()
+    with open(image_path, 'rb') as f:
+        checksums = image_upload.upload(glance, 'id', f, chunk_size=100000)
+    assert glance.images.data['id'] == content
+    assert checksums.size == len(content)
+    assert checksums.md5 == hashlib.md5(content).hexdigest()
+    assert checksums.sha256 == hashlib.sha256(content).hexdigest()
+
+
+def test_upload_stream(content):
+    glance = FakeGlance()
+    checksums = image_upload.upload(glance, 'id', BytesIO(content),
+                                    chunk_size=100000)
+    assert glance.images.data['id'] == content
+    assert checksums.md5 == hashlib.md5(content).hexdigest()
+
+
+def test_upload_checksum_mismatch(content):
+    glance = FakeGlance(corrupt=True)
+    with pytest.raises(image_upload.ChecksumError):
+        image_upload.upload(glance, 'id', BytesIO(content))
+
+
+def test_upload_images(tmpdir, image_path, content):
+    archive_path = str(tmpdir.join('image.tar.gz'))
+    with tarfile.open(archive_path, 'w:gz') as tar:
+        tar.add(image_path, arcname='image.raw')
+
+    glance = FakeGlance()
+    result = image_upload.upload_images(glance, [
+        ('id1', image_path, False),
+        ('id2', archive_path, True),
+    ])
+    assert glance.images.data == {'id1': content, 'id2': content}
+    assert [x.md5 for x in result] == [hashlib.md5(content).hexdigest()] * 2
+
+
+def test_get_checksum(image_path, content):
+    checksum = hashlib.md5(content).hexdigest()
+    assert image_upload.get_checksum(image_path) == checksum
+    with open(image_path + '.md5') as f:
+        assert f.read().endswith(checksum)
+    # Cached value is used
+    with open(image_path + '.md5', 'w') as f:
+        f.write('{0} {1} cached'.format(
+            int(os.path.getmtime(image_path)), len(content)))
+    assert image_upload.get_checksum(image_path) == 'cached'
+
+
+class FakeOsConn(object):
+    env = None
+
+    def __init__(self):
+        self.glance = FakeGlance()
+
+
+def test_import_image_reuse(image_path, content):
+    os_conn = FakeOsConn()
+    image, created = image_upload.import_image(os_conn, image_path, 'ubuntu')
+    assert created
+    assert os_conn.glance.images.data[image.id] == content
+
+    image2, created = image_upload.import_image(os_conn, image_path, 'ubuntu')
+    assert not created
+    assert image2.id == image.id
+
+    image3, created = image_upload.import_image(os_conn, image_path, 'other')
+    assert created
+    assert image3.id != image.id
+
+
+def test_import_images(tmpdir, image_path, content):
+    archive_path = str(tmpdir.join('image.tar.gz'))
+    with tarfile.open(archive_path, 'w:gz') as tar:
+        tar.add(image_path, arcname='image.raw')
+
+    os_conn = FakeOsConn()
+    reused, _ = image_upload.import_image(os_conn, image_path, 'ubuntu')
+    result = image_upload.import_images(os_conn, [
+        {'url': image_path, 'name': 'ubuntu'},
+        {'url': image_path, 'name': 'other'},
+        {'url': archive_path, 'name': 'archive', 'unpack': True},
+    ])
+    assert [x[1] for x in result] == [False, True, True]
+    assert result[0][0].id == reused.id
+    assert [x[0].name for x in result] == ['ubuntu', 'other', 'archive']
+    assert all(os_conn.glance.images.data[x[0].id] == content
+               for x in result)
+
+
+class FakeRemote(object):
+    def __init__(self):
+        self.commands = []
+
+    def execute(self, command, verbose=True):
+        self.commands.append(command)
+        result = type('Result', (), {})()
+        result.is_ok = True
+        result.stderr_string = ''
+        result.stdout_string = (
+            '+----------+-------+\n'
+            '| Property | Value |\n'
+            '+----------+-------+\n'
+            '| id       | uuid1 |\n'
+            '+----------+-------+\n')
+        return result
+
+
+def test_create_image_on_controller_as_owner():
+    remote = FakeRemote()
+    image_id = image_upload.create_image_on_controller(
+        remote, '/tmp/image', 'ubuntu', 'qcow2', 'bare', {},
+        credentials=('user1', 'pass 1', 'project1'))
+    assert image_id == 'uuid1'
+    command = remote.commands[0]
+    assert command.startswith('. openrc && ')
+    assert "OS_PASSWORD='pass 1' OS_TENANT_NAME=project1" in command
+    # Credentials override openrc ones
+    assert command.index('OS_USERNAME=user1') < command.index('glance')
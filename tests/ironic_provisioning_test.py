@@ -0,0 +1,105 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import pytest
+
+from mos_tests.ironic import provisioning
+
+TRANSITIONS = {('enroll', 'manage'): 'manageable',
+               ('manageable', 'provide'): 'available'}
+
+
+class Node(object):
+    def __init__(self, uuid, state='enroll'):
+        self.uuid = uuid
+        self.provision_state = state
+        self.target_provision_state = None
+        self.instance_uuid = None
+        self.conductor_affinity = 1
+        self.last_error = None
+
+
+class FakeIronic(object):
+    def __init__(self):
+        self.nodes = []
+        self.calls = []
+        self.client = self
+        self.node = self
+        self.os_conn = None
+
+    def get_deploy_images(self):
+        self.calls.append('images')
+        return {'deploy_kernel': 'k'}
+
+    def create_node(self, driver, driver_info, node_properties, mac_address,
+                    deploy_images=None):
+        assert deploy_images == {'deploy_kernel': 'k'}
+        node = Node(mac_address)
+        self.nodes.append(node)
+        return node
+
+    def list(self, detail=False):
+        self.calls.append('list')
+        return self.nodes
+
+    def set_provision_state(self, uuid, action):
+        node = next(x for x in self.nodes if x.uuid == uuid)
+        node.provision_state = TRANSITIONS.get(
+            (node.provision_state, action), 'error')
+
+
+def configs(count):
+    return [{'driver': 'fake', 'driver_info': {},
+             'node_properties': {}, 'mac_address': 'node{0}'.format(i)}
+            for i in range(count)]
+
+
+def test_enroll_and_prepare():
+    ironic = FakeIronic()
+    pipeline = provisioning.ProvisioningPipeline(ironic, poll_interval=0)
+    nodes = pipeline.enroll(configs(3))
+    assert [x.uuid for x in nodes] == ['node0', 'node1', 'node2']
+    pipeline.prepare(timeout=5)
+    assert all(x.provision_state == 'available' for x in ironic.nodes)
+    # Images are looked up once, nodes are listed once per poll
+    assert ironic.calls == ['images', 'list', 'list', 'list']
+    states = [x[1] for x in pipeline.records['node0'].states]
+    assert states == ['enroll', 'manageable', 'available']
+
+
+def test_failed_node():
+    ironic = FakeIronic()
+    pipeline = provisioning.ProvisioningPipeline(ironic, poll_interval=0)
+    pipeline.enroll(configs(2))
+    ironic.nodes[1].provision_state = 'error'
+    ironic.nodes[1].last_error = 'power failure'
+    with pytest.raises(provisioning.ProvisioningError) as e:
+        pipeline.prepare(timeout=5)
+    assert 'power failure' in str(e.value)
+
+
+def test_deploy_stats():
+    pipeline = provisioning.ProvisioningPipeline(FakeIronic())
+    pipeline.add_nodes([Node('a'), Node('b'), Node('c')])
+    for uuid, conductor, start, end in (('a', 1, 0, 10), ('b', 1, 5, 20),
+                                        ('c', 2, 0, 30)):
+        record = pipeline.records[uuid]
+        record.conductor = conductor
+        record.deploy_start = start
+        record.deploy_end = end
+    stats = pipeline.deploy_stats()
+    assert sorted(stats) == [1, 2]
+    assert stats[1].count == 2
+    assert stats[1].duration == 20
+    assert 'ironic-deploy[2]' in pipeline.report()
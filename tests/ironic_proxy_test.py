@@ -0,0 +1,161 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from contextlib import contextmanager
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from mos_tests.ironic import proxy
+
+
+def echo_server(path):
+    """Unix socket server, which echoes data of each connection"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(100)
+
+    def echo(conn):
+        while True:
+            data = conn.recv(65536)
+            if not data:
+                break
+            conn.sendall(data)
+        conn.close()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.error:
+                return
+            thread = threading.Thread(target=echo, args=(conn,))
+            thread.daemon = True
+            thread.start()
+
+    thread = threading.Thread(target=serve)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def sender_server(path, size):
+    """Unix socket server, which sends `size` bytes and closes connection"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+
+    def serve():
+        conn, _ = server.accept()
+        conn.sendall(b'x' * size)
+        conn.close()
+
+    thread = threading.Thread(target=serve)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+@contextmanager
+def forwarding(path, upstream):
+    server = proxy.TheServer('127.0.0.1', 0, forward_to=path)
+    thread = threading.Thread(target=server.main_loop,
+                              kwargs={'timeout': 0.1})
+    thread.daemon = True
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.stop()
+        thread.join()
+        server.close()
+        upstream.close()
+
+
+@pytest.yield_fixture
+def forwarder(tmpdir):
+    path = os.path.join(str(tmpdir), 'libvirt-sock')
+    with forwarding(path, echo_server(path)) as server:
+        yield server
+
+
+def exchange(address, size):
+    payload = os.urandom(size)
+    client = socket.create_connection(address)
+    received = []
+
+    def read():
+        total = 0
+        while total < size:
+            data = client.recv(65536)
+            if not data:
+                break
+            received.append(data)
+            total += len(data)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    client.sendall(payload)
+    reader.join(30)
+    client.close()
+    return b''.join(received) == payload
+
+
+def test_forward_concurrent_clients(forwarder):
+    size = 3 * 1024 * 1024
+    results = []
+    threads = [threading.Thread(
+        target=lambda: results.append(exchange(forwarder.address, size)))
+        for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+    assert results == [True] * 10
+    assert forwarder.stats['accepted'] == 10
+    assert forwarder.stats['bytes_in'] == 10 * size
+    assert forwarder.stats['bytes_out'] == 10 * size
+
+
+def test_upstream_unavailable(tmpdir):
+    server = proxy.TheServer('127.0.0.1', 0,
+                             forward_to=str(tmpdir.join('absent')))
+    client = socket.create_connection(server.address)
+    server.on_accept()
+    assert client.recv(1) == b''
+    assert server.stats['failed'] == 1
+    assert server.active == 0
+    client.close()
+    server.close()
+
+
+def test_upstream_closes_first(tmpdir):
+    size = 4 * 1024 * 1024
+    path = os.path.join(str(tmpdir), 'libvirt-sock')
+    with forwarding(path, sender_server(path, size)) as server:
+        client = socket.create_connection(server.address)
+        total = 0
+        while True:
+            # Slow reader: libvirt closes while data is still buffered
+            time.sleep(0.01)
+            data = client.recv(65536)
+            if not data:
+                break
+            total += len(data)
+        client.close()
+        assert total == size
+        assert server.stats['closed'] == 1
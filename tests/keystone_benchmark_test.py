@@ -0,0 +1,82 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import itertools
+import threading
+
+from mos_tests.keystone import benchmark
+
+
+class Response(object):
+    def __init__(self, data=None, headers=None):
+        self.data = data or {}
+        self.headers = headers or {}
+        self.content = b'{}'
+
+    def json(self):
+        return self.data
+
+
+class FakeSession(object):
+    def __init__(self):
+        self.requests = []
+        self.tokens = set()
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def request(self, url, method, headers=None, authenticated=None,
+                log=True, **kwargs):
+        assert authenticated is False and log is False
+        path = url.split('/v3', 1)[1]
+        with self.lock:
+            self.requests.append((method, path))
+            if path == '/domains':
+                return Response({'domains': [{'id': 'domain_id'}]})
+            if method == 'POST':
+                token = 'token{0}'.format(next(self.counter))
+                self.tokens.add(token)
+                return Response(headers={'X-Subject-Token': token})
+            assert headers['X-Auth-Token'] == 'admin'
+            if method == 'GET' and path == '/auth/tokens':
+                assert headers['X-Subject-Token'] in self.tokens
+            if method == 'DELETE':
+                self.tokens.remove(headers['X-Subject-Token'])
+            return Response()
+
+
+class FakeKeystone(object):
+    management_url = 'https://10.0.0.2:5000/v2.0/'
+
+
+class FakeOsConn(object):
+    keystone = FakeKeystone()
+
+
+def test_v3_url():
+    assert benchmark.v3_url(FakeOsConn()) == 'https://10.0.0.2:5000/v3'
+
+
+def test_run():
+    session = FakeSession()
+    keystone = benchmark.KeystoneBenchmark(session, 'http://ks:5000/v3',
+                                           'admin')
+    results = keystone.run('openldap1', 'user01', '1111', count=20,
+                           concurrency=5)
+    assert [x[0] for x in results] == list(benchmark.OPERATIONS)
+    for operation, stats in results:
+        assert stats.count == 20, operation
+        assert stats.errors == 0
+    # All issued tokens are revoked
+    assert session.tokens == set()
+    assert session.requests.count(('GET', '/users')) == 20
@@ -0,0 +1,119 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import pytest
+
+from mos_tests.nova import migration_profiler as profiler
+
+JOB_INFO = """Domain: instance-00000001
+Job type:         Unbounded
+Time elapsed:     2000         ms
+Data processed:   512.000 MiB
+Memory processed: 256.000 MiB
+Memory remaining: 10.000 MiB
+Memory bandwidth: 32.000 MiB/s
+Dirty rate:       100          pages/s
+Iteration:        3
+Domain: instance-00000002
+Job type:         None
+"""
+
+PING = """PING 10.0.0.5 (10.0.0.5) 56(84) bytes of data.
+[1000.0] 64 bytes from 10.0.0.5: icmp_seq=1 ttl=64 time=0.5 ms
+[1000.2] 64 bytes from 10.0.0.5: icmp_seq=2 ttl=64 time=0.5 ms
+[1001.2] 64 bytes from 10.0.0.5: icmp_seq=7 ttl=64 time=0.5 ms
+[1001.4] 64 bytes from 10.0.0.5: icmp_seq=8 ttl=64 time=0.5 ms
+"""
+
+
+class Instance(object):
+    id = 'id1'
+    name = 'server01'
+
+    def __init__(self):
+        setattr(self, 'OS-EXT-SRV-ATTR:instance_name', 'instance-00000001')
+        setattr(self, 'OS-EXT-SRV-ATTR:hypervisor_hostname', 'node-1')
+
+
+def test_parse_domjobinfo_list():
+    jobs = profiler.parse_domjobinfo_list(JOB_INFO)
+    assert sorted(jobs) == ['instance-00000001', 'instance-00000002']
+    job = jobs['instance-00000001']
+    assert job['job_type'] == 'Unbounded'
+    assert job['time_elapsed'] == 2
+    assert job['data_processed'] == 512 * 1024 ** 2
+    assert job['memory_bandwidth'] == 32 * 1024 ** 2
+    assert job['dirty_rate'] == 100
+    assert job['iteration'] == 3
+    assert jobs['instance-00000002'] == {'job_type': 'None'}
+
+
+def test_ping_downtime():
+    timestamps = profiler.parse_ping(PING)
+    assert timestamps == [1000.0, 1000.2, 1001.2, 1001.4]
+    assert profiler.ping_downtime(timestamps) == pytest.approx(0.8)
+    assert profiler.ping_downtime([]) is None
+
+
+def test_profile():
+    profile = profiler.MigrationProfile(Instance())
+    profile.start = 10
+    profile.add_state(11, 'preparing')
+    profile.add_state(12, 'running')
+    profile.add_state(13, 'running')
+    # Old libvirt: iterations are detected by remaining memory growth
+    for i, remaining in enumerate([100, 50, 80, 20, 30, 0]):
+        profile.add_sample(12 + i, {'job_type': 'Unbounded',
+                                    'memory_remaining': remaining,
+                                    'memory_processed': i * 100.0,
+                                    'time_elapsed': i + 1})
+    profile.add_sample(18, {'job_type': 'None'})
+    profile.add_state(20, 'completed')
+    states = [x[1] for x in profile.states]
+    assert states == ['preparing', 'running', 'completed']
+    assert profile.done
+    assert profile.duration == 10
+    assert profile.iterations == 3
+    assert profile.memory_rate == 500.0 / 6
+    profile.completed = {'iteration': 4, 'total_downtime': 0.05,
+                         'memory_processed': 600.0, 'time_elapsed': 6}
+    assert profile.iterations == 4
+    assert profile.memory_rate == 100
+    assert profile.libvirt_downtime == 0.05
+
+
+class BrokenMigrations(object):
+    def list(self):
+        raise Exception('Service Unavailable')
+
+
+class BrokenOsConn(object):
+    def __init__(self):
+        self.nova = type('Nova', (), {})()
+        self.nova.migrations = BrokenMigrations()
+        self.nova.servers = BrokenMigrations()
+
+    def get_node_with_dhcp_for_network(self, network_id):
+        return []
+
+
+def test_profiler_errors_are_ignored():
+    instance = Instance()
+    instance.live_migrate = lambda **kwargs: None
+    with profiler.MigrationProfiler(None, BrokenOsConn(), [instance],
+                                    network_id='net1',
+                                    interval=0.01) as migration_profiler:
+        migration_profiler.migrate(instance)
+    assert migration_profiler.profiles['id1'].status is None
+    assert 'server01' in migration_profiler.report()
@@ -0,0 +1,110 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from collections import namedtuple
+
+import pytest
+
+from mos_tests.murano import tracker
+
+Environment = namedtuple('Environment', ['id', 'status'])
+Deployment = namedtuple('Deployment', ['id', 'state', 'result'])
+Report = namedtuple('Report', ['id', 'created', 'level', 'text'])
+
+
+class FakeMurano(object):
+    """Environments deploy scenarios: list of (status, reports) per poll"""
+
+    def __init__(self, scenarios):
+        self.scenarios = scenarios
+        self.polls = {x: 0 for x in scenarios}
+        self.environments = self
+        self.deployments = self
+
+    def _step(self, env_id):
+        steps = self.scenarios[env_id]
+        return steps[min(self.polls[env_id] - 1, len(steps) - 1)]
+
+    def get(self, env_id):
+        self.polls[env_id] += 1
+        return Environment(env_id, self._step(env_id)[0])
+
+    def list(self, env_id):
+        return [Deployment('old', 'success', None),
+                Deployment('new', 'running', {'result': {
+                    'message': 'failed', 'details': ''}})]
+
+    def reports(self, env_id, deployment_id):
+        assert deployment_id == 'new'
+        reports = []
+        for i, text in enumerate(self._step(env_id)[1]):
+            level = 'error' if text.startswith('Error') else 'info'
+            reports.append(Report(i, '2016-01-01T00:00:{0:02d}'.format(i),
+                                  level, text))
+        # API returns reports in any order
+        return reports[::-1]
+
+
+def track(murano):
+    deploy_tracker = tracker.DeploymentTracker(murano, poll_interval=0)
+    for env_id in murano.scenarios:
+        deploy_tracker.add(Environment(env_id, None))
+    deploy_tracker.wait(timeout=10)
+    return deploy_tracker
+
+
+def test_tracker():
+    murano = FakeMurano({
+        'env1': [('deploying', ['Start']),
+                 ('ready', ['Start', 'Deployment finished'])],
+        'env2': [('deploying', ['Start']),
+                 ('deploying', ['Start', 'Created']),
+                 ('ready', ['Start', 'Created', 'Deployment finished'])],
+    })
+    deploy_tracker = track(murano)
+    assert deploy_tracker.logs('env1') == ['Start', 'Deployment finished']
+    assert deploy_tracker.logs('env2') == ['Start', 'Created',
+                                           'Deployment finished']
+    # Finished environments are not polled anymore
+    assert murano.polls == {'env1': 2, 'env2': 3}
+
+
+def test_tracker_fail_fast():
+    murano = FakeMurano({
+        'env1': [('deploying', ['Start']),
+                 ('deploying', ['Start', 'Error: no flavor'])],
+        'env2': [('deploying', ['Start'])],
+    })
+    with pytest.raises(tracker.DeploymentError) as e:
+        track(murano)
+    assert 'no flavor' in str(e.value)
+
+
+def test_tracker_deploy_failure():
+    murano = FakeMurano({'env1': [('deploy failure', [])]})
+    with pytest.raises(tracker.DeploymentError) as e:
+        track(murano)
+    assert 'failed' in str(e.value)
+
+
+def test_run_probes():
+    tracker.run_probes([('ok', lambda: True)])
+
+    def broken():
+        raise IOError()
+
+    with pytest.raises(AssertionError) as e:
+        tracker.run_probes([('ok', lambda: True), ('false', lambda: False),
+                            ('broken', broken)])
+    assert 'false, broken' in str(e.value)
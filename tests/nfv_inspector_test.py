@@ -0,0 +1,147 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mos_tests.nfv import inspector
+
+HUGEPAGES = '/sys/kernel/mm/hugepages/hugepages-{0}kB/{1}_hugepages:{2}'
+NODE_HUGEPAGES = ('/sys/devices/system/node/node{0}/hugepages/'
+                  'hugepages-{1}kB/{2}_hugepages:{3}')
+SIBLINGS = '/sys/devices/system/cpu/cpu{0}/topology/thread_siblings_list:{1}'
+
+DOMAIN = """<domain type='kvm' id='2'>
+  <name>instance-00000001</name>
+  <uuid>1c2b7f1e-0000-0000-0000-000000000001</uuid>
+  <memoryBacking>
+    <hugepages>
+      <page size='2048' unit='KiB' nodeset='0'/>
+    </hugepages>
+  </memoryBacking>
+  <cputune>
+    <vcpupin vcpu='0' cpuset='2'/>
+    <vcpupin vcpu='1' cpuset='6'/>
+  </cputune>
+  <numatune>
+    <memory mode='strict' nodeset='0'/>
+    <memnode cellid='0' mode='strict' nodeset='0'/>
+  </numatune>
+  <cpu>
+    <numa>
+      <cell id='0' cpus='0-1' memory='524288' unit='KiB'/>
+    </numa>
+  </cpu>
+</domain>"""
+
+SWEEP = '\n'.join([
+    '### cmdline',
+    'BOOT_IMAGE=/vmlinuz ro isolcpus=2-3,6-7 hugepagesz=2M',
+    '### cpus',
+    '0,0', '1,0', '2,0', '3,1', '4,0', '5,1', '6,0', '7,1',
+    '### siblings',
+    SIBLINGS.format(0, '0,4'), SIBLINGS.format(2, '2,6'),
+    SIBLINGS.format(6, '2,6'), SIBLINGS.format(3, '3,7'),
+    SIBLINGS.format(7, '3,7'), SIBLINGS.format(1, '1,5'),
+    '### hugepages',
+    HUGEPAGES.format(2048, 'nr', 512), HUGEPAGES.format(2048, 'free', 256),
+    NODE_HUGEPAGES.format(0, 2048, 'nr', 256),
+    NODE_HUGEPAGES.format(0, 2048, 'free', 0),
+    NODE_HUGEPAGES.format(1, 2048, 'nr', 256),
+    NODE_HUGEPAGES.format(1, 2048, 'free', 256),
+    '### meminfo',
+    '/sys/devices/system/node/node0/meminfo:Node 0 MemTotal:  4046756 kB',
+    '/sys/devices/system/node/node1/meminfo:Node 1 MemTotal:  4194304 kB',
+    '### domain instance-00000001',
+    DOMAIN,
+])
+
+
+def test_parse_cpus_list():
+    assert inspector.parse_cpus_list('1-3,6') == [1, 2, 3, 6]
+    assert inspector.parse_cpus_list('domain,4') == [4]
+
+
+def test_parse_sweep():
+    host = inspector.parse_sweep('node-1', SWEEP)
+    assert host.isolcpus == {2, 3, 6, 7}
+    assert host.numa_cpus == {0: [0, 1, 2, 4, 6], 1: [3, 5, 7]}
+    assert host.numa_memory == {0: 4046756.0, 1: 4194304.0}
+    assert host.hugepages == {2048: {'total': 512, 'free': 256}}
+    assert host.numa_hugepages[0] == {2048: {'total': 256, 'free': 0}}
+    assert inspector.thread_siblings_lists(host, 0) == [('2', '6')]
+    assert inspector.thread_siblings_lists(host, '1') == [('3', '7')]
+
+    domain = host.domains['instance-00000001']
+    assert domain.uuid == '1c2b7f1e-0000-0000-0000-000000000001'
+    assert domain.page_size == 2048
+    assert domain.vcpupins == {0: '2', 1: '6'}
+    assert domain.memnodes == [('0', '0')]
+    assert domain.numa_cells == {'0': 524288}
+
+
+def test_inspector_cache():
+    class Remote(object):
+        def __init__(self, node):
+            self.node = node
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def check_call(self, cmd):
+            self.node.sweeps += 1
+            return type('Result', (), {'stdout_string': SWEEP})
+
+    class Node(object):
+        sweeps = 0
+        data = {'fqdn': 'node-1'}
+
+        def ssh(self):
+            return Remote(self)
+
+    class Server(object):
+        status = 'ACTIVE'
+
+        def __init__(self, id):
+            self.id = id
+            setattr(self, 'OS-EXT-SRV-ATTR:host', 'node-1')
+            setattr(self, 'OS-EXT-SRV-ATTR:instance_name',
+                    'instance-00000001')
+
+    node = Node()
+    servers = []
+    nova = type('Nova', (), {})()
+    nova.servers = type('Servers', (), {})()
+    nova.servers.list = lambda search_opts: servers
+    env = type('Env', (), {'id': 1})()
+    env.os_conn = type('OsConn', (), {'nova': nova})()
+    env.get_nodes_by_role = lambda role: [node]
+
+    inspector_ = inspector.get_inspector(env)
+    inspector_.hosts()
+    inspector_.hosts()
+    assert node.sweeps == 1
+    servers.append(Server('uuid1'))
+    assert 'instance-00000001' in inspector_.host('node-1').domains
+    assert node.sweeps == 2
+    inspector_.invalidate()
+    inspector_.hosts()
+    assert node.sweeps == 3
+    # Other instance with the same name and state (after env revert)
+    servers[:] = [Server('uuid2')]
+    inspector_.hosts()
+    assert node.sweeps == 4
+
+    inspector.clear()
+    assert inspector.get_inspector(env) is not inspector_
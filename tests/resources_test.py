@@ -0,0 +1,117 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import pytest
+
+from mos_tests.functions import resources
+
+
+class Keypair(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class Keypairs(object):
+    def __init__(self):
+        self.keys = {}
+
+    def get(self, name):
+        if name not in self.keys:
+            raise Exception('NotFound')
+        return self.keys[name]
+
+
+class FakeNova(object):
+    def __init__(self):
+        self.keypairs = Keypairs()
+
+
+class FakeOsConn(object):
+    controller_ip = '10.0.0.2'
+    username = 'admin'
+
+    def __init__(self, tenant='admin', nova=None):
+        self.tenant = tenant
+        self.nova = nova or FakeNova()
+        self.created = []
+
+    def create_key(self, key_name):
+        key = self.nova.keypairs.keys[key_name] = Keypair(key_name)
+        self.created.append(key_name)
+        return key
+
+    def delete_key(self, key_name):
+        del self.nova.keypairs.keys[key_name]
+
+
+@pytest.fixture
+def factory():
+    return resources.ResourceFactory()
+
+
+def test_same_resource_is_shared(factory):
+    os_conn = FakeOsConn()
+    with factory.lease(os_conn, 'keypair') as key1:
+        # Other client of same user
+        with factory.lease(FakeOsConn(nova=os_conn.nova),
+                           'keypair') as key2:
+            assert key1 is key2
+            assert factory.refs(key1) == 2
+        assert factory.refs(key1) == 1
+    assert factory.refs(key1) == 0
+    # Resource is alive after last release
+    with factory.lease(os_conn, 'keypair') as key3:
+        assert key3 is key1
+    assert len(os_conn.created) == 1
+
+
+def test_different_owners(factory):
+    key1 = factory.acquire(FakeOsConn(), 'keypair')
+    key2 = factory.acquire(FakeOsConn(tenant='other'), 'keypair')
+    assert key1 is not key2
+    assert key1.name != key2.name
+
+
+def test_deleted_resource_is_recreated(factory):
+    os_conn = FakeOsConn()
+    key = factory.acquire(os_conn, 'keypair')
+    os_conn.delete_key(key.name)
+    assert factory.acquire(os_conn, 'keypair') is not key
+    assert len(os_conn.created) == 2
+
+
+def test_reset_and_cleanup(factory):
+    os_conn = FakeOsConn()
+    key = factory.acquire(os_conn, 'keypair', name='key1')
+    assert factory.is_shared('keypair', 'key1')
+    factory.reset()
+    assert not factory.is_shared('keypair', 'key1')
+    assert factory.acquire(os_conn, 'keypair', name='key1') is not key
+
+    factory.cleanup()
+    assert os_conn.nova.keypairs.keys == {}
+
+
+def test_reused_resource_is_not_deleted(factory, monkeypatch):
+    deleted = []
+    monkeypatch.setattr(resources.image_upload, 'import_image',
+                        lambda *args, **kwargs: (Keypair('image1'), False))
+    monkeypatch.setitem(resources.KINDS, 'image', (
+        resources.create_image, lambda os_conn, image: True,
+        lambda os_conn, image: deleted.append(image), lambda x: x.name))
+    image = factory.acquire(FakeOsConn(), 'image', url='http://image')
+    assert factory.is_shared('image', 'image1')
+    factory.cleanup()
+    assert deleted == []
+    assert not factory.is_shared('image', image.name)
@@ -0,0 +1,126 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from contextlib import contextmanager
+import threading
+import time
+
+import pytest
+from six import BytesIO
+
+from mos_tests.functions import service
+
+CONFIG = b'[DEFAULT]\ndebug = False\n'
+
+
+class FakeRemote(object):
+    restarts = []
+    lock = threading.Lock()
+
+    def __init__(self, host, broken=False, bad_restart=False):
+        self.host = host
+        self.broken = broken
+        self.bad_restart = bad_restart
+        self.files = {'/etc/nova/nova.conf': CONFIG}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    @contextmanager
+    def open(self, path, mode='r'):
+        if self.broken:
+            raise IOError('No such file')
+        f = BytesIO(self.files[path] if 'r' in mode else b'')
+        yield f
+        if 'w' in mode:
+            self.files[path] = f.getvalue()
+
+    def check_call(self, command, verbose=True):
+        start = time.time()
+        time.sleep(0.05)
+        with self.lock:
+            self.restarts.append((self.host, start, time.time()))
+        if self.bad_restart and self.files['/etc/nova/nova.conf'] != CONFIG:
+            raise Exception('Service is not started')
+
+
+@pytest.fixture
+def remotes():
+    FakeRemote.restarts = []
+    return [FakeRemote(x) for x in ('ctrl1', 'ctrl2', 'cmp1', 'cmp2')]
+
+
+def make_transaction(remotes):
+    transaction = service.ConfigTransaction()
+    for remote in remotes:
+        wave = remote.host if remote.host.startswith('ctrl') else 'compute'
+        transaction.add(remote, '/etc/nova/nova.conf',
+                        [('DEFAULT', 'debug', 'True')],
+                        restart_cmd='restart', wave=wave)
+    return transaction
+
+
+def test_transaction(remotes):
+    with make_transaction(remotes) as transaction:
+        assert transaction.changed
+        for remote in remotes:
+            assert b'debug = True' in remote.files['/etc/nova/nova.conf']
+        restarts = {host: (start, end)
+                    for host, start, end in FakeRemote.restarts}
+        # Controllers are restarted one by one, computes - together
+        assert restarts['ctrl1'][1] <= restarts['ctrl2'][0]
+        assert restarts['ctrl2'][1] <= restarts['cmp1'][0]
+        assert restarts['cmp1'][0] < restarts['cmp2'][1]
+        assert restarts['cmp2'][0] < restarts['cmp1'][1]
+
+    assert not transaction.changed
+    assert len(FakeRemote.restarts) == 8
+    for remote in remotes:
+        assert remote.files['/etc/nova/nova.conf'] == CONFIG
+
+
+def test_transaction_not_changed(remotes):
+    transaction = service.ConfigTransaction()
+    for remote in remotes:
+        transaction.add(remote, '/etc/nova/nova.conf',
+                        [('DEFAULT', 'debug', 'False')], restart_cmd='restart')
+    with transaction:
+        pass
+    assert FakeRemote.restarts == []
+
+
+def test_transaction_failed(remotes):
+    remotes[2].broken = True
+    transaction = make_transaction(remotes)
+    with pytest.raises(IOError):
+        transaction.apply()
+    assert not transaction.changed
+    assert FakeRemote.restarts == []
+    for remote in remotes[:2] + remotes[3:]:
+        assert remote.files['/etc/nova/nova.conf'] == CONFIG
+
+
+def test_transaction_restart_failed(remotes):
+    remotes[3].bad_restart = True
+    transaction = make_transaction(remotes)
+    with pytest.raises(Exception):
+        transaction.apply()
+    assert not transaction.changed
+    # 4 restarts with new configs and 4 with restored ones
+    assert len(FakeRemote.restarts) == 8
+    for remote in remotes:
+        assert remote.files['/etc/nova/nova.conf'] == CONFIG
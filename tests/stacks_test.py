@@ -0,0 +1,123 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from collections import namedtuple
+import threading
+
+import pytest
+
+from mos_tests.functions import stacks
+
+Stack = namedtuple('Stack', ['id', 'stack_name', 'stack_status',
+                             'stack_status_reason'])
+Event = namedtuple('Event', ['id', 'physical_resource_id', 'resource_name',
+                             'resource_status', 'event_time'])
+
+
+class NotFound(Exception):
+    code = 404
+
+
+class FakeHeat(object):
+    """Stacks scenarios: list of statuses, one per `get` call
+
+    Each status change of stack produces event of resource `server`.
+    """
+
+    def __init__(self, scenarios):
+        self.scenarios = scenarios
+        self.polls = {}
+        self.events_calls = []
+        self.deleted = set()
+        self.lock = threading.Lock()
+        self.stacks = self
+        self.events = self
+
+    def create(self, stack_name, **kwargs):
+        self.polls[stack_name] = 0
+        return {'stack': {'id': stack_name}}
+
+    def delete(self, stack_id):
+        if stack_id not in self.scenarios:
+            raise NotFound()
+        self.polls[stack_id] = 0
+        self.deleted.add(stack_id)
+
+    def update(self, stack_id, **kwargs):
+        self.polls[stack_id] = 0
+
+    def _statuses(self, stack_id):
+        steps = self.scenarios[stack_id]
+        return steps[:max(self.polls[stack_id], 1)]
+
+    def get(self, stack_id):
+        if stack_id not in self.scenarios:
+            raise NotFound()
+        with self.lock:
+            self.polls[stack_id] += 1
+        status = self._statuses(stack_id)[-1]
+        if status is None:
+            raise NotFound()
+        return Stack(stack_id, stack_id, status, 'reason')
+
+    def list(self, stack_id, sort_dir, marker=None):
+        self.events_calls.append((stack_id, marker))
+        events = [Event(i, 'server-id', 'server', status,
+                        '2016-01-01T00:00:{0:02d}Z'.format(i * 10))
+                  for i, status in enumerate(self._statuses(stack_id))
+                  if status is not None]
+        if marker is not None:
+            events = events[marker + 1:]
+        return events
+
+
+def test_create_stacks():
+    heat = FakeHeat({
+        'stack1': ['CREATE_IN_PROGRESS', 'CREATE_COMPLETE'],
+        'stack2': ['CREATE_IN_PROGRESS', 'CREATE_IN_PROGRESS',
+                   'CREATE_COMPLETE'],
+    })
+    create = [{'stack_name': 'stack1'}, {'stack_name': 'stack2'}]
+    tracker = stacks.create_stacks(heat, create, timeout=10, poll_interval=0)
+    assert sorted(tracker.ids) == ['stack1', 'stack2']
+    # Finished stacks are not polled anymore
+    assert heat.polls == {'stack1': 2, 'stack2': 3}
+    # Only new events are requested
+    assert ('stack2', 0) in heat.events_calls
+    assert ('stack2', 1) in heat.events_calls
+    timings = tracker.timings()
+    assert timings['stack1'][1] == {'server': (10, 'CREATE_COMPLETE')}
+    assert timings['stack2'][1] == {'server': (20, 'CREATE_COMPLETE')}
+
+
+def test_create_stacks_failed():
+    heat = FakeHeat({
+        'stack1': ['CREATE_IN_PROGRESS', 'CREATE_COMPLETE'],
+        'stack2': ['CREATE_IN_PROGRESS', 'CREATE_FAILED'],
+    })
+    with pytest.raises(stacks.StackError):
+        stacks.create_stacks(heat, [{'stack_name': 'stack1'},
+                                    {'stack_name': 'stack2'}],
+                             timeout=10, poll_interval=0)
+
+
+def test_delete_stacks():
+    heat = FakeHeat({
+        'stack1': ['DELETE_IN_PROGRESS', None],
+        'stack2': ['DELETE_IN_PROGRESS', 'DELETE_COMPLETE'],
+    })
+    tracker = stacks.delete_stacks(heat, ['stack1', 'stack2', 'absent'],
+                                   timeout=10, poll_interval=0)
+    assert heat.deleted == {'stack1', 'stack2'}
+    assert all(x.status == 'DELETE_COMPLETE' for x in tracker.stacks)
@@ -0,0 +1,146 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+import pytest
+
+from mos_tests.functions import volumes
+
+
+class Resource(object):
+    def __init__(self, resource_id, status, volume_id=None):
+        self.id = resource_id
+        self.status = status
+        self.volume_id = volume_id
+        self.attachments = []
+
+
+class Manager(object):
+    """Resources become ready on the second listing after request"""
+
+    def __init__(self, prefix, ready='available'):
+        self.prefix = prefix
+        self.ready = ready
+        self.resources = {}
+        self.lists = 0
+        self.lock = threading.Lock()
+        # id: listings left before transition, final status or None
+        self.transitions = {}
+
+    def create(self, volume_id=None, **kwargs):
+        with self.lock:
+            resource = Resource('{0}{1}'.format(self.prefix,
+                                                len(self.resources)),
+                                'creating', volume_id=volume_id)
+            self.resources[resource.id] = resource
+            self.transitions[resource.id] = [2, self.ready]
+        return resource
+
+    def delete(self, resource_id):
+        self.resources[resource_id].status = 'deleting'
+        self.transitions[resource_id] = [2, None]
+
+    def list(self):
+        self.lists += 1
+        for resource_id, transition in list(self.transitions.items()):
+            transition[0] -= 1
+            if transition[0] == 0:
+                del self.transitions[resource_id]
+                if transition[1] is None:
+                    del self.resources[resource_id]
+                else:
+                    self.resources[resource_id].status = transition[1]
+        return list(self.resources.values())
+
+
+class FakeCinder(object):
+    def __init__(self):
+        self.volumes = Manager('vol')
+        self.volume_snapshots = Manager('snap')
+        self.backups = Manager('backup')
+
+
+class FakeOsConn(object):
+    def __init__(self):
+        self.cinder = FakeCinder()
+
+
+def test_create_and_delete_volumes():
+    os_conn = FakeOsConn()
+    engine = volumes.VolumeEngine(os_conn, poll_interval=0)
+    created = engine.create_volumes([{'size': 1}] * 5)
+    assert sorted(x.id for x in created) == ['vol{0}'.format(i)
+                                             for i in range(5)]
+    assert all(x.status == 'available' for x in created)
+    # One listing per poll for all volumes
+    assert os_conn.cinder.volumes.lists == 2
+    engine.create_snapshots([{'volume_id': x.id} for x in created])
+    engine.delete_volumes(['vol0', 'vol1', 'vol2'])
+    assert sorted(os_conn.cinder.volumes.resources) == ['vol3', 'vol4']
+    # Ids are given in order of concurrent requests, check snapshots volumes
+    snapshots = os_conn.cinder.volume_snapshots.resources.values()
+    assert sorted(x.volume_id for x in snapshots) == ['vol3', 'vol4']
+    assert engine.stats['volume-create'].count == 5
+    assert engine.stats['volume-delete'].count == 3
+    assert 'cinder-snapshot-delete: 3 ops' in engine.report()
+
+
+def test_volumes_are_deleted_when_ready():
+    os_conn = FakeOsConn()
+    manager = os_conn.cinder.volumes
+    deleted = []
+
+    def delete(resource_id):
+        # Cinder rejects deletion of volumes in transitional statuses
+        assert manager.resources[resource_id].status in ('available',
+                                                         'error')
+        deleted.append(resource_id)
+        Manager.delete(manager, resource_id)
+
+    manager.delete = delete
+    engine = volumes.VolumeEngine(os_conn, poll_interval=0)
+    created = engine.create_volumes([{'size': 1}] * 2, wait=False)
+    manager.transitions['vol1'] = [3, 'error']
+    engine.delete_volumes(created)
+    assert sorted(deleted) == ['vol0', 'vol1']
+    assert manager.resources == {}
+
+
+def test_backups_of_one_volume_are_sequential():
+    os_conn = FakeOsConn()
+    engine = volumes.VolumeEngine(os_conn, poll_interval=0)
+    backups = engine.create_backups([{'volume_id': 'a'}, {'volume_id': 'a'},
+                                     {'volume_id': 'b'}])
+    assert len(backups) == 3
+    # Two waves: backups of `a` and `b`, then second backup of `a`
+    assert os_conn.cinder.backups.lists == 4
+
+
+def test_error_status():
+    os_conn = FakeOsConn()
+    engine = volumes.VolumeEngine(os_conn, poll_interval=0)
+    volume = engine.create_volumes([{'size': 1}], wait=False)[0]
+    os_conn.cinder.volumes.transitions[volume.id] = [1, 'error']
+    with pytest.raises(volumes.VolumeError):
+        engine.wait()
+
+
+def test_rate_limiter():
+    limiter = volumes.RateLimiter(50)
+    start = time.time()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.time() - start >= 0.1
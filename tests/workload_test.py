@@ -0,0 +1,103 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+from mos_tests.functions import workload
+
+VCPUINFO = """Domain: instance-00000001
+VCPU:           0
+CPU:            2
+State:          running
+CPU time:       12.3s
+CPU Affinity:   --y-----
+
+VCPU:           1
+CPU:            6
+State:          running
+Domain: instance-00000002
+"""
+
+
+def test_parse_guest_sample():
+    sample = workload.parse_guest_sample(
+        'cpu  100 0 50 800 10 0 5 35 0 0\n'
+        'pgfault 12000\n'
+        'pgmajfault 7\n')
+    assert sample == {'cpu_total': 1000, 'cpu_steal': 35,
+                      'pgfault': 12000, 'pgmajfault': 7}
+
+
+def test_series():
+    samples = [(10, {'cpu_total': 1000, 'cpu_steal': 0, 'pgfault': 100}),
+               (12, {'cpu_total': 1200, 'cpu_steal': 20, 'pgfault': 300}),
+               (13, {}),
+               (14, {'cpu_total': 1400, 'cpu_steal': 70, 'pgfault': 400})]
+    assert workload.steal_percents(samples) == [(12, 10.0)]
+    assert workload.rates(samples, 'pgfault') == [(12, 100.0)]
+
+
+def test_parse_vcpuinfo_list():
+    assert workload.parse_vcpuinfo_list(VCPUINFO) == {
+        'instance-00000001': {0: 2, 1: 6},
+        'instance-00000002': {}}
+
+
+def test_start_stop_commands():
+    command = workload.PROFILES['memory'].format(**workload.DEFAULTS)
+    assert workload.start_command('memory', command) == (
+        "setsid sh -c 'stress --vm-bytes 5M --vm-keep -m 1' <&- >/dev/null "
+        "2>&1 & echo $! > /tmp/workload_memory.pid")
+    assert 'kill -- -$(cat /tmp/workload_memory.pid)' in (
+        workload.stop_command('memory'))
+
+
+class FakeRemote(object):
+    lock = threading.Lock()
+
+    def __init__(self, host, connections):
+        self.host = host
+        self.connections = connections
+        with self.lock:
+            connections.append(host)
+        time.sleep(0.1)
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.closed = True
+
+
+def test_remotes_are_connected_in_parallel():
+    load = workload.Workload(None, None, [], concurrency=4)
+    connections = []
+    hosts = ['node-1', 'node-2', 'node-3', 'node-1']
+    start = time.time()
+    remotes = load._map(
+        lambda x: load._remote(x, lambda: FakeRemote(x, connections)),
+        hosts)
+    assert time.time() - start < 0.3
+    assert remotes[0] is remotes[3]
+    assert len(set(remotes)) == 3
+
+    load._drop_remote('node-2')
+    assert remotes[1].closed
+    remote = load._remote('node-2', lambda: FakeRemote('node-2', connections))
+    assert remote is not remotes[1]
+    assert connections.count('node-2') == 2
+    load.close()
+    assert all(x.closed for x in remotes)
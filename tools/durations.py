@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+#
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests durations history
+
+Durations are stored by `plugins.durations` pytest plugin (or imported from
+junit xml report) to SQLite database. Tests are identified by testrail_id
+(or by test name if test has no testrail_id) and environment profile.
+
+Usage:
+    durations.py report [--profile PROFILE] [--db DB]
+    durations.py trend TEST [--profile PROFILE] [--db DB]
+    durations.py regressions [--factor 2] [--label LABEL]
+                             [--base-label LABEL] [--profile PROFILE]
+    durations.py import report.xml --profile PROFILE [--label LABEL]
+"""
+
+from __future__ import print_function
+
+from collections import defaultdict
+import math
+import optparse
+import re
+import sqlite3
+import sys
+import time
+from xml.etree import ElementTree
+
+DEFAULT_DB = 'durations.sqlite'
+
+TESTRAIL_ID_RE = re.compile(r'\[\((\w+)\)\]$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    profile TEXT NOT NULL,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS durations (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test TEXT NOT NULL,
+    testrail_id TEXT,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    duration REAL NOT NULL,
+    outcome TEXT
+);
+CREATE INDEX IF NOT EXISTS durations_run ON durations (run_id);
+CREATE INDEX IF NOT EXISTS durations_key ON durations (testrail_id, test);
+"""
+
+# Test phases, which sum is a test duration
+PHASES = ('setup', 'call', 'teardown')
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of values list"""
+    if not values:
+        return None
+    values = sorted(values)
+    index = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[min(max(index, 0), len(values) - 1)]
+
+
+def get_testrail_id(name):
+    """Extract testrail_id from test name suffix ('test_a[(12345)]')"""
+    match = TESTRAIL_ID_RE.search(name)
+    if match:
+        return match.group(1)
+
+
+class DurationsDB(object):
+    """SQLite storage of tests and fixtures durations"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def start_run(self, profile, label=None, started=None):
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO runs (started, profile, label) VALUES (?, ?, ?)',
+                (started or time.time(), profile, label))
+        return cursor.lastrowid
+
+    def add_durations(self, run_id, records):
+        """Store durations
+
+        :param records: iterable of tuples
+            (test, testrail_id, kind, name, duration, outcome)
+        """
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO durations (run_id, test, testrail_id, kind, '
+                'name, duration, outcome) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(run_id,) + tuple(x) for x in records])
+
+    def test_durations(self, profile=None, label=None, passed_only=True):
+        """Returns tests durations for each run
+
+        :return: dict {test key: [(run started, label, duration), ...]}
+            sorted by run start time
+        """
+        query = ("SELECT COALESCE(d.testrail_id, d.test), r.started, "
+                 "r.label, SUM(d.duration), "
+                 "SUM(d.outcome NOT IN ('passed', 'skipped')) "
+                 "FROM durations d JOIN runs r ON d.run_id = r.id "
+                 "WHERE d.kind IN ({0})".format(
+                     ', '.join('?' * len(PHASES))))
+        params = list(PHASES)
+        if profile is not None:
+            query += ' AND r.profile = ?'
+            params.append(profile)
+        if label is not None:
+            query += ' AND r.label = ?'
+            params.append(label)
+        query += (' GROUP BY r.id, COALESCE(d.testrail_id, d.test) '
+                  'ORDER BY r.started')
+        result = defaultdict(list)
+        for key, started, run_label, duration, failures in self.conn.execute(
+                query, params):
+            if passed_only and failures:
+                continue
+            result[key].append((started, run_label, duration))
+        return result
+
+    def fixture_durations(self, profile=None):
+        """Returns {fixture name: [duration, ...]}"""
+        query = ("SELECT d.name, d.duration FROM durations d "
+                 "JOIN runs r ON d.run_id = r.id WHERE d.kind = 'fixture'")
+        params = []
+        if profile is not None:
+            query += ' AND r.profile = ?'
+            params.append(profile)
+        result = defaultdict(list)
+        for name, duration in self.conn.execute(query, params):
+            result[name].append(duration)
+        return result
+
+    def expected_durations(self, profile=None, runs=5):
+        """Returns {test key: median duration of last `runs` runs}"""
+        return {key: percentile([x[2] for x in values[-runs:]], 50)
+                for key, values in self.test_durations(profile).items()}
+
+    def regressions(self, profile=None, factor=2.0, min_delta=30,
+                    label=None, base_label=None):
+        """Find tests, which become slower
+
+        Last run duration (or median for `label` runs) is compared with
+        median of previous runs (or of `base_label` runs).
+
+        :return: list of tuples (test key, base duration, new duration)
+        """
+        if label is not None:
+            new = self.test_durations(profile, label=label)
+            base = self.test_durations(profile, label=base_label)
+        else:
+            base = self.test_durations(profile, label=base_label)
+            new = {k: v[-1:] for k, v in base.items()}
+            base = {k: v[:-1] for k, v in base.items()}
+        result = []
+        for key, values in new.items():
+            base_values = [x[2] for x in base.get(key, [])
+                           if label is None or x[1] != label]
+            if not values or not base_values:
+                continue
+            base_duration = percentile(base_values, 50)
+            new_duration = percentile([x[2] for x in values], 50)
+            if (new_duration >= base_duration * factor and
+                    new_duration - base_duration >= min_delta):
+                result.append((key, base_duration, new_duration))
+        return sorted(result, key=lambda x: x[2] - x[1], reverse=True)
+
+    def import_junit(self, path, profile, label=None):
+        """Import tests durations from junit xml report
+
+        Tests are stored with `call` kind (junit report has no phases).
+        """
+        tree = ElementTree.parse(path)
+        records = []
+        for case in tree.iter('testcase'):
+            name = case.get('name')
+            test = '{0}::{1}'.format(case.get('classname'), name)
+            testrail_id = get_testrail_id(name)
+            for prop in case.iter('property'):
+                if prop.get('name') == 'testrail_id':
+                    testrail_id = prop.get('value')
+            outcome = 'passed'
+            for tag in ('failure', 'error', 'skipped'):
+                if case.find(tag) is not None:
+                    outcome = 'skipped' if tag == 'skipped' else 'failed'
+            records.append((test, testrail_id, 'call', '',
+                            float(case.get('time', 0)), outcome))
+        run_id = self.start_run(profile, label)
+        self.add_durations(run_id, records)
+        return len(records)
+
+
+def print_report(db, profile):
+    print('{0:>8} {1:>8} {2:>8} {3:>8} {4:>5}  {5}'.format(
+        'p50', 'p90', 'max', 'last', 'runs', 'test'))
+    data = db.test_durations(profile)
+    rows = []
+    for key, values in data.items():
+        durations = [x[2] for x in values]
+        rows.append((percentile(durations, 50), percentile(durations, 90),
+                     max(durations), durations[-1], len(durations), key))
+    for row in sorted(rows, reverse=True):
+        print('{0:8.1f} {1:8.1f} {2:8.1f} {3:8.1f} {4:5}  {5}'.format(*row))
+    print('')
+    print('{0:>8} {1:>8} {2:>5}  {3}'.format('p50', 'p90', 'count',
+                                             'fixture'))
+    fixtures = db.fixture_durations(profile)
+    rows = [(percentile(v, 50), percentile(v, 90), len(v), k)
+            for k, v in fixtures.items()]
+    for row in sorted(rows, reverse=True):
+        print('{0:8.1f} {1:8.1f} {2:5}  {3}'.format(*row))
+
+
+def print_trend(db, profile, test):
+    for started, label, duration in db.test_durations(profile).get(test, []):
+        print('{0}  {1:20}  {2:8.1f}'.format(
+            time.strftime('%Y-%m-%d %H:%M', time.localtime(started)),
+            label or '', duration))
+
+
+def print_regressions(db, profile, factor, min_delta, label, base_label):
+    regressions = db.regressions(profile, factor=factor, min_delta=min_delta,
+                                 label=label, base_label=base_label)
+    for key, base_duration, new_duration in regressions:
+        print('{0:8.1f} -> {1:8.1f} (x{2:.1f})  {3}'.format(
+            base_duration, new_duration, new_duration / base_duration, key))
+    return regressions
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage=__doc__.split('Usage:')[-1].rstrip(),
+        description='Report tests durations history and regressions')
+    parser.add_option('--db', default=DEFAULT_DB,
+                      help='Path to SQLite database with durations')
+    parser.add_option('-p', '--profile', help='Environment profile name')
+    parser.add_option('-l', '--label',
+                      help='Runs label (MOS version, for example) to check '
+                           'for regressions or to assign on import')
+    parser.add_option('-b', '--base-label',
+                      help='Runs label to compare with')
+    parser.add_option('-f', '--factor', type=float, default=2.0,
+                      help='Duration increase factor to treat as regression')
+    parser.add_option('-d', '--min-delta', type=float, default=30,
+                      help='Minimal duration increase (in seconds) to treat '
+                           'as regression')
+
+    (options, args) = parser.parse_args()
+    if not args:
+        parser.error('Command is required')
+    command, args = args[0], args[1:]
+
+    db = DurationsDB(options.db)
+    try:
+        if command == 'report':
+            print_report(db, options.profile)
+        elif command == 'trend' and len(args) == 1:
+            print_trend(db, options.profile, args[0])
+        elif command == 'regressions':
+            if print_regressions(db, options.profile, options.factor,
+                                 options.min_delta, options.label,
+                                 options.base_label):
+                return 1
+        elif command == 'import' and len(args) == 1:
+            if options.profile is None:
+                parser.error('--profile is required for import')
+            count = db.import_junit(args[0], options.profile, options.label)
+            print('{0} tests imported'.format(count))
+        else:
+            parser.error('Unknown command or wrong arguments')
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())